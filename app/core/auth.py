@@ -26,6 +26,18 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def password_needs_rehash(hashed_password: str) -> bool:
+    """
+    Indica se o hash foi gerado com parâmetros diferentes dos atuais
+    (ex.: BCRYPT_ROUNDS alterado) e deve ser regravado no próximo login
+    """
+    try:
+        return pwd_context.needs_update(hashed_password)
+    except (ValueError, TypeError):
+        # Hash malformado/desconhecido: não há como regravar sem a senha válida
+        return False
+
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None) -> str:
     """
     Cria token JWT com dados fornecidos
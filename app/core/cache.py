@@ -0,0 +1,102 @@
+"""
+Cache em memória com expiração (TTL) e despejo LRU
+===================================================
+
+Estrutura compartilhada pelos caches de processo do Sentinela.
+Thread-safe: pode ser usada tanto no event loop quanto em threads
+do threadpool do Starlette ou em workers Celery.
+
+Repositório: adrisa007/sentinela (ID: 1112237272)
+"""
+from collections import OrderedDict
+from typing import Any, Callable, Hashable, Optional
+import threading
+import time
+
+
+class TTLLRUCache:
+    """
+    Cache chave/valor limitado por tamanho (LRU) e por tempo de vida (TTL)
+
+    Attributes:
+        maxsize: Número máximo de entradas mantidas
+        ttl: Tempo de vida de cada entrada em segundos
+        hits: Total de leituras encontradas no cache
+        misses: Total de leituras não encontradas (ou expiradas)
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 60.0, timer: Callable[[], float] = time.monotonic):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._timer = timer
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """Retorna o valor da chave, ou `default` se ausente/expirada"""
+        now = self._timer()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return default
+            expires_at, value = item
+            if expires_at <= now:
+                del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """Armazena o valor, despejando a entrada menos recente se necessário"""
+        expires_at = self._timer() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        """Remove a chave e retorna seu valor (ignorando expiração)"""
+        with self._lock:
+            item = self._data.pop(key, None)
+        return default if item is None else item[1]
+
+    def discard_where(self, predicate: Callable[[Hashable, Any], bool]) -> int:
+        """
+        Remove todas as entradas para as quais `predicate(chave, valor)` é verdadeiro
+
+        Returns:
+            int: Quantidade de entradas removidas
+        """
+        with self._lock:
+            keys = [k for k, (_, v) in self._data.items() if predicate(k, v)]
+            for k in keys:
+                del self._data[k]
+        return len(keys)
+
+    def clear(self) -> None:
+        """Esvazia o cache e zera os contadores"""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        """Estatísticas de uso do cache"""
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "ttl": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0,
+        }
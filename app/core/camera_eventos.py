@@ -0,0 +1,311 @@
+"""
+Câmeras: histórico de eventos e rollups
+=======================================
+
+Eventos (movimento, offline, violação...) são gravados em
+`cameras_eventos`, só com INSERT em lote. No PostgreSQL a tabela é
+particionada por mês (partições criadas com CAMERAS_EVENTOS_PARTICOES_FUTURAS
+meses de antecedência; uma partição DEFAULT recebe o que cair fora) e
+indexada por BRIN em `ocorrido_em`.
+
+O Celery consolida o histórico em `cameras_eventos_rollup`:
+- HORA: contagem por câmera/tipo/hora, reprocessando as últimas
+  CAMERAS_EVENTOS_REPROCESSAR_HORAS horas a cada ciclo (eventos atrasados)
+- DIA: soma das horas de cada dia tocado pelo ciclo
+
+A série consultada escolhe a fonte pelo intervalo pedido (ver
+`escolher_granularidade`): intervalos curtos agregam o histórico bruto
+por minuto; semanas leem rollups por hora e meses, por dia. O trecho
+mais recente, que o Celery ainda pode não ter consolidado, sempre vem
+do histórico bruto.
+
+Repositório: adrisa007/sentinela (ID: 1112237272)
+"""
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+import logging
+
+from sqlalchemy import delete, event, func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.models import CameraEvento, CameraEventoRollup, GranularidadeRollup, TipoEventoCamera
+from app.core.pagination import keyset_page
+
+logger = logging.getLogger(__name__)
+
+# Linhas por comando de INSERT (executemany)
+INSERT_CHUNK = 1000
+
+# Granularidade da série → unidade do date_trunc
+UNIDADES = {"MINUTO": "minute", "HORA": "hour", "DIA": "day"}
+
+_FORMATOS_SQLITE = {
+    "minute": "%Y-%m-%d %H:%M:00",
+    "hour": "%Y-%m-%d %H:00:00",
+    "day": "%Y-%m-%d 00:00:00",
+}
+
+
+def _utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def _como_utc(value: Any) -> datetime:
+    """Valor de período vindo do banco (datetime, ou texto no SQLite) em UTC"""
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    return _utc(value)
+
+
+def alinhar(value: datetime, granularidade: str) -> datetime:
+    """Início do minuto/hora/dia (UTC) que contém `value`"""
+    value = _utc(value).replace(second=0, microsecond=0)
+    if granularidade in ("HORA", "DIA"):
+        value = value.replace(minute=0)
+    if granularidade == "DIA":
+        value = value.replace(hour=0)
+    return value
+
+
+def truncar(coluna, unidade: str, dialect: str):
+    """Expressão SQL que trunca um timestamp em minute/hour/day (UTC)"""
+    if dialect == "postgresql":
+        return func.date_trunc(unidade, func.timezone("UTC", coluna))
+    return func.strftime(_FORMATOS_SQLITE[unidade], coluna)
+
+
+# ============ Gravação ============
+
+def registrar_eventos(connection, rows: List[dict]) -> int:
+    """INSERT em lote no histórico (colunas: entidade_id, camera_id, tipo, ocorrido_em, dados)"""
+    for inicio in range(0, len(rows), INSERT_CHUNK):
+        connection.execute(insert(CameraEvento), rows[inicio:inicio + INSERT_CHUNK])
+    return len(rows)
+
+
+# ============ Partições (PostgreSQL) ============
+
+def _proximo_mes(dia: date) -> date:
+    return date(dia.year + dia.month // 12, dia.month % 12 + 1, 1)
+
+
+def garantir_particoes(connection, referencia: Optional[date] = None, meses: Optional[int] = None) -> List[str]:
+    """
+    Cria as partições mensais do mês de `referencia` e dos `meses` seguintes
+
+    Idempotente (CREATE TABLE IF NOT EXISTS); sem efeito fora do PostgreSQL.
+
+    Returns:
+        list: nomes das partições garantidas
+    """
+    if connection.dialect.name != "postgresql":
+        return []
+    meses = settings.CAMERAS_EVENTOS_PARTICOES_FUTURAS if meses is None else meses
+    inicio = (referencia or datetime.now(timezone.utc).date()).replace(day=1)
+    nomes = []
+    for _ in range(meses + 1):
+        fim = _proximo_mes(inicio)
+        nome = f"cameras_eventos_{inicio:%Y_%m}"
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {nome} PARTITION OF cameras_eventos "
+            f"FOR VALUES FROM ('{inicio.isoformat()} 00:00:00+00') TO ('{fim.isoformat()} 00:00:00+00')"
+        ))
+        nomes.append(nome)
+        inicio = fim
+    return nomes
+
+
+@event.listens_for(CameraEvento.__table__, "after_create")
+def _particoes_iniciais(target, connection, **kw):
+    garantir_particoes(connection)
+
+
+def run_particoes() -> Dict[str, Any]:
+    """Ponto de entrada síncrono (Celery)"""
+    from app.core.database import engine
+
+    with engine.begin() as connection:
+        nomes = garantir_particoes(connection)
+    return {"particoes": nomes}
+
+
+# ============ Rollups ============
+
+def _substituir(db: Session, granularidade: GranularidadeRollup, inicio: datetime, fim: datetime, rows: List[dict]) -> None:
+    db.execute(delete(CameraEventoRollup).where(
+        CameraEventoRollup.granularidade == granularidade,
+        CameraEventoRollup.periodo >= inicio,
+        CameraEventoRollup.periodo < fim,
+    ).execution_options(synchronize_session=False))
+    for i in range(0, len(rows), INSERT_CHUNK):
+        db.execute(insert(CameraEventoRollup), rows[i:i + INSERT_CHUNK])
+
+
+def consolidar_eventos(db: Session, desde: datetime, ate: datetime) -> Dict[str, int]:
+    """
+    Recalcula os rollups das horas completas em [desde, ate) e dos dias que elas tocam
+
+    Os períodos são substituídos (DELETE + INSERT), então reprocessar uma
+    janela é idempotente e incorpora eventos que chegaram atrasados.
+    """
+    inicio, fim = alinhar(desde, "HORA"), alinhar(ate, "HORA")
+    if fim <= inicio:
+        return {"horas": 0, "dias": 0}
+    dialect = db.get_bind().dialect.name
+
+    hora = truncar(CameraEvento.ocorrido_em, "hour", dialect)
+    por_hora = db.execute(
+        select(CameraEvento.camera_id, CameraEvento.entidade_id, CameraEvento.tipo, hora, func.count())
+        .where(CameraEvento.ocorrido_em >= inicio, CameraEvento.ocorrido_em < fim)
+        .group_by(CameraEvento.camera_id, CameraEvento.entidade_id, CameraEvento.tipo, hora)
+    ).all()
+    _substituir(db, GranularidadeRollup.HORA, inicio, fim, [
+        {"granularidade": GranularidadeRollup.HORA, "camera_id": camera_id, "entidade_id": entidade_id,
+         "tipo": tipo, "periodo": _como_utc(periodo), "total": total}
+        for camera_id, entidade_id, tipo, periodo, total in por_hora
+    ])
+
+    dia_inicio = alinhar(inicio, "DIA")
+    dia_fim = alinhar(fim - timedelta(microseconds=1), "DIA") + timedelta(days=1)
+    dia = truncar(CameraEventoRollup.periodo, "day", dialect)
+    por_dia = db.execute(
+        select(CameraEventoRollup.camera_id, CameraEventoRollup.entidade_id, CameraEventoRollup.tipo,
+               dia, func.sum(CameraEventoRollup.total))
+        .where(
+            CameraEventoRollup.granularidade == GranularidadeRollup.HORA,
+            CameraEventoRollup.periodo >= dia_inicio,
+            CameraEventoRollup.periodo < dia_fim,
+        )
+        .group_by(CameraEventoRollup.camera_id, CameraEventoRollup.entidade_id, CameraEventoRollup.tipo, dia)
+    ).all()
+    _substituir(db, GranularidadeRollup.DIA, dia_inicio, dia_fim, [
+        {"granularidade": GranularidadeRollup.DIA, "camera_id": camera_id, "entidade_id": entidade_id,
+         "tipo": tipo, "periodo": _como_utc(periodo), "total": int(total)}
+        for camera_id, entidade_id, tipo, periodo, total in por_dia
+    ])
+
+    db.commit()
+    logger.info(f"📊 Rollups de eventos: {len(por_hora)} linha(s) por hora, {len(por_dia)} por dia")
+    return {"horas": len(por_hora), "dias": len(por_dia)}
+
+
+def run_consolidacao(agora: Optional[datetime] = None) -> Dict[str, int]:
+    """Ponto de entrada síncrono (Celery): reprocessa as horas recentes"""
+    from app.core.database import SessionLocal
+
+    agora = agora or datetime.now(timezone.utc)
+    db = SessionLocal()
+    try:
+        return consolidar_eventos(db, agora - timedelta(hours=settings.CAMERAS_EVENTOS_REPROCESSAR_HORAS), agora)
+    finally:
+        db.close()
+
+
+# ============ Consulta ============
+
+def escolher_granularidade(inicio: datetime, fim: datetime) -> str:
+    """MINUTO (histórico bruto), HORA ou DIA (rollups) conforme a duração do intervalo"""
+    duracao = fim - inicio
+    if duracao <= timedelta(hours=settings.CAMERAS_EVENTOS_BRUTO_MAX_HORAS):
+        return "MINUTO"
+    if duracao <= timedelta(days=settings.CAMERAS_EVENTOS_HORA_MAX_DIAS):
+        return "HORA"
+    return "DIA"
+
+
+def corte_rollup(granularidade: str, agora: Optional[datetime] = None) -> datetime:
+    """
+    Início do primeiro período que o Celery pode ainda não ter consolidado
+
+    O ciclo roda de hora em hora no minuto CAMERAS_EVENTOS_ROLLUP_MINUTE e
+    consolida as horas completas; tudo antes do corte já está nos rollups.
+    """
+    agora = agora or datetime.now(timezone.utc)
+    atraso = timedelta(hours=1, minutes=settings.CAMERAS_EVENTOS_ROLLUP_MINUTE)
+    return alinhar(agora - atraso, granularidade)
+
+
+def _filtros(model, entidade_id: int, camera_id: Optional[int], tipos: Optional[List[TipoEventoCamera]]) -> list:
+    filtros = [model.entidade_id == entidade_id]
+    if camera_id is not None:
+        filtros.append(model.camera_id == camera_id)
+    if tipos:
+        filtros.append(model.tipo.in_(tipos))
+    return filtros
+
+
+async def serie_eventos(
+    db: AsyncSession,
+    entidade_id: int,
+    inicio: datetime,
+    fim: datetime,
+    camera_id: Optional[int] = None,
+    tipos: Optional[List[TipoEventoCamera]] = None,
+    agora: Optional[datetime] = None,
+) -> Tuple[str, List[Dict[str, Any]]]:
+    """
+    Contagem de eventos por período e tipo em [inicio, fim)
+
+    Returns:
+        (granularidade, pontos): pontos `{periodo, tipo, total}` ordenados,
+        somados entre as câmeras da entidade (ou de uma câmera)
+    """
+    inicio, fim = _utc(inicio), _utc(fim)
+    granularidade = escolher_granularidade(inicio, fim)
+    unidade = UNIDADES[granularidade]
+    inicio = alinhar(inicio, granularidade)
+    dialect = db.get_bind().dialect.name
+
+    corte = inicio
+    if granularidade != "MINUTO":
+        corte = min(max(corte_rollup(granularidade, agora), inicio), fim)
+
+    totais: Dict[Tuple[datetime, TipoEventoCamera], int] = defaultdict(int)
+    if corte > inicio:
+        R = CameraEventoRollup
+        rows = await db.execute(
+            select(R.periodo, R.tipo, func.sum(R.total))
+            .where(R.granularidade == GranularidadeRollup(granularidade), R.periodo >= inicio, R.periodo < corte,
+                   *_filtros(R, entidade_id, camera_id, tipos))
+            .group_by(R.periodo, R.tipo)
+        )
+        for periodo, tipo, total in rows:
+            totais[(_como_utc(periodo), tipo)] += int(total)
+    if fim > corte:
+        periodo = truncar(CameraEvento.ocorrido_em, unidade, dialect)
+        rows = await db.execute(
+            select(periodo, CameraEvento.tipo, func.count())
+            .where(CameraEvento.ocorrido_em >= corte, CameraEvento.ocorrido_em < fim,
+                   *_filtros(CameraEvento, entidade_id, camera_id, tipos))
+            .group_by(periodo, CameraEvento.tipo)
+        )
+        for periodo, tipo, total in rows:
+            totais[(_como_utc(periodo), tipo)] += total
+
+    pontos = [
+        {"periodo": periodo, "tipo": tipo, "total": total}
+        for (periodo, tipo), total in sorted(totais.items(), key=lambda item: (item[0][0], item[0][1].value))
+    ]
+    return granularidade, pontos
+
+
+async def listar_eventos(
+    db: AsyncSession,
+    entidade_id: int,
+    inicio: datetime,
+    fim: datetime,
+    camera_id: Optional[int] = None,
+    tipos: Optional[List[TipoEventoCamera]] = None,
+    apos: Optional[Tuple[datetime, int]] = None,
+    limit: int = 100,
+) -> List[CameraEvento]:
+    """Eventos brutos em [inicio, fim), mais recentes primeiro (keyset em (ocorrido_em, id))"""
+    stmt = select(CameraEvento).where(
+        CameraEvento.ocorrido_em >= _utc(inicio), CameraEvento.ocorrido_em < _utc(fim),
+        *_filtros(CameraEvento, entidade_id, camera_id, tipos),
+    )
+    stmt = keyset_page(stmt, [CameraEvento.ocorrido_em, CameraEvento.id], after=apos, descending=True, limit=limit)
+    return list((await db.execute(stmt)).scalars())
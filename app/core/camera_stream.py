@@ -0,0 +1,318 @@
+"""
+Câmeras: stream de mudanças de status (SSE)
+===========================================
+
+GET /cameras/stream mantém uma conexão Server-Sent Events por cliente e
+envia só as mudanças de status das câmeras da entidade, em vez de cada
+dashboard consultar a lista inteira a cada poucos segundos.
+
+Fluxo:
+1. POST /cameras/heartbeats detecta as câmeras cujo status mudou
+   (EstadoCameras.gravar) e as publica no canal Redis
+   `cameras:status:{entidade_id}`
+2. Cada worker mantém UMA assinatura pub/sub (padrão `cameras:status:*`)
+   e distribui cada mensagem às conexões locais daquela entidade
+3. Cada conexão tem uma fila limitada (CAMERAS_STREAM_FILA): um cliente
+   lento perde as mensagens mais antigas, nunca atrasa os demais, e
+   recebe um evento `overflow` para recarregar a lista
+4. Câmeras que param de reportar não geram heartbeat: a varredura
+   (CAMERAS_VARREDURA_INTERVAL) marca OFFLINE as que passaram de
+   CAMERAS_OFFLINE_APOS e publica a transição
+
+Sem Redis (CAMERAS_ESTADO_BACKEND=memory, ou se a publicação falhar) as
+mudanças são entregues só às conexões do próprio processo.
+
+Repositório: adrisa007/sentinela (ID: 1112237272)
+"""
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+import asyncio
+import json
+import logging
+
+from app.core.cameras import EstadoCameras, Heartbeat, estado_cameras
+from app.core.config import settings
+from app.core.models import StatusCamera
+
+logger = logging.getLogger(__name__)
+
+CHANNEL_PREFIX = "cameras:status"
+
+
+class StreamIndisponivel(RuntimeError):
+    """Limite de conexões simultâneas do worker atingido"""
+
+
+def mensagem_mudanca(anterior: Optional[StatusCamera], hb: Heartbeat) -> str:
+    """Payload JSON de uma mudança de status"""
+    return json.dumps({
+        "camera_id": hb.camera_id,
+        "status": hb.status.value,
+        "anterior": anterior.value if anterior else None,
+        "visto_em": hb.visto_em.isoformat(),
+        "ip": hb.ip,
+        "firmware": hb.firmware,
+    }, separators=(",", ":"))
+
+
+class FilaConexao:
+    """
+    Fila limitada de uma conexão; cheia, descarta a mensagem mais antiga
+
+    `put` nunca bloqueia: a distribuição para milhares de conexões é um
+    laço de appends, independente da velocidade de cada cliente.
+    """
+
+    def __init__(self, maxlen: int):
+        self.mensagens: deque = deque(maxlen=maxlen)
+        self.descartadas = 0
+        self._evento = asyncio.Event()
+
+    def put(self, mensagem: str) -> None:
+        if len(self.mensagens) == self.mensagens.maxlen:
+            self.descartadas += 1
+        self.mensagens.append(mensagem)
+        self._evento.set()
+
+    async def proximas(self, timeout: float) -> Tuple[List[str], int]:
+        """
+        Espera mensagens por até `timeout` segundos
+
+        Returns:
+            (mensagens, descartadas desde a última leitura); ([], 0) no timeout
+        """
+        if not self.mensagens:
+            self._evento.clear()
+            try:
+                await asyncio.wait_for(self._evento.wait(), timeout)
+            except asyncio.TimeoutError:
+                return [], 0
+        mensagens = list(self.mensagens)
+        self.mensagens.clear()
+        descartadas, self.descartadas = self.descartadas, 0
+        return mensagens, descartadas
+
+
+class StreamCameras:
+    """
+    Distribui mudanças de status às conexões SSE do worker
+
+    Attributes:
+        redis: Cliente redis.asyncio (None = entrega só no processo)
+        fila: Tamanho da fila de cada conexão
+        max_conexoes: Conexões simultâneas por worker
+    """
+
+    def __init__(self, redis=None, fila: int = 100, max_conexoes: int = 5000):
+        self.redis = redis
+        self.fila = fila
+        self.max_conexoes = max_conexoes
+        self.conexoes: Dict[int, Set[FilaConexao]] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.stats_ = {"publicadas": 0, "entregues": 0, "descartadas": 0, "erros": 0}
+
+    @staticmethod
+    def make_channel(entidade_id: int) -> str:
+        return f"{CHANNEL_PREFIX}:{entidade_id}"
+
+    def total_conexoes(self) -> int:
+        return sum(len(filas) for filas in self.conexoes.values())
+
+    @asynccontextmanager
+    async def assinar(self, entidade_id: int) -> AsyncIterator[FilaConexao]:
+        """Registra uma conexão da entidade enquanto o contexto estiver aberto"""
+        if self.total_conexoes() >= self.max_conexoes:
+            raise StreamIndisponivel(f"Limite de {self.max_conexoes} conexões atingido")
+        fila = FilaConexao(self.fila)
+        self.conexoes.setdefault(entidade_id, set()).add(fila)
+        try:
+            yield fila
+        finally:
+            filas = self.conexoes.get(entidade_id)
+            if filas is not None:
+                filas.discard(fila)
+                if not filas:
+                    del self.conexoes[entidade_id]
+            self.stats_["descartadas"] += fila.descartadas
+
+    def distribuir(self, entidade_id: int, mensagens: Iterable[str]) -> int:
+        """Entrega mensagens a todas as conexões locais da entidade"""
+        filas = self.conexoes.get(entidade_id)
+        if not filas:
+            return 0
+        mensagens = list(mensagens)
+        for fila in filas:
+            for mensagem in mensagens:
+                fila.put(mensagem)
+        entregues = len(filas) * len(mensagens)
+        self.stats_["entregues"] += entregues
+        return entregues
+
+    async def publicar(self, mudancas: Iterable[Tuple[Optional[StatusCamera], Heartbeat]]) -> int:
+        """Publica mudanças de status (um pipeline por chamada no Redis)"""
+        por_entidade: Dict[int, List[str]] = {}
+        for anterior, hb in mudancas:
+            por_entidade.setdefault(hb.entidade_id, []).append(mensagem_mudanca(anterior, hb))
+        if not por_entidade:
+            return 0
+        total = sum(len(m) for m in por_entidade.values())
+        self.stats_["publicadas"] += total
+
+        if self.redis is None:
+            for entidade_id, mensagens in por_entidade.items():
+                self.distribuir(entidade_id, mensagens)
+            return total
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for entidade_id, mensagens in por_entidade.items():
+                    for mensagem in mensagens:
+                        pipe.publish(self.make_channel(entidade_id), mensagem)
+                await pipe.execute()
+        except Exception as e:
+            self.stats_["erros"] += 1
+            logger.warning(f"⚠️ Stream de câmeras: falha ao publicar ({e}); entregando só no processo")
+            for entidade_id, mensagens in por_entidade.items():
+                self.distribuir(entidade_id, mensagens)
+        return total
+
+    async def _ouvir(self) -> None:
+        """Lê o pub/sub do worker e distribui; reconecta após falhas"""
+        while True:
+            pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.psubscribe(f"{CHANNEL_PREFIX}:*")
+                while True:
+                    message = await pubsub.get_message(timeout=1.0)
+                    if message is None:
+                        continue
+                    entidade_id = int(message["channel"].rsplit(":", 1)[1])
+                    self.distribuir(entidade_id, [message["data"]])
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats_["erros"] += 1
+                logger.warning(f"⚠️ Stream de câmeras: pub/sub interrompido ({e}); reconectando")
+                await asyncio.sleep(1.0)
+            finally:
+                await pubsub.aclose()
+
+    async def start(self) -> None:
+        """Inicia a assinatura pub/sub do worker (lifespan da aplicação)"""
+        if self.redis is not None and self._task is None:
+            self._task = asyncio.create_task(self._ouvir())
+
+    async def aclose(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self.redis is not None:
+            redis, self.redis = self.redis, None
+            await redis.aclose()
+
+    def stats(self) -> dict:
+        return {**self.stats_, "conexoes": self.total_conexoes(), "entidades": len(self.conexoes)}
+
+
+class VarreduraOffline:
+    """
+    Publica no stream as transições para OFFLINE por falta de heartbeat
+
+    Roda em cada worker; com Redis, uma trava por intervalo deixa uma única
+    varredura entre os workers, e o compare-and-set de
+    EstadoCameras.marcar_offline impede transições publicadas duas vezes.
+
+    Attributes:
+        estado: Último estado das câmeras
+        stream: Destino das mudanças
+        intervalo: Segundos entre varreduras
+    """
+
+    def __init__(self, estado: EstadoCameras, stream: StreamCameras, intervalo: float = 30.0):
+        self.estado = estado
+        self.stream = stream
+        self.intervalo = intervalo
+        self._task: Optional[asyncio.Task] = None
+        self.stats_ = {"varreduras": 0, "offline": 0}
+
+    async def varrer(self, agora: Optional[datetime] = None) -> int:
+        """Marca e publica as câmeras que ficaram OFFLINE; retorna quantas"""
+        mudancas = await self.estado.marcar_offline(agora, trava=self.intervalo * 0.9)
+        await self.stream.publicar(mudancas)
+        self.stats_["varreduras"] += 1
+        self.stats_["offline"] += len(mudancas)
+        return len(mudancas)
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.intervalo)
+            try:
+                await self.varrer()
+            except Exception as e:
+                logger.warning(f"⚠️ Varredura de câmeras offline falhou ({e})")
+
+    def start(self) -> None:
+        """Inicia a varredura periódica (lifespan da aplicação)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def stats(self) -> dict:
+        return {**self.stats_, "running": self._task is not None, "interval": self.intervalo}
+
+
+async def eventos_sse(
+    fila: FilaConexao,
+    desconectado: Callable[[], Awaitable[bool]],
+    heartbeat: float,
+) -> AsyncIterator[str]:
+    """
+    Quadros SSE de uma conexão
+
+    - `event: status` para cada mudança
+    - `event: overflow` quando a fila descartou mensagens (recarregar a lista)
+    - comentário `: ping` a cada `heartbeat` segundos sem mudanças, para
+      manter proxies e o navegador com a conexão aberta
+    """
+    yield f"retry: {int(heartbeat * 1000)}\n\n"
+    while not await desconectado():
+        mensagens, descartadas = await fila.proximas(heartbeat)
+        if descartadas:
+            yield f"event: overflow\ndata: {json.dumps({'descartadas': descartadas})}\n\n"
+        if not mensagens:
+            yield ": ping\n\n"
+            continue
+        yield "".join(f"event: status\ndata: {mensagem}\n\n" for mensagem in mensagens)
+
+
+def _create_redis():
+    """Cliente Redis assíncrono para o pub/sub (apenas com CAMERAS_ESTADO_BACKEND=redis)"""
+    if settings.CAMERAS_ESTADO_BACKEND != "redis":
+        return None
+    import redis.asyncio as aioredis
+    from app.redis_client import get_redis_url
+
+    # Sem socket_timeout: a conexão de pub/sub fica ociosa entre mensagens
+    return aioredis.from_url(get_redis_url(), decode_responses=True, socket_connect_timeout=0.5)
+
+
+# Instâncias globais (uma por worker)
+camera_stream = StreamCameras(
+    redis=_create_redis(),
+    fila=settings.CAMERAS_STREAM_FILA,
+    max_conexoes=settings.CAMERAS_STREAM_MAX_CONEXOES,
+)
+varredura_offline = VarreduraOffline(estado_cameras, camera_stream, intervalo=settings.CAMERAS_VARREDURA_INTERVAL)
@@ -0,0 +1,558 @@
+"""
+Câmeras: ingestão de heartbeats em lote
+=======================================
+
+POST /cameras/heartbeats recebe milhares de relatos de status por
+requisição. Nenhum relato vira escrita linha a linha no banco:
+
+1. Diretório: `codigo → camera_id` por entidade em cache (TTL), para
+   validar o lote sem consultar o banco por item
+2. Estado: o último estado de cada câmera vai para hashes Redis
+   (`cameras:estado:{entidade_id}`, campo = camera_id), pelo pool Redis
+   compartilhado do worker, em um pipeline por requisição; sem Redis (CAMERAS_ESTADO_BACKEND=memory, ou enquanto o
+   Redis estiver inacessível), um dict por processo
+3. Buffer: os heartbeats são coalescidos por câmera (fica o mais recente)
+   e gravados em `cameras_estado` como upsert em lote, a cada
+   CAMERAS_FLUSH_INTERVAL segundos ou ao acumular CAMERAS_FLUSH_MAX câmeras
+
+Leituras combinam o estado durável com o do Redis (o mais recente vence)
+e derivam OFFLINE quando o último heartbeat passou de CAMERAS_OFFLINE_APOS.
+
+Repositório: adrisa007/sentinela (ID: 1112237272)
+"""
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import json
+import logging
+import time
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLLRUCache
+from app.core.config import settings
+from app.core.models import Camera, CameraEstado, StatusCamera
+from app.redis_client import RedisPool, redis_pool
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "cameras:estado"
+LOCK_VARREDURA = "cameras:varredura"
+
+# Após erro no Redis, o estado fica em memória por este tempo (s) antes de tentar de novo
+REDIS_RETRY_INTERVAL = 5.0
+
+# KEYS[1] = hash da entidade; ARGV = (campo, timestamp, valor) de cada câmera
+# Grava o campo só se o heartbeat for mais recente que o gravado (heartbeats
+# fora de ordem, réplicas concorrentes). Retorna, por câmera, o status anterior
+# ("" se não havia) ou "<" quando o heartbeat era antigo e foi ignorado.
+GRAVAR_SE_MAIS_RECENTE_LUA = """
+local anteriores = {}
+for i = 1, #ARGV, 3 do
+    local atual = redis.call("HGET", KEYS[1], ARGV[i])
+    local estado = atual and cjson.decode(atual)
+    if estado and tonumber(ARGV[i + 1]) <= estado["t"] then
+        anteriores[#anteriores + 1] = "<"
+    else
+        redis.call("HSET", KEYS[1], ARGV[i], ARGV[i + 2])
+        anteriores[#anteriores + 1] = estado and estado["s"] or ""
+    end
+end
+return anteriores
+"""
+
+# KEYS[1] = hash da entidade; ARGV = campo, valor esperado, novo valor
+# Troca o campo só se ele ainda tiver o valor lido (nenhum heartbeat chegou nesse meio tempo)
+TROCAR_SE_IGUAL_LUA = """
+if redis.call("HGET", KEYS[1], ARGV[1]) == ARGV[2] then
+    redis.call("HSET", KEYS[1], ARGV[1], ARGV[3])
+    return 1
+end
+return 0
+"""
+
+# Chaves por SCAN ao listar os hashes de estado na varredura
+VARREDURA_CHUNK = 500
+
+# Linhas por comando de upsert (executemany)
+UPSERT_CHUNK = 1000
+
+
+@dataclass(frozen=True)
+class Heartbeat:
+    """Relato de status já validado e resolvido para a câmera"""
+    camera_id: int
+    entidade_id: int
+    status: StatusCamera
+    visto_em: datetime
+    ip: Optional[str] = None
+    firmware: Optional[str] = None
+
+    def to_row(self) -> dict:
+        """Colunas de cameras_estado"""
+        return {
+            "camera_id": self.camera_id,
+            "entidade_id": self.entidade_id,
+            "status": self.status,
+            "visto_em": self.visto_em,
+            "ip": self.ip,
+            "firmware": self.firmware,
+        }
+
+    def dumps(self) -> str:
+        return json.dumps({
+            "s": self.status.value, "t": self.visto_em.timestamp(), "ip": self.ip, "fw": self.firmware
+        }, separators=(",", ":"))
+
+    @classmethod
+    def loads(cls, camera_id: int, entidade_id: int, raw: str) -> "Heartbeat":
+        data = json.loads(raw)
+        return cls(
+            camera_id=camera_id,
+            entidade_id=entidade_id,
+            status=StatusCamera(data["s"]),
+            visto_em=datetime.fromtimestamp(data["t"], timezone.utc),
+            ip=data.get("ip"),
+            firmware=data.get("fw"),
+        )
+
+
+def _utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def status_efetivo(status: Optional[StatusCamera], visto_em: Optional[datetime], agora: Optional[datetime] = None) -> Optional[StatusCamera]:
+    """Status reportado, ou OFFLINE se o último heartbeat é antigo demais (None se nunca reportou)"""
+    if status is None or visto_em is None:
+        return None
+    agora = agora or datetime.now(timezone.utc)
+    if _utc(visto_em) < agora - timedelta(seconds=settings.CAMERAS_OFFLINE_APOS):
+        return StatusCamera.OFFLINE
+    return status
+
+
+def _ficou_offline(hb: Heartbeat, agora: datetime) -> bool:
+    """Reportou um status diferente de OFFLINE, mas o último heartbeat já venceu"""
+    return hb.status != StatusCamera.OFFLINE and status_efetivo(hb.status, hb.visto_em, agora) == StatusCamera.OFFLINE
+
+
+# ============ Diretório codigo → camera_id ============
+
+class DiretorioCameras:
+    """Mapa `codigo → camera_id` das câmeras ativas de cada entidade, em cache"""
+
+    def __init__(self, ttl: float = 60.0, maxsize: int = 10000):
+        self.cache = TTLLRUCache(maxsize=maxsize, ttl=ttl)
+
+    async def mapa(self, db: AsyncSession, entidade_id: int) -> Dict[str, int]:
+        mapa = self.cache.get(entidade_id)
+        if mapa is None:
+            rows = await db.execute(
+                select(Camera.codigo, Camera.id).where(Camera.entidade_id == entidade_id, Camera.ativa.is_(True))
+            )
+            mapa = dict(rows.all())
+            self.cache.set(entidade_id, mapa)
+        return mapa
+
+    def invalidar(self, entidade_id: int) -> None:
+        """Chamado a cada criação/alteração/remoção de câmera da entidade"""
+        self.cache.pop(entidade_id)
+
+
+# ============ Último estado (Redis) ============
+
+class EstadoCameras:
+    """
+    Último estado de cada câmera em hashes por entidade
+
+    Falhas do Redis não quebram a ingestão: por REDIS_RETRY_INTERVAL o
+    estado passa para o dict do processo (como o fallback em memória do
+    rate limiter) e o estado durável segue pelo buffer.
+
+    Attributes:
+        pool: Pool Redis do worker (None = só memória)
+    """
+
+    def __init__(self, pool: Optional[RedisPool] = None, timer: Callable[[], float] = time.monotonic):
+        self.pool = pool
+        self.local: Dict[int, Dict[int, str]] = {}
+        self.errors = 0
+        self._timer = timer
+        self._redis_disabled_until = 0.0
+
+    @staticmethod
+    def make_key(entidade_id: int) -> str:
+        return f"{KEY_PREFIX}:{entidade_id}"
+
+    def _redis_available(self) -> bool:
+        return self.pool is not None and self._timer() >= self._redis_disabled_until
+
+    def _redis_failed(self, e: Exception) -> None:
+        self.errors += 1
+        self._redis_disabled_until = self._timer() + REDIS_RETRY_INTERVAL
+        logger.warning(f"⚠️ Estado de câmeras: Redis indisponível ({e}), usando memória por {REDIS_RETRY_INTERVAL:.0f}s")
+
+    def _gravar_local(self, por_entidade: Dict[int, Dict[int, Heartbeat]]) -> Dict[int, str]:
+        anteriores: Dict[int, str] = {}
+        for entidade_id, campos in por_entidade.items():
+            local = self.local.setdefault(entidade_id, {})
+            for camera_id, hb in campos.items():
+                raw = local.get(camera_id)
+                estado = json.loads(raw) if raw else None
+                if estado and hb.visto_em.timestamp() <= estado["t"]:
+                    anteriores[camera_id] = "<"
+                    continue
+                local[camera_id] = hb.dumps()
+                anteriores[camera_id] = estado["s"] if estado else ""
+        return anteriores
+
+    async def _gravar_redis(self, por_entidade: Dict[int, Dict[int, Heartbeat]]) -> Dict[int, str]:
+        gravar = self.pool.client.register_script(GRAVAR_SE_MAIS_RECENTE_LUA)
+        async with self.pool.pipeline() as pipe:
+            for entidade_id, campos in por_entidade.items():
+                args = []
+                for camera_id, hb in campos.items():
+                    args += [str(camera_id), repr(hb.visto_em.timestamp()), hb.dumps()]
+                await gravar(keys=[self.make_key(entidade_id)], args=args, client=pipe)
+            results = await pipe.execute()
+        anteriores: Dict[int, str] = {}
+        for campos, valores in zip(por_entidade.values(), results):
+            anteriores.update(zip(campos, valores))
+        return anteriores
+
+    async def gravar(self, heartbeats: Iterable[Heartbeat]) -> List[Tuple[Optional[StatusCamera], Heartbeat]]:
+        """
+        Grava o último estado de cada câmera
+
+        Cada câmera só é sobrescrita por um heartbeat mais recente que o
+        gravado: no Redis, um script Lua por entidade compara e grava
+        atomicamente (sem janela entre ler o anterior e gravar); em memória,
+        a mesma regra.
+
+        Returns:
+            list: `(status_anterior, heartbeat)` das câmeras cujo status mudou
+            (anterior None na primeira vez que a câmera reporta)
+        """
+        recentes: Dict[int, Heartbeat] = {}
+        for hb in heartbeats:
+            atual = recentes.get(hb.camera_id)
+            if atual is None or atual.visto_em <= hb.visto_em:
+                recentes[hb.camera_id] = hb
+        por_entidade: Dict[int, Dict[int, Heartbeat]] = {}
+        for hb in recentes.values():
+            por_entidade.setdefault(hb.entidade_id, {})[hb.camera_id] = hb
+        if not por_entidade:
+            return []
+
+        # camera_id -> status anterior ("" se não havia, "<" se o heartbeat era antigo)
+        anteriores: Optional[Dict[int, str]] = None
+        if self._redis_available():
+            try:
+                anteriores = await self._gravar_redis(por_entidade)
+            except Exception as e:
+                self._redis_failed(e)
+        if anteriores is None:
+            anteriores = self._gravar_local(por_entidade)
+
+        mudancas = []
+        for hb in recentes.values():
+            valor = anteriores.get(hb.camera_id)
+            if valor == "<":
+                continue
+            anterior = StatusCamera(valor) if valor else None
+            if anterior != hb.status:
+                mudancas.append((anterior, hb))
+        return mudancas
+
+    async def _ler_hashes(self, keys: List[str]) -> Dict[int, Dict[str, str]]:
+        """Hashes brutos (campo → heartbeat serializado) por entidade, via HGETALL em pipeline"""
+        hashes = await self.pool.hgetall_many(keys)
+        return {int(key.rsplit(":", 1)[1]): campos for key, campos in hashes.items()}
+
+    async def ler(self, entidade_id: int) -> Dict[int, Heartbeat]:
+        campos = None
+        if self._redis_available():
+            try:
+                campos = (await self._ler_hashes([self.make_key(entidade_id)]))[entidade_id]
+            except Exception as e:
+                self._redis_failed(e)
+        if campos is None:
+            campos = self.local.get(entidade_id, {})
+        return {int(k): Heartbeat.loads(int(k), entidade_id, v) for k, v in campos.items()}
+
+    async def remover(self, entidade_id: int, camera_id: int) -> None:
+        self.local.get(entidade_id, {}).pop(camera_id, None)
+        if self._redis_available():
+            try:
+                await self.pool.client.hdel(self.make_key(entidade_id), str(camera_id))
+            except Exception as e:
+                self._redis_failed(e)
+
+    async def marcar_offline(
+        self, agora: Optional[datetime] = None, trava: Optional[float] = None
+    ) -> List[Tuple[Optional[StatusCamera], Heartbeat]]:
+        """
+        Marca como OFFLINE as câmeras cujo último heartbeat passou de CAMERAS_OFFLINE_APOS
+
+        O `visto_em` é mantido; só o status gravado muda, então o próximo
+        heartbeat da câmera aparece como mudança (OFFLINE → ONLINE). No Redis,
+        cada troca é um compare-and-set no valor lido: se um heartbeat chegou
+        nesse meio tempo, ou outro worker já marcou a câmera, ela fica de fora.
+
+        Args:
+            trava: Com Redis, segundos de uma trava (SET NX) que deixa uma única
+                varredura por intervalo entre os workers; None = sem trava
+
+        Returns:
+            list: `(status_anterior, heartbeat OFFLINE)` das câmeras marcadas
+        """
+        agora = agora or datetime.now(timezone.utc)
+        if self._redis_available():
+            try:
+                return await self._marcar_offline_redis(agora, trava)
+            except Exception as e:
+                self._redis_failed(e)
+
+        marcadas = []
+        for entidade_id, campos in self.local.items():
+            for camera_id, raw in campos.items():
+                hb = Heartbeat.loads(camera_id, entidade_id, raw)
+                if _ficou_offline(hb, agora):
+                    offline = replace(hb, status=StatusCamera.OFFLINE)
+                    campos[camera_id] = offline.dumps()
+                    marcadas.append((hb.status, offline))
+        return marcadas
+
+    async def _marcar_offline_redis(
+        self, agora: datetime, trava: Optional[float]
+    ) -> List[Tuple[Optional[StatusCamera], Heartbeat]]:
+        client = self.pool.client
+        if trava is not None:
+            if not await client.set(LOCK_VARREDURA, "1", nx=True, px=max(1, int(trava * 1000))):
+                return []
+        keys = [key async for key in client.scan_iter(match=f"{KEY_PREFIX}:*", count=VARREDURA_CHUNK)]
+        candidatas: List[Tuple[str, str, Heartbeat]] = []
+        for entidade_id, campos in (await self._ler_hashes(keys)).items():
+            for campo, raw in campos.items():
+                hb = Heartbeat.loads(int(campo), entidade_id, raw)
+                if _ficou_offline(hb, agora):
+                    candidatas.append((self.make_key(entidade_id), raw, hb))
+        if not candidatas:
+            return []
+
+        trocar = client.register_script(TROCAR_SE_IGUAL_LUA)
+        async with self.pool.pipeline() as pipe:
+            for key, raw, hb in candidatas:
+                offline = replace(hb, status=StatusCamera.OFFLINE)
+                await trocar(keys=[key], args=[str(hb.camera_id), raw, offline.dumps()], client=pipe)
+            trocadas = await pipe.execute()
+        return [
+            (hb.status, replace(hb, status=StatusCamera.OFFLINE))
+            for (_, _, hb), trocada in zip(candidatas, trocadas) if trocada
+        ]
+
+
+
+# ============ Buffer e upsert em lote ============
+
+def _cameras_existentes(connection, camera_ids: List[int]) -> set:
+    """Câmeras ainda cadastradas; no PostgreSQL, FOR KEY SHARE segura a exclusão até o commit"""
+    return set(connection.scalars(
+        select(Camera.id).where(Camera.id.in_(camera_ids)).with_for_update(key_share=True)
+    ))
+
+
+def gravar_estados(connection, rows: List[dict]) -> int:
+    """
+    Upsert em lote em cameras_estado (um executemany por bloco)
+
+    Heartbeats fora de ordem não regridem o estado: a linha só é
+    sobrescrita se o novo `visto_em` não for anterior ao gravado.
+    Linhas de câmeras já excluídas (outro worker ainda com a câmera no
+    diretório ou no buffer) são descartadas em vez de violar a FK e
+    derrubar o lote inteiro.
+
+    Returns:
+        int: Linhas gravadas
+    """
+    dialect = connection.dialect.name
+    gravadas = 0
+    for inicio in range(0, len(rows), UPSERT_CHUNK):
+        bloco = rows[inicio:inicio + UPSERT_CHUNK]
+        existentes = _cameras_existentes(connection, [row["camera_id"] for row in bloco])
+        bloco = [row for row in bloco if row["camera_id"] in existentes]
+        if not bloco:
+            continue
+        gravadas += len(bloco)
+        if dialect in ("postgresql", "sqlite"):
+            if dialect == "postgresql":
+                from sqlalchemy.dialects.postgresql import insert as upsert
+            else:
+                from sqlalchemy.dialects.sqlite import insert as upsert
+            stmt = upsert(CameraEstado)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=["camera_id"],
+                set_={c: stmt.excluded[c] for c in ("entidade_id", "status", "visto_em", "ip", "firmware")},
+                where=CameraEstado.visto_em <= stmt.excluded.visto_em,
+            )
+            connection.execute(stmt, bloco)
+            continue
+
+        for row in bloco:
+            result = connection.execute(
+                update(CameraEstado)
+                .where(CameraEstado.camera_id == row["camera_id"], CameraEstado.visto_em <= row["visto_em"])
+                .values(**row)
+            )
+            if result.rowcount == 0 and connection.scalar(
+                select(CameraEstado.camera_id).where(CameraEstado.camera_id == row["camera_id"])
+            ) is None:
+                connection.execute(insert(CameraEstado).values(**row))
+    return gravadas
+
+
+class BufferHeartbeats:
+    """
+    Heartbeats pendentes coalescidos por câmera, gravados em lote
+
+    Attributes:
+        session_factory: Fábrica de AsyncSession usada no flush
+        flush_max: Câmeras pendentes que disparam um flush imediato
+        flush_interval: Intervalo (s) do flush periódico em segundo plano
+    """
+
+    def __init__(self, session_factory: Optional[Callable[[], AsyncSession]] = None,
+                 flush_max: int = 2000, flush_interval: float = 5.0):
+        self.session_factory = session_factory
+        self.flush_max = flush_max
+        self.flush_interval = flush_interval
+        self.pendentes: Dict[int, Heartbeat] = {}
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task] = None
+        self.stats_ = {"recebidos": 0, "gravados": 0, "descartados": 0, "flushes": 0, "falhas": 0}
+
+    def __len__(self) -> int:
+        return len(self.pendentes)
+
+    def _mesclar(self, heartbeats: Iterable[Heartbeat]) -> None:
+        for hb in heartbeats:
+            atual = self.pendentes.get(hb.camera_id)
+            if atual is None or atual.visto_em <= hb.visto_em:
+                self.pendentes[hb.camera_id] = hb
+
+    def adicionar(self, heartbeats: List[Heartbeat]) -> bool:
+        """Enfileira os heartbeats; True quando o buffer atingiu flush_max"""
+        self.stats_["recebidos"] += len(heartbeats)
+        self._mesclar(heartbeats)
+        return len(self.pendentes) >= self.flush_max
+
+    def descartar(self, camera_id: int) -> None:
+        """Remove pendências de uma câmera excluída (outros workers as descartam no flush)"""
+        self.pendentes.pop(camera_id, None)
+
+    async def flush(self) -> int:
+        """Grava os pendentes em cameras_estado; em falha, eles voltam ao buffer"""
+        async with self._lock:
+            if not self.pendentes:
+                return 0
+            lote, self.pendentes = self.pendentes, {}
+            rows = [hb.to_row() for hb in lote.values()]
+            try:
+                factory = self.session_factory or _default_session_factory()
+                async with factory() as db:
+                    gravadas = await db.run_sync(lambda session: gravar_estados(session.connection(), rows))
+                    await db.commit()
+            except Exception as e:
+                self.stats_["falhas"] += 1
+                self._mesclar(lote.values())
+                logger.error(f"❌ Heartbeats: falha ao gravar lote de {len(rows)} câmeras ({e})")
+                return 0
+            self.stats_["gravados"] += gravadas
+            self.stats_["descartados"] += len(rows) - gravadas
+            self.stats_["flushes"] += 1
+            return gravadas
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def start(self) -> None:
+        """Inicia o flush periódico (lifespan da aplicação)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        """Para o flush periódico e grava o que restou"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush()
+
+    def stats(self) -> dict:
+        return {**self.stats_, "pendentes": len(self.pendentes)}
+
+
+def _default_session_factory():
+    from app.core.database import AsyncSessionLocal
+    return AsyncSessionLocal
+
+
+# ============ Ingestão e leitura ============
+
+def resolver_heartbeats(
+    itens: Iterable[Any],
+    mapa: Dict[str, int],
+    entidade_id: int,
+    agora: Optional[datetime] = None,
+) -> tuple:
+    """
+    Resolve relatos `{codigo, status, timestamp, ip, firmware}` para Heartbeats
+
+    Timestamps ausentes ou no futuro viram `agora`.
+
+    Returns:
+        (heartbeats, codigos_desconhecidos)
+    """
+    agora = agora or datetime.now(timezone.utc)
+    heartbeats, desconhecidos = [], []
+    for item in itens:
+        camera_id = mapa.get(item.codigo)
+        if camera_id is None:
+            desconhecidos.append(item.codigo)
+            continue
+        visto_em = min(_utc(item.timestamp), agora) if item.timestamp else agora
+        heartbeats.append(Heartbeat(camera_id, entidade_id, StatusCamera(item.status.value), visto_em,
+                                    item.ip, item.firmware))
+    return heartbeats, desconhecidos
+
+
+async def estados_da_entidade(db: AsyncSession, entidade_id: int, camera_ids: Iterable[int]) -> Dict[int, Heartbeat]:
+    """Último estado das câmeras: cameras_estado + Redis (o mais recente vence)"""
+    camera_ids = list(camera_ids)
+    if not camera_ids:
+        return {}
+    rows = (await db.execute(select(CameraEstado).where(CameraEstado.camera_id.in_(camera_ids)))).scalars()
+    estados = {
+        r.camera_id: Heartbeat(r.camera_id, r.entidade_id, r.status, _utc(r.visto_em), r.ip, r.firmware)
+        for r in rows
+    }
+    for camera_id, hb in (await estado_cameras.ler(entidade_id)).items():
+        if camera_id in camera_ids and (camera_id not in estados or estados[camera_id].visto_em <= hb.visto_em):
+            estados[camera_id] = hb
+    return estados
+
+
+# Instâncias globais (uma por worker)
+diretorio_cameras = DiretorioCameras()
+estado_cameras = EstadoCameras(pool=redis_pool if settings.CAMERAS_ESTADO_BACKEND == "redis" else None)
+heartbeat_buffer = BufferHeartbeats(
+    flush_max=settings.CAMERAS_FLUSH_MAX,
+    flush_interval=settings.CAMERAS_FLUSH_INTERVAL,
+)
@@ -0,0 +1,422 @@
+"""
+Certidões de regularidade de fornecedores
+=========================================
+
+- Revalidação em lote: a task periódica seleciona as certidões com
+  verificação mais antiga e as divide em lotes; cada lote consulta os
+  emissores com limite de concorrência por emissor e um cache de
+  resultados compartilhado pelo worker (a mesma certidão acompanhada por
+  várias entidades gera uma única consulta)
+- Contadores: `certidoes_contadores` é atualizado a cada escrita (eventos
+  ORM, mesma transação), e /certidoes/stats lê apenas as linhas da
+  entidade; a recontagem noturna corrige qualquer desvio de escritas
+  feitas fora do ORM
+- Vencimentos: certidões entram no índice de app.core.vencimentos
+
+Os emissores não têm uma API comum: cada um recebe um verificador com
+`registrar_verificador`. Sem verificador registrado, a situação é
+derivada da data de validade.
+
+Repositório: adrisa007/sentinela (ID: 1112237272)
+"""
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import logging
+import time
+
+from sqlalchemy import String, cast, delete, func, insert, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLLRUCache
+from app.core.config import settings
+from app.core.escritas import Valores, observar_escritas
+from app.core.models import Certidao, CertidaoContador, StatusCertidao, TipoCertidao, TipoVencimento, Vencimento
+from app.core.vencimentos import FonteVencimento, registrar_fonte
+
+logger = logging.getLogger(__name__)
+
+EMISSORES: Dict[TipoCertidao, str] = {
+    TipoCertidao.CND_FEDERAL: "RECEITA_FEDERAL",
+    TipoCertidao.CNDT: "TST",
+    TipoCertidao.FGTS: "CAIXA",
+    TipoCertidao.ESTADUAL: "SEFAZ",
+    TipoCertidao.MUNICIPAL: "PREFEITURA",
+}
+
+DIMENSOES = ("status", "tipo")
+
+
+# ============ Contadores incrementais ============
+
+def _incrementar(connection, entidade_id: int, dimensao: str, valor: str, delta: int) -> None:
+    """total += delta na linha do contador, criando-a se preciso"""
+    dialect = connection.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        stmt = upsert(CertidaoContador).values(
+            entidade_id=entidade_id, dimensao=dimensao, valor=valor, total=delta
+        )
+        connection.execute(stmt.on_conflict_do_update(
+            index_elements=["entidade_id", "dimensao", "valor"],
+            set_={"total": CertidaoContador.total + delta},
+        ))
+        return
+
+    result = connection.execute(
+        update(CertidaoContador)
+        .where(
+            CertidaoContador.entidade_id == entidade_id,
+            CertidaoContador.dimensao == dimensao,
+            CertidaoContador.valor == valor,
+        )
+        .values(total=CertidaoContador.total + delta)
+    )
+    if result.rowcount == 0:
+        connection.execute(insert(CertidaoContador).values(
+            entidade_id=entidade_id, dimensao=dimensao, valor=valor, total=delta
+        ))
+
+
+def _chaves(entidade_id: int, status: StatusCertidao, tipo: TipoCertidao) -> List[Tuple[int, str, str]]:
+    return [(entidade_id, "status", StatusCertidao(status).value), (entidade_id, "tipo", TipoCertidao(tipo).value)]
+
+
+def _contar(connection, target: Certidao, antes: Optional[Valores], depois: Optional[Valores]) -> None:
+    """-1 nas chaves que a certidão deixou, +1 nas que passou a ocupar"""
+    anteriores = set(_chaves(**antes)) if antes else set()
+    atuais = set(_chaves(**depois)) if depois else set()
+    for chave in anteriores - atuais:
+        _incrementar(connection, *chave, -1)
+    for chave in atuais - anteriores:
+        _incrementar(connection, *chave, 1)
+
+
+observar_escritas(Certidao, ("entidade_id", "status", "tipo"), _contar)
+
+
+def recontar_certidoes(db: Session) -> int:
+    """
+    Reconstrói os contadores com um GROUP BY por dimensão (task noturna)
+
+    Returns:
+        int: Linhas de contador gravadas
+    """
+    db.execute(delete(CertidaoContador))
+    total = 0
+    colunas = ["entidade_id", "dimensao", "valor", "total"]
+    for dimensao in DIMENSOES:
+        coluna = getattr(Certidao, dimensao)
+        consulta = (
+            select(Certidao.entidade_id, literal(dimensao), coluna, func.count())
+            .group_by(Certidao.entidade_id, coluna)
+        )
+        total += db.execute(insert(CertidaoContador).from_select(colunas, consulta)).rowcount
+    db.commit()
+    logger.info(f"🔢 Contadores de certidões recalculados ({total} linhas)")
+    return total
+
+
+async def get_stats(db: AsyncSession, entidade_id: int) -> Dict[str, Dict[str, int]]:
+    """Contadores da entidade por dimensão: {"status": {...}, "tipo": {...}}"""
+    rows = await db.execute(
+        select(CertidaoContador.dimensao, CertidaoContador.valor, CertidaoContador.total)
+        .where(CertidaoContador.entidade_id == entidade_id, CertidaoContador.total != 0)
+    )
+    stats: Dict[str, Dict[str, int]] = {dimensao: {} for dimensao in DIMENSOES}
+    for dimensao, valor, total in rows:
+        stats.setdefault(dimensao, {})[valor] = total
+    return stats
+
+
+# ============ Índice de vencimentos ============
+
+def _linha_vencimento(certidao: Certidao) -> Optional[dict]:
+    if certidao.data_validade is None:
+        return None
+    return {
+        "entidade_id": certidao.entidade_id,
+        "data_vencimento": certidao.data_validade,
+        "descricao": f"{TipoCertidao(certidao.tipo).value} {certidao.numero} - CNPJ {certidao.cnpj_fornecedor}"[:255],
+    }
+
+
+def _consulta_vencimentos(limite: date):
+    return select(
+        Certidao.id,
+        Certidao.entidade_id,
+        Certidao.data_validade,
+        func.substr(
+            cast(Certidao.tipo, String) + " " + Certidao.numero + " - CNPJ " + Certidao.cnpj_fornecedor, 1, 255
+        ),
+    ).where(Certidao.data_validade >= limite)
+
+
+registrar_fonte(TipoVencimento.CERTIDAO, FonteVencimento(
+    model=Certidao,
+    campos=("entidade_id", "data_validade", "tipo", "numero", "cnpj_fornecedor"),
+    linha=_linha_vencimento,
+    consulta=_consulta_vencimentos,
+))
+
+
+async def listar_certidoes_vencendo(
+    db: AsyncSession,
+    entidade_id: int,
+    dias: int,
+    hoje: Optional[date] = None,
+) -> List[Tuple[Certidao, int]]:
+    """
+    Certidões da entidade vencendo nos próximos `dias`
+
+    Busca por faixa no índice de vencimentos e junção pela chave primária.
+
+    Returns:
+        list: (certidão, dias_restantes), da mais próxima à mais distante
+    """
+    hoje = hoje or date.today()
+    stmt = (
+        select(Certidao)
+        .join(Vencimento, (Vencimento.tipo == TipoVencimento.CERTIDAO) & (Vencimento.referencia_id == Certidao.id))
+        .where(
+            Vencimento.entidade_id == entidade_id,
+            Vencimento.data_vencimento.between(hoje, hoje + timedelta(days=dias)),
+        )
+        .order_by(Vencimento.data_vencimento, Vencimento.referencia_id)
+    )
+    return [(c, (c.data_validade - hoje).days) for c in (await db.execute(stmt)).scalars()]
+
+
+# ============ Verificação nos emissores ============
+
+@dataclass(frozen=True)
+class ConsultaCertidao:
+    """Dados enviados ao emissor; também é a chave do cache de resultados"""
+    tipo: TipoCertidao
+    cnpj_fornecedor: str
+    numero: str
+    data_validade: date
+
+    @property
+    def emissor(self) -> str:
+        return EMISSORES[self.tipo]
+
+    @classmethod
+    def from_model(cls, certidao: Certidao) -> "ConsultaCertidao":
+        return cls(
+            tipo=TipoCertidao(certidao.tipo),
+            cnpj_fornecedor=certidao.cnpj_fornecedor,
+            numero=certidao.numero,
+            data_validade=certidao.data_validade,
+        )
+
+
+@dataclass(frozen=True)
+class ResultadoVerificacao:
+    """Resposta do emissor: situação e, se informada, nova data de validade"""
+    status: StatusCertidao
+    data_validade: Optional[date] = None
+
+
+Verificador = Callable[[ConsultaCertidao], Awaitable[ResultadoVerificacao]]
+
+
+async def verificar_por_validade(consulta: ConsultaCertidao) -> ResultadoVerificacao:
+    """Verificador padrão: situação derivada apenas da data de validade"""
+    if consulta.data_validade < date.today():
+        return ResultadoVerificacao(StatusCertidao.VENCIDA)
+    return ResultadoVerificacao(StatusCertidao.VALIDA)
+
+
+_verificadores: Dict[str, Verificador] = {}
+
+
+def registrar_verificador(emissor: str, verificador: Verificador) -> None:
+    """Associa o cliente de um emissor (ex.: "TST") às consultas de seus tipos de certidão"""
+    _verificadores[emissor] = verificador
+
+
+def _parse_concorrencia(spec: str) -> Dict[str, int]:
+    limites = {}
+    for item in filter(None, (p.strip() for p in spec.split(","))):
+        emissor, _, valor = item.partition("=")
+        limites[emissor.strip().upper()] = int(valor)
+    return limites
+
+
+class RevalidadorCertidoes:
+    """
+    Consulta lotes de certidões nos emissores
+
+    - Um semáforo por emissor limita consultas simultâneas
+      (CERTIDOES_CONCORRENCIA_EMISSOR, exceções em CERTIDOES_CONCORRENCIA_POR_EMISSOR)
+    - Resultados ficam em um TTLLRUCache por CERTIDOES_CACHE_TTL; consultas
+      repetidas no lote são feitas uma vez
+    - Falha de um emissor afeta apenas as certidões dele (ficam para o próximo ciclo)
+    """
+
+    def __init__(
+        self,
+        concorrencia_padrao: int = None,
+        concorrencia: Optional[Dict[str, int]] = None,
+        cache: Optional[TTLLRUCache] = None,
+    ):
+        self.concorrencia_padrao = concorrencia_padrao or settings.CERTIDOES_CONCORRENCIA_EMISSOR
+        self.concorrencia = (
+            concorrencia if concorrencia is not None
+            else _parse_concorrencia(settings.CERTIDOES_CONCORRENCIA_POR_EMISSOR)
+        )
+        self.cache = cache or TTLLRUCache(maxsize=settings.CERTIDOES_CACHE_MAXSIZE, ttl=settings.CERTIDOES_CACHE_TTL)
+        self.consultas = 0
+        self.falhas = 0
+
+    def limite(self, emissor: str) -> int:
+        return self.concorrencia.get(emissor, self.concorrencia_padrao)
+
+    async def verificar(
+        self, consultas: Iterable[ConsultaCertidao]
+    ) -> Dict[ConsultaCertidao, Optional[ResultadoVerificacao]]:
+        """
+        Resultado de cada consulta distinta (None quando o emissor falhou)
+        """
+        resultados: Dict[ConsultaCertidao, Optional[ResultadoVerificacao]] = {}
+        pendentes = []
+        for consulta in set(consultas):
+            cached = self.cache.get(consulta)
+            if cached is not None:
+                resultados[consulta] = cached
+            else:
+                pendentes.append(consulta)
+
+        # Semáforos criados no loop da execução (asyncio.run por lote no worker)
+        semaforos = {emissor: asyncio.Semaphore(self.limite(emissor)) for emissor in {c.emissor for c in pendentes}}
+
+        async def consultar(consulta: ConsultaCertidao) -> None:
+            verificador = _verificadores.get(consulta.emissor, verificar_por_validade)
+            async with semaforos[consulta.emissor]:
+                self.consultas += 1
+                try:
+                    resultado = await verificador(consulta)
+                except Exception as e:
+                    self.falhas += 1
+                    logger.warning(f"⚠️  Certidões: falha no emissor {consulta.emissor} ({type(e).__name__}: {e})")
+                    resultados[consulta] = None
+                    return
+            self.cache.set(consulta, resultado)
+            resultados[consulta] = resultado
+
+        await asyncio.gather(*(consultar(c) for c in pendentes))
+        return resultados
+
+    def stats(self) -> dict:
+        return {
+            "consultas": self.consultas,
+            "falhas": self.falhas,
+            "cache": {"size": len(self.cache), "hits": self.cache.hits, "misses": self.cache.misses},
+        }
+
+
+# Instância do processo (worker Celery): o cache sobrevive entre lotes
+revalidador = RevalidadorCertidoes()
+
+
+# ============ Lotes ============
+
+def selecionar_lotes(
+    db: Session,
+    agora: Optional[datetime] = None,
+    tamanho: Optional[int] = None,
+    max_lotes: Optional[int] = None,
+) -> List[List[int]]:
+    """
+    Ids das certidões a revalidar, das verificações mais antigas às mais
+    recentes (nunca verificadas primeiro), divididos em lotes
+    """
+    agora = agora or datetime.now(timezone.utc)
+    tamanho = tamanho or settings.CERTIDOES_LOTE_TAMANHO
+    max_lotes = max_lotes or settings.CERTIDOES_MAX_LOTES
+    corte = agora - timedelta(hours=settings.CERTIDOES_REVALIDAR_APOS_HORAS)
+
+    ids = db.scalars(
+        select(Certidao.id)
+        .where((Certidao.ultima_verificacao.is_(None)) | (Certidao.ultima_verificacao < corte))
+        .order_by(Certidao.ultima_verificacao.asc().nulls_first(), Certidao.id)
+        .limit(tamanho * max_lotes)
+    ).all()
+    return [list(ids[i:i + tamanho]) for i in range(0, len(ids), tamanho)]
+
+
+def revalidar_lote(
+    db: Session,
+    ids: List[int],
+    revalidador_: Optional[RevalidadorCertidoes] = None,
+) -> Dict[str, int]:
+    """
+    Revalida um lote e grava as mudanças em uma transação
+
+    As consultas aos emissores acontecem fora de transação. Na gravação, as
+    linhas são relidas com SELECT ... FOR UPDATE e só recebem o resultado se
+    validade, situação e última verificação ainda forem as lidas antes da
+    consulta; alteradas nesse meio tempo (edição do usuário, outro lote),
+    ficam para o próximo ciclo. A gravação passa pelo ORM, então contadores
+    e índice de vencimentos acompanham as mudanças de situação/validade.
+
+    Returns:
+        dict: {"verificadas", "alteradas", "falhas", "concorrentes", "segundos"}
+    """
+    revalidador_ = revalidador_ or revalidador
+    inicio = time.perf_counter()
+    lidas = {
+        c.id: (ConsultaCertidao.from_model(c), c.status, c.ultima_verificacao)
+        for c in db.scalars(select(Certidao).where(Certidao.id.in_(ids)))
+    }
+    db.commit()  # Não segura a transação durante as consultas
+
+    resultados = asyncio.run(revalidador_.verificar(consulta for consulta, _, _ in lidas.values()))
+
+    agora = datetime.now(timezone.utc)
+    alteradas = falhas = concorrentes = 0
+    certidoes = db.scalars(
+        select(Certidao)
+        .where(Certidao.id.in_(list(lidas)))
+        .order_by(Certidao.id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    ).all()
+    for certidao in certidoes:
+        consulta, status, ultima_verificacao = lidas[certidao.id]
+        resultado = resultados.get(consulta)
+        if resultado is None:
+            falhas += 1
+            continue
+        if (
+            ConsultaCertidao.from_model(certidao) != consulta
+            or certidao.status != status
+            or certidao.ultima_verificacao != ultima_verificacao
+        ):
+            concorrentes += 1
+            continue
+        if certidao.status != resultado.status or (
+            resultado.data_validade and resultado.data_validade != certidao.data_validade
+        ):
+            alteradas += 1
+        certidao.status = resultado.status
+        if resultado.data_validade:
+            certidao.data_validade = resultado.data_validade
+        certidao.ultima_verificacao = agora
+    db.commit()
+
+    resumo = {
+        "verificadas": len(certidoes) - falhas - concorrentes,
+        "alteradas": alteradas,
+        "falhas": falhas,
+        "concorrentes": concorrentes,
+        "segundos": round(time.perf_counter() - inicio, 3),
+    }
+    logger.info(f"📑 Certidões: lote de {len(ids)} revalidado {resumo}")
+    return resumo
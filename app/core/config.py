@@ -31,13 +31,149 @@ class Settings:
     
     # ============ Segurança - Bcrypt ============
     BCRYPT_ROUNDS: int = int(getenv("BCRYPT_ROUNDS", "12"))
+    PASSWORD_HASH_WORKERS: int = int(getenv("PASSWORD_HASH_WORKERS", "2"))
+    PASSWORD_HASH_MAX_QUEUE: int = int(getenv("PASSWORD_HASH_MAX_QUEUE", "32"))
     
+    # ============ Cache de Principal (usuário/entidade autenticados) ============
+    PRINCIPAL_CACHE_ENABLED: bool = getenv("PRINCIPAL_CACHE_ENABLED", "true").lower() == "true"
+    PRINCIPAL_CACHE_TTL: int = int(getenv("PRINCIPAL_CACHE_TTL", "60"))
+    PRINCIPAL_CACHE_MAXSIZE: int = int(getenv("PRINCIPAL_CACHE_MAXSIZE", "10000"))
+
     # ============ Banco de Dados ============
     DATABASE_URL: str = getenv(
         "DATABASE_URL",
         f"sqlite:///{BASE_DIR}/sentinela.db"
     )
-    
+
+    # Pool de conexões (por engine, por worker)
+    DB_POOL_SIZE: int = int(getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_RECYCLE: int = int(getenv("DB_POOL_RECYCLE", "300"))
+    DB_POOL_TIMEOUT: int = int(getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_PRE_PING: bool = getenv("DB_POOL_PRE_PING", "true").lower() == "true"
+
+    # ============ PNCP (Portal Nacional de Contratações Públicas) ============
+    PNCP_API_URL: str = getenv("PNCP_API_URL", "https://pncp.gov.br/api")
+    PNCP_HTTP2: bool = getenv("PNCP_HTTP2", "true").lower() == "true"
+    PNCP_MAX_CONNECTIONS: int = int(getenv("PNCP_MAX_CONNECTIONS", "20"))
+    PNCP_MAX_KEEPALIVE: int = int(getenv("PNCP_MAX_KEEPALIVE", "10"))
+    PNCP_CONNECT_TIMEOUT: float = float(getenv("PNCP_CONNECT_TIMEOUT", "3"))
+    PNCP_READ_TIMEOUT: float = float(getenv("PNCP_READ_TIMEOUT", "10"))
+    PNCP_MAX_RETRIES: int = int(getenv("PNCP_MAX_RETRIES", "2"))
+    PNCP_RETRY_BUDGET_RATIO: float = float(getenv("PNCP_RETRY_BUDGET_RATIO", "0.2"))
+    PNCP_CIRCUIT_FAILURE_THRESHOLD: int = int(getenv("PNCP_CIRCUIT_FAILURE_THRESHOLD", "5"))
+    PNCP_CIRCUIT_RESET_TIMEOUT: float = float(getenv("PNCP_CIRCUIT_RESET_TIMEOUT", "30"))
+    # Tempo máximo (s) da requisição de teste do circuito meio-aberto
+    PNCP_CIRCUIT_PROBE_TIMEOUT: float = float(getenv("PNCP_CIRCUIT_PROBE_TIMEOUT", "5"))
+    # Requisições/s ao host do PNCP por worker (0 = sem limite) e rajada permitida
+    PNCP_RATE_LIMIT_PER_SECOND: float = float(getenv("PNCP_RATE_LIMIT_PER_SECOND", "10"))
+    PNCP_RATE_LIMIT_BURST: int = int(getenv("PNCP_RATE_LIMIT_BURST", "20"))
+    # Consulta em lote (POST /pncp/fornecedores/batch)
+    PNCP_BATCH_MAX_CNPJS: int = int(getenv("PNCP_BATCH_MAX_CNPJS", "100"))
+    PNCP_BATCH_CONCURRENCY: int = int(getenv("PNCP_BATCH_CONCURRENCY", "8"))
+
+    # Espelho local (tabelas pncp_*) sincronizado pela task Celery sentinela.periodic.pncp_sync
+    PNCP_MIRROR_ENABLED: bool = getenv("PNCP_MIRROR_ENABLED", "true").lower() == "true"
+    PNCP_SYNC_INTERVAL: float = float(getenv("PNCP_SYNC_INTERVAL", "900"))
+    PNCP_SYNC_PAGE_SIZE: int = int(getenv("PNCP_SYNC_PAGE_SIZE", "500"))
+    PNCP_SYNC_MAX_PAGES: int = int(getenv("PNCP_SYNC_MAX_PAGES", "200"))
+    # Registros validados e gravados por transação na ingestão de exportações
+    PNCP_INGEST_CHUNK_SIZE: int = int(getenv("PNCP_INGEST_CHUNK_SIZE", "5000"))
+
+    # Cache de consultas PNCP (L1 em processo + L2 opcional no Redis)
+    PNCP_CACHE_ENABLED: bool = getenv("PNCP_CACHE_ENABLED", "true").lower() == "true"
+    # redis: L1 + L2 compartilhado entre workers/réplicas (só L1 enquanto o Redis estiver fora)
+    # | memory: apenas L1 por processo
+    PNCP_CACHE_BACKEND: str = getenv("PNCP_CACHE_BACKEND", "redis")
+    PNCP_CACHE_MAXSIZE: int = int(getenv("PNCP_CACHE_MAXSIZE", "5000"))
+    PNCP_CACHE_CADASTRO_TTL: int = int(getenv("PNCP_CACHE_CADASTRO_TTL", "21600"))
+    PNCP_CACHE_CONTRATOS_TTL: int = int(getenv("PNCP_CACHE_CONTRATOS_TTL", "1800"))
+    # Tempo extra (após o TTL) em que o dado vencido ainda é servido enquanto revalida
+    PNCP_CACHE_STALE_TTL: int = int(getenv("PNCP_CACHE_STALE_TTL", "86400"))
+    PNCP_CACHE_REDIS_TIMEOUT: float = float(getenv("PNCP_CACHE_REDIS_TIMEOUT", "0.25"))
+
+    # ============ Índice de Vencimentos ============
+    # Itens já vencidos continuam no índice por este número de dias (alertas de "vencido")
+    VENCIMENTOS_RETENCAO_DIAS: int = int(getenv("VENCIMENTOS_RETENCAO_DIAS", "30"))
+    # Horário (America/Sao_Paulo) da reconstrução noturna pela task sentinela.periodic.refresh_vencimentos
+    VENCIMENTOS_REFRESH_HOUR: int = int(getenv("VENCIMENTOS_REFRESH_HOUR", "3"))
+
+    # ============ Certidões ============
+    # Revalidação em lote (Celery): intervalo do despacho, idade mínima da última verificação e tamanho dos lotes
+    CERTIDOES_REVALIDAR_INTERVAL: float = float(getenv("CERTIDOES_REVALIDAR_INTERVAL", "3600"))
+    CERTIDOES_REVALIDAR_APOS_HORAS: int = int(getenv("CERTIDOES_REVALIDAR_APOS_HORAS", "24"))
+    CERTIDOES_LOTE_TAMANHO: int = int(getenv("CERTIDOES_LOTE_TAMANHO", "200"))
+    CERTIDOES_MAX_LOTES: int = int(getenv("CERTIDOES_MAX_LOTES", "50"))
+    # Consultas simultâneas por emissor; exceções no formato "TST=2,CAIXA=8"
+    CERTIDOES_CONCORRENCIA_EMISSOR: int = int(getenv("CERTIDOES_CONCORRENCIA_EMISSOR", "4"))
+    CERTIDOES_CONCORRENCIA_POR_EMISSOR: str = getenv("CERTIDOES_CONCORRENCIA_POR_EMISSOR", "")
+    # Cache de resultados das consultas aos emissores (por worker)
+    CERTIDOES_CACHE_TTL: int = int(getenv("CERTIDOES_CACHE_TTL", "21600"))
+    CERTIDOES_CACHE_MAXSIZE: int = int(getenv("CERTIDOES_CACHE_MAXSIZE", "10000"))
+
+    # ============ Dashboard do Gestor ============
+    # Janela (dias) das colunas "vencendo" do resumo por entidade
+    DASHBOARD_JANELA_DIAS: int = int(getenv("DASHBOARD_JANELA_DIAS", "30"))
+    # Intervalo (segundos) do recálculo completo pela task sentinela.periodic.dashboard_recalcular
+    DASHBOARD_RECALCULO_INTERVAL: float = float(getenv("DASHBOARD_RECALCULO_INTERVAL", "3600"))
+
+    # ============ Câmeras ============
+    # Heartbeats por requisição em POST /cameras/heartbeats
+    CAMERAS_HEARTBEAT_MAX_LOTE: int = int(getenv("CAMERAS_HEARTBEAT_MAX_LOTE", "5000"))
+    # Buffer de heartbeats: gravação em lote a cada intervalo (s) ou ao atingir N câmeras pendentes
+    CAMERAS_FLUSH_INTERVAL: float = float(getenv("CAMERAS_FLUSH_INTERVAL", "5"))
+    CAMERAS_FLUSH_MAX: int = int(getenv("CAMERAS_FLUSH_MAX", "2000"))
+    # Sem heartbeat há mais de N segundos → câmera considerada OFFLINE
+    CAMERAS_OFFLINE_APOS: int = int(getenv("CAMERAS_OFFLINE_APOS", "180"))
+    # Varredura (s) que publica no stream as câmeras que passaram de CAMERAS_OFFLINE_APOS sem heartbeat
+    CAMERAS_VARREDURA_INTERVAL: float = float(getenv("CAMERAS_VARREDURA_INTERVAL", "30"))
+    # redis: hashes compartilhados entre workers/réplicas (memória do processo se o Redis cair)
+    # | memory: último estado só por processo
+    CAMERAS_ESTADO_BACKEND: str = getenv("CAMERAS_ESTADO_BACKEND", "redis")
+    # Eventos: itens por requisição em POST /cameras/eventos
+    CAMERAS_EVENTOS_MAX_LOTE: int = int(getenv("CAMERAS_EVENTOS_MAX_LOTE", "5000"))
+    # Série: até N horas lê o histórico bruto (por minuto); até N dias, rollups por hora; acima, por dia
+    CAMERAS_EVENTOS_BRUTO_MAX_HORAS: int = int(getenv("CAMERAS_EVENTOS_BRUTO_MAX_HORAS", "6"))
+    CAMERAS_EVENTOS_HORA_MAX_DIAS: int = int(getenv("CAMERAS_EVENTOS_HORA_MAX_DIAS", "7"))
+    CAMERAS_EVENTOS_SERIE_MAX_DIAS: int = int(getenv("CAMERAS_EVENTOS_SERIE_MAX_DIAS", "366"))
+    # Rollups (Celery beat, de hora em hora no minuto indicado): horas recentes reprocessadas a cada ciclo
+    CAMERAS_EVENTOS_ROLLUP_MINUTE: int = int(getenv("CAMERAS_EVENTOS_ROLLUP_MINUTE", "5"))
+    CAMERAS_EVENTOS_REPROCESSAR_HORAS: int = int(getenv("CAMERAS_EVENTOS_REPROCESSAR_HORAS", "3"))
+    # PostgreSQL: partições mensais criadas com N meses de antecedência
+    CAMERAS_EVENTOS_PARTICOES_FUTURAS: int = int(getenv("CAMERAS_EVENTOS_PARTICOES_FUTURAS", "3"))
+    # Stream SSE (GET /cameras/stream): fila por conexão (descarta as mais antigas), ping (s) e conexões por worker
+    CAMERAS_STREAM_FILA: int = int(getenv("CAMERAS_STREAM_FILA", "100"))
+    CAMERAS_STREAM_HEARTBEAT: float = float(getenv("CAMERAS_STREAM_HEARTBEAT", "15"))
+    CAMERAS_STREAM_MAX_CONEXOES: int = int(getenv("CAMERAS_STREAM_MAX_CONEXOES", "5000"))
+
+    # ============ Riscos ============
+    # Avaliação em lote (Celery): hora (America/Sao_Paulo) e entidades por job
+    RISCOS_AVALIAR_HOUR: int = int(getenv("RISCOS_AVALIAR_HOUR", "4"))
+    RISCOS_LOTE_ENTIDADES: int = int(getenv("RISCOS_LOTE_ENTIDADES", "50"))
+    # Score mínimo (0-100) para um risco ser gravado
+    RISCOS_SCORE_MINIMO: float = float(getenv("RISCOS_SCORE_MINIMO", "25"))
+    # Dias antes do fim da vigência em que a falta de renovação começa a pontuar
+    RISCOS_JANELA_RENOVACAO_DIAS: int = int(getenv("RISCOS_JANELA_RENOVACAO_DIAS", "60"))
+    # Fatia do valor ativo da entidade acima da qual um fornecedor pontua concentração
+    RISCOS_LIMIAR_CONCENTRACAO: float = float(getenv("RISCOS_LIMIAR_CONCENTRACAO", "0.3"))
+
+    # ============ Health Checks ============
+    # Prober em segundo plano (s entre rodadas) e timeout (s) de cada dependência
+    HEALTH_PROBE_INTERVAL: float = float(getenv("HEALTH_PROBE_INTERVAL", "10"))
+    HEALTH_DB_TIMEOUT: float = float(getenv("HEALTH_DB_TIMEOUT", "2"))
+    HEALTH_REDIS_TIMEOUT: float = float(getenv("HEALTH_REDIS_TIMEOUT", "1"))
+    HEALTH_CELERY_TIMEOUT: float = float(getenv("HEALTH_CELERY_TIMEOUT", "1"))
+    HEALTH_CELERY_ENABLED: bool = getenv("HEALTH_CELERY_ENABLED", "true").lower() == "true"
+    # Verificações forçadas com ?fresh=1, por cliente
+    HEALTH_FRESH_RATE_LIMIT: str = getenv("HEALTH_FRESH_RATE_LIMIT", "6/minute")
+
+    # ============ Métricas (Prometheus) ============
+    # Bearer exigido em /metrics e /health/{prober,pool,redis,pncp}; vazio = endpoints desligados (404)
+    DIAGNOSTICS_TOKEN: str = getenv("DIAGNOSTICS_TOKEN", "")
+    # GET /metrics e middleware de métricas; intervalo mínimo (s) entre leituras dos pools
+    METRICS_ENABLED: bool = getenv("METRICS_ENABLED", "true").lower() == "true"
+    METRICS_POOL_REFRESH: float = float(getenv("METRICS_POOL_REFRESH", "1"))
+
     # ============ Security Headers (Helmet) ============
     APP_DOMAIN: str = getenv("APP_DOMAIN", "sentinela.example.com")
     ENABLE_HSTS: bool = getenv("ENABLE_HSTS", "true").lower() == "true"
@@ -46,6 +182,15 @@ class Settings:
     RATE_LIMIT_ENABLED: bool = getenv("RATE_LIMIT_ENABLED", "true").lower() == "true"
     RATE_LIMIT_GLOBAL: str = getenv("RATE_LIMIT_GLOBAL", "300/minute")
     RATE_LIMIT_LOGIN: str = getenv("RATE_LIMIT_LOGIN", "10/minute")
+    # memory: contadores por processo | redis: compartilhados entre workers/réplicas
+    RATE_LIMIT_STORAGE: str = getenv("RATE_LIMIT_STORAGE", "memory")
+    # fixed-window | moving-window | sliding-window-counter | token-bucket
+    RATE_LIMIT_STRATEGY: str = getenv("RATE_LIMIT_STRATEGY", "fixed-window")
+    RATE_LIMIT_REDIS_TIMEOUT: float = float(getenv("RATE_LIMIT_REDIS_TIMEOUT", "0.25"))
+    # Hits de usuários autenticados agregados localmente e enviados em lote ao storage
+    RATE_LIMIT_BATCH_ENABLED: bool = getenv("RATE_LIMIT_BATCH_ENABLED", "true").lower() == "true"
+    RATE_LIMIT_BATCH_INTERVAL_MS: int = int(getenv("RATE_LIMIT_BATCH_INTERVAL_MS", "5"))
+    RATE_LIMIT_BATCH_MAX: int = int(getenv("RATE_LIMIT_BATCH_MAX", "10"))
     
     # ============ CSRF Protection ============
     CSRF_ENABLED: bool = getenv("CSRF_ENABLED", "true").lower() == "true"
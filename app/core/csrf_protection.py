@@ -7,15 +7,17 @@ cookies SameSite=Strict e validação de tokens.
 
 Repositório: adrisa007/sentinela (ID: 1112237272)
 """
-from fastapi import Request, Response, HTTPException, status
-from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
-from typing import Callable
+from fastapi import Request, HTTPException, status
+from fastapi.responses import JSONResponse
+from starlette.requests import cookie_parser
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Tuple
 import secrets
 import logging
 from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
 
 from app.core.config import settings
+from app.core.metrics import CSRF_REJECTIONS
 
 logger = logging.getLogger(__name__)
 
@@ -41,6 +43,7 @@ CSRF_EXEMPT_ROUTES = [
     "/cameras",       # Temporariamente isento para testes
     "/pncp",          # API PNCP usa apenas autenticação JWT
 ]
+CSRF_EXEMPT_PREFIXES = tuple(CSRF_EXEMPT_ROUTES)
 
 
 # ============ Gerador de Tokens CSRF ============
@@ -102,17 +105,23 @@ csrf_generator = CSRFTokenGenerator(settings.SECRET_KEY)
 
 # ============ Middleware CSRF ============
 
-class CSRFProtectionMiddleware(BaseHTTPMiddleware):
+class CSRFProtectionMiddleware:
     """
-    Middleware que implementa proteção CSRF
+    Middleware ASGI que implementa proteção CSRF
     
     Funcionalidades:
     - Gera tokens CSRF para requisições GET
     - Valida tokens em requisições POST, PUT, PATCH, DELETE
     - Usa cookies SameSite=Strict
-    - Valida tokens via header ou form field
+    - Valida tokens via header ou cookie
+    
+    Implementado diretamente sobre ASGI: o cookie é anexado ao
+    `http.response.start` sem envolver o corpo da resposta, e requisições
+    rejeitadas recebem 403 sem chegar à aplicação.
     """
     
+    SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS", "TRACE"})
+    
     def __init__(
         self,
         app: ASGIApp,
@@ -122,13 +131,23 @@ class CSRFProtectionMiddleware(BaseHTTPMiddleware):
         cookie_httponly: bool = True,
         cookie_samesite: str = "strict"
     ):
-        super().__init__(app)
+        self.app = app
         self.cookie_name = cookie_name
         self.header_name = header_name
         self.cookie_secure = cookie_secure
         self.cookie_httponly = cookie_httponly
         self.cookie_samesite = cookie_samesite
         
+        # Atributos do Set-Cookie são fixos: só o valor do token muda
+        attributes = [f"Max-Age={CSRF_TOKEN_MAX_AGE}", "Path=/", f"SameSite={cookie_samesite}"]
+        if cookie_httponly:
+            attributes.append("HttpOnly")
+        if cookie_secure:
+            attributes.append("Secure")
+        self._cookie_prefix = f"{cookie_name}=".encode("latin-1")
+        self._cookie_suffix = ("; " + "; ".join(attributes)).encode("latin-1")
+        self._header_key = header_name.lower().encode("latin-1")
+        
         logger.info(f"🛡️  CSRFProtectionMiddleware inicializado")
         logger.info(f"   Cookie: {self.cookie_name} (SameSite={self.cookie_samesite})")
     
@@ -142,7 +161,7 @@ class CSRFProtectionMiddleware(BaseHTTPMiddleware):
         Returns:
             bool: True se método seguro
         """
-        return method in ["GET", "HEAD", "OPTIONS", "TRACE"]
+        return method in self.SAFE_METHODS
     
     def _is_exempt_route(self, path: str) -> bool:
         """
@@ -154,34 +173,40 @@ class CSRFProtectionMiddleware(BaseHTTPMiddleware):
         Returns:
             bool: True se isenta
         """
-        for exempt_path in CSRF_EXEMPT_ROUTES:
-            if path.startswith(exempt_path):
-                return True
-        return False
+        return path.startswith(CSRF_EXEMPT_PREFIXES)
     
-    def _get_token_from_request(self, request: Request) -> str | None:
+    def _get_cookie(self, scope: Scope) -> str | None:
+        """Lê o cookie CSRF dos headers crus da requisição"""
+        for key, value in scope["headers"]:
+            if key == b"cookie":
+                token = cookie_parser(value.decode("latin-1")).get(self.cookie_name)
+                if token:
+                    return token
+        return None
+    
+    def _get_token_from_request(self, scope: Scope) -> str | None:
         """
         Extrai token CSRF da requisição
         
         Ordem de prioridade:
         1. Header X-CSRF-Token
-        2. Form field csrf_token
-        3. Cookie csrf_token
+        2. Cookie csrf_token
         
         Args:
-            request: Request do FastAPI
+            scope: Scope ASGI da requisição
             
         Returns:
             str | None: Token CSRF ou None
         """
         # 1. Tentar header
-        token = request.headers.get(self.header_name)
-        if token:
-            logger.debug(f"🔍 Token CSRF encontrado no header: {token[:20]}...")
-            return token
+        for key, value in scope["headers"]:
+            if key == self._header_key and value:
+                token = value.decode("latin-1")
+                logger.debug(f"🔍 Token CSRF encontrado no header: {token[:20]}...")
+                return token
         
         # 2. Tentar cookie
-        token = request.cookies.get(self.cookie_name)
+        token = self._get_cookie(scope)
         if token:
             logger.debug(f"🔍 Token CSRF encontrado no cookie: {token[:20]}...")
             return token
@@ -189,71 +214,76 @@ class CSRFProtectionMiddleware(BaseHTTPMiddleware):
         logger.warning("⚠️  Token CSRF não encontrado na requisição")
         return None
     
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
+    def _set_cookie_header(self) -> Tuple[bytes, bytes]:
+        """Gera um novo token e o header Set-Cookie correspondente"""
+        token = csrf_generator.generate_token()
+        logger.debug(f"🍪 Cookie CSRF definido: {token[:20]}...")
+        return (b"set-cookie", self._cookie_prefix + token.encode("latin-1") + self._cookie_suffix)
+    
+    async def _call_with_new_cookie(self, scope: Scope, receive: Receive, send: Send) -> None:
+        """Encaminha a requisição anexando um novo cookie CSRF à resposta"""
+        async def send_with_cookie(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", ()))
+                headers.append(self._set_cookie_header())
+                message["headers"] = headers
+            await send(message)
+        
+        await self.app(scope, receive, send_with_cookie)
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
         """
         Processa a requisição e aplica proteção CSRF
         """
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        method = scope["method"]
+        path = scope["path"]
+        
         # Métodos seguros não precisam de validação
-        if self._is_safe_method(request.method):
-            response = await call_next(request)
-            
+        if self._is_safe_method(method):
             # Se não tem cookie CSRF, gerar e adicionar
-            if not request.cookies.get(self.cookie_name):
-                token = csrf_generator.generate_token()
-                response.set_cookie(
-                    key=self.cookie_name,
-                    value=token,
-                    max_age=CSRF_TOKEN_MAX_AGE,
-                    secure=self.cookie_secure,
-                    httponly=self.cookie_httponly,
-                    samesite=self.cookie_samesite,
-                    path="/"
-                )
-                logger.debug(f"🍪 Cookie CSRF definido: {token[:20]}...")
-            
-            return response
+            if self._get_cookie(scope):
+                await self.app(scope, receive, send)
+            else:
+                await self._call_with_new_cookie(scope, receive, send)
+            return
         
         # Verificar se rota está isenta
-        if self._is_exempt_route(request.url.path):
-            logger.debug(f"✅ Rota isenta de CSRF: {request.url.path}")
-            response = await call_next(request)
-            return response
+        if self._is_exempt_route(path):
+            logger.debug(f"✅ Rota isenta de CSRF: {path}")
+            await self.app(scope, receive, send)
+            return
         
         # Validar token CSRF
-        token = self._get_token_from_request(request)
+        token = self._get_token_from_request(scope)
         
         if not token:
-            logger.error(f"🚫 CSRF: Token não fornecido em {request.method} {request.url.path}")
-            raise HTTPException(
+            logger.error(f"🚫 CSRF: Token não fornecido em {method} {path}")
+            CSRF_REJECTIONS.labels("missing").inc()
+            response = JSONResponse(
                 status_code=status.HTTP_403_FORBIDDEN,
-                detail="CSRF token missing. Include X-CSRF-Token header or csrf_token cookie."
+                content={"detail": "CSRF token missing. Include X-CSRF-Token header or csrf_token cookie."}
             )
+            await response(scope, receive, send)
+            return
         
         if not csrf_generator.validate_token(token):
-            logger.error(f"🚫 CSRF: Token inválido em {request.method} {request.url.path}")
-            raise HTTPException(
+            logger.error(f"🚫 CSRF: Token inválido em {method} {path}")
+            CSRF_REJECTIONS.labels("invalid").inc()
+            response = JSONResponse(
                 status_code=status.HTTP_403_FORBIDDEN,
-                detail="Invalid or expired CSRF token"
+                content={"detail": "Invalid or expired CSRF token"}
             )
+            await response(scope, receive, send)
+            return
         
-        logger.debug(f"✅ CSRF válido para {request.method} {request.url.path}")
-        
-        # Processar requisição
-        response = await call_next(request)
-        
-        # Renovar cookie CSRF após requisição bem-sucedida
-        new_token = csrf_generator.generate_token()
-        response.set_cookie(
-            key=self.cookie_name,
-            value=new_token,
-            max_age=CSRF_TOKEN_MAX_AGE,
-            secure=self.cookie_secure,
-            httponly=self.cookie_httponly,
-            samesite=self.cookie_samesite,
-            path="/"
-        )
+        logger.debug(f"✅ CSRF válido para {method} {path}")
         
-        return response
+        # Processar requisição e renovar cookie CSRF
+        await self._call_with_new_cookie(scope, receive, send)
 
 
 # ============ Funções Helper ============
@@ -0,0 +1,314 @@
+"""
+Resumo do dashboard do gestor
+=============================
+
+Tabela `resumos_entidades` com uma linha por entidade (totais e somas de
+contratos, vencimentos próximos, certidões irregulares, riscos críticos),
+para que GET /dashboard/gestor seja uma leitura por chave em vez de
+várias agregações sobre as tabelas de origem.
+
+Manutenção:
+- Cada fonte declara a contribuição de uma linha para as colunas do
+  resumo; eventos ORM aplicam `contribuição(nova) - contribuição(antiga)`
+  como delta na mesma transação da escrita
+- A task `sentinela.periodic.dashboard_recalcular` recalcula tudo com um
+  GROUP BY por fonte: cobre escritas fora do ORM e a virada do dia nas
+  colunas "vencendo" (janela de DASHBOARD_JANELA_DIAS)
+
+`versao` só muda quando algum valor muda, então o ETag da resposta
+continua válido enquanto o resumo da entidade não se altera.
+
+Novas fontes entram com `registrar_fonte`.
+
+Repositório: adrisa007/sentinela (ID: 1112237272)
+"""
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import logging
+
+from sqlalchemy import Select, and_, case, func, insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.escritas import Valores, observar_escritas
+from app.core.models import Certidao, Contrato, ResumoEntidade, StatusCertidao, StatusContrato
+
+logger = logging.getLogger(__name__)
+
+COLUNAS = (
+    "contratos_total",
+    "contratos_vigentes",
+    "contratos_vencendo",
+    "valor_total",
+    "valor_vigente",
+    "certidoes_total",
+    "certidoes_irregulares",
+    "certidoes_vencendo",
+    "riscos_criticos",
+)
+
+
+@dataclass(frozen=True)
+class FonteResumo:
+    """
+    Tabela de origem do resumo
+
+    Attributes:
+        model: Modelo ORM cujas escritas atualizam o resumo
+        campos: Atributos lidos por `contribuicao` (entidade_id incluído)
+        contribuicao: ({campo: valor}, hoje) → {coluna: valor} de uma linha
+        agregado: hoje → SELECT entidade_id + colunas rotuladas, GROUP BY entidade_id
+    """
+    model: type
+    campos: Tuple[str, ...]
+    contribuicao: Callable[[Dict[str, Any], date], Dict[str, float]]
+    agregado: Callable[[date], Select]
+
+
+FONTES: List[FonteResumo] = []
+
+
+def _fim_janela(hoje: date) -> date:
+    return hoje + timedelta(days=settings.DASHBOARD_JANELA_DIAS)
+
+
+# ============ Manutenção por escrita (ORM) ============
+
+def _aplicar(connection, entidade_id: int, deltas: Dict[str, float]) -> None:
+    """colunas += deltas na linha da entidade (criando-a se preciso) e nova versão"""
+    agora = datetime.now(timezone.utc)
+    dialect = connection.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        stmt = upsert(ResumoEntidade).values(entidade_id=entidade_id, versao=1, atualizado_em=agora, **deltas)
+        set_ = {coluna: getattr(ResumoEntidade, coluna) + delta for coluna, delta in deltas.items()}
+        connection.execute(stmt.on_conflict_do_update(
+            index_elements=["entidade_id"],
+            set_={**set_, "versao": ResumoEntidade.versao + 1, "atualizado_em": agora},
+        ))
+        return
+
+    result = connection.execute(
+        update(ResumoEntidade)
+        .where(ResumoEntidade.entidade_id == entidade_id)
+        .values(
+            versao=ResumoEntidade.versao + 1,
+            atualizado_em=agora,
+            **{coluna: getattr(ResumoEntidade, coluna) + delta for coluna, delta in deltas.items()},
+        )
+    )
+    if result.rowcount == 0:
+        connection.execute(insert(ResumoEntidade).values(
+            entidade_id=entidade_id, versao=1, atualizado_em=agora, **deltas
+        ))
+
+
+def aplicar_deltas(connection, entidade_id: int, deltas: Dict[str, float]) -> None:
+    """
+    Aplica deltas ao resumo da entidade (para fontes gravadas em lote, fora do ORM)
+
+    Deltas nulos são ignorados; sem nenhum, a versão (e o ETag) não muda.
+    """
+    alteradas = {coluna: delta for coluna, delta in deltas.items() if delta}
+    if alteradas:
+        _aplicar(connection, entidade_id, alteradas)
+
+
+def _propagar(connection, fonte: FonteResumo, antes: Optional[Valores], depois: Optional[Valores]) -> None:
+    hoje = date.today()
+    deltas: Dict[int, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+    for valores, sinal in ((antes, -1), (depois, 1)):
+        if valores and valores["entidade_id"] is not None:
+            for coluna, valor in fonte.contribuicao(valores, hoje).items():
+                deltas[valores["entidade_id"]][coluna] += sinal * valor
+    for entidade_id, colunas in deltas.items():
+        aplicar_deltas(connection, entidade_id, colunas)
+
+
+def registrar_fonte(fonte: FonteResumo) -> None:
+    """Inclui uma tabela de origem no resumo e liga seus eventos de escrita"""
+    FONTES.append(fonte)
+
+    def _propagar_fonte(connection, target, antes, depois) -> None:
+        _propagar(connection, fonte, antes, depois)
+
+    observar_escritas(fonte.model, fonte.campos, _propagar_fonte)
+
+
+# ============ Fontes ============
+
+STATUS_CONTRATO_ATIVOS = (StatusContrato.VIGENTE, StatusContrato.SUSPENSO)
+STATUS_CERTIDAO_IRREGULARES = (StatusCertidao.VENCIDA, StatusCertidao.IRREGULAR)
+
+
+def _contribuicao_contrato(c: Dict[str, Any], hoje: date) -> Dict[str, float]:
+    vigente = c["status"] == StatusContrato.VIGENTE
+    vencendo = c["status"] in STATUS_CONTRATO_ATIVOS and hoje <= c["vigencia"] <= _fim_janela(hoje)
+    return {
+        "contratos_total": 1,
+        "contratos_vigentes": int(vigente),
+        "contratos_vencendo": int(vencendo),
+        "valor_total": c["valor"] or 0.0,
+        "valor_vigente": (c["valor"] or 0.0) if vigente else 0.0,
+    }
+
+
+def _agregado_contratos(hoje: date) -> Select:
+    vigente = Contrato.status == StatusContrato.VIGENTE
+    vencendo = and_(Contrato.status.in_(STATUS_CONTRATO_ATIVOS), Contrato.vigencia.between(hoje, _fim_janela(hoje)))
+    return select(
+        Contrato.entidade_id,
+        func.count().label("contratos_total"),
+        func.sum(case((vigente, 1), else_=0)).label("contratos_vigentes"),
+        func.sum(case((vencendo, 1), else_=0)).label("contratos_vencendo"),
+        func.sum(Contrato.valor).label("valor_total"),
+        func.sum(case((vigente, Contrato.valor), else_=0)).label("valor_vigente"),
+    ).group_by(Contrato.entidade_id)
+
+
+registrar_fonte(FonteResumo(
+    model=Contrato,
+    campos=("entidade_id", "status", "valor", "vigencia"),
+    contribuicao=_contribuicao_contrato,
+    agregado=_agregado_contratos,
+))
+
+
+def _contribuicao_certidao(c: Dict[str, Any], hoje: date) -> Dict[str, float]:
+    return {
+        "certidoes_total": 1,
+        "certidoes_irregulares": int(c["status"] in STATUS_CERTIDAO_IRREGULARES),
+        "certidoes_vencendo": int(hoje <= c["data_validade"] <= _fim_janela(hoje)),
+    }
+
+
+def _agregado_certidoes(hoje: date) -> Select:
+    irregular = Certidao.status.in_(STATUS_CERTIDAO_IRREGULARES)
+    vencendo = Certidao.data_validade.between(hoje, _fim_janela(hoje))
+    return select(
+        Certidao.entidade_id,
+        func.count().label("certidoes_total"),
+        func.sum(case((irregular, 1), else_=0)).label("certidoes_irregulares"),
+        func.sum(case((vencendo, 1), else_=0)).label("certidoes_vencendo"),
+    ).group_by(Certidao.entidade_id)
+
+
+registrar_fonte(FonteResumo(
+    model=Certidao,
+    campos=("entidade_id", "status", "data_validade"),
+    contribuicao=_contribuicao_certidao,
+    agregado=_agregado_certidoes,
+))
+
+
+# ============ Recálculo (Celery) ============
+
+def _difere(resumo: ResumoEntidade, valores: Dict[str, float]) -> bool:
+    return any(abs((getattr(resumo, coluna) or 0) - valores[coluna]) > 0.005 for coluna in COLUNAS)
+
+
+def _inserir_resumo(db: Session, entidade_id: int, agora: datetime, valores: Dict[str, float]) -> bool:
+    """INSERT da linha da entidade; False se um delta concorrente já a criou"""
+    dialect = db.get_bind().dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as upsert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as upsert
+        stmt = upsert(ResumoEntidade).values(entidade_id=entidade_id, versao=1, atualizado_em=agora, **valores)
+        return db.execute(stmt.on_conflict_do_nothing(index_elements=["entidade_id"])).rowcount == 1
+
+    db.execute(insert(ResumoEntidade).values(entidade_id=entidade_id, versao=1, atualizado_em=agora, **valores))
+    return True
+
+
+def recalcular_resumos(db: Session, hoje: Optional[date] = None) -> Dict[str, int]:
+    """
+    Recalcula o resumo de todas as entidades a partir das fontes
+
+    Só as linhas com algum valor diferente ganham nova versão (e novo
+    ETag); as demais ficam intactas. A gravação é um compare-and-set na
+    versão lida antes das agregações (`versao = versao + 1 WHERE versao =
+    :lida`): se um delta de escrita chegou nesse meio tempo, a linha é
+    mantida como está e fica para o próximo ciclo, em vez de perder o delta.
+
+    Returns:
+        dict: {"entidades": n, "alteradas": n, "concorrentes": n}
+    """
+    hoje = hoje or date.today()
+    existentes = {r.entidade_id: r for r in db.scalars(select(ResumoEntidade))}
+
+    totais: Dict[int, Dict[str, float]] = defaultdict(lambda: dict.fromkeys(COLUNAS, 0))
+    for fonte in FONTES:
+        for linha in db.execute(fonte.agregado(hoje)).mappings():
+            for coluna, valor in linha.items():
+                if coluna != "entidade_id":
+                    totais[linha["entidade_id"]][coluna] += valor or 0
+
+    entidades = set(totais) | set(existentes)
+    agora = datetime.now(timezone.utc)
+    alteradas = concorrentes = 0
+    for entidade_id in entidades:
+        valores = totais[entidade_id]
+        resumo = existentes.get(entidade_id)
+        if resumo is None:
+            gravada = _inserir_resumo(db, entidade_id, agora, valores)
+        elif _difere(resumo, valores):
+            gravada = db.execute(
+                update(ResumoEntidade)
+                .where(ResumoEntidade.entidade_id == entidade_id, ResumoEntidade.versao == resumo.versao)
+                .values(versao=ResumoEntidade.versao + 1, atualizado_em=agora, **valores)
+                .execution_options(synchronize_session=False)
+            ).rowcount == 1
+        else:
+            continue
+        if gravada:
+            alteradas += 1
+        else:
+            concorrentes += 1
+
+    db.commit()
+    resultado = {"entidades": len(entidades), "alteradas": alteradas, "concorrentes": concorrentes}
+    logger.info(f"📊 Resumos do dashboard recalculados: {resultado}")
+    return resultado
+
+
+def run_recalculo() -> Dict[str, int]:
+    """Ponto de entrada síncrono (Celery)"""
+    from app.core.database import SessionLocal
+    import app.core.riscos  # noqa: F401  (registra a fonte de riscos no worker)
+
+    db = SessionLocal()
+    try:
+        return recalcular_resumos(db)
+    finally:
+        db.close()
+
+
+# ============ Consulta ============
+
+async def obter_resumo(db: AsyncSession, entidade_id: int) -> Dict[str, Any]:
+    """
+    Resumo da entidade (zeros e versão 0 se ainda não houver linha)
+
+    Returns:
+        dict: colunas do resumo + versao + atualizado_em (UTC ou None)
+    """
+    resumo = await db.get(ResumoEntidade, entidade_id, populate_existing=True)
+    if resumo is None:
+        return {**dict.fromkeys(COLUNAS, 0), "versao": 0, "atualizado_em": None}
+
+    atualizado_em = resumo.atualizado_em
+    if atualizado_em is not None and atualizado_em.tzinfo is None:
+        atualizado_em = atualizado_em.replace(tzinfo=timezone.utc)  # SQLite não guarda fuso
+    return {
+        **{coluna: getattr(resumo, coluna) for coluna in COLUNAS},
+        "versao": resumo.versao,
+        "atualizado_em": atualizado_em,
+    }
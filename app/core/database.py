@@ -1,13 +1,70 @@
+from typing import Optional
+
 from sqlalchemy import create_engine, text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 from app.core.config import settings
+from app.core.pool_metrics import InstrumentedAsyncQueuePool, InstrumentedQueuePool, get_pool_stats
 
 
-engine = create_engine(
-    settings.DATABASE_URL,
-    pool_pre_ping=True,
-    echo=settings.DEBUG
-)
+# ============ Fábrica de Engines ============
+
+def build_engine_options(database_url: str, pool_class: type) -> dict:
+    """
+    Monta os argumentos de create_engine a partir de Settings
+    
+    SQLite em memória mantém o pool padrão do dialeto (conexão única);
+    demais bancos usam QueuePool instrumentado com tamanho, overflow,
+    recycle, timeout e pre-ping configuráveis.
+    
+    Args:
+        database_url: URL do banco
+        pool_class: Classe de pool instrumentada (sync ou async)
+        
+    Returns:
+        dict: kwargs para create_engine/create_async_engine
+    """
+    url = make_url(database_url)
+    options = {
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "echo": settings.DEBUG,
+    }
+    
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        return options
+    
+    options.update({
+        "poolclass": pool_class,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+    })
+    
+    # Neon exige SSL; respeita sslmode/ssl explícitos na URL
+    if url.host and "neon.tech" in url.host and not ({"sslmode", "ssl"} & set(url.query)):
+        if url.get_backend_name() == "postgresql" and url.get_driver_name() == "asyncpg":
+            options["connect_args"] = {"ssl": "require"}
+        else:
+            options["connect_args"] = {"sslmode": "require"}
+    
+    return options
+
+
+def create_db_engine(database_url: Optional[str] = None) -> Engine:
+    """Cria o engine síncrono da aplicação (único por processo)"""
+    database_url = database_url or settings.DATABASE_URL
+    return create_engine(database_url, **build_engine_options(database_url, InstrumentedQueuePool))
+
+
+def create_async_db_engine(database_url: Optional[str] = None) -> AsyncEngine:
+    """Cria o engine assíncrono da aplicação com as mesmas configurações de pool"""
+    database_url = get_async_database_url(database_url or settings.DATABASE_URL)
+    return create_async_engine(database_url, **build_engine_options(database_url, InstrumentedAsyncQueuePool))
+
+
+engine = create_db_engine()
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 Base = declarative_base()
@@ -22,6 +79,59 @@ def get_db():
         db.close()
 
 
+# ============ Engine Assíncrono (asyncpg / aiosqlite) ============
+
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgres": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def get_async_database_url(database_url: str) -> str:
+    """
+    Converte a DATABASE_URL síncrona para o driver assíncrono equivalente
+    
+    - postgresql:// → postgresql+asyncpg:// (sslmode=require → ssl=require)
+    - sqlite:///    → sqlite+aiosqlite:///
+    
+    Args:
+        database_url: URL no formato usado por create_engine
+        
+    Returns:
+        str: URL para create_async_engine
+    """
+    url = make_url(database_url)
+    drivername = ASYNC_DRIVERS.get(url.drivername, url.drivername)
+    
+    query = dict(url.query)
+    if drivername == "postgresql+asyncpg":
+        # asyncpg não entende os parâmetros libpq sslmode/channel_binding
+        sslmode = query.pop("sslmode", None)
+        query.pop("channel_binding", None)
+        if sslmode:
+            query["ssl"] = sslmode
+    
+    return url.set(drivername=drivername, query=query).render_as_string(hide_password=False)
+
+
+async_engine = create_async_db_engine()
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+
+async def get_async_db():
+    """Dependency para obter sessão assíncrona do banco de dados"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
 def init_db():
     """Inicializa o banco de dados criando todas as tabelas"""
     Base.metadata.create_all(bind=engine)
@@ -41,3 +151,32 @@ def check_database_connection() -> bool:
     except Exception as e:
         print(f"Erro ao conectar ao banco: {e}")
         return False
+
+
+async def check_async_database_connection() -> bool:
+    """
+    SELECT 1 pelo engine assíncrono (o pool das rotas HTTP)
+    
+    Returns:
+        bool: True se conectado, False caso contrário
+    """
+    try:
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+        return True
+    except Exception as e:
+        print(f"Erro ao conectar ao banco: {e}")
+        return False
+
+
+def get_db_pool_stats() -> dict:
+    """
+    Estatísticas dos pools de conexão deste worker
+    
+    Returns:
+        dict: Estado e métricas de checkout dos engines sync e async
+    """
+    return {
+        "sync": get_pool_stats(engine),
+        "async": get_pool_stats(async_engine.sync_engine),
+    }
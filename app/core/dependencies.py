@@ -2,18 +2,22 @@
 Dependencies para autenticação e autorização
 Versão: 2.0 - MFA TOTP obrigatório para ROOT/GESTOR
 """
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, Response, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from jose import JWTError, jwt
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import Optional
 from datetime import datetime
 import logging
+import secrets
 
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.core.models import User, UserRole
 from app.core.config import settings
 from app.core.auth import verify_totp
+from app.core.principal_cache import principal_cache, UserSnapshot, EntidadeSnapshot
+from app.core.rate_limit import limiter
 
 # Configurar logging
 logger = logging.getLogger(__name__)
@@ -32,13 +36,18 @@ class CurrentUser:
         email: Email do usuário
         role: Role/perfil do usuário (ROOT, GESTOR, OPERADOR)
         mfa_verified: Se o MFA foi verificado (obrigatório para ROOT/GESTOR)
-        user: Objeto User completo do SQLAlchemy
+        user: User do SQLAlchemy ou UserSnapshot (quando vindo do principal cache)
     """
-    def __init__(self, user: User, mfa_verified: bool = False):
+    def __init__(self, user: "User | UserSnapshot", mfa_verified: bool = False):
         self.id = user.id
         self.username = user.username
         self.email = user.email
         self.role = user.role
+        self.full_name = user.full_name
+        self.is_active = user.is_active
+        self.mfa_enabled = user.mfa_enabled
+        self.entidade_id = user.entidade_id
+        self.last_login = user.last_login
         self.mfa_verified = mfa_verified
         self.user = user
         
@@ -87,22 +96,24 @@ def decode_jwt_token(token: str) -> dict:
 
 
 async def get_current_user(
+    request: Request,
     credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ) -> CurrentUser:
     """
     🔐 ATUALIZADO: Obtém usuário autenticado com MFA OBRIGATÓRIO para ROOT/GESTOR
     
     Fluxo de Validação:
     1. ✅ Decodifica e valida JWT
-    2. ✅ Verifica existência e status do usuário
+    2. ✅ Verifica existência e status do usuário (via principal cache)
     3. ✅ **EXIGE MFA TOTP para ROOT e GESTOR**
     4. ✅ Valida código TOTP com janela de tempo
     5. ✅ Retorna CurrentUser autenticado
     
     Args:
+        request: Requisição atual (recebe `state.user_id` para o rate limiting por usuário)
         credentials: Credenciais Bearer token do header Authorization
-        db: Sessão do banco de dados (injetada)
+        db: Sessão assíncrona do banco de dados (injetada)
         
     Returns:
         CurrentUser: Objeto com dados do usuário autenticado
@@ -141,15 +152,23 @@ async def get_current_user(
             headers={"WWW-Authenticate": "Bearer"}
         )
     
-    # 3. Buscar usuário no banco de dados
-    user = db.query(User).filter(User.id == user_id).first()
-    if not user:
-        logger.warning(f"Tentativa de acesso com user_id inexistente: {user_id}")
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Usuário não encontrado",
-            headers={"WWW-Authenticate": "Bearer"}
-        )
+    # 3. Buscar usuário (principal cache → banco de dados)
+    cache_key = principal_cache.make_key(user_id, payload)
+    user = principal_cache.get_user(cache_key)
+    mfa_secret: Optional[str] = None
+    from_cache = user is not None
+    if not from_cache:
+        result = await db.execute(select(User).where(User.id == user_id))
+        db_user = result.scalar_one_or_none()
+        if not db_user:
+            logger.warning(f"Tentativa de acesso com user_id inexistente: {user_id}")
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Usuário não encontrado",
+                headers={"WWW-Authenticate": "Bearer"}
+            )
+        user = UserSnapshot.from_model(db_user)
+        mfa_secret = db_user.mfa_secret
     
     # 4. Verificar se usuário está ativo
     if not user.is_active:
@@ -179,47 +198,51 @@ async def get_current_user(
                 headers={"X-MFA-Required": "true"}
             )
         
-        if not user.mfa_secret:
-            logger.error(
-                f"MFA habilitado mas sem secret para {user.username}"
-            )
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail="Erro de configuração MFA. Entre em contato com o administrador.",
-                headers={"X-MFA-Required": "true"}
-            )
-        
-        # 5.2. Extrair código TOTP do payload
-        totp_token: Optional[str] = payload.get("totp")
-        if not totp_token:
-            logger.warning(
-                f"Token JWT sem código TOTP para {user.username} (Role: {user.role})"
-            )
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail=(
-                    f"🔒 Código MFA (TOTP) não fornecido. "
-                    f"Usuários {user.role.value} devem incluir código MFA no login."
-                ),
-                headers={
-                    "X-MFA-Required": "true",
-                    "X-MFA-Setup-URL": "/auth/mfa/setup"
-                }
-            )
-        
-        # 5.3. Validar código TOTP
-        if not verify_totp(user.mfa_secret, totp_token):
-            logger.warning(
-                f"Código TOTP inválido para {user.username} - Código: {totp_token[:2]}***"
-            )
-            raise HTTPException(
-                status_code=status.HTTP_403_FORBIDDEN,
-                detail=(
-                    "🔒 Código MFA (TOTP) inválido ou expirado. "
-                    "Gere um novo código no seu aplicativo autenticador."
-                ),
-                headers={"X-MFA-Failed": "true"}
-            )
+        # O secret não fica no principal cache: o TOTP do token é validado
+        # quando o principal é carregado do banco; acertos seguintes do mesmo
+        # token (mesma chave jti/iat) já passaram por esta validação
+        if not from_cache:
+            if not mfa_secret:
+                logger.error(
+                    f"MFA habilitado mas sem secret para {user.username}"
+                )
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="Erro de configuração MFA. Entre em contato com o administrador.",
+                    headers={"X-MFA-Required": "true"}
+                )
+            
+            # 5.2. Extrair código TOTP do payload
+            totp_token: Optional[str] = payload.get("totp")
+            if not totp_token:
+                logger.warning(
+                    f"Token JWT sem código TOTP para {user.username} (Role: {user.role})"
+                )
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail=(
+                        f"🔒 Código MFA (TOTP) não fornecido. "
+                        f"Usuários {user.role.value} devem incluir código MFA no login."
+                    ),
+                    headers={
+                        "X-MFA-Required": "true",
+                        "X-MFA-Setup-URL": "/auth/mfa/setup"
+                    }
+                )
+            
+            # 5.3. Validar código TOTP
+            if not verify_totp(mfa_secret, totp_token):
+                logger.warning(
+                    f"Código TOTP inválido para {user.username} - Código: {totp_token[:2]}***"
+                )
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail=(
+                        "🔒 Código MFA (TOTP) inválido ou expirado. "
+                        "Gere um novo código no seu aplicativo autenticador."
+                    ),
+                    headers={"X-MFA-Failed": "true"}
+                )
         
         # 5.4. MFA verificado com sucesso
         mfa_verified = True
@@ -233,7 +256,13 @@ async def get_current_user(
             f"Usuário {user.username} autenticado sem MFA (Role: {user.role})"
         )
     
-    # 6. Retornar CurrentUser
+    if not from_cache:
+        principal_cache.set_user(cache_key, user)
+    
+    # 6. Identificar usuário para o rate limiting (get_identifier → "user:<id>")
+    request.state.user_id = user.id
+    
+    # 7. Retornar CurrentUser
     return CurrentUser(user=user, mfa_verified=mfa_verified)
 
 
@@ -301,6 +330,60 @@ def require_mfa_verified():
     return mfa_checker
 
 
+async def rate_limit_usuario(
+    request: Request,
+    response: Response,
+    current_user: CurrentUser = Depends(get_current_user)
+) -> None:
+    """
+    Aplica os limites padrão do limiter (RATE_LIMIT_GLOBAL) por usuário autenticado
+    
+    Faz o papel do SlowAPIMiddleware nas rotas autenticadas, mas depois de
+    get_current_user: a chave já é "user:<id>" e passa pela estratégia
+    <estratégia>+batched. Rotas com @limiter.limit mantêm o próprio limite.
+    
+    Usage:
+        router = APIRouter(dependencies=[Depends(rate_limit_usuario)])
+    
+    Raises:
+        RateLimitExceeded: Limite excedido (429 via rate_limit_exceeded_handler)
+    """
+    app_limiter = getattr(request.app.state, "limiter", limiter)
+    if not app_limiter.enabled:
+        return
+    app_limiter._check_request_limit(request, request.scope["route"].endpoint, in_middleware=True)
+    view_rate_limit = getattr(request.state, "view_rate_limit", None)
+    if view_rate_limit is not None:
+        app_limiter._inject_headers(response, view_rate_limit)
+
+
+async def require_diagnostics_token(request: Request) -> None:
+    """
+    Protege os endpoints internos de diagnóstico (/metrics, /health/pool, ...)
+    
+    Exige `Authorization: Bearer <DIAGNOSTICS_TOKEN>` (no Prometheus,
+    `authorization.credentials` do scrape). Sem token configurado os
+    endpoints ficam desligados: expõem topologia e carga do worker.
+    
+    Usage:
+        @router.get("/pool", dependencies=[Depends(require_diagnostics_token)])
+    
+    Raises:
+        HTTPException: 404 sem DIAGNOSTICS_TOKEN, 401 com token ausente ou inválido
+    """
+    if not settings.DIAGNOSTICS_TOKEN:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Not Found")
+    
+    scheme, _, token = request.headers.get("Authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(token.encode(), settings.DIAGNOSTICS_TOKEN.encode()):
+        logger.warning(f"🚫 Diagnóstico: token inválido em {request.url.path}")
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Token de diagnóstico inválido",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+
+
 # ============ Aliases convenientes ============
 
 # Apenas ROOT pode acessar
@@ -321,10 +404,23 @@ require_authenticated = require_operador
 from app.core.models import Entidade
 
 
+async def _load_entidade(entidade_id: int, db: AsyncSession) -> Optional[EntidadeSnapshot]:
+    """Obtém snapshot da entidade do principal cache ou, em caso de miss, do banco"""
+    entidade = principal_cache.get_entidade(entidade_id)
+    if entidade is None:
+        result = await db.execute(select(Entidade).where(Entidade.id == entidade_id))
+        db_entidade = result.scalar_one_or_none()
+        if db_entidade is None:
+            return None
+        entidade = EntidadeSnapshot.from_model(db_entidade)
+        principal_cache.set_entidade(entidade)
+    return entidade
+
+
 async def get_current_entidade(
     current_user: CurrentUser = Depends(get_current_user),
-    db: Session = Depends(get_db)
-) -> Entidade:
+    db: AsyncSession = Depends(get_async_db)
+) -> EntidadeSnapshot:
     """
     🏢 Obtém a entidade associada ao usuário logado
     
@@ -333,10 +429,10 @@ async def get_current_entidade(
     
     Args:
         current_user: Usuário autenticado (injetado)
-        db: Sessão do banco de dados (injetada)
+        db: Sessão assíncrona do banco de dados (injetada)
         
     Returns:
-        Entidade: Objeto Entidade associado ao usuário
+        EntidadeSnapshot: Snapshot imutável da Entidade associada ao usuário
         
     Raises:
         HTTPException 404: Se usuário não tem entidade associada
@@ -344,7 +440,7 @@ async def get_current_entidade(
         
     Usage:
         @app.get("/my-entity")
-        async def get_my_entity(entidade: Entidade = Depends(get_current_entidade)):
+        async def get_my_entity(entidade: EntidadeSnapshot = Depends(get_current_entidade)):
             return entidade
     """
     
@@ -361,10 +457,8 @@ async def get_current_entidade(
             )
         )
     
-    # Buscar entidade no banco
-    entidade = db.query(Entidade).filter(
-        Entidade.id == current_user.user.entidade_id
-    ).first()
+    # Buscar entidade (principal cache → banco de dados)
+    entidade = await _load_entidade(current_user.user.entidade_id, db)
     
     if not entidade:
         logger.error(
@@ -397,8 +491,8 @@ async def get_current_entidade(
 
 async def get_current_entidade_optional(
     current_user: CurrentUser = Depends(get_current_user),
-    db: Session = Depends(get_db)
-) -> Optional[Entidade]:
+    db: AsyncSession = Depends(get_async_db)
+) -> Optional[EntidadeSnapshot]:
     """
     🏢 Obtém a entidade do usuário logado (opcional - não lança erro se não houver)
     
@@ -407,19 +501,18 @@ async def get_current_entidade_optional(
     
     Args:
         current_user: Usuário autenticado
-        db: Sessão do banco de dados
+        db: Sessão assíncrona do banco de dados
         
     Returns:
-        Entidade ou None: Entidade associada ou None se não houver
+        EntidadeSnapshot ou None: Entidade associada ou None se não houver
     """
     
     if not current_user.user.entidade_id:
         return None
     
-    entidade = db.query(Entidade).filter(
-        Entidade.id == current_user.user.entidade_id,
-        Entidade.is_active == True
-    ).first()
+    entidade = await _load_entidade(current_user.user.entidade_id, db)
+    if entidade is None or not entidade.is_active:
+        return None
     
     return entidade
 
@@ -434,8 +527,8 @@ def require_entidade():
             return {"message": "Usuário tem entidade"}
     """
     async def entidade_checker(
-        entidade: Entidade = Depends(get_current_entidade)
-    ) -> Entidade:
+        entidade: EntidadeSnapshot = Depends(get_current_entidade)
+    ) -> EntidadeSnapshot:
         # A validação já é feita por get_current_entidade
         return entidade
     
@@ -463,7 +556,7 @@ def require_active_entidade():
         None (usa Depends internamente)
         
     Returns:
-        Entidade: Objeto Entidade com status ATIVA
+        EntidadeSnapshot: Entidade com status ATIVA
         
     Raises:
         HTTPException 404: Se usuário não tem entidade associada
@@ -484,8 +577,8 @@ def require_active_entidade():
     Security Level: 🔒🔒🔒 HIGH
     """
     async def check_entidade_active(
-        entidade: Entidade = Depends(get_current_entidade)
-    ) -> Entidade:
+        entidade: EntidadeSnapshot = Depends(get_current_entidade)
+    ) -> EntidadeSnapshot:
         from app.core.models import StatusEntidade
         
         # Verificar se entidade está ATIVA
@@ -562,8 +655,8 @@ def require_entidade_status(*allowed_statuses: 'StatusEntidade'):
             return {"message": "Acesso permitido"}
     """
     async def check_entidade_status(
-        entidade: Entidade = Depends(get_current_entidade)
-    ) -> Entidade:
+        entidade: EntidadeSnapshot = Depends(get_current_entidade)
+    ) -> EntidadeSnapshot:
         if entidade.status not in allowed_statuses:
             logger.warning(
                 f"🚫 Acesso negado: Entidade '{entidade.nome}' status '{entidade.status.value}' "
@@ -589,8 +682,8 @@ def require_entidade_status(*allowed_statuses: 'StatusEntidade'):
 
 async def get_entidade_with_status_check(
     current_user: CurrentUser = Depends(get_current_user),
-    db: Session = Depends(get_db)
-) -> Entidade:
+    db: AsyncSession = Depends(get_async_db)
+) -> EntidadeSnapshot:
     """
     🏢 Versão de get_current_entidade com validação automática de status ATIVA
     
@@ -598,7 +691,7 @@ async def get_entidade_with_status_check(
     Use esta quando quiser sempre validar status ATIVA.
     
     Returns:
-        Entidade: Entidade ATIVA do usuário
+        EntidadeSnapshot: Entidade ATIVA do usuário
         
     Raises:
         HTTPException 404: Usuário sem entidade
@@ -0,0 +1,75 @@
+"""
+Escritas ORM com valores antes/depois
+=====================================
+
+Tabelas derivadas (índice de vencimentos, contadores de certidões, resumo
+do dashboard) são mantidas na mesma transação da escrita, a partir dos
+valores da linha antes e depois do flush. `observar_escritas` liga os
+eventos after_insert/after_update/after_delete de um modelo e entrega os
+dois lados ao callback:
+
+- insert: (None, depois)
+- update: (antes, depois), só quando algum dos campos observados mudou
+- delete: (antes, None)
+
+Cada campo observado recebe um listener "set" com active_history, para que
+o valor anterior seja carregado antes da troca mesmo com o atributo
+expirado (após um commit, por exemplo).
+
+Repositório: adrisa007/sentinela (ID: 1112237272)
+"""
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from sqlalchemy import event, inspect
+
+Valores = Dict[str, Any]
+CallbackEscrita = Callable[[Any, Any, Optional[Valores], Optional[Valores]], None]
+
+
+def _manter_historico(target, value, oldvalue, initiator) -> None:
+    """Sem efeito; registrado com active_history para o valor anterior carregar antes da troca"""
+
+
+def valores_atuais(target, campos: Tuple[str, ...]) -> Valores:
+    return {campo: getattr(target, campo) for campo in campos}
+
+
+def valores_anteriores(target, campos: Tuple[str, ...]) -> Valores:
+    """Valores antes do flush em andamento (os atuais para campos não alterados)"""
+    state = inspect(target)
+    valores = {}
+    for campo in campos:
+        history = state.attrs[campo].history
+        if history.has_changes():
+            # Valor anterior None não aparece em `deleted`
+            valores[campo] = history.deleted[0] if history.deleted else None
+        else:
+            valores[campo] = getattr(target, campo)
+    return valores
+
+
+def observar_escritas(model: type, campos: Tuple[str, ...], callback: CallbackEscrita) -> None:
+    """
+    Chama `callback(connection, target, antes, depois)` a cada escrita de `model`
+
+    Args:
+        model: Modelo ORM observado
+        campos: Atributos lidos pelo callback; updates que não os alteram são ignorados
+        callback: Executado dentro do flush, na conexão da transação da escrita
+    """
+    for campo in campos:
+        event.listen(getattr(model, campo), "set", _manter_historico, active_history=True)
+
+    @event.listens_for(model, "after_insert")
+    def _on_insert(mapper, connection, target) -> None:
+        callback(connection, target, None, valores_atuais(target, campos))
+
+    @event.listens_for(model, "after_update")
+    def _on_update(mapper, connection, target) -> None:
+        state = inspect(target)
+        if any(state.attrs[campo].history.has_changes() for campo in campos):
+            callback(connection, target, valores_anteriores(target, campos), valores_atuais(target, campos))
+
+    @event.listens_for(model, "after_delete")
+    def _on_delete(mapper, connection, target) -> None:
+        callback(connection, target, valores_atuais(target, campos), None)
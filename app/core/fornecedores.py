@@ -0,0 +1,125 @@
+"""
+Busca de fornecedores
+=====================
+
+Busca indexada para a listagem e o typeahead de fornecedores, sem
+varreduras `ILIKE '%x%'` na tabela inteira:
+
+- CNPJ/CPF: prefixo de dígitos vira uma faixa no índice único de `cnpj`
+  (`cnpj >= '1234' AND cnpj < '1235'`), usável por qualquer B-tree
+- Texto (razão social / nome fantasia):
+  - PostgreSQL: `ILIKE '%x%'` atendido pelos índices GIN `gin_trgm_ops`
+  - SQLite: MATCH na tabela FTS5 `fornecedores_fts` (tokenizer trigram)
+  - Trigramas exigem ao menos 3 caracteres (BUSCA_MIN_CHARS)
+
+O total é contado até TOTAL_MAX linhas: para buscas amplas a contagem
+exata custaria uma varredura do resultado inteiro.
+
+Repositório: adrisa007/sentinela (ID: 1112237272)
+"""
+from typing import List, Optional, Tuple
+
+from sqlalchemy import Select, column, func, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.models import Fornecedor, StatusFornecedor, TipoFornecedor
+
+BUSCA_MIN_CHARS = 3
+TOTAL_MAX = 1000
+
+
+class BuscaInvalida(ValueError):
+    """Termo de busca curto demais para os índices de trigramas"""
+
+
+def _digitos(value: str) -> str:
+    return ''.join(filter(str.isdigit, value))
+
+
+def _eh_documento(termo: str) -> bool:
+    """Termo só com dígitos e pontuação de CNPJ/CPF (12.345.678/0001-90)"""
+    return bool(_digitos(termo)) and all(c.isdigit() or c in ".-/ " for c in termo)
+
+
+def filtro_prefixo_cnpj(prefixo: str):
+    """Prefixo de CNPJ/CPF como faixa no índice de `cnpj`"""
+    prefixo = _digitos(prefixo)
+    if len(prefixo) >= 14:
+        return Fornecedor.cnpj == prefixo[:14]
+    fim = prefixo[:-1] + chr(ord(prefixo[-1]) + 1)
+    return (Fornecedor.cnpj >= prefixo) & (Fornecedor.cnpj < fim)
+
+
+def filtro_texto(termo: str, dialect: str):
+    """Razão social ou nome fantasia contendo `termo`, pelo índice do dialeto"""
+    termo = termo.strip()
+    if len(termo) < BUSCA_MIN_CHARS:
+        raise BuscaInvalida(f"Informe ao menos {BUSCA_MIN_CHARS} caracteres para buscar por nome")
+
+    if dialect == "sqlite":
+        # Frase entre aspas: o trigram casa a substring literal
+        frase = '"' + termo.replace('"', '""') + '"'
+        fts = text("SELECT rowid FROM fornecedores_fts WHERE fornecedores_fts MATCH :frase")
+        return Fornecedor.id.in_(fts.bindparams(frase=frase).columns(column("rowid")))
+
+    padrao = "%" + termo.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    return or_(
+        Fornecedor.razao_social.ilike(padrao, escape="\\"),
+        Fornecedor.nome_fantasia.ilike(padrao, escape="\\"),
+    )
+
+
+def consulta_fornecedores(
+    dialect: str,
+    search: Optional[str] = None,
+    cnpj: Optional[str] = None,
+    status: Optional[StatusFornecedor] = None,
+    tipo: Optional[TipoFornecedor] = None,
+    uf: Optional[str] = None,
+) -> Select:
+    """SELECT de fornecedores com os filtros da listagem (sem ordenação)"""
+    stmt = select(Fornecedor)
+    if search and search.strip():
+        if _eh_documento(search):
+            stmt = stmt.where(filtro_prefixo_cnpj(search))
+        else:
+            stmt = stmt.where(filtro_texto(search, dialect))
+    if cnpj and _digitos(cnpj):
+        stmt = stmt.where(filtro_prefixo_cnpj(cnpj))
+    if status:
+        stmt = stmt.where(Fornecedor.status == status)
+    if tipo:
+        stmt = stmt.where(Fornecedor.tipo == tipo)
+    if uf:
+        stmt = stmt.where(Fornecedor.uf == uf.upper())
+    return stmt
+
+
+async def buscar_fornecedores(
+    db: AsyncSession,
+    search: Optional[str] = None,
+    cnpj: Optional[str] = None,
+    status: Optional[StatusFornecedor] = None,
+    tipo: Optional[TipoFornecedor] = None,
+    uf: Optional[str] = None,
+    page: int = 1,
+    limit: int = 10,
+) -> Tuple[List[Fornecedor], int]:
+    """
+    Página de fornecedores ordenada por razão social.
+
+    Returns:
+        (fornecedores, total) — total limitado a TOTAL_MAX
+
+    Raises:
+        BuscaInvalida: termo de texto com menos de BUSCA_MIN_CHARS caracteres
+    """
+    dialect = db.get_bind().dialect.name
+    stmt = consulta_fornecedores(dialect, search, cnpj, status, tipo, uf)
+
+    total = await db.scalar(
+        select(func.count()).select_from(stmt.with_only_columns(Fornecedor.id).limit(TOTAL_MAX).subquery())
+    )
+    page_stmt = stmt.order_by(Fornecedor.razao_social, Fornecedor.id).offset((page - 1) * limit).limit(limit)
+    fornecedores = (await db.execute(page_stmt)).scalars().all()
+    return list(fornecedores), total
@@ -0,0 +1,246 @@
+"""
+Health checks com snapshot em cache
+===================================
+
+Railway, o healthcheck do docker-compose e monitores externos consultam
+/health, /health/ready e /health/live o tempo todo. Em vez de cada
+requisição abrir uma conexão com o banco e pingar o Redis, um prober por
+worker verifica banco, Redis e broker do Celery em paralelo a cada
+HEALTH_PROBE_INTERVAL segundos, cada um com seu timeout, e guarda o
+resultado. As rotas servem o último snapshot.
+
+- Sem snapshot recente (prober parado, primeira verificação ainda em
+  curso ou snapshot com mais de 3 intervalos), a rota verifica na hora
+- Verificações simultâneas são coalescidas: N requisições, uma verificação
+- `?fresh=1` força uma verificação nova, limitada por HEALTH_FRESH_RATE_LIMIT
+
+Repositório: adrisa007/sentinela (ID: 1112237272)
+"""
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Optional
+import asyncio
+import logging
+import time
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ResultadoCheck:
+    """Resultado da verificação de uma dependência (status: connected, disconnected ou error)"""
+    status: str
+    latencia_ms: float
+    erro: Optional[str] = None
+    detalhes: dict = field(default_factory=dict)
+
+    @property
+    def ok(self) -> bool:
+        return self.status == "connected"
+
+    def to_dict(self) -> dict:
+        data = {"status": self.status, "latency_ms": round(self.latencia_ms, 2), **self.detalhes}
+        if self.erro is not None:
+            data["error"] = self.erro
+        return data
+
+
+@dataclass
+class Snapshot:
+    """Resultados de uma rodada de verificações"""
+    checks: Dict[str, ResultadoCheck]
+    verificado_em: datetime
+    monotonic: float
+
+    def idade(self) -> float:
+        return time.monotonic() - self.monotonic
+
+    def to_dict(self) -> dict:
+        return {
+            "checked_at": self.verificado_em.isoformat(),
+            "age_seconds": round(self.idade(), 3),
+            "checks": {nome: r.to_dict() for nome, r in self.checks.items()},
+        }
+
+
+# ============ Verificações ============
+
+class DependenciaDesconectada(Exception):
+    """A dependência respondeu, mas não está saudável (ex.: check retornou False)"""
+
+
+async def check_database() -> dict:
+    """SELECT 1 no pool assíncrono (o engine sync fica para o Celery)"""
+    from app import database
+
+    if not await database.check_async_database_connection():
+        raise DependenciaDesconectada("disconnected")
+    return {}
+
+
+async def check_redis() -> dict:
+    """PING e INFO no pool assíncrono, em paralelo"""
+    from app import redis_client
+
+    healthy, info = await asyncio.gather(redis_client.check_redis_connection(), redis_client.get_redis_info())
+    if not healthy:
+        raise DependenciaDesconectada(info.get("error", "Unknown error"))
+    return {"info": {
+        "version": info.get("version", "unknown"),
+        "uptime_seconds": info.get("uptime_seconds", 0),
+        "connected_clients": info.get("connected_clients", 0),
+    }}
+
+
+class CheckCelery:
+    """PING no broker do Celery e tamanho da fila padrão (cliente próprio, banco Redis do broker)"""
+
+    def __init__(self):
+        self._redis = None
+
+    async def __call__(self) -> dict:
+        if self._redis is None:
+            import redis.asyncio as aioredis
+            from app.tasks.celery_app import CELERY_BROKER_URL
+
+            self._redis = aioredis.from_url(
+                CELERY_BROKER_URL,
+                decode_responses=True,
+                socket_connect_timeout=settings.HEALTH_CELERY_TIMEOUT,
+                socket_timeout=settings.HEALTH_CELERY_TIMEOUT,
+            )
+        async with self._redis.pipeline(transaction=False) as pipe:
+            pipe.ping()
+            pipe.llen("celery")
+            _, fila = await pipe.execute()
+        return {"queue_length": fila}
+
+    async def aclose(self) -> None:
+        if self._redis is not None:
+            redis, self._redis = self._redis, None
+            await redis.aclose()
+
+
+# ============ Prober ============
+
+class HealthProber:
+    """
+    Verifica as dependências em segundo plano e guarda o último snapshot
+
+    Attributes:
+        checks: nome -> (corrotina de verificação, timeout em segundos)
+        intervalo: Segundos entre rodadas do prober
+    """
+
+    def __init__(self, checks: Dict[str, tuple], intervalo: float = 10.0):
+        self.checks: Dict[str, tuple] = checks
+        self.intervalo = intervalo
+        self.snapshot: Optional[Snapshot] = None
+        self._em_curso: Optional[asyncio.Task] = None
+        self._pendentes: Dict[str, asyncio.Future] = {}
+        self._task: Optional[asyncio.Task] = None
+        self.stats_ = {"rodadas": 0, "sob_demanda": 0, "coalescidas": 0, "timeouts": 0}
+
+    async def _executar(self, nome: str, check: Callable[[], Awaitable[dict]], timeout: float) -> ResultadoCheck:
+        inicio = time.perf_counter()
+        # Verificação anterior ainda presa (ex.: thread do banco): não empilhar outra
+        pendente = self._pendentes.get(nome)
+        if pendente is not None and not pendente.done():
+            self.stats_["timeouts"] += 1
+            return ResultadoCheck("error", 0.0, "previous check still running")
+        future = asyncio.ensure_future(check())
+        self._pendentes[nome] = future
+        try:
+            detalhes = await asyncio.wait_for(asyncio.shield(future), timeout)
+            return ResultadoCheck("connected", (time.perf_counter() - inicio) * 1000, detalhes=detalhes or {})
+        except asyncio.TimeoutError:
+            self.stats_["timeouts"] += 1
+            future.add_done_callback(lambda f: f.cancelled() or f.exception())
+            return ResultadoCheck("error", (time.perf_counter() - inicio) * 1000, f"timeout after {timeout}s")
+        except DependenciaDesconectada as e:
+            return ResultadoCheck("disconnected", (time.perf_counter() - inicio) * 1000, str(e))
+        except Exception as e:
+            return ResultadoCheck("error", (time.perf_counter() - inicio) * 1000, str(e))
+
+    async def _rodada(self) -> Snapshot:
+        nomes = list(self.checks)
+        resultados = await asyncio.gather(*(self._executar(nome, *self.checks[nome]) for nome in nomes))
+        self.snapshot = Snapshot(dict(zip(nomes, resultados)), datetime.utcnow(), time.monotonic())
+        self.stats_["rodadas"] += 1
+        return self.snapshot
+
+    async def verificar(self) -> Snapshot:
+        """Roda as verificações agora; chamadas simultâneas compartilham a mesma rodada"""
+        if self._em_curso is None or self._em_curso.done():
+            self._em_curso = asyncio.ensure_future(self._rodada())
+        else:
+            self.stats_["coalescidas"] += 1
+        return await asyncio.shield(self._em_curso)
+
+    def recente(self) -> Optional[Snapshot]:
+        """Último snapshot, se o prober estiver ativo e ele não estiver vencido"""
+        if self._task is None or self.snapshot is None or self.snapshot.idade() > 3 * self.intervalo:
+            return None
+        return self.snapshot
+
+    async def obter(self, fresh: bool = False) -> Snapshot:
+        """Snapshot em cache ou, sem snapshot recente (ou com fresh), uma verificação agora"""
+        snapshot = None if fresh else self.recente()
+        if snapshot is None:
+            self.stats_["sob_demanda"] += 1
+            snapshot = await self.verificar()
+        return snapshot
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                await self.verificar()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ Health prober: falha na rodada ({e})")
+            await asyncio.sleep(self.intervalo)
+
+    def start(self) -> None:
+        """Inicia o prober do worker (lifespan da aplicação)"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def aclose(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self.snapshot = None
+        self._em_curso = None
+        self._pendentes.clear()
+        for check, _ in self.checks.values():
+            if hasattr(check, "aclose"):
+                await check.aclose()
+
+    def stats(self) -> dict:
+        return {
+            **self.stats_,
+            "running": self._task is not None,
+            "interval": self.intervalo,
+            "age_seconds": round(self.snapshot.idade(), 3) if self.snapshot else None,
+        }
+
+
+def _create_checks() -> Dict[str, tuple]:
+    checks = {
+        "database": (check_database, settings.HEALTH_DB_TIMEOUT),
+        "redis": (check_redis, settings.HEALTH_REDIS_TIMEOUT),
+    }
+    if settings.HEALTH_CELERY_ENABLED:
+        checks["celery"] = (CheckCelery(), settings.HEALTH_CELERY_TIMEOUT)
+    return checks
+
+
+# Instância global (uma por worker)
+health_prober = HealthProber(_create_checks(), intervalo=settings.HEALTH_PROBE_INTERVAL)
@@ -0,0 +1,207 @@
+"""
+Métricas Prometheus
+===================
+
+GET /metrics expõe, no formato texto do Prometheus:
+
+- HTTP: latência (histograma) e contagem por status, por rota
+  (template, ex.: /cameras/{camera_id}), e requisições em andamento
+- Banco: queries por requisição e conexões dos pools sync/async
+- Redis: tempo de uso de cada conexão do pool compartilhado (comando
+  ou pipeline) e conexões do pool
+- Rejeições do rate limiter e do CSRF
+- PNCP: latência das chamadas HTTP ao upstream e resultados do cache
+
+Coleta barata: cada observação é um incremento sob o lock do próprio
+valor (sem lock global), as queries são contadas em um ContextVar da
+requisição e os gauges dos pools são atualizados no máximo uma vez por
+METRICS_POOL_REFRESH segundos.
+
+Multiprocesso (uvicorn/gunicorn com vários workers): defina
+PROMETHEUS_MULTIPROC_DIR com um diretório vazio antes de subir os
+workers; cada worker grava seus valores ali e /metrics agrega todos.
+
+Repositório: adrisa007/sentinela (ID: 1112237272)
+"""
+from contextvars import ContextVar
+from typing import List, Optional
+import os
+import time
+
+from prometheus_client import CONTENT_TYPE_LATEST, REGISTRY, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+from prometheus_client import multiprocess
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+# O prometheus_client escolhe o armazenamento (memória ou mmap) pela variável na importação
+MULTIPROCESS = bool(os.getenv("PROMETHEUS_MULTIPROC_DIR"))
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+REDIS_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+QUERY_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+# ============ Métricas ============
+
+HTTP_REQUESTS = Counter(
+    "sentinela_http_requests_total", "Requisições HTTP por rota e status", ["method", "route", "status"]
+)
+HTTP_LATENCY = Histogram(
+    "sentinela_http_request_duration_seconds", "Latência das requisições HTTP", ["method", "route"],
+    buckets=LATENCY_BUCKETS,
+)
+HTTP_IN_FLIGHT = Gauge(
+    "sentinela_http_requests_in_flight", "Requisições HTTP em andamento", ["method"],
+    multiprocess_mode="livesum",
+)
+DB_QUERIES = Histogram(
+    "sentinela_db_queries_per_request", "Queries SQL executadas por requisição", ["route"],
+    buckets=QUERY_BUCKETS,
+)
+DB_POOL_CONNECTIONS = Gauge(
+    "sentinela_db_pool_connections", "Conexões dos pools do banco", ["pool", "state"],
+    multiprocess_mode="livesum",
+)
+REDIS_LATENCY = Histogram(
+    "sentinela_redis_command_duration_seconds", "Tempo de uso de uma conexão do pool Redis (comando ou pipeline)",
+    buckets=REDIS_BUCKETS,
+)
+REDIS_POOL_CONNECTIONS = Gauge(
+    "sentinela_redis_pool_connections", "Conexões do pool Redis compartilhado", ["state"],
+    multiprocess_mode="livesum",
+)
+RATE_LIMIT_REJECTIONS = Counter(
+    "sentinela_rate_limit_rejections_total", "Requisições rejeitadas pelo rate limiter (429)", ["route"]
+)
+CSRF_REJECTIONS = Counter(
+    "sentinela_csrf_rejections_total", "Requisições rejeitadas pela proteção CSRF (403)", ["reason"]
+)
+PNCP_UPSTREAM_LATENCY = Histogram(
+    "sentinela_pncp_upstream_duration_seconds", "Latência das chamadas HTTP ao PNCP", ["outcome"],
+    buckets=LATENCY_BUCKETS,
+)
+PNCP_CACHE_REQUESTS = Counter(
+    "sentinela_pncp_cache_requests_total",
+    "Consultas ao cache PNCP por resultado: l1_hit, l2_hit, miss e stale_hit (hits servidos vencidos)",
+    ["result"],
+)
+
+# ============ Queries por requisição ============
+
+# Lista mutável: visível também nas cópias do contexto (threadpool, greenlets do SQLAlchemy async)
+_queries: ContextVar[Optional[List[int]]] = ContextVar("sentinela_db_queries", default=None)
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _contar_query(conn, cursor, statement, parameters, context, executemany) -> None:
+    contador = _queries.get()
+    if contador is not None:
+        contador[0] += 1
+
+
+# ============ Pools ============
+
+_pools_atualizados_em = 0.0
+
+
+def atualizar_pools(force: bool = False) -> None:
+    """Copia o estado dos pools do banco e do Redis para os gauges (no máximo 1x por METRICS_POOL_REFRESH)"""
+    global _pools_atualizados_em
+    agora = time.monotonic()
+    if not force and agora - _pools_atualizados_em < settings.METRICS_POOL_REFRESH:
+        return
+    _pools_atualizados_em = agora
+
+    from app.core.database import async_engine, engine
+    from app.redis_client import redis_pool
+
+    for nome, pool in (("sync", engine.pool), ("async", async_engine.sync_engine.pool)):
+        if hasattr(pool, "checkedout"):
+            DB_POOL_CONNECTIONS.labels(nome, "checked_out").set(pool.checkedout())
+            DB_POOL_CONNECTIONS.labels(nome, "checked_in").set(pool.checkedin())
+            DB_POOL_CONNECTIONS.labels(nome, "overflow").set(max(pool.overflow(), 0))
+
+    stats = redis_pool.stats()
+    if stats["started"]:
+        REDIS_POOL_CONNECTIONS.labels("in_use").set(stats["in_use"])
+        REDIS_POOL_CONNECTIONS.labels("idle").set(stats["idle"])
+
+
+# ============ Middleware HTTP ============
+
+def rota_template(scope: Scope, status_code: int) -> str:
+    """
+    Template da rota após o roteamento (ex.: /cameras/{camera_id})
+
+    Sem rota: "unmatched" para 404 e "other" para as rotas do próprio
+    Starlette (docs), evitando uma série por URL.
+    """
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    return "unmatched" if status_code == 404 else "other"
+
+
+class MetricsMiddleware:
+    """
+    Middleware ASGI puro: latência, status e queries por rota; requisições em andamento por método
+
+    A rota só é conhecida depois do roteamento, por isso o gauge de
+    requisições em andamento usa apenas o método (por rota: taxa x
+    latência média do histograma).
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status_code = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        contador = [0]
+        token = _queries.set(contador)
+        in_flight = HTTP_IN_FLIGHT.labels(method)
+        in_flight.inc()
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - start
+            in_flight.dec()
+            _queries.reset(token)
+            route = rota_template(scope, status_code)
+            HTTP_LATENCY.labels(method, route).observe(elapsed)
+            HTTP_REQUESTS.labels(method, route, str(status_code)).inc()
+            DB_QUERIES.labels(route).observe(contador[0])
+            atualizar_pools()
+
+
+# ============ Exposição ============
+
+def gerar_metricas() -> bytes:
+    """Métricas no formato texto do Prometheus (todos os workers no modo multiprocesso)"""
+    atualizar_pools(force=True)
+    if MULTIPROCESS:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry)
+    return generate_latest(REGISTRY)
+
+
+def marcar_processo_encerrado() -> None:
+    """Remove os gauges `live*` deste worker dos arquivos compartilhados (lifespan, ao desligar)"""
+    if MULTIPROCESS:
+        multiprocess.mark_process_dead(os.getpid())
+
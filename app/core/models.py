@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, Enum as SQLEnum, Text, ForeignKey
+from sqlalchemy import Column, Integer, BigInteger, Identity, String, Boolean, Date, DateTime, Enum as SQLEnum, Text, ForeignKey, Float, Index, UniqueConstraint, JSON, DDL, event
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from enum import Enum
@@ -37,6 +37,96 @@ class StatusEntidade(str, Enum):
     EM_ANALISE = "EM_ANALISE"
 
 
+class StatusContrato(str, Enum):
+    """Status de um contrato da entidade"""
+    VIGENTE = "VIGENTE"
+    SUSPENSO = "SUSPENSO"
+    ENCERRADO = "ENCERRADO"
+    RESCINDIDO = "RESCINDIDO"
+
+
+class TipoVencimento(str, Enum):
+    """Origem de um item do índice de vencimentos"""
+    CONTRATO = "CONTRATO"
+    CERTIDAO = "CERTIDAO"
+
+
+class TipoCertidao(str, Enum):
+    """Certidões de regularidade exigidas de fornecedores"""
+    CND_FEDERAL = "CND_FEDERAL"        # Receita Federal / PGFN
+    CNDT = "CNDT"                      # Débitos trabalhistas (TST)
+    FGTS = "FGTS"                      # Certificado de Regularidade do FGTS (Caixa)
+    ESTADUAL = "ESTADUAL"              # SEFAZ
+    MUNICIPAL = "MUNICIPAL"            # Prefeitura
+
+
+class StatusCertidao(str, Enum):
+    """
+    Situação de uma certidão
+    
+    - PENDENTE: Cadastrada e ainda não verificada no emissor
+    - VALIDA: Negativa (ou positiva com efeito de negativa) dentro da validade
+    - VENCIDA: Validade expirada
+    - IRREGULAR: Emissor informa pendências do fornecedor
+    """
+    PENDENTE = "PENDENTE"
+    VALIDA = "VALIDA"
+    VENCIDA = "VENCIDA"
+    IRREGULAR = "IRREGULAR"
+
+
+class TipoFornecedor(str, Enum):
+    """Pessoa jurídica (CNPJ) ou física (CPF)"""
+    JURIDICA = "JURIDICA"
+    FISICA = "FISICA"
+
+
+class StatusFornecedor(str, Enum):
+    """Status de fornecedor no cadastro"""
+    ATIVO = "ATIVO"
+    INATIVO = "INATIVO"
+
+
+class StatusCamera(str, Enum):
+    """
+    Status reportado por uma câmera no heartbeat
+
+    OFFLINE também é derivado na leitura quando o último heartbeat é
+    mais antigo que CAMERAS_OFFLINE_APOS.
+    """
+    ONLINE = "ONLINE"
+    DEGRADADA = "DEGRADADA"
+    OFFLINE = "OFFLINE"
+
+
+class TipoEventoCamera(str, Enum):
+    """Eventos registrados no histórico das câmeras"""
+    MOVIMENTO = "MOVIMENTO"
+    OFFLINE = "OFFLINE"
+    ONLINE = "ONLINE"
+    VIOLACAO = "VIOLACAO"  # tamper: obstrução, mudança de ângulo, desconexão física
+
+
+class GranularidadeRollup(str, Enum):
+    """Períodos dos rollups de eventos de câmeras"""
+    HORA = "HORA"
+    DIA = "DIA"
+
+
+class AlvoRisco(str, Enum):
+    """Item avaliado pelo motor de riscos"""
+    CONTRATO = "CONTRATO"
+    FORNECEDOR = "FORNECEDOR"
+
+
+class SeveridadeRisco(str, Enum):
+    """Faixas de score de risco"""
+    CRITICA = "CRITICA"
+    ALTA = "ALTA"
+    MEDIA = "MEDIA"
+    BAIXA = "BAIXA"
+
+
 class Entidade(Base):
     """
     Modelo de Entidade - Representa empresas, organizações, departamentos, etc.
@@ -150,3 +240,488 @@ class User(Base):
             "created_at": self.created_at.isoformat() if self.created_at else None,
             "last_login": self.last_login.isoformat() if self.last_login else None
         }
+
+
+# ============ Contratos ============
+
+class Contrato(Base):
+    """
+    Contrato de uma entidade
+    
+    Toda consulta é escopada por `entidade_id`. Os índices compostos
+    terminam em `id` para servir a paginação keyset da listagem
+    (ORDER BY <coluna>, id) sem ordenação em memória:
+    - (entidade_id, id): listagem padrão
+    - (entidade_id, vigencia, id): ordenação/filtro por fim de vigência
+    - (entidade_id, status, id): filtro por status
+    - cnpj_fornecedor: contratos de um fornecedor
+    """
+    __tablename__ = "contratos"
+    __table_args__ = (
+        UniqueConstraint("entidade_id", "numero", name="uq_contratos_entidade_numero"),
+        Index("ix_contratos_entidade_id", "entidade_id", "id"),
+        Index("ix_contratos_entidade_vigencia", "entidade_id", "vigencia", "id"),
+        Index("ix_contratos_entidade_status", "entidade_id", "status", "id"),
+        Index("ix_contratos_cnpj_fornecedor", "cnpj_fornecedor"),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    entidade_id = Column(Integer, ForeignKey("entidades.id", ondelete="CASCADE"), nullable=False)
+    numero = Column(String(50), nullable=False)
+    objeto = Column(Text, nullable=False)
+    cnpj_fornecedor = Column(String(14), nullable=False)
+    valor = Column(Float, nullable=False, default=0.0)
+    data_assinatura = Column(Date, nullable=True)
+    vigencia = Column(Date, nullable=False)  # Fim da vigência
+    status = Column(SQLEnum(StatusContrato), default=StatusContrato.VIGENTE, nullable=False)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<Contrato(id={self.id}, numero='{self.numero}', entidade_id={self.entidade_id})>"
+
+
+class Vencimento(Base):
+    """
+    Índice de vencimentos por entidade (mantido por app.core.vencimentos)
+    
+    Uma linha por item com vencimento ativo, no dia em que vence. Escritas
+    em contratos atualizam o índice na mesma transação (eventos ORM) e a
+    task noturna o reconstrói a partir das tabelas de origem. "Vencendo
+    em N dias" vira uma busca por faixa em (entidade_id, data_vencimento).
+    """
+    __tablename__ = "vencimentos"
+    __table_args__ = (
+        Index("ix_vencimentos_entidade_data", "entidade_id", "data_vencimento"),
+    )
+    
+    tipo = Column(SQLEnum(TipoVencimento), primary_key=True)
+    referencia_id = Column(Integer, primary_key=True)
+    entidade_id = Column(Integer, ForeignKey("entidades.id", ondelete="CASCADE"), nullable=False)
+    data_vencimento = Column(Date, nullable=False)
+    descricao = Column(String(255), nullable=True)
+    
+    def __repr__(self):
+        return f"<Vencimento(tipo='{self.tipo}', referencia_id={self.referencia_id}, data_vencimento={self.data_vencimento})>"
+
+
+# ============ Fornecedores ============
+
+class Fornecedor(Base):
+    """
+    Cadastro de fornecedores (compartilhado entre entidades)
+    
+    Índices de busca (app.core.fornecedores.buscar_fornecedores):
+    - cnpj: B-tree único, usado para prefixo como faixa (cnpj >= '123' AND cnpj < '124')
+    - PostgreSQL: GIN pg_trgm em razao_social e nome_fantasia (ILIKE '%x%' indexado)
+    - SQLite: tabela FTS5 `fornecedores_fts` (tokenizer trigram), mantida por triggers
+    """
+    __tablename__ = "fornecedores"
+    __table_args__ = (
+        Index("ix_fornecedores_razao_social", "razao_social"),
+        Index(
+            "ix_fornecedores_razao_social_trgm", "razao_social",
+            postgresql_using="gin", postgresql_ops={"razao_social": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+        Index(
+            "ix_fornecedores_nome_fantasia_trgm", "nome_fantasia",
+            postgresql_using="gin", postgresql_ops={"nome_fantasia": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    cnpj = Column(String(14), unique=True, nullable=False)  # CNPJ ou CPF, apenas dígitos
+    razao_social = Column(String(255), nullable=False)
+    nome_fantasia = Column(String(255), nullable=True)
+    tipo = Column(SQLEnum(TipoFornecedor), default=TipoFornecedor.JURIDICA, nullable=False)
+    status = Column(SQLEnum(StatusFornecedor), default=StatusFornecedor.ATIVO, nullable=False)
+    municipio = Column(String(100), nullable=True)
+    uf = Column(String(2), nullable=True)
+    telefone = Column(String(30), nullable=True)
+    email = Column(String(100), nullable=True)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<Fornecedor(id={self.id}, cnpj='{self.cnpj}', razao_social='{self.razao_social}')>"
+
+
+# pg_trgm precisa existir antes dos índices GIN
+event.listen(
+    Fornecedor.__table__, "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
+)
+
+# SQLite: índice FTS5 trigram (external content) sincronizado por triggers
+for _ddl in (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS fornecedores_fts USING fts5("
+    "razao_social, nome_fantasia, content='fornecedores', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS fornecedores_fts_ai AFTER INSERT ON fornecedores BEGIN "
+    "INSERT INTO fornecedores_fts(rowid, razao_social, nome_fantasia) "
+    "VALUES (new.id, new.razao_social, new.nome_fantasia); END",
+    "CREATE TRIGGER IF NOT EXISTS fornecedores_fts_ad AFTER DELETE ON fornecedores BEGIN "
+    "INSERT INTO fornecedores_fts(fornecedores_fts, rowid, razao_social, nome_fantasia) "
+    "VALUES ('delete', old.id, old.razao_social, old.nome_fantasia); END",
+    "CREATE TRIGGER IF NOT EXISTS fornecedores_fts_au AFTER UPDATE OF razao_social, nome_fantasia ON fornecedores BEGIN "
+    "INSERT INTO fornecedores_fts(fornecedores_fts, rowid, razao_social, nome_fantasia) "
+    "VALUES ('delete', old.id, old.razao_social, old.nome_fantasia); "
+    "INSERT INTO fornecedores_fts(rowid, razao_social, nome_fantasia) "
+    "VALUES (new.id, new.razao_social, new.nome_fantasia); END",
+):
+    event.listen(Fornecedor.__table__, "after_create", DDL(_ddl).execute_if(dialect="sqlite"))
+event.listen(
+    Fornecedor.__table__, "before_drop",
+    DDL("DROP TABLE IF EXISTS fornecedores_fts").execute_if(dialect="sqlite"),
+)
+
+
+# ============ Certidões ============
+
+class Certidao(Base):
+    """
+    Certidão de regularidade de um fornecedor, acompanhada por uma entidade
+    
+    O emissor é derivado do tipo (app.core.certidoes.EMISSORES). A
+    revalidação em lote (Celery) percorre as certidões pela ordem de
+    `ultima_verificacao`.
+    """
+    __tablename__ = "certidoes"
+    __table_args__ = (
+        Index("ix_certidoes_entidade_validade", "entidade_id", "data_validade"),
+        Index("ix_certidoes_fornecedor_tipo", "cnpj_fornecedor", "tipo"),
+        Index("ix_certidoes_ultima_verificacao", "ultima_verificacao"),
+    )
+    
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    entidade_id = Column(Integer, ForeignKey("entidades.id", ondelete="CASCADE"), nullable=False)
+    cnpj_fornecedor = Column(String(14), nullable=False)
+    tipo = Column(SQLEnum(TipoCertidao), nullable=False)
+    numero = Column(String(100), nullable=False)
+    data_emissao = Column(Date, nullable=True)
+    data_validade = Column(Date, nullable=False)
+    status = Column(SQLEnum(StatusCertidao), default=StatusCertidao.PENDENTE, nullable=False)
+    ultima_verificacao = Column(DateTime(timezone=True), nullable=True)
+    
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    
+    def __repr__(self):
+        return f"<Certidao(id={self.id}, tipo='{self.tipo}', cnpj_fornecedor='{self.cnpj_fornecedor}')>"
+
+
+class CertidaoContador(Base):
+    """
+    Contadores de certidões por entidade, mantidos a cada escrita
+    
+    Uma linha por (entidade, dimensão, valor) — ex.: ("status", "VALIDA") ou
+    ("tipo", "FGTS") — para que /certidoes/stats seja uma leitura por
+    chave em vez de COUNT(*) GROUP BY sobre a tabela de certidões.
+    """
+    __tablename__ = "certidoes_contadores"
+    
+    entidade_id = Column(Integer, ForeignKey("entidades.id", ondelete="CASCADE"), primary_key=True)
+    dimensao = Column(String(20), primary_key=True)
+    valor = Column(String(50), primary_key=True)
+    total = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<CertidaoContador(entidade_id={self.entidade_id}, {self.dimensao}={self.valor}, total={self.total})>"
+
+
+# ============ Câmeras ============
+
+class Camera(Base):
+    """
+    Câmera cadastrada em uma entidade
+
+    O estado operacional (heartbeats) fica em `cameras_estado`, gravado em
+    lote, para que a carga de heartbeats não atualize este cadastro.
+    """
+    __tablename__ = "cameras"
+    __table_args__ = (
+        Index("ix_cameras_entidade_id", "entidade_id", "id"),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    entidade_id = Column(Integer, ForeignKey("entidades.id", ondelete="CASCADE"), nullable=False)
+    codigo = Column(String(64), unique=True, nullable=False)  # Identificador do dispositivo (serial/MAC)
+    nome = Column(String(100), nullable=False)
+    localizacao = Column(String(255), nullable=True)
+    url_stream = Column(String(500), nullable=True)
+    ativa = Column(Boolean, default=True, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<Camera(id={self.id}, codigo='{self.codigo}', entidade_id={self.entidade_id})>"
+
+
+class CameraEstado(Base):
+    """
+    Último estado conhecido de cada câmera (upsert em lote dos heartbeats)
+
+    O estado mais recente também fica em hashes Redis (app.core.cameras);
+    esta tabela é a cópia durável, gravada pelo buffer de heartbeats.
+    """
+    __tablename__ = "cameras_estado"
+
+    camera_id = Column(Integer, ForeignKey("cameras.id", ondelete="CASCADE"), primary_key=True)
+    entidade_id = Column(Integer, ForeignKey("entidades.id", ondelete="CASCADE"), nullable=False, index=True)
+    status = Column(SQLEnum(StatusCamera), nullable=False)
+    visto_em = Column(DateTime(timezone=True), nullable=False)
+    ip = Column(String(45), nullable=True)
+    firmware = Column(String(50), nullable=True)
+
+    def __repr__(self):
+        return f"<CameraEstado(camera_id={self.camera_id}, status='{self.status}', visto_em={self.visto_em})>"
+
+
+class CameraEvento(Base):
+    """
+    Histórico de eventos das câmeras (append-only)
+
+    No PostgreSQL a tabela é particionada por mês em `ocorrido_em`
+    (partições criadas com antecedência por app.core.camera_eventos) e
+    indexada por BRIN, que ocupa poucas páginas e casa com a inserção
+    em ordem de tempo. Sem FKs: o volume é alto e a retenção é feita
+    descartando partições, não em cascata.
+    """
+    __tablename__ = "cameras_eventos"
+    __table_args__ = (
+        Index("ix_cameras_eventos_ocorrido_em_brin", "ocorrido_em", postgresql_using="brin").ddl_if(dialect="postgresql"),
+        Index("ix_cameras_eventos_camera_ocorrido", "camera_id", "ocorrido_em"),
+        Index("ix_cameras_eventos_entidade_ocorrido", "entidade_id", "ocorrido_em"),
+        {"postgresql_partition_by": "RANGE (ocorrido_em)"},
+    )
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), Identity(), primary_key=True)
+    entidade_id = Column(Integer, nullable=False)
+    camera_id = Column(Integer, nullable=False)
+    tipo = Column(SQLEnum(TipoEventoCamera), nullable=False)
+    ocorrido_em = Column(DateTime(timezone=True), nullable=False)
+    dados = Column(JSON, nullable=True)  # Metadados do evento/vídeo (clipe, confiança, zona...)
+
+    def __repr__(self):
+        return f"<CameraEvento(camera_id={self.camera_id}, tipo='{self.tipo}', ocorrido_em={self.ocorrido_em})>"
+
+
+# Tabela particionada no PostgreSQL não aceita PK sem a coluna de partição:
+# lá o id é só IDENTITY (a ordem de leitura é (ocorrido_em, id))
+CameraEvento.__table__.primary_key.ddl_if(
+    callable_=lambda ddl, target, bind, dialect=None, **kw: dialect is None or dialect.name != "postgresql"
+)
+event.listen(
+    CameraEvento.__table__, "after_create",
+    DDL("CREATE TABLE IF NOT EXISTS cameras_eventos_default PARTITION OF cameras_eventos DEFAULT").execute_if(dialect="postgresql"),
+)
+
+
+class CameraEventoRollup(Base):
+    """
+    Contagem de eventos por câmera, tipo e hora/dia (Celery, app.core.camera_eventos)
+
+    Gráficos de semanas ou meses leem estas linhas em vez do histórico bruto.
+    """
+    __tablename__ = "cameras_eventos_rollup"
+    __table_args__ = (
+        Index("ix_cameras_eventos_rollup_entidade", "entidade_id", "granularidade", "periodo"),
+    )
+
+    granularidade = Column(SQLEnum(GranularidadeRollup), primary_key=True)
+    camera_id = Column(Integer, primary_key=True)
+    periodo = Column(DateTime(timezone=True), primary_key=True)  # Início da hora/dia (UTC)
+    tipo = Column(SQLEnum(TipoEventoCamera), primary_key=True)
+    entidade_id = Column(Integer, nullable=False)
+    total = Column(Integer, nullable=False)
+
+    def __repr__(self):
+        return f"<CameraEventoRollup({self.granularidade}, camera_id={self.camera_id}, periodo={self.periodo}, total={self.total})>"
+
+
+# ============ Riscos ============
+
+class Risco(Base):
+    """
+    Risco avaliado em lote (app.core.riscos), já ranqueado por entidade
+
+    Cada avaliação regrava todos os riscos da entidade; `posicao` é a
+    ordem por score (1 = maior), então a tabela de riscos críticos é uma
+    busca por faixa em (entidade_id, posicao).
+    """
+    __tablename__ = "riscos"
+    __table_args__ = (
+        Index("ix_riscos_entidade_posicao", "entidade_id", "posicao", unique=True),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    entidade_id = Column(Integer, ForeignKey("entidades.id", ondelete="CASCADE"), nullable=False)
+    posicao = Column(Integer, nullable=False)
+    alvo = Column(SQLEnum(AlvoRisco), nullable=False)
+    contrato_id = Column(Integer, ForeignKey("contratos.id", ondelete="CASCADE"), nullable=True)
+    cnpj_fornecedor = Column(String(14), nullable=False)
+    referencia = Column(String(100), nullable=False)  # Número do contrato ou CNPJ
+    descricao = Column(String(255), nullable=False)
+    score = Column(Float, nullable=False)  # 0-100
+    severidade = Column(SQLEnum(SeveridadeRisco), nullable=False)
+    valor = Column(Float, nullable=False, default=0.0)  # Valor ativo em risco
+
+    # Fatores normalizados (0-1) que compõem o score
+    fator_certidoes = Column(Float, nullable=False, default=0.0)
+    fator_concentracao = Column(Float, nullable=False, default=0.0)
+    fator_renovacao = Column(Float, nullable=False, default=0.0)
+    fator_pncp = Column(Float, nullable=False, default=0.0)
+
+    calculado_em = Column(DateTime(timezone=True), nullable=False)
+
+    def __repr__(self):
+        return f"<Risco(entidade_id={self.entidade_id}, posicao={self.posicao}, score={self.score})>"
+
+
+# ============ Resumo do Dashboard ============
+
+class ResumoEntidade(Base):
+    """
+    Resumo pré-agregado por entidade para GET /dashboard/gestor
+
+    Mantido por deltas a cada escrita nas fontes (app.core.dashboard) e
+    recalculado periodicamente. `versao` muda sempre que algum valor muda
+    e alimenta o ETag; `atualizado_em` é o Last-Modified.
+    """
+    __tablename__ = "resumos_entidades"
+
+    entidade_id = Column(Integer, ForeignKey("entidades.id", ondelete="CASCADE"), primary_key=True)
+    contratos_total = Column(Integer, nullable=False, default=0)
+    contratos_vigentes = Column(Integer, nullable=False, default=0)
+    contratos_vencendo = Column(Integer, nullable=False, default=0)
+    valor_total = Column(Float, nullable=False, default=0.0)
+    valor_vigente = Column(Float, nullable=False, default=0.0)
+    certidoes_total = Column(Integer, nullable=False, default=0)
+    certidoes_irregulares = Column(Integer, nullable=False, default=0)
+    certidoes_vencendo = Column(Integer, nullable=False, default=0)
+    riscos_criticos = Column(Integer, nullable=False, default=0)
+
+    versao = Column(Integer, nullable=False, default=0)
+    atualizado_em = Column(DateTime(timezone=True), nullable=True)
+
+    def __repr__(self):
+        return f"<ResumoEntidade(entidade_id={self.entidade_id}, versao={self.versao})>"
+
+
+# ============ Espelho local do PNCP ============
+
+class FornecedorPNCP(Base):
+    """
+    Cadastro de fornecedor espelhado do PNCP (sincronizado por Celery)
+    
+    Chave natural: CNPJ (apenas dígitos). `data_atualizacao_pncp` é a data
+    de atualização informada pelo PNCP, usada na sincronização incremental.
+    """
+    __tablename__ = "pncp_fornecedores"
+    
+    cnpj = Column(String(14), primary_key=True)
+    razao_social = Column(String(255), nullable=False)
+    nome_fantasia = Column(String(255), nullable=True)
+    situacao_cadastral = Column(String(50), nullable=True)
+    data_abertura = Column(String(10), nullable=True)
+    porte = Column(String(50), nullable=True)
+    natureza_juridica = Column(String(255), nullable=True)
+    logradouro = Column(String(255), nullable=True)
+    numero = Column(String(20), nullable=True)
+    complemento = Column(String(255), nullable=True)
+    bairro = Column(String(100), nullable=True)
+    municipio = Column(String(100), nullable=True)
+    uf = Column(String(2), nullable=True)
+    cep = Column(String(9), nullable=True)
+    telefone = Column(String(30), nullable=True)
+    email = Column(String(100), nullable=True)
+    
+    data_atualizacao_pncp = Column(DateTime(timezone=True), nullable=True, index=True)
+    sincronizado_em = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<FornecedorPNCP(cnpj='{self.cnpj}', razao_social='{self.razao_social}')>"
+    
+    def to_pncp(self) -> dict:
+        """Cadastro no formato da API do PNCP (camelCase)"""
+        return {
+            "cnpj": self.cnpj,
+            "razaoSocial": self.razao_social,
+            "nomeFantasia": self.nome_fantasia,
+            "situacaoCadastral": self.situacao_cadastral,
+            "dataAbertura": self.data_abertura,
+            "porte": self.porte,
+            "naturezaJuridica": self.natureza_juridica,
+            "logradouro": self.logradouro,
+            "numero": self.numero,
+            "complemento": self.complemento,
+            "bairro": self.bairro,
+            "municipio": self.municipio,
+            "uf": self.uf,
+            "cep": self.cep,
+            "telefone": self.telefone,
+            "email": self.email,
+        }
+
+
+class ContratoPNCP(Base):
+    """
+    Contrato espelhado do PNCP (sincronizado por Celery)
+    
+    Chave natural: identificador do contrato no PNCP. Consultas por
+    fornecedor usam o índice (cnpj_fornecedor, data_assinatura).
+    """
+    __tablename__ = "pncp_contratos"
+    __table_args__ = (
+        Index("ix_pncp_contratos_fornecedor_assinatura", "cnpj_fornecedor", "data_assinatura"),
+    )
+    
+    id_pncp = Column(String(64), primary_key=True)
+    cnpj_fornecedor = Column(String(14), nullable=False)
+    numero = Column(String(50), nullable=False)
+    objeto = Column(Text, nullable=True)
+    valor = Column(Float, nullable=False, default=0.0)
+    data_assinatura = Column(String(10), nullable=True)
+    vigencia = Column(String(10), nullable=True)
+    status = Column(String(30), nullable=True)
+    orgao = Column(String(255), nullable=True)
+    
+    data_atualizacao_pncp = Column(DateTime(timezone=True), nullable=True, index=True)
+    sincronizado_em = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    
+    def __repr__(self):
+        return f"<ContratoPNCP(id_pncp='{self.id_pncp}', cnpj_fornecedor='{self.cnpj_fornecedor}')>"
+    
+    def to_pncp(self) -> dict:
+        """Contrato no formato da API do PNCP (camelCase)"""
+        return {
+            "id": self.id_pncp,
+            "numero": self.numero,
+            "objeto": self.objeto,
+            "valor": self.valor,
+            "dataAssinatura": self.data_assinatura,
+            "vigencia": self.vigencia,
+            "status": self.status,
+            "orgao": self.orgao,
+        }
+
+
+class PNCPSyncState(Base):
+    """
+    Marca d'água da sincronização incremental por recurso do PNCP
+    
+    (high_water_mark, ultima_chave) é o cursor keyset do último registro
+    gravado: a próxima execução retoma exatamente depois dele.
+    """
+    __tablename__ = "pncp_sync_state"
+    
+    recurso = Column(String(50), primary_key=True)
+    high_water_mark = Column(DateTime(timezone=True), nullable=True)
+    ultima_chave = Column(String(64), nullable=True)
+    ultima_execucao = Column(DateTime(timezone=True), nullable=True)
+    registros_sincronizados = Column(Integer, default=0, nullable=False)
+    
+    def __repr__(self):
+        return f"<PNCPSyncState(recurso='{self.recurso}', high_water_mark={self.high_water_mark})>"
@@ -0,0 +1,94 @@
+"""
+Paginação keyset (cursor)
+=========================
+
+Em vez de OFFSET (que percorre e descarta todas as linhas anteriores), a
+próxima página é pedida a partir da chave de ordenação da última linha
+entregue: `WHERE (coluna, id) > (:valor, :id) ORDER BY coluna, id LIMIT n`.
+Com um índice que termina nas colunas de ordenação, cada página custa o
+mesmo independentemente da profundidade.
+
+O cursor entregue ao cliente é opaco (base64url de um JSON com a
+ordenação e os valores da última linha) e deve ser devolvido sem
+alterações.
+
+Repositório: adrisa007/sentinela (ID: 1112237272)
+"""
+from datetime import date, datetime
+from typing import Any, List, Sequence, Tuple
+import base64
+import binascii
+import json
+
+from sqlalchemy import Select, tuple_
+
+
+class InvalidCursor(ValueError):
+    """Cursor malformado ou emitido para outra ordenação"""
+
+
+def _json_default(value: Any) -> str:
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    if hasattr(value, "value"):  # Enum
+        return value.value
+    raise TypeError(f"Tipo não serializável no cursor: {type(value).__name__}")
+
+
+def encode_cursor(ordem: str, values: Sequence[Any]) -> str:
+    """Cursor opaco para a linha com chave de ordenação `values`"""
+    payload = json.dumps({"o": ordem, "k": list(values)}, default=_json_default, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, ordem: str) -> List[Any]:
+    """
+    Valores da chave de ordenação contidos no cursor
+
+    Raises:
+        InvalidCursor: Cursor ilegível ou de outra ordenação
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        values = payload["k"]
+        cursor_ordem = payload["o"]
+    except (binascii.Error, ValueError, KeyError, TypeError) as e:
+        raise InvalidCursor("Cursor inválido") from e
+    if cursor_ordem != ordem or not isinstance(values, list):
+        raise InvalidCursor("Cursor não corresponde à ordenação pedida")
+    return values
+
+
+def keyset_page(
+    stmt: Select,
+    columns: Sequence[Any],
+    after: Sequence[Any] = None,
+    descending: bool = False,
+    limit: int = 50,
+) -> Select:
+    """
+    Aplica ORDER BY, o predicado keyset e LIMIT n+1 a uma consulta
+
+    A linha extra indica se existe próxima página (ver `split_page`).
+
+    Args:
+        stmt: SELECT já com os filtros
+        columns: Colunas de ordenação; a última deve ser única (ex.: id)
+        after: Valores da última linha da página anterior (cursor decodificado)
+        descending: Ordem decrescente
+        limit: Tamanho da página
+    """
+    if after is not None:
+        if len(after) != len(columns):
+            raise InvalidCursor("Cursor não corresponde à ordenação pedida")
+        key = tuple_(*columns)
+        stmt = stmt.where(key < tuple_(*after) if descending else key > tuple_(*after))
+    order = [c.desc() if descending else c.asc() for c in columns]
+    return stmt.order_by(*order).limit(limit + 1)
+
+
+def split_page(rows: Sequence[Any], limit: int) -> Tuple[List[Any], bool]:
+    """Separa a linha extra de `keyset_page`: (página, há_mais)"""
+    rows = list(rows)
+    return rows[:limit], len(rows) > limit
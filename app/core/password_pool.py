@@ -0,0 +1,174 @@
+"""
+Pool Dedicado para Hash/Verificação de Senhas (bcrypt)
+======================================================
+
+bcrypt com BCRYPT_ROUNDS=12 leva ~250 ms por operação. Executado dentro
+de um handler `async def`, bloqueia o event loop e atrasa todas as outras
+requisições do worker. Este módulo move o trabalho para um
+ThreadPoolExecutor de tamanho fixo (a extensão C do bcrypt libera o GIL)
+com limite de fila: quando saturado, falha rápido com
+PasswordPoolSaturated para que a rota responda 503.
+
+Repositório: adrisa007/sentinela (ID: 1112237272)
+"""
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, TypeVar
+import asyncio
+import logging
+import threading
+
+from sqlalchemy import update
+
+from app.core.config import settings
+from app.core.models import User
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class PasswordPoolSaturated(Exception):
+    """Pool de hash de senhas sem capacidade (workers ocupados e fila cheia)"""
+
+
+class PasswordHashPool:
+    """
+    Executor limitado para operações de bcrypt
+
+    Attributes:
+        max_workers: Threads dedicadas a bcrypt
+        max_queue: Operações que podem aguardar além das em execução
+    """
+
+    def __init__(self, max_workers: int, max_queue: int):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.rejected = 0
+        self.completed = 0
+
+    @property
+    def capacity(self) -> int:
+        """Máximo de operações simultâneas (em execução + na fila)"""
+        return self.max_workers + self.max_queue
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers,
+                        thread_name_prefix="bcrypt"
+                    )
+        return self._executor
+
+    def _acquire(self) -> None:
+        with self._lock:
+            if self._pending >= self.capacity:
+                self.rejected += 1
+                raise PasswordPoolSaturated(
+                    f"Pool de senhas saturado ({self._pending}/{self.capacity})"
+                )
+            self._pending += 1
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
+            self.completed += 1
+
+    async def run(self, func: Callable[..., T], *args) -> T:
+        """
+        Executa `func(*args)` no pool sem bloquear o event loop
+
+        A vaga é liberada quando a thread termina, não quando o chamador
+        desiste: uma requisição cancelada (cliente desconectou) não interrompe
+        o bcrypt em execução, que continua contando para a saturação.
+
+        Raises:
+            PasswordPoolSaturated: Se não houver capacidade (backpressure)
+        """
+        self._acquire()
+        try:
+            future = self._get_executor().submit(func, *args)
+        except BaseException:
+            self._release()
+            raise
+        future.add_done_callback(lambda _: self._release())
+        return await asyncio.wrap_future(future)
+
+    def stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "pending": self._pending,
+            "completed": self.completed,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+
+# Instância global (uma por worker)
+password_pool = PasswordHashPool(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue=settings.PASSWORD_HASH_MAX_QUEUE,
+)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Versão não bloqueante de verify_password (executada no password_pool)"""
+    from app.core.auth import verify_password
+    return await password_pool.run(verify_password, plain_password, hashed_password)
+
+
+async def get_password_hash_async(password: str) -> str:
+    """Versão não bloqueante de get_password_hash (executada no password_pool)"""
+    from app.core.auth import get_password_hash
+    return await password_pool.run(get_password_hash, password)
+
+
+async def rehash_password(user_id: int, plain_password: str, old_hash: str) -> bool:
+    """
+    Regrava o hash da senha com o custo atual (executado em background após o login)
+    
+    Oportunista: se o pool estiver saturado ou o banco falhar, tenta de novo
+    no próximo login. A escrita é condicionada ao hash antigo (compare-and-set)
+    para não sobrescrever uma troca de senha concorrente.
+    
+    Returns:
+        bool: True se o hash foi atualizado
+    """
+    from app.core import database
+    
+    try:
+        new_hash = await get_password_hash_async(plain_password)
+    except PasswordPoolSaturated:
+        logger.info(f"⏳ Rehash adiado para usuário {user_id}: pool de senhas saturado")
+        return False
+    
+    try:
+        async with database.AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(User)
+                .where(User.id == user_id, User.hashed_password == old_hash)
+                .values(hashed_password=new_hash)
+            )
+            await db.commit()
+    except Exception as e:
+        logger.error(f"❌ Falha ao regravar hash do usuário {user_id}: {e}")
+        return False
+    
+    updated = result.rowcount == 1
+    if updated:
+        logger.info(f"🔁 Hash de senha do usuário {user_id} atualizado para o custo atual")
+    return updated
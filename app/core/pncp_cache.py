@@ -0,0 +1,309 @@
+"""
+Cache em camadas das consultas ao PNCP
+======================================
+
+Dados de fornecedor no PNCP mudam raramente, mas o dashboard consulta os
+mesmos CNPJs a todo carregamento. Camadas:
+
+- L1: TTLLRUCache em processo (microssegundos)
+- L2: Redis compartilhado entre workers/réplicas, pelo pool Redis do worker
+  (PNCP_CACHE_BACKEND=redis, padrão; "memory" desliga o L2)
+
+Chave: CNPJ normalizado (apenas dígitos), com TTLs separados para cadastro
+e contratos. Cada entrada tem dois prazos:
+
+- fresh_until: até aqui o valor é servido sem consultar o PNCP
+- stale_until: até aqui o valor vencido ainda é servido, enquanto uma
+  revalidação roda em segundo plano (stale-while-revalidate)
+
+Misses concorrentes para a mesma chave são coalescidos em uma única
+chamada ao PNCP (single-flight). Falhas do Redis nunca quebram a consulta:
+o L2 é desligado por alguns segundos e o cache segue só com o L1.
+
+Repositório: adrisa007/sentinela (ID: 1112237272)
+"""
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import asyncio
+import json
+import logging
+import time
+
+from app.core.cache import TTLLRUCache
+from app.core.config import settings
+from app.core.metrics import PNCP_CACHE_REQUESTS
+from app.core.pncp_client import PNCPClient, PNCPError, pncp_client
+from app.redis_client import RedisPool, redis_pool
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "pncp:cache"
+
+# Após erro no Redis, o L2 fica desligado por este tempo (s)
+REDIS_RETRY_INTERVAL = 5.0
+
+
+@dataclass(frozen=True)
+class CacheEntry:
+    """Valor em cache com prazos em tempo de parede (comparáveis entre processos)"""
+    value: Any
+    fresh_until: float
+    stale_until: float
+
+    def dumps(self) -> str:
+        return json.dumps({"v": self.value, "f": self.fresh_until, "s": self.stale_until})
+
+    @classmethod
+    def loads(cls, raw: str) -> "CacheEntry":
+        data = json.loads(raw)
+        return cls(value=data["v"], fresh_until=data["f"], stale_until=data["s"])
+
+
+class PNCPCache:
+    """
+    Cache stale-while-revalidate com single-flight na frente do PNCPClient
+
+    Attributes:
+        client: Cliente PNCP usado nos misses e revalidações
+        ttls: TTL (s) de frescor por tipo de dado ("cadastro", "contratos")
+        stale_ttl: Tempo (s) após o TTL em que o valor vencido ainda é servido
+        pool: Pool Redis do worker para o L2 (None = apenas L1)
+        redis_timeout: Espera máxima (s) por um comando do L2; o pool é
+            compartilhado e tem timeout de socket maior
+    """
+
+    def __init__(
+        self,
+        client: PNCPClient,
+        pool: Optional[RedisPool] = None,
+        enabled: bool = True,
+        maxsize: int = 5000,
+        cadastro_ttl: float = 21600,
+        contratos_ttl: float = 1800,
+        stale_ttl: float = 86400,
+        redis_timeout: float = 0.25,
+        timer: Callable[[], float] = time.time,
+    ):
+        self.client = client
+        self.pool = pool
+        self.redis_timeout = redis_timeout
+        self.enabled = enabled
+        self.ttls = {"cadastro": cadastro_ttl, "contratos": contratos_ttl}
+        self.stale_ttl = stale_ttl
+        self._timer = timer
+        self.local = TTLLRUCache(maxsize=maxsize, ttl=cadastro_ttl + stale_ttl, timer=timer)
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self._redis_disabled_until = 0.0
+        self._reset_counters()
+
+    def _reset_counters(self) -> None:
+        self.counters = {
+            "l1_hits": 0,
+            "l2_hits": 0,
+            "stale_hits": 0,
+            "misses": 0,
+            "coalesced": 0,
+            "revalidations": 0,
+            "upstream_errors": 0,
+            "redis_errors": 0,
+        }
+        self.upstream_calls = 0
+        self.upstream_time_total = 0.0
+        self.upstream_time_max = 0.0
+
+    @staticmethod
+    def make_key(kind: str, cnpj: str) -> str:
+        return f"{KEY_PREFIX}:{kind}:{''.join(filter(str.isdigit, cnpj))}"
+
+    # ---------- L2 (Redis) ----------
+
+    def _redis_available(self) -> bool:
+        return self.pool is not None and self._timer() >= self._redis_disabled_until
+
+    def _redis_failed(self, e: Exception) -> None:
+        self.counters["redis_errors"] += 1
+        self._redis_disabled_until = self._timer() + REDIS_RETRY_INTERVAL
+        logger.warning(f"⚠️  Cache PNCP: Redis indisponível ({e}), usando apenas L1 por {REDIS_RETRY_INTERVAL:.0f}s")
+
+    async def _l2_get(self, key: str) -> Optional[CacheEntry]:
+        if not self._redis_available():
+            return None
+        try:
+            raw = await asyncio.wait_for(self.pool.client.get(key), self.redis_timeout)
+        except Exception as e:
+            self._redis_failed(e)
+            return None
+        if raw is None:
+            return None
+        try:
+            return CacheEntry.loads(raw)
+        except (ValueError, KeyError, TypeError):
+            return None
+
+    async def _l2_set(self, key: str, entry: CacheEntry) -> None:
+        if not self._redis_available():
+            return
+        ttl = max(1, int(entry.stale_until - self._timer()))
+        try:
+            await asyncio.wait_for(self.pool.client.set(key, entry.dumps(), ex=ttl), self.redis_timeout)
+        except Exception as e:
+            self._redis_failed(e)
+
+    # ---------- Consulta ----------
+
+    async def _lookup(self, key: str) -> Optional[CacheEntry]:
+        entry = self.local.get(key)
+        if entry is not None:
+            self.counters["l1_hits"] += 1
+            PNCP_CACHE_REQUESTS.labels("l1_hit").inc()
+            return entry
+        entry = await self._l2_get(key)
+        if entry is not None and entry.stale_until > self._timer():
+            self.counters["l2_hits"] += 1
+            PNCP_CACHE_REQUESTS.labels("l2_hit").inc()
+            self.local.set(key, entry, ttl=entry.stale_until - self._timer())
+            return entry
+        return None
+
+    async def _load(self, key: str, kind: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Busca no PNCP e grava nas duas camadas"""
+        start = time.perf_counter()
+        try:
+            value = await loader()
+        except PNCPError:
+            self.counters["upstream_errors"] += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            self.upstream_calls += 1
+            self.upstream_time_total += elapsed
+            self.upstream_time_max = max(self.upstream_time_max, elapsed)
+
+        now = self._timer()
+        fresh_until = now + self.ttls[kind]
+        entry = CacheEntry(value=value, fresh_until=fresh_until, stale_until=fresh_until + self.stale_ttl)
+        self.local.set(key, entry, ttl=entry.stale_until - now)
+        await self._l2_set(key, entry)
+        return value
+
+    def _single_flight(self, key: str, kind: str, loader: Callable[[], Awaitable[Any]]) -> "asyncio.Task":
+        """Task compartilhada por todas as consultas concorrentes da mesma chave"""
+        task = self._inflight.get(key)
+        if task is not None and not task.done():
+            self.counters["coalesced"] += 1
+            return task
+
+        task = asyncio.ensure_future(self._load(key, kind, loader))
+        self._inflight[key] = task
+        task.add_done_callback(lambda t: self._inflight.pop(key, None) if self._inflight.get(key) is t else None)
+        return task
+
+    def _revalidate(self, key: str, kind: str, loader: Callable[[], Awaitable[Any]]) -> None:
+        if key in self._inflight:
+            return
+        self.counters["revalidations"] += 1
+        task = self._single_flight(key, kind, loader)
+
+        def _log_failure(t: "asyncio.Task") -> None:
+            if not t.cancelled() and t.exception() is not None:
+                logger.warning(f"⚠️  Cache PNCP: revalidação de {key} falhou, mantendo valor vencido ({t.exception()})")
+
+        task.add_done_callback(_log_failure)
+
+    async def get_or_load(self, kind: str, cnpj: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Retorna o valor em cache (fresco ou vencido) ou busca no PNCP
+
+        Args:
+            kind: "cadastro" ou "contratos" (define o TTL)
+            cnpj: CNPJ do fornecedor (formatado ou não)
+            loader: Corrotina sem argumentos que consulta o PNCP
+
+        Raises:
+            PNCPError: Miss (sem valor vencido utilizável) e falha no PNCP
+        """
+        if not self.enabled:
+            return await loader()
+
+        key = self.make_key(kind, cnpj)
+        entry = await self._lookup(key)
+        if entry is not None:
+            now = self._timer()
+            if now < entry.fresh_until:
+                return entry.value
+            if now < entry.stale_until:
+                self.counters["stale_hits"] += 1
+                PNCP_CACHE_REQUESTS.labels("stale_hit").inc()
+                self._revalidate(key, kind, loader)
+                return entry.value
+
+        self.counters["misses"] += 1
+        PNCP_CACHE_REQUESTS.labels("miss").inc()
+        # shield: cancelar um chamador não cancela a busca compartilhada
+        return await asyncio.shield(self._single_flight(key, kind, loader))
+
+    async def get_cadastro(self, cnpj: str) -> Dict[str, Any]:
+        return await self.get_or_load("cadastro", cnpj, lambda: self.client.get_cadastro(cnpj))
+
+    async def get_contratos(self, cnpj: str) -> List[Dict[str, Any]]:
+        return await self.get_or_load("contratos", cnpj, lambda: self.client.get_contratos(cnpj))
+
+    async def get_fornecedor(self, cnpj: str) -> Dict[str, Any]:
+        """Cadastro + contratos em paralelo, cada um com sua entrada de cache"""
+        cadastro, contratos = await asyncio.gather(
+            self.get_cadastro(cnpj),
+            self.get_contratos(cnpj),
+            return_exceptions=True,
+        )
+        if isinstance(cadastro, BaseException):
+            raise cadastro
+        if isinstance(contratos, BaseException):
+            raise contratos
+        return {"cadastro": cadastro, "contratos": contratos}
+
+    # ---------- Manutenção ----------
+
+    async def invalidate(self, cnpj: str) -> None:
+        """Remove cadastro e contratos do CNPJ das duas camadas"""
+        keys = [self.make_key(kind, cnpj) for kind in self.ttls]
+        for key in keys:
+            self.local.pop(key)
+        if self._redis_available():
+            try:
+                await asyncio.wait_for(self.pool.delete_many(keys), self.redis_timeout)
+            except Exception as e:
+                self._redis_failed(e)
+
+    def clear(self) -> None:
+        """Esvazia o L1 e zera os contadores (o L2 expira pelo TTL)"""
+        self.local.clear()
+        self._reset_counters()
+
+    def stats(self) -> dict:
+        counters = self.counters
+        hits = counters["l1_hits"] + counters["l2_hits"]
+        total = hits + counters["misses"]
+        return {
+            "enabled": self.enabled,
+            "backend": "redis" if self.pool is not None else "memory",
+            "l2_available": self._redis_available(),
+            **counters,
+            "hit_ratio": round(hits / total, 4) if total else 0.0,
+            "l1_size": len(self.local),
+            "upstream_calls": self.upstream_calls,
+            "upstream_avg_ms": round(self.upstream_time_total / self.upstream_calls * 1000, 2) if self.upstream_calls else 0.0,
+            "upstream_max_ms": round(self.upstream_time_max * 1000, 2),
+        }
+
+
+# Instância global (uma por worker)
+pncp_cache = PNCPCache(
+    pncp_client,
+    pool=redis_pool if settings.PNCP_CACHE_BACKEND == "redis" else None,
+    enabled=settings.PNCP_CACHE_ENABLED,
+    maxsize=settings.PNCP_CACHE_MAXSIZE,
+    cadastro_ttl=settings.PNCP_CACHE_CADASTRO_TTL,
+    contratos_ttl=settings.PNCP_CACHE_CONTRATOS_TTL,
+    stale_ttl=settings.PNCP_CACHE_STALE_TTL,
+    redis_timeout=settings.PNCP_CACHE_REDIS_TIMEOUT,
+)
@@ -0,0 +1,458 @@
+"""
+Cliente HTTP do PNCP (Portal Nacional de Contratações Públicas)
+==============================================================
+
+Um único `httpx.AsyncClient` por worker (pool keep-alive, HTTP/2 quando o
+pacote `h2` está instalado, timeouts separados por fase), aberto/fechado
+pelo lifespan da aplicação. Consultas de fornecedor disparam cadastro e
+contratos em paralelo.
+
+Resiliência contra a API do governo lenta ou instável:
+- Retentativas com backoff exponencial e jitter, limitadas por um
+  orçamento de retentativas (fração das requisições recentes)
+- Circuit breaker: após falhas consecutivas, falha rápido por um período
+  em vez de acumular requisições presas no timeout
+- Limite de taxa por host (token bucket), para que consultas em lote não
+  disparem rajadas contra a API
+
+Repositório: adrisa007/sentinela (ID: 1112237272)
+"""
+from collections import deque
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+import asyncio
+import logging
+import random
+import time
+
+import httpx
+
+from app.core.config import settings
+from app.core.metrics import PNCP_UPSTREAM_LATENCY
+
+logger = logging.getLogger(__name__)
+
+# Status que indicam indisponibilidade temporária (vale retentar)
+RETRYABLE_STATUS = frozenset({429, 500, 502, 503, 504})
+
+
+# ============ Exceções ============
+
+class PNCPError(Exception):
+    """Erro ao consultar o PNCP"""
+
+
+class PNCPNotFoundError(PNCPError):
+    """Recurso inexistente no PNCP (404)"""
+
+
+class PNCPUnavailableError(PNCPError):
+    """PNCP indisponível: circuito aberto, orçamento de retentativas esgotado ou falhas persistentes"""
+
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+# ============ Orçamento de Retentativas ============
+
+class RetryBudget:
+    """
+    Limita retentativas a uma fração das requisições recentes
+
+    Com a API fora do ar, retentar toda requisição multiplica a carga
+    (e a latência) justamente quando ela menos aguenta. O orçamento permite
+    `ratio` retentativas por requisição na janela deslizante, com um piso
+    de `min_retries` para tráfego baixo.
+    """
+
+    def __init__(self, ratio: float = 0.2, min_retries: int = 3, window: float = 10.0):
+        self.ratio = ratio
+        self.min_retries = min_retries
+        self.window = window
+        self._requests: deque = deque()
+        self._retries: deque = deque()
+
+    def _prune(self, now: float) -> None:
+        cutoff = now - self.window
+        for events in (self._requests, self._retries):
+            while events and events[0] < cutoff:
+                events.popleft()
+
+    def record_request(self) -> None:
+        self._requests.append(time.monotonic())
+
+    def try_acquire_retry(self) -> bool:
+        """Consome uma retentativa do orçamento, se houver"""
+        now = time.monotonic()
+        self._prune(now)
+        allowed = max(self.min_retries, int(len(self._requests) * self.ratio))
+        if len(self._retries) >= allowed:
+            return False
+        self._retries.append(now)
+        return True
+
+
+# ============ Limite de Taxa por Host ============
+
+class HostRateLimiter:
+    """
+    Token bucket assíncrono que limita as requisições ao host do PNCP
+
+    Cada chamada reserva um token; se o balde estiver vazio, o saldo fica
+    negativo e a chamada espera a reposição correspondente, de modo que
+    as esperas se enfileiram na ordem de chegada. Sem locks: a reserva é
+    feita sem `await`, atômica no event loop. `rate <= 0` desliga o limite.
+    """
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        self._tokens -= 1
+        if self._tokens < 0:
+            await asyncio.sleep(-self._tokens / self.rate)
+
+
+# ============ Circuit Breaker ============
+
+class CircuitBreaker:
+    """
+    Circuit breaker clássico: fechado → aberto → meio-aberto
+
+    - fechado: requisições passam; `failure_threshold` falhas seguidas abrem o circuito
+    - aberto: requisições falham imediatamente durante `reset_timeout` segundos
+    - meio-aberto: uma requisição de teste; sucesso fecha, falha reabre. As
+      requisições concorrentes aguardam o resultado do teste em vez de serem
+      rejeitadas (cadastro e contratos de um mesmo fornecedor, por exemplo)
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self._probe: Optional[asyncio.Event] = None
+
+    def retry_after(self) -> float:
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    async def acquire(self) -> str:
+        """
+        Decide se uma requisição pode seguir
+
+        Returns:
+            str: CLOSED (segue), HALF_OPEN (segue como requisição de teste;
+            o chamador deve registrar sucesso, falha ou `release_probe`) ou
+            OPEN (rejeitada)
+        """
+        while True:
+            if self.state == self.CLOSED:
+                return self.CLOSED
+            if self.state == self.OPEN:
+                if self.retry_after() > 0:
+                    return self.OPEN
+                self.state = self.HALF_OPEN
+            if self._probe is None:
+                self._probe = asyncio.Event()
+                return self.HALF_OPEN
+            await self._probe.wait()
+
+    def _end_probe(self) -> None:
+        if self._probe is not None:
+            probe, self._probe = self._probe, None
+            probe.set()
+
+    def release_probe(self) -> None:
+        """Libera a requisição de teste sem veredito (cancelada); a próxima na fila testa"""
+        self._end_probe()
+
+    def record_success(self) -> None:
+        if self.state != self.CLOSED:
+            logger.info("✅ PNCP: circuito fechado")
+        self.state = self.CLOSED
+        self.failures = 0
+        self._end_probe()
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+            if self.state != self.OPEN:
+                logger.warning(
+                    f"🔌 PNCP: circuito aberto por {self.reset_timeout:.0f}s "
+                    f"após {self.failures} falhas"
+                )
+            self.state = self.OPEN
+            self.opened_at = time.monotonic()
+        self._end_probe()
+
+
+# ============ Cliente ============
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+class PNCPClient:
+    """
+    Cliente compartilhado da API do PNCP
+
+    Attributes:
+        base_url: URL base da API
+        max_retries: Retentativas por chamada (sujeitas ao orçamento)
+        rate_limiter: Limite de requisições/s ao host (inclui retentativas)
+        backoff_base: Base (s) do backoff exponencial com jitter
+        backoff_max: Teto (s) de cada espera
+        probe_timeout: Prazo total (s) da requisição de teste do circuito meio-aberto
+    """
+
+    def __init__(
+        self,
+        base_url: str = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+        max_retries: int = None,
+        backoff_base: float = 0.1,
+        backoff_max: float = 2.0,
+        retry_budget: Optional[RetryBudget] = None,
+        circuit_breaker: Optional[CircuitBreaker] = None,
+        timeout: Optional[httpx.Timeout] = None,
+        rate_limiter: Optional[HostRateLimiter] = None,
+        probe_timeout: Optional[float] = None,
+    ):
+        self.base_url = (base_url or settings.PNCP_API_URL).rstrip("/")
+        self.max_retries = settings.PNCP_MAX_RETRIES if max_retries is None else max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retry_budget = retry_budget or RetryBudget(ratio=settings.PNCP_RETRY_BUDGET_RATIO)
+        self.circuit_breaker = circuit_breaker or CircuitBreaker(
+            failure_threshold=settings.PNCP_CIRCUIT_FAILURE_THRESHOLD,
+            reset_timeout=settings.PNCP_CIRCUIT_RESET_TIMEOUT,
+        )
+        self.timeout = timeout or httpx.Timeout(
+            connect=settings.PNCP_CONNECT_TIMEOUT,
+            read=settings.PNCP_READ_TIMEOUT,
+            write=settings.PNCP_READ_TIMEOUT,
+            pool=settings.PNCP_CONNECT_TIMEOUT,
+        )
+        self.probe_timeout = settings.PNCP_CIRCUIT_PROBE_TIMEOUT if probe_timeout is None else probe_timeout
+        self.rate_limiter = rate_limiter or HostRateLimiter(
+            rate=settings.PNCP_RATE_LIMIT_PER_SECOND,
+            burst=settings.PNCP_RATE_LIMIT_BURST,
+        )
+        self._transport = transport
+        self._client: Optional[httpx.AsyncClient] = None
+        self.http2 = False
+
+    # ---------- Ciclo de vida ----------
+
+    def _build_client(self) -> httpx.AsyncClient:
+        http2 = settings.PNCP_HTTP2 and _http2_available()
+        if settings.PNCP_HTTP2 and not http2:
+            logger.warning("⚠️  PNCP: pacote h2 não instalado, usando HTTP/1.1")
+        self.http2 = http2
+
+        return httpx.AsyncClient(
+            base_url=self.base_url,
+            http2=http2,
+            transport=self._transport,
+            headers={"Accept": "application/json", "User-Agent": f"{settings.APP_NAME}/{settings.VERSION}"},
+            limits=httpx.Limits(
+                max_connections=settings.PNCP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.PNCP_MAX_KEEPALIVE,
+                keepalive_expiry=30.0,
+            ),
+            timeout=self.timeout,
+        )
+
+    async def start(self) -> None:
+        if self._client is None:
+            self._client = self._build_client()
+            logger.info(f"🌐 Cliente PNCP iniciado ({self.base_url}, http2={self.http2})")
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            client, self._client = self._client, None
+            await client.aclose()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Criação preguiçosa: rotas funcionam mesmo sem o lifespan (ex.: TestClient sem `with`)
+        if self._client is None:
+            self._client = self._build_client()
+        return self._client
+
+    # ---------- Requisições ----------
+
+    def _backoff(self, attempt: int) -> float:
+        """Full jitter: espera aleatória em [0, min(teto, base * 2^tentativa)]"""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
+
+    async def _send(self, path: str, params: Optional[dict], probe: bool) -> httpx.Response:
+        """Uma tentativa; a requisição de teste do circuito tem prazo total próprio"""
+        await self.rate_limiter.acquire()
+        start = time.perf_counter()
+        request = self.client.get(path, params=params)
+        try:
+            response = await (asyncio.wait_for(request, self.probe_timeout) if probe else request)
+        except (httpx.TransportError, asyncio.TimeoutError):
+            PNCP_UPSTREAM_LATENCY.labels("transport_error").observe(time.perf_counter() - start)
+            raise
+        PNCP_UPSTREAM_LATENCY.labels(str(response.status_code)).observe(time.perf_counter() - start)
+        return response
+
+    async def _get_json(self, path: str, params: Optional[dict] = None) -> Any:
+        """
+        GET com retentativas, orçamento e circuit breaker
+
+        Raises:
+            PNCPNotFoundError: 404
+            PNCPUnavailableError: Circuito aberto ou falhas esgotaram as retentativas
+            PNCPError: Outros erros HTTP (4xx) ou resposta inválida
+        """
+        breaker = self.circuit_breaker
+        self.retry_budget.record_request()
+        attempt = 0
+
+        while True:
+            state = await breaker.acquire()
+            if state == breaker.OPEN:
+                raise PNCPUnavailableError(
+                    "PNCP temporariamente indisponível (circuito aberto)",
+                    retry_after=breaker.retry_after(),
+                )
+            probe = state == breaker.HALF_OPEN
+
+            failure: Optional[str] = None
+            try:
+                response = await self._send(path, params, probe)
+            except httpx.TransportError as e:
+                failure = f"{type(e).__name__}: {e}"
+            except asyncio.TimeoutError:
+                failure = f"teste do circuito sem resposta em {self.probe_timeout:.0f}s"
+            except httpx.HTTPError as e:
+                # Redirecionamentos em excesso, corpo ilegível: não adianta retentar
+                breaker.record_failure()
+                raise PNCPError(f"Falha ao consultar PNCP: {type(e).__name__}: {e}") from e
+            except BaseException:
+                # Cancelada (cliente desconectou): sem veredito, o teste passa adiante
+                if probe:
+                    breaker.release_probe()
+                raise
+            else:
+                if response.status_code == 404:
+                    breaker.record_success()
+                    raise PNCPNotFoundError(f"Recurso não encontrado no PNCP: {path}")
+                if response.status_code in RETRYABLE_STATUS:
+                    failure = f"HTTP {response.status_code}"
+                elif response.is_error:
+                    breaker.record_success()
+                    raise PNCPError(f"PNCP respondeu HTTP {response.status_code} para {path}")
+                else:
+                    try:
+                        data = response.json()
+                    except ValueError as e:
+                        breaker.record_failure()
+                        raise PNCPError(f"PNCP respondeu JSON inválido para {path}") from e
+                    breaker.record_success()
+                    return data
+
+            breaker.record_failure()
+            if attempt >= self.max_retries or not self.retry_budget.try_acquire_retry():
+                logger.warning(f"⚠️  PNCP {path}: {failure} (sem novas tentativas)")
+                raise PNCPUnavailableError(f"Falha ao consultar PNCP: {failure}")
+
+            delay = self._backoff(attempt)
+            logger.info(f"🔁 PNCP {path}: {failure}, nova tentativa em {delay * 1000:.0f} ms")
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def get_cadastro(self, cnpj: str) -> Dict[str, Any]:
+        """Dados cadastrais do fornecedor"""
+        return await self._get_json(f"/fornecedor/{cnpj}")
+
+    async def get_contratos(self, cnpj: str) -> List[Dict[str, Any]]:
+        """Contratos do fornecedor (lista vazia se não houver)"""
+        try:
+            data = await self._get_json(f"/contratos/fornecedor/{cnpj}")
+        except PNCPNotFoundError:
+            return []
+        return data.get("contratos", []) if isinstance(data, dict) else data
+
+    async def get_fornecedor(self, cnpj: str) -> Dict[str, Any]:
+        """
+        Cadastro + contratos do fornecedor, consultados em paralelo
+
+        Returns:
+            dict: {"cadastro": {...}, "contratos": [...]}
+        """
+        cadastro, contratos = await asyncio.gather(
+            self.get_cadastro(cnpj),
+            self.get_contratos(cnpj),
+            return_exceptions=True,
+        )
+        if isinstance(cadastro, BaseException):
+            raise cadastro
+        if isinstance(contratos, BaseException):
+            raise contratos
+        return {"cadastro": cadastro, "contratos": contratos}
+
+    async def get_atualizacoes(
+        self,
+        recurso: str,
+        desde: Optional[datetime] = None,
+        apos_chave: Optional[str] = None,
+        tamanho: int = 500,
+    ) -> List[Dict[str, Any]]:
+        """
+        Página de registros atualizados no PNCP, em ordem (dataAtualizacao, chave)
+
+        A paginação é por keyset: a próxima página começa depois do par
+        (dataAtualizacao, chave) do último registro recebido.
+
+        Args:
+            recurso: "fornecedores" ou "contratos"
+            desde: dataAtualizacao do último registro já sincronizado
+            apos_chave: Chave (CNPJ/id) do último registro já sincronizado
+            tamanho: Registros por página
+
+        Returns:
+            list: Registros em camelCase, cada um com "dataAtualizacao"
+        """
+        params: Dict[str, Any] = {"tamanhoPagina": tamanho}
+        if desde is not None:
+            params["dataAtualizacaoInicial"] = desde.isoformat()
+        if apos_chave is not None:
+            params["aposChave"] = apos_chave
+        data = await self._get_json(f"/{recurso}/atualizacoes", params=params)
+        return data.get("data", []) if isinstance(data, dict) else data
+
+    def stats(self) -> dict:
+        breaker = self.circuit_breaker
+        return {
+            "base_url": self.base_url,
+            "http2": self.http2,
+            "circuit_state": breaker.state,
+            "consecutive_failures": breaker.failures,
+            "retry_after": round(breaker.retry_after(), 1) if breaker.state == CircuitBreaker.OPEN else 0,
+        }
+
+
+# Instância global (uma por worker), aberta/fechada pelo lifespan em app.main
+pncp_client = PNCPClient()
@@ -0,0 +1,321 @@
+"""
+Ingestão em streaming das exportações de contratos do PNCP
+==========================================================
+
+Carga inicial (backfill) do espelho local a partir dos arquivos/páginas
+de exportação do PNCP, em memória constante:
+
+- Parser JSON incremental: os bytes chegam em blocos (arquivo, .gz ou
+  HTTP) e cada elemento do array é decodificado assim que fica completo,
+  sem montar a página inteira em memória
+- Validação em lotes com ContratoPNCPDump (campos de ContratosPNCP +
+  identificação do contrato/fornecedor); registros inválidos são
+  contados e descartados
+- Carga em lote por chunk: COPY para uma tabela temporária + INSERT ...
+  ON CONFLICT no PostgreSQL (psycopg2); executemany com upsert nos demais
+
+Formatos aceitos por fonte:
+- Página do PNCP: {"data": [...], "totalRegistros": ...}
+- Array no topo: [...]
+- NDJSON: um objeto por linha (.ndjson / .jsonl)
+
+Entradas: scripts/ingest_pncp_dump.py (CLI) e a task Celery
+`sentinela.pncp.ingest_dump`.
+
+Repositório: adrisa007/sentinela (ID: 1112237272)
+"""
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, Iterator, List, Optional
+import codecs
+import csv
+import gzip
+import io
+import json
+import logging
+import time
+
+from pydantic import ValidationError
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.models import ContratoPNCP
+from app.core.pncp_mirror import bulk_upsert
+from app.core.schemas import ContratoPNCPDump
+
+logger = logging.getLogger(__name__)
+
+READ_SIZE = 64 * 1024
+_JSON = json.JSONDecoder()
+
+
+class JSONStreamError(ValueError):
+    """Documento JSON malformado ou truncado"""
+
+
+# ============ Parser incremental ============
+
+class _TextBuffer:
+    """Janela de texto sobre blocos de bytes; descarta o que já foi consumido"""
+
+    def __init__(self, chunks: Iterable[bytes]):
+        self._chunks = iter(chunks)
+        self._utf8 = codecs.getincrementaldecoder("utf-8-sig")()
+        self.text = ""
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """Lê o próximo bloco; False no fim da fonte"""
+        if self.eof:
+            return False
+        chunk = next(self._chunks, None)
+        self.text = self.text[self.pos:]
+        self.pos = 0
+        if chunk is None:
+            self.eof = True
+            self.text += self._utf8.decode(b"", final=True)
+            return False
+        self.text += self._utf8.decode(chunk)
+        return True
+
+    def peek(self, skip: str = "") -> Optional[str]:
+        """Pula espaços (e caracteres em `skip`) e retorna o próximo caractere, ou None no fim"""
+        while True:
+            text, pos = self.text, self.pos
+            while pos < len(text) and (text[pos].isspace() or text[pos] in skip):
+                pos += 1
+            self.pos = pos
+            if pos < len(text):
+                return text[pos]
+            if not self.fill():
+                return None
+
+    def expect(self, char: str) -> None:
+        if self.peek() != char:
+            raise JSONStreamError(f"Esperado '{char}' na posição {self.pos}")
+        self.pos += 1
+
+    def decode(self) -> Any:
+        """Decodifica o próximo valor JSON completo, lendo mais blocos se preciso"""
+        # raw_decode não aceita espaços antes do valor
+        if self.peek() is None:
+            raise JSONStreamError("Fim inesperado do documento")
+        while True:
+            try:
+                value, end = _JSON.raw_decode(self.text, self.pos)
+            except json.JSONDecodeError as e:
+                if self.fill():
+                    continue
+                raise JSONStreamError(f"JSON truncado ou inválido: {e}") from e
+            # Número cortado no fim do bloco ("12" de "123", "1" de "1.5") continua no próximo
+            if isinstance(value, (int, float)) and not self.eof:
+                if (end == len(self.text) or self.text[end] in ".eE+-") and self.fill():
+                    continue
+            self.pos = end
+            return value
+
+
+def iter_json_records(
+    chunks: Iterable[bytes],
+    array_key: str = "data",
+    ndjson: bool = False,
+) -> Iterator[Any]:
+    """
+    Itera os registros de uma exportação do PNCP sem carregá-la inteira
+
+    Args:
+        chunks: Blocos de bytes da fonte (arquivo, gzip, resposta HTTP)
+        array_key: Chave do array de registros quando o topo é um objeto
+        ndjson: Fonte com um objeto JSON por linha
+
+    Raises:
+        JSONStreamError: Documento malformado ou truncado
+    """
+    buf = _TextBuffer(chunks)
+
+    if ndjson:
+        while buf.peek() is not None:
+            yield buf.decode()
+        return
+
+    first = buf.peek()
+    if first is None:
+        return
+    if first == "{":
+        # Percorre as chaves do objeto até o array; metadados são descartados
+        buf.pos += 1
+        while True:
+            char = buf.peek(skip=",")
+            if char == "}" or char is None:
+                return
+            key = buf.decode()
+            buf.expect(":")
+            if key == array_key and buf.peek() == "[":
+                break
+            buf.decode()
+
+    buf.expect("[")
+    while True:
+        char = buf.peek(skip=",")
+        if char is None:
+            raise JSONStreamError("Array não terminado")
+        if char == "]":
+            return
+        yield buf.decode()
+
+
+def open_source(source: str, read_size: int = READ_SIZE) -> Iterator[bytes]:
+    """
+    Blocos de bytes de um arquivo local (.gz descompactado) ou URL http(s)
+    """
+    if source.startswith(("http://", "https://")):
+        import httpx
+
+        with httpx.Client(timeout=httpx.Timeout(settings.PNCP_READ_TIMEOUT, connect=settings.PNCP_CONNECT_TIMEOUT)) as client:
+            with client.stream("GET", source, headers={"Accept": "application/json"}) as response:
+                response.raise_for_status()
+                yield from response.iter_bytes(read_size)
+        return
+
+    opener = gzip.open if source.endswith(".gz") else open
+    with opener(source, "rb") as fp:
+        while True:
+            chunk = fp.read(read_size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def is_ndjson(source: str) -> bool:
+    name = source.split("?", 1)[0].removesuffix(".gz")
+    return name.endswith((".ndjson", ".jsonl"))
+
+
+# ============ Carga em lote ============
+
+COPY_COLUMNS = (
+    "id_pncp", "cnpj_fornecedor", "numero", "objeto", "valor", "data_assinatura",
+    "vigencia", "status", "orgao", "data_atualizacao_pncp",
+)
+
+
+def _copy_upsert(db: Session, rows: List[Dict[str, Any]]) -> int:
+    """COPY para tabela temporária + INSERT ... SELECT ... ON CONFLICT (PostgreSQL/psycopg2)"""
+    columns = ", ".join(COPY_COLUMNS)
+    updates = ", ".join(f"{c} = EXCLUDED.{c}" for c in COPY_COLUMNS if c != "id_pncp")
+
+    data = io.StringIO()
+    writer = csv.writer(data)
+    for row in rows:
+        writer.writerow([row[c] for c in COPY_COLUMNS])
+    data.seek(0)
+
+    cursor = db.connection().connection.dbapi_connection.cursor()
+    try:
+        cursor.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS pncp_contratos_stage "
+            "(LIKE pncp_contratos INCLUDING DEFAULTS) ON COMMIT DELETE ROWS"
+        )
+        cursor.copy_expert(f"COPY pncp_contratos_stage ({columns}) FROM STDIN WITH (FORMAT csv)", data)
+        cursor.execute(
+            f"INSERT INTO pncp_contratos ({columns}) SELECT {columns} FROM pncp_contratos_stage "
+            f"ON CONFLICT (id_pncp) DO UPDATE SET {updates}, sincronizado_em = now()"
+        )
+    finally:
+        cursor.close()
+    return len(rows)
+
+
+def gravar_lote(db: Session, rows: List[Dict[str, Any]]) -> int:
+    """Grava um chunk validado e confirma a transação"""
+    if not rows:
+        return 0
+    bind = db.get_bind()
+    if bind.dialect.name == "postgresql" and bind.dialect.driver == "psycopg2":
+        written = _copy_upsert(db, rows)
+    else:
+        written = bulk_upsert(db, ContratoPNCP, rows, "id_pncp")
+    db.commit()
+    return written
+
+
+@dataclass
+class IngestResult:
+    """Contadores de uma ingestão"""
+    lidos: int = 0
+    gravados: int = 0
+    invalidos: int = 0
+    segundos: float = 0.0
+    erros: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> dict:
+        return {
+            "lidos": self.lidos,
+            "gravados": self.gravados,
+            "invalidos": self.invalidos,
+            "segundos": round(self.segundos, 2),
+            "registros_por_segundo": round(self.lidos / self.segundos) if self.segundos else 0,
+            "erros": self.erros,
+        }
+
+
+# Amostra de erros de validação guardada no resultado
+MAX_ERROS_REGISTRADOS = 20
+
+
+def carregar_contratos(
+    db: Session,
+    records: Iterable[Dict[str, Any]],
+    chunk_size: Optional[int] = None,
+    result: Optional[IngestResult] = None,
+) -> IngestResult:
+    """
+    Valida e grava contratos em chunks de `chunk_size`
+
+    Apenas um chunk fica em memória por vez; ids repetidos dentro do
+    chunk mantêm a última ocorrência (o upsert não aceita a mesma chave
+    duas vezes no mesmo comando).
+    """
+    chunk_size = chunk_size or settings.PNCP_INGEST_CHUNK_SIZE
+    result = result or IngestResult()
+    start = time.perf_counter()
+
+    chunk: Dict[str, Dict[str, Any]] = {}
+    for record in records:
+        result.lidos += 1
+        try:
+            row = ContratoPNCPDump.model_validate(record).to_row()
+        except ValidationError as e:
+            result.invalidos += 1
+            if len(result.erros) < MAX_ERROS_REGISTRADOS:
+                result.erros.append(f"registro {result.lidos}: {e.errors()[0]['msg']}")
+            continue
+        chunk[row["id_pncp"]] = row
+        if len(chunk) >= chunk_size:
+            result.gravados += gravar_lote(db, list(chunk.values()))
+            chunk = {}
+
+    result.gravados += gravar_lote(db, list(chunk.values()))
+    result.segundos += time.perf_counter() - start
+    return result
+
+
+def ingerir_fontes(
+    db: Session,
+    sources: Iterable[str],
+    chunk_size: Optional[int] = None,
+    array_key: str = "data",
+) -> IngestResult:
+    """
+    Ingere uma ou mais fontes (arquivos ou URLs de páginas) em sequência
+
+    Returns:
+        IngestResult: Totais acumulados de todas as fontes
+    """
+    result = IngestResult()
+    for source in sources:
+        antes = result.gravados
+        records = iter_json_records(open_source(source), array_key=array_key, ndjson=is_ndjson(source))
+        carregar_contratos(db, records, chunk_size=chunk_size, result=result)
+        logger.info(f"📥 PNCP ingest: {result.gravados - antes} contratos de {source}")
+    return result
@@ -0,0 +1,274 @@
+"""
+Espelho local do PNCP
+=====================
+
+Fornecedores e contratos do PNCP persistidos em `pncp_fornecedores` e
+`pncp_contratos`, para que as rotas /pncp respondam com uma leitura por
+chave primária/índice em vez de chamar a API do governo.
+
+Sincronização incremental (task Celery `sentinela.periodic.pncp_sync`):
+- Cada recurso guarda em `pncp_sync_state` o cursor keyset
+  (dataAtualizacao, chave) do último registro gravado
+- Páginas são pedidas ao PNCP a partir desse cursor e gravadas com
+  upsert em lote (INSERT ... ON CONFLICT DO UPDATE), uma transação por
+  página; o cursor avança na mesma transação, então uma execução
+  interrompida retoma de onde parou sem perder nem duplicar registros
+
+Leitura: CNPJs presentes no espelho são servidos localmente; os demais
+seguem para o cache/cliente PNCP (app.core.pncp_cache).
+
+Repositório: adrisa007/sentinela (ID: 1112237272)
+"""
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import asyncio
+import logging
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.models import ContratoPNCP, FornecedorPNCP, PNCPSyncState
+from app.core.pncp_client import PNCPClient
+
+logger = logging.getLogger(__name__)
+
+
+# ============ Conversão PNCP → linhas ============
+
+def _parse_datetime(value: Any) -> Optional[datetime]:
+    if not value:
+        return None
+    if isinstance(value, datetime):
+        return value
+    return datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+
+
+def _digits(value: Any) -> str:
+    return ''.join(filter(str.isdigit, str(value or "")))
+
+
+def fornecedor_row(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Registro de fornecedor do PNCP (camelCase) → colunas de FornecedorPNCP"""
+    return {
+        "cnpj": _digits(record["cnpj"]),
+        "razao_social": record["razaoSocial"],
+        "nome_fantasia": record.get("nomeFantasia"),
+        "situacao_cadastral": record.get("situacaoCadastral"),
+        "data_abertura": record.get("dataAbertura"),
+        "porte": record.get("porte"),
+        "natureza_juridica": record.get("naturezaJuridica"),
+        "logradouro": record.get("logradouro"),
+        "numero": record.get("numero"),
+        "complemento": record.get("complemento"),
+        "bairro": record.get("bairro"),
+        "municipio": record.get("municipio"),
+        "uf": record.get("uf"),
+        "cep": record.get("cep"),
+        "telefone": record.get("telefone"),
+        "email": record.get("email"),
+        "data_atualizacao_pncp": _parse_datetime(record.get("dataAtualizacao")),
+    }
+
+
+def contrato_row(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Registro de contrato do PNCP (camelCase) → colunas de ContratoPNCP"""
+    cnpj = _digits(record["cnpjFornecedor"])
+    return {
+        "id_pncp": str(record.get("id") or f"{cnpj}:{record['numero']}"),
+        "cnpj_fornecedor": cnpj,
+        "numero": record["numero"],
+        "objeto": record.get("objeto"),
+        "valor": float(record.get("valor") or 0),
+        "data_assinatura": record.get("dataAssinatura"),
+        "vigencia": record.get("vigencia"),
+        "status": record.get("status"),
+        "orgao": record.get("orgao"),
+        "data_atualizacao_pncp": _parse_datetime(record.get("dataAtualizacao")),
+    }
+
+
+# recurso → (modelo, conversor, coluna chave)
+RECURSOS: Dict[str, Tuple[type, Callable[[Dict[str, Any]], Dict[str, Any]], str]] = {
+    "fornecedores": (FornecedorPNCP, fornecedor_row, "cnpj"),
+    "contratos": (ContratoPNCP, contrato_row, "id_pncp"),
+}
+
+
+# ============ Upsert em lote ============
+
+def bulk_upsert(db: Session, model: type, rows: List[Dict[str, Any]], key: str) -> int:
+    """
+    INSERT ... ON CONFLICT (chave) DO UPDATE em um único executemany
+
+    PostgreSQL e SQLite usam o upsert nativo do dialeto; outros bancos
+    caem para session.merge linha a linha.
+
+    Returns:
+        int: Linhas gravadas
+    """
+    if not rows:
+        return 0
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        for row in rows:
+            db.merge(model(**row))
+        return len(rows)
+
+    stmt = insert(model)
+    columns = [c for c in rows[0] if c != key]
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[key],
+        set_={**{c: stmt.excluded[c] for c in columns}, "sincronizado_em": datetime.now(timezone.utc)},
+    )
+    db.execute(stmt, rows)
+    return len(rows)
+
+
+# ============ Sincronização incremental ============
+
+def _get_state(db: Session, recurso: str) -> PNCPSyncState:
+    state = db.get(PNCPSyncState, recurso)
+    if state is None:
+        state = PNCPSyncState(recurso=recurso, registros_sincronizados=0)
+        db.add(state)
+    return state
+
+
+def _convert(records: Iterable[Dict[str, Any]], converter, key: str) -> List[Dict[str, Any]]:
+    """Converte a página descartando registros malformados e chaves repetidas"""
+    rows: Dict[str, Dict[str, Any]] = {}
+    for record in records:
+        try:
+            row = converter(record)
+        except (KeyError, TypeError, ValueError) as e:
+            logger.warning(f"⚠️  PNCP sync: registro ignorado ({type(e).__name__}: {e})")
+            continue
+        rows[row[key]] = row
+    return list(rows.values())
+
+
+async def sincronizar_recurso(
+    client: PNCPClient,
+    db: Session,
+    recurso: str,
+    page_size: Optional[int] = None,
+    max_pages: Optional[int] = None,
+) -> int:
+    """
+    Sincroniza um recurso a partir do cursor salvo até esgotar as atualizações
+
+    Args:
+        client: Cliente PNCP
+        db: Sessão síncrona (worker Celery)
+        recurso: "fornecedores" ou "contratos"
+        page_size: Registros por página (padrão: PNCP_SYNC_PAGE_SIZE)
+        max_pages: Limite de páginas por execução (padrão: PNCP_SYNC_MAX_PAGES)
+
+    Returns:
+        int: Registros gravados nesta execução
+    """
+    model, converter, key = RECURSOS[recurso]
+    page_size = page_size or settings.PNCP_SYNC_PAGE_SIZE
+    max_pages = max_pages or settings.PNCP_SYNC_MAX_PAGES
+
+    state = _get_state(db, recurso)
+    total = 0
+    for _ in range(max_pages):
+        page = await client.get_atualizacoes(
+            recurso, desde=state.high_water_mark, apos_chave=state.ultima_chave, tamanho=page_size
+        )
+        if not page:
+            break
+
+        rows = _convert(page, converter, key)
+        total += bulk_upsert(db, model, rows, key)
+
+        # Cursor avança na mesma transação do upsert
+        ultimo = page[-1]
+        state.high_water_mark = _parse_datetime(ultimo.get("dataAtualizacao")) or state.high_water_mark
+        try:
+            state.ultima_chave = converter(ultimo)[key]
+        except (KeyError, TypeError, ValueError):
+            pass
+        state.registros_sincronizados = (state.registros_sincronizados or 0) + len(rows)
+        db.commit()
+
+        if len(page) < page_size:
+            break
+
+    state.ultima_execucao = datetime.now(timezone.utc)
+    db.commit()
+    return total
+
+
+async def sincronizar_espelho(client: PNCPClient, db: Session) -> Dict[str, int]:
+    """Sincroniza fornecedores e depois contratos"""
+    resultado = {}
+    for recurso in RECURSOS:
+        resultado[recurso] = await sincronizar_recurso(client, db, recurso)
+        logger.info(f"🔄 PNCP sync: {resultado[recurso]} {recurso} atualizados")
+    return resultado
+
+
+def run_sync() -> Dict[str, int]:
+    """
+    Ponto de entrada síncrono (Celery): cliente e sessão próprios da execução
+
+    O cliente global pertence ao event loop da API; aqui um loop novo é
+    criado por execução, então o cliente também é.
+    """
+    from app.core.database import SessionLocal
+
+    async def _run() -> Dict[str, int]:
+        client = PNCPClient()
+        db = SessionLocal()
+        try:
+            return await sincronizar_espelho(client, db)
+        finally:
+            db.close()
+            await client.aclose()
+
+    return asyncio.run(_run())
+
+
+# ============ Leitura ============
+
+async def get_fornecedores_locais(db: AsyncSession, cnpjs: List[str]) -> Dict[str, Dict[str, Any]]:
+    """
+    Cadastro + contratos dos CNPJs presentes no espelho (duas consultas)
+
+    Returns:
+        dict: cnpj → {"cadastro": {...}, "contratos": [...]} no formato da API do PNCP
+    """
+    if not cnpjs:
+        return {}
+
+    fornecedores = (
+        await db.execute(select(FornecedorPNCP).where(FornecedorPNCP.cnpj.in_(cnpjs)))
+    ).scalars().all()
+    if not fornecedores:
+        return {}
+
+    encontrados = {f.cnpj: {"cadastro": f.to_pncp(), "contratos": []} for f in fornecedores}
+    contratos = (
+        await db.execute(
+            select(ContratoPNCP)
+            .where(ContratoPNCP.cnpj_fornecedor.in_(list(encontrados)))
+            .order_by(ContratoPNCP.cnpj_fornecedor, ContratoPNCP.data_assinatura.desc())
+        )
+    ).scalars().all()
+    for contrato in contratos:
+        encontrados[contrato.cnpj_fornecedor]["contratos"].append(contrato.to_pncp())
+    return encontrados
+
+
+async def get_fornecedor_local(db: AsyncSession, cnpj: str) -> Optional[Dict[str, Any]]:
+    """Cadastro + contratos de um CNPJ no espelho, ou None se desconhecido"""
+    return (await get_fornecedores_locais(db, [cnpj])).get(cnpj)
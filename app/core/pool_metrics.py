@@ -0,0 +1,132 @@
+"""
+Instrumentação do Pool de Conexões do SQLAlchemy
+================================================
+
+Pools QueuePool que medem o tempo de espera por uma conexão (checkout)
+e expõem contadores para dimensionar o pool por worker a partir de dados
+reais, em vez de esgotar o limite de conexões do Neon.
+
+Repositório: adrisa007/sentinela (ID: 1112237272)
+"""
+from typing import Optional
+import threading
+import time
+
+from sqlalchemy import exc as sa_exc
+from sqlalchemy.engine import Engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+# Limites superiores (ms) do histograma de latência de checkout
+CHECKOUT_LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+
+class PoolMetrics:
+    """
+    Contadores de checkout de um pool
+
+    Attributes:
+        checkouts: Total de conexões entregues
+        timeouts: Total de checkouts que estouraram pool_timeout
+        wait_total_ms: Soma dos tempos de espera por conexão
+        wait_max_ms: Maior tempo de espera observado
+        buckets: Contagem cumulativa por limite de CHECKOUT_LATENCY_BUCKETS_MS (+Inf no final)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total_ms = 0.0
+        self.wait_max_ms = 0.0
+        self.buckets = [0] * (len(CHECKOUT_LATENCY_BUCKETS_MS) + 1)
+
+    def observe(self, wait_ms: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.wait_total_ms += wait_ms
+            if wait_ms > self.wait_max_ms:
+                self.wait_max_ms = wait_ms
+            for i, bound in enumerate(CHECKOUT_LATENCY_BUCKETS_MS):
+                if wait_ms <= bound:
+                    self.buckets[i] += 1
+                    return
+            self.buckets[-1] += 1
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.timeouts += 1
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            cumulative = 0
+            histogram = {}
+            for bound, count in zip(CHECKOUT_LATENCY_BUCKETS_MS, self.buckets):
+                cumulative += count
+                histogram[f"le_{bound}ms"] = cumulative
+            histogram["le_inf"] = cumulative + self.buckets[-1]
+
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_total_ms": round(self.wait_total_ms, 3),
+                "wait_avg_ms": round(self.wait_total_ms / self.checkouts, 3) if self.checkouts else 0.0,
+                "wait_max_ms": round(self.wait_max_ms, 3),
+                "checkout_latency_histogram": histogram,
+            }
+
+
+class InstrumentedPoolMixin:
+    """Mede o tempo gasto em `_do_get` (espera + eventual abertura de conexão)"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except sa_exc.TimeoutError:
+            self.metrics.record_timeout()
+            raise
+        self.metrics.observe((time.perf_counter() - start) * 1000)
+        return connection
+
+
+class InstrumentedQueuePool(InstrumentedPoolMixin, QueuePool):
+    """QueuePool com métricas de checkout (engine síncrono)"""
+
+
+class InstrumentedAsyncQueuePool(InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    """AsyncAdaptedQueuePool com métricas de checkout (engine assíncrono)"""
+
+
+def get_pool_stats(engine: Engine) -> dict:
+    """
+    Estado atual e métricas acumuladas do pool de um engine
+
+    Args:
+        engine: Engine síncrono (para AsyncEngine, passe `async_engine.sync_engine`)
+
+    Returns:
+        dict: Tamanho, conexões em uso, overflow e métricas de checkout
+    """
+    pool = engine.pool
+    stats: dict = {"pool_class": type(pool).__name__}
+
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "max_overflow": pool._max_overflow,
+            "timeout": pool.timeout(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+        })
+
+    metrics: Optional[PoolMetrics] = getattr(pool, "metrics", None)
+    if metrics is not None:
+        stats.update(metrics.snapshot())
+
+    return stats
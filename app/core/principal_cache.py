@@ -0,0 +1,225 @@
+"""
+Cache do Principal Autenticado
+==============================
+
+Evita que toda rota protegida consulte `users` e `entidades` a cada
+requisição. Guarda snapshots imutáveis e compactos do usuário (chave:
+user_id + jti/iat do token) e da entidade (chave: entidade_id), com TTL
+e despejo LRU.
+
+Invalidação:
+- Qualquer UPDATE/DELETE via ORM em User ou Entidade (mapper events)
+  anota os ids na sessão; o commit (after_commit, sessões sync e async)
+  remove as entradas afetadas neste processo
+  (ex.: update_entidade_status, verify_mfa, disable_mfa, desativação).
+  Invalidar no flush deixaria uma requisição concorrente reler a linha
+  antiga, ainda não substituída, e recolocá-la no cache.
+- Em outros workers a entrada expira pelo TTL (PRINCIPAL_CACHE_TTL).
+
+O secret de MFA não entra no snapshot: o TOTP é validado ao carregar o
+principal do banco e as rotas de MFA leem o secret do banco.
+
+Repositório: adrisa007/sentinela (ID: 1112237272)
+"""
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Optional, Tuple
+import logging
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+
+from app.core.cache import TTLLRUCache
+from app.core.config import settings
+from app.core.models import User, UserRole, Entidade, TipoEntidade, StatusEntidade
+
+logger = logging.getLogger(__name__)
+
+
+# ============ Snapshots Imutáveis ============
+
+@dataclass(frozen=True)
+class UserSnapshot:
+    """Cópia somente-leitura dos campos de User usados na autorização"""
+    id: int
+    username: str
+    email: str
+    full_name: Optional[str]
+    role: UserRole
+    is_active: bool
+    mfa_enabled: bool
+    entidade_id: Optional[int]
+    last_login: Optional[datetime]
+
+    @classmethod
+    def from_model(cls, user: User) -> "UserSnapshot":
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            full_name=user.full_name,
+            role=user.role,
+            is_active=user.is_active,
+            mfa_enabled=user.mfa_enabled,
+            entidade_id=user.entidade_id,
+            last_login=user.last_login,
+        )
+
+
+@dataclass(frozen=True)
+class EntidadeSnapshot:
+    """Cópia somente-leitura dos campos de Entidade usados pelos routers"""
+    id: int
+    nome: str
+    razao_social: Optional[str]
+    cnpj: Optional[str]
+    tipo: TipoEntidade
+    status: StatusEntidade
+    is_active: bool
+    email: Optional[str]
+    telefone: Optional[str]
+    endereco: Optional[str]
+    cidade: Optional[str]
+    estado: Optional[str]
+    cep: Optional[str]
+    motivo_status: Optional[str]
+    created_at: Optional[datetime]
+
+    @classmethod
+    def from_model(cls, entidade: Entidade) -> "EntidadeSnapshot":
+        return cls(
+            id=entidade.id,
+            nome=entidade.nome,
+            razao_social=entidade.razao_social,
+            cnpj=entidade.cnpj,
+            tipo=entidade.tipo,
+            status=entidade.status,
+            is_active=entidade.is_active,
+            email=entidade.email,
+            telefone=entidade.telefone,
+            endereco=entidade.endereco,
+            cidade=entidade.cidade,
+            estado=entidade.estado,
+            cep=entidade.cep,
+            motivo_status=entidade.motivo_status,
+            created_at=entidade.created_at,
+        )
+
+    @property
+    def is_ativa(self) -> bool:
+        """Verifica se entidade está ativa"""
+        return self.status == StatusEntidade.ATIVA
+
+    @property
+    def is_acessivel(self) -> bool:
+        """Verifica se entidade é acessível (ativa ou em análise)"""
+        return self.status in [StatusEntidade.ATIVA, StatusEntidade.EM_ANALISE]
+
+
+# ============ Cache ============
+
+class PrincipalCache:
+    """
+    Cache de processo para usuários e entidades autenticados
+
+    Usage:
+        key = principal_cache.make_key(user_id, payload)
+        snapshot = principal_cache.get_user(key)
+    """
+
+    def __init__(self, maxsize: int, ttl: float, enabled: bool = True):
+        self.enabled = enabled
+        self.users = TTLLRUCache(maxsize=maxsize, ttl=ttl)
+        self.entidades = TTLLRUCache(maxsize=maxsize, ttl=ttl)
+
+    @staticmethod
+    def make_key(user_id: int, payload: dict) -> Tuple[int, Any]:
+        """Chave do principal: (user_id, jti) ou (user_id, iat) quando não há jti"""
+        return (user_id, payload.get("jti") or payload.get("iat"))
+
+    def get_user(self, key: Tuple[int, Any]) -> Optional[UserSnapshot]:
+        if not self.enabled:
+            return None
+        return self.users.get(key)
+
+    def set_user(self, key: Tuple[int, Any], snapshot: UserSnapshot) -> None:
+        if self.enabled:
+            self.users.set(key, snapshot)
+
+    def get_entidade(self, entidade_id: int) -> Optional[EntidadeSnapshot]:
+        if not self.enabled:
+            return None
+        return self.entidades.get(entidade_id)
+
+    def set_entidade(self, snapshot: EntidadeSnapshot) -> None:
+        if self.enabled:
+            self.entidades.set(snapshot.id, snapshot)
+
+    def invalidate_user(self, user_id: int) -> int:
+        """Remove todas as sessões em cache do usuário (todos os tokens)"""
+        removed = self.users.discard_where(lambda key, _: key[0] == user_id)
+        if removed:
+            logger.debug(f"🧹 Principal cache: {removed} entrada(s) do usuário {user_id} invalidada(s)")
+        return removed
+
+    def invalidate_entidade(self, entidade_id: int) -> None:
+        """Remove a entidade do cache"""
+        if self.entidades.pop(entidade_id) is not None:
+            logger.debug(f"🧹 Principal cache: entidade {entidade_id} invalidada")
+
+    def clear(self) -> None:
+        self.users.clear()
+        self.entidades.clear()
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "users": self.users.stats(),
+            "entidades": self.entidades.stats(),
+        }
+
+
+# Instância global
+principal_cache = PrincipalCache(
+    maxsize=settings.PRINCIPAL_CACHE_MAXSIZE,
+    ttl=settings.PRINCIPAL_CACHE_TTL,
+    enabled=settings.PRINCIPAL_CACHE_ENABLED,
+)
+
+
+# ============ Invalidação por Escrita (ORM) ============
+
+PENDENTES = "principal_cache_invalidar"
+
+
+def _anotar(target, tipo: str) -> None:
+    session = object_session(target)
+    if session is not None:
+        session.info.setdefault(PENDENTES, set()).add((tipo, target.id))
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_user_on_write(mapper, connection, target: User) -> None:
+    _anotar(target, "user")
+
+
+@event.listens_for(Entidade, "after_update")
+@event.listens_for(Entidade, "after_delete")
+def _invalidate_entidade_on_write(mapper, connection, target: Entidade) -> None:
+    _anotar(target, "entidade")
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_on_commit(session: Session) -> None:
+    """Sessões async também disparam: AsyncSession delega a uma Session sync"""
+    for tipo, id_ in session.info.pop(PENDENTES, ()):
+        if tipo == "user":
+            principal_cache.invalidate_user(id_)
+        else:
+            principal_cache.invalidate_entidade(id_)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_on_rollback(session: Session) -> None:
+    session.info.pop(PENDENTES, None)
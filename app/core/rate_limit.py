@@ -12,7 +12,16 @@ from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 from fastapi import Request, Response
 from fastapi.responses import JSONResponse
+from limits import RateLimitItem, parse
+from math import ceil
+from typing import Optional, Tuple
 import logging
+import time
+
+from app.core.config import settings
+from app.core.metrics import RATE_LIMIT_REJECTIONS, rota_template
+# Registra o esquema sentinela+redis:// e as estratégias token-bucket e +batched
+import app.core.rate_limit_storage  # noqa: F401
 
 logger = logging.getLogger(__name__)
 
@@ -50,16 +59,98 @@ def get_identifier(request: Request) -> str:
     return get_remote_address(request)
 
 
+def get_storage_config() -> Tuple[str, dict]:
+    """
+    Define o storage do limiter a partir de RATE_LIMIT_STORAGE
+    
+    Com "redis", usa a mesma instância configurada em app.redis_client, com
+    timeouts curtos: se o Redis cair, o slowapi passa a contar em memória
+    (in_memory_fallback_enabled) e volta ao Redis quando ele responder.
+    
+    Returns:
+        Tuple[str, dict]: (storage_uri, storage_options)
+    """
+    if settings.RATE_LIMIT_STORAGE == "redis":
+        from app.redis_client import get_redis_url
+        
+        return f"sentinela+{get_redis_url()}", {
+            "socket_connect_timeout": settings.RATE_LIMIT_REDIS_TIMEOUT,
+            "socket_timeout": settings.RATE_LIMIT_REDIS_TIMEOUT,
+        }
+    
+    return "memory://", {}
+
+
+storage_uri, storage_options = get_storage_config()
+
+def get_strategy_name() -> str:
+    """Estratégia registrada no `limits`, com sufixo +batched se o batching estiver ativo"""
+    if settings.RATE_LIMIT_BATCH_ENABLED:
+        return f"{settings.RATE_LIMIT_STRATEGY}+batched"
+    return settings.RATE_LIMIT_STRATEGY
+
+
 # Criar instância do Limiter
 limiter = Limiter(
     key_func=get_identifier,
-    default_limits=["300/minute"],  # Limite global: 300 req/min
-    storage_uri="memory://",  # Usar memória (para produção, usar Redis)
-    strategy="fixed-window",  # Estratégia de janela fixa
+    default_limits=[settings.RATE_LIMIT_GLOBAL],  # Limite global: 300 req/min
+    storage_uri=storage_uri,
+    storage_options=storage_options,
+    strategy=get_strategy_name(),
+    in_memory_fallback_enabled=True,  # Redis inacessível: contadores locais
     headers_enabled=True,  # Adicionar headers de rate limit na resposta
 )
 
 
+# ============ Estado do Limite ============
+
+# Granularidade do `limits` -> (singular, plural)
+GRANULARITY_LABELS = {
+    "second": ("segundo", "segundos"),
+    "minute": ("minuto", "minutos"),
+    "hour": ("hora", "horas"),
+    "day": ("dia", "dias"),
+    "month": ("mês", "meses"),
+    "year": ("ano", "anos"),
+}
+
+
+def describe_limit(item: RateLimitItem) -> str:
+    """Descrição legível de um limite (ex.: "10 requisições por minuto")"""
+    name = item.GRANULARITY.name
+    singular, plural = GRANULARITY_LABELS.get(name, (name, f"{name}s"))
+    if item.multiples == 1:
+        return f"{item.amount} requisições por {singular}"
+    return f"{item.amount} requisições a cada {item.multiples} {plural}"
+
+
+def get_limit_state(request: Request) -> Optional[dict]:
+    """
+    Lê do storage o estado do limite aplicado à requisição atual
+    
+    Usa `request.state.view_rate_limit`, preenchido pelo slowapi com o limite
+    mais restritivo avaliado para a rota (ou o que foi excedido).
+    
+    Returns:
+        dict | None: limit, remaining, reset (epoch), reset_in (s) e descrição;
+        None se nenhum limite foi avaliado nesta requisição
+    """
+    view_rate_limit = getattr(request.state, "view_rate_limit", None)
+    if not view_rate_limit:
+        return None
+    
+    item, identifiers = view_rate_limit
+    app_limiter = getattr(request.app.state, "limiter", limiter)
+    window_stats = app_limiter.limiter.get_window_stats(item, *identifiers)
+    return {
+        "limit": item.amount,
+        "remaining": max(0, window_stats.remaining),
+        "reset": int(ceil(window_stats.reset_time)),
+        "reset_in": max(1, ceil(window_stats.reset_time - time.time())),
+        "description": describe_limit(item),
+    }
+
+
 # ============ Handler de Erro Customizado ============
 
 def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded) -> Response:
@@ -68,12 +159,14 @@ def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded) -> Res
     
     Retorna:
     - Status Code: 429 Too Many Requests
-    - Headers com informações de rate limit
+    - Headers com o limite da rota excedida e o tempo real até liberar
     - Mensagem amigável em JSON
     """
     # Obter identificador do cliente
     identifier = get_identifier(request)
     
+    RATE_LIMIT_REJECTIONS.labels(rota_template(request.scope, 429)).inc()
+    
     # Log de tentativa de rate limit
     logger.warning(
         f"🚫 Rate limit excedido - "
@@ -82,47 +175,99 @@ def rate_limit_exceeded_handler(request: Request, exc: RateLimitExceeded) -> Res
         f"Método: {request.method}"
     )
     
+    try:
+        state = get_limit_state(request)
+    except Exception as e:
+        logger.error(f"Erro ao obter estado do rate limit: {e}")
+        state = None
+    
+    if state is None:
+        item = exc.limit.limit
+        state = {
+            "limit": item.amount,
+            "remaining": 0,
+            "reset": int(time.time()) + item.get_expiry(),
+            "reset_in": item.get_expiry(),
+            "description": describe_limit(item),
+        }
+    
+    return limit_exceeded_response(identifier, state)
+
+
+def limit_exceeded_response(identifier: str, state: dict) -> JSONResponse:
+    """Resposta 429 padrão a partir do estado do limite (ver get_limit_state)"""
     return JSONResponse(
         status_code=429,
         content={
             "error": "Rate Limit Exceeded",
             "message": "Você excedeu o limite de requisições permitidas. Tente novamente em alguns instantes.",
             "detail": {
-                "limit": "300 requisições por minuto",
-                "retry_after": "60 segundos",
+                "limit": state["description"],
+                "retry_after": f"{state['reset_in']} segundos",
                 "identifier": identifier[:20] + "..." if len(identifier) > 20 else identifier
             }
         },
         headers={
-            "Retry-After": "60",
-            "X-RateLimit-Limit": "300",
+            "Retry-After": str(state["reset_in"]),
+            "X-RateLimit-Limit": str(state["limit"]),
             "X-RateLimit-Remaining": "0",
-            "X-RateLimit-Reset": str(int(exc.retry_after) if hasattr(exc, 'retry_after') else 60)
+            "X-RateLimit-Reset": str(state["reset"])
         }
     )
 
 
 # ============ Funções Auxiliares ============
 
+def hit_extra_limit(request: Request, limit: str, scope: str) -> Optional[Response]:
+    """
+    Aplica um limite adicional, fora do decorator, a parte de uma rota
+
+    Usa o mesmo storage e identificador do limiter (ex.: `?fresh=1` em
+    /health, que força verificações no banco e no Redis).
+
+    Returns:
+        Response | None: 429 se o limite foi excedido, None caso contrário
+    """
+    app_limiter = getattr(request.app.state, "limiter", limiter)
+    if not app_limiter.enabled:
+        return None
+    item = parse(limit)
+    identifier = get_identifier(request)
+    if app_limiter.limiter.hit(item, scope, identifier):
+        return None
+
+    RATE_LIMIT_REJECTIONS.labels(rota_template(request.scope, 429)).inc()
+    logger.warning(f"🚫 Rate limit excedido - Identificador: {identifier} - Escopo: {scope}")
+    window_stats = app_limiter.limiter.get_window_stats(item, scope, identifier)
+    return limit_exceeded_response(identifier, {
+        "limit": item.amount,
+        "reset": int(ceil(window_stats.reset_time)),
+        "reset_in": max(1, ceil(window_stats.reset_time - time.time())),
+        "description": describe_limit(item),
+    })
+
+
 def get_rate_limit_info(request: Request) -> dict:
     """
     Obtém informações atuais de rate limit
     
     Returns:
-        dict: Informações de limite, restante e reset
+        dict: Limite, restante, reset (epoch) e segundos até o reset
     """
     try:
-        # Extrair do limiter
-        key = get_identifier(request)
-        # TODO: Implementar lógica para obter info do storage
-        return {
-            "limit": 300,
-            "remaining": "N/A",  # Requer integração com storage
-            "reset": "N/A"
-        }
+        state = get_limit_state(request)
+        if state is not None:
+            return state
     except Exception as e:
         logger.error(f"Erro ao obter rate limit info: {e}")
-        return {"limit": 300, "remaining": "N/A", "reset": "N/A"}
+    
+    item = parse(settings.RATE_LIMIT_GLOBAL)
+    return {
+        "limit": item.amount,
+        "remaining": "N/A",
+        "reset": "N/A",
+        "description": describe_limit(item),
+    }
 
 
 def exempt_from_rate_limit(request: Request) -> bool:
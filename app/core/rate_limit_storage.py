@@ -0,0 +1,513 @@
+"""
+Storage Distribuído e Estratégias de Rate Limiting
+==================================================
+
+Com vários workers uvicorn e réplicas no Railway, contadores em memória
+fazem cada processo limitar sozinho (limite efetivo = 300 × N). Este
+módulo registra no `limits`/slowapi:
+
+- `sentinela+redis://` — RedisStorage do `limits` (janela móvel via Lua)
+  acrescido de um token bucket atômico em Lua: uma ida ao Redis por checagem
+- `token-bucket` — estratégia que usa o script Lua quando o storage é o
+  Redis e baldes locais em processo nos demais casos (memória e fallback
+  do slowapi quando o Redis está inacessível)
+- `<estratégia>+batched` — variante que agrega localmente os hits de
+  usuários autenticados e os envia ao storage em lote
+
+Repositório: adrisa007/sentinela (ID: 1112237272)
+"""
+from math import floor
+from typing import Callable, Dict, Optional, Tuple
+import logging
+import threading
+import time
+
+from limits.limits import RateLimitItem
+from limits.storage import MemoryStorage, RedisStorage
+from limits.strategies import STRATEGIES, FixedWindowRateLimiter, MovingWindowRateLimiter, RateLimiter
+from limits.util import WindowStats
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+# ============ Token Bucket (Lua) ============
+
+# KEYS[1] = balde; ARGV = capacidade, tokens/s, custo, consumir (1/0), já atendidos
+# Usa o relógio do Redis para que todas as réplicas compartilhem o mesmo tempo.
+TOKEN_BUCKET_LUA = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local consume = ARGV[4] == "1"
+local served = tonumber(ARGV[5] or "0")
+
+local clock = redis.call("TIME")
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+
+local state = redis.call("HMGET", KEYS[1], "tokens", "ts")
+local tokens = tonumber(state[1])
+local ts = tonumber(state[2])
+if tokens == nil or ts == nil then
+    tokens = capacity
+    ts = now
+end
+
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate)
+if consume then
+    -- Hits já atendidos (lote): consumidos mesmo sem saldo; a dívida é reposta com o tempo
+    tokens = tokens - served
+end
+
+local allowed = 0
+if tokens >= cost then
+    allowed = 1
+    if consume then
+        tokens = tokens - cost
+    end
+end
+
+if consume then
+    redis.call("HSET", KEYS[1], "tokens", tostring(tokens), "ts", tostring(now))
+    redis.call("PEXPIRE", KEYS[1], math.ceil(capacity / rate * 1000) + 1000)
+end
+
+return {allowed, tostring(tokens), tostring(now)}
+"""
+
+
+# KEYS[1] = contador da janela fixa; ARGV = expiração (s), quantidade
+# incr_expire.lua do `limits` (mesma chave e semântica) devolvendo também o TTL,
+# para que o lote saiba o restante e o reset sem uma segunda ida ao Redis.
+INCR_COM_TTL_LUA = """
+local amount = tonumber(ARGV[2])
+local current = redis.call("INCRBY", KEYS[1], amount)
+if current == amount then
+    redis.call("EXPIRE", KEYS[1], ARGV[1])
+end
+return {current, redis.call("PTTL", KEYS[1])}
+"""
+
+# KEYS[1] = lista da janela móvel do `limits`; ARGV = agora, limite, expiração,
+# hits já atendidos localmente, custo deste hit
+# Como acquire_moving_window.lua, mas os hits já atendidos entram na janela
+# mesmo quando não sobra espaço para este hit, e a janela resultante
+# (entrada mais antiga, quantidade) volta na mesma chamada.
+JANELA_MOVEL_LOTE_LUA = """
+local timestamp = tonumber(ARGV[1])
+local limit = tonumber(ARGV[2])
+local expiry = tonumber(ARGV[3])
+local served = tonumber(ARGV[4])
+local cost = tonumber(ARGV[5])
+
+local function push(amount)
+    local entries = {}
+    for i = 1, amount do
+        entries[i] = timestamp
+    end
+    for i = 1, #entries, 5000 do
+        redis.call("LPUSH", KEYS[1], unpack(entries, i, math.min(i + 4999, #entries)))
+    end
+end
+
+local total = served + cost
+local allowed = 0
+local entry = total <= limit and redis.call("LINDEX", KEYS[1], limit - total)
+if total <= limit and not (entry and tonumber(entry) >= timestamp - expiry) then
+    allowed = 1
+    push(total)
+else
+    push(math.min(served, limit))
+end
+redis.call("LTRIM", KEYS[1], 0, limit - 1)
+redis.call("EXPIRE", KEYS[1], expiry)
+
+local low, high, index = 0, redis.call("LLEN", KEYS[1]) - 1, nil
+while low <= high do
+    local mid = math.floor((low + high) / 2)
+    local value = tonumber(redis.call("LINDEX", KEYS[1], mid))
+    if value and value >= timestamp - expiry then
+        index = mid
+        low = mid + 1
+    else
+        high = mid - 1
+    end
+end
+if index == nil then
+    return {allowed, tostring(timestamp), 0}
+end
+return {allowed, redis.call("LINDEX", KEYS[1], index), index + 1}
+"""
+
+
+class SentinelaRedisStorage(RedisStorage):
+    """
+    RedisStorage do `limits` com suporte a token bucket
+
+    Esquemas: `sentinela+redis://` e `sentinela+rediss://` (TLS). O restante
+    da URL segue o formato do redis-py.
+    """
+
+    STORAGE_SCHEME = ["sentinela+redis", "sentinela+rediss"]
+
+    def __init__(self, uri: str, **options):
+        super().__init__(uri.replace("sentinela+", "", 1), **options)
+
+    def initialize_storage(self, uri: str) -> None:
+        super().initialize_storage(uri)
+        connection = self.get_connection()
+        self.lua_token_bucket = connection.register_script(TOKEN_BUCKET_LUA)
+        self.lua_incr_com_ttl = connection.register_script(INCR_COM_TTL_LUA)
+        self.lua_janela_movel_lote = connection.register_script(JANELA_MOVEL_LOTE_LUA)
+
+    def token_bucket(
+        self, key: str, capacity: int, rate: float, cost: int = 1, consume: bool = True, served: int = 0
+    ) -> Tuple[bool, float, float]:
+        """
+        Consulta/consome um balde de tokens atomicamente
+
+        Args:
+            served: Hits já atendidos (lote), consumidos antes da decisão mesmo sem saldo
+
+        Returns:
+            Tuple[bool, float, float]: (permitido, tokens restantes, relógio do Redis)
+        """
+        allowed, tokens, now = self.lua_token_bucket(
+            [self.prefixed_key(f"tb:{key}")],
+            [capacity, rate, cost, 1 if consume else 0, served],
+        )
+        return bool(int(allowed)), float(tokens), float(now)
+
+    def incr_with_expiry(self, key: str, expiry: int, amount: int) -> Tuple[int, float]:
+        """
+        `incr` da janela fixa que devolve também o fim da janela
+
+        Returns:
+            Tuple[int, float]: (contador após o incremento, reset em epoch)
+        """
+        current, ttl_ms = self.lua_incr_com_ttl([self.prefixed_key(key)], [expiry, amount])
+        return int(current), time.time() + max(int(ttl_ms), 0) / 1000
+
+    def acquire_served_entries(
+        self, key: str, limit: int, expiry: int, served: int, cost: int
+    ) -> Tuple[bool, float, int]:
+        """
+        Janela móvel: registra `served` hits já atendidos e decide `cost` em uma chamada
+
+        Returns:
+            Tuple[bool, float, int]: (permitido, início da janela, entradas na janela)
+        """
+        allowed, start, count = self.lua_janela_movel_lote(
+            [self.prefixed_key(key)], [time.time(), limit, expiry, served, cost]
+        )
+        return bool(int(allowed)), float(start), int(count)
+
+
+class LocalTokenBuckets:
+    """Baldes de tokens em processo (memória e fallback do Redis)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+
+    def token_bucket(
+        self, key: str, capacity: int, rate: float, cost: int = 1, consume: bool = True, served: int = 0
+    ) -> Tuple[bool, float, float]:
+        now = time.time()
+        with self._lock:
+            tokens, ts = self._buckets.get(key, (capacity, now))
+            tokens = min(capacity, tokens + max(0.0, now - ts) * rate)
+            if consume:
+                tokens -= served
+            allowed = tokens >= cost
+            if consume:
+                if allowed:
+                    tokens -= cost
+                self._buckets[key] = (tokens, now)
+        return allowed, tokens, now
+
+    def clear(self, key: str) -> None:
+        with self._lock:
+            self._buckets.pop(key, None)
+
+
+# ============ Estratégia Token Bucket ============
+
+class TokenBucketRateLimiter(RateLimiter):
+    """
+    Token bucket: capacidade = `amount` do limite, reposição contínua de
+    `amount / período` tokens por segundo
+
+    Permite rajadas curtas até a capacidade sem o "estouro na virada da
+    janela" da janela fixa.
+    """
+
+    def __init__(self, storage):
+        super().__init__(storage)
+        if isinstance(storage, SentinelaRedisStorage):
+            self.buckets = storage
+        else:
+            self.buckets = LocalTokenBuckets()
+
+    @staticmethod
+    def _bucket_params(item: RateLimitItem) -> Tuple[int, float]:
+        return item.amount, item.amount / item.get_expiry()
+
+    def hit(self, item: RateLimitItem, *identifiers: str, cost: int = 1) -> bool:
+        capacity, rate = self._bucket_params(item)
+        allowed, _, _ = self.buckets.token_bucket(item.key_for(*identifiers), capacity, rate, cost)
+        return allowed
+
+    def test(self, item: RateLimitItem, *identifiers: str, cost: int = 1) -> bool:
+        capacity, rate = self._bucket_params(item)
+        allowed, _, _ = self.buckets.token_bucket(
+            item.key_for(*identifiers), capacity, rate, cost, consume=False
+        )
+        return allowed
+
+    def get_window_stats(self, item: RateLimitItem, *identifiers: str) -> WindowStats:
+        """
+        Returns:
+            WindowStats: (instante em que o próximo token estará disponível, tokens inteiros restantes)
+        """
+        capacity, rate = self._bucket_params(item)
+        _, tokens, now = self.buckets.token_bucket(
+            item.key_for(*identifiers), capacity, rate, 0, consume=False
+        )
+        return self.window_stats(tokens, now, rate)
+
+    @staticmethod
+    def window_stats(tokens: float, now: float, rate: float) -> WindowStats:
+        return WindowStats(now + max(0.0, 1 - tokens) / rate, max(0, floor(tokens)))
+
+    def clear(self, item: RateLimitItem, *identifiers: str) -> None:
+        key = item.key_for(*identifiers)
+        if isinstance(self.buckets, LocalTokenBuckets):
+            self.buckets.clear(key)
+        else:
+            self.storage.clear(f"tb:{key}")
+
+
+STRATEGIES["token-bucket"] = TokenBucketRateLimiter
+
+
+# ============ Agregação Local de Hits (batching) ============
+
+class _BatchEntry:
+    """Estado local de uma chave: último valor lido do storage + hits ainda não enviados"""
+
+    __slots__ = ("item", "identifiers", "pending", "remaining", "reset_time", "synced_at")
+
+    def __init__(self, item: RateLimitItem, identifiers: Tuple[str, ...], remaining: int, reset_time: float):
+        self.item = item
+        self.identifiers = identifiers
+        self.pending = 0
+        self.remaining = remaining
+        self.reset_time = reset_time
+        self.synced_at = time.time()
+
+
+# Chaves sem hits pendentes são descartadas após este tempo (s) sem sincronizar
+IDLE_ENTRY_TTL = 1.0
+
+
+def is_authenticated_key(identifiers: Tuple[str, ...]) -> bool:
+    """Chaves geradas por get_identifier para usuários autenticados ("user:<id>")"""
+    return any(str(identifier).startswith("user:") for identifier in identifiers)
+
+
+class BatchedRateLimiter(RateLimiter):
+    """
+    Agrega hits de clientes autenticados em memória e os envia ao storage
+    em lote a cada `flush_interval` segundos (thread em background)
+
+    Um hit é aceito localmente enquanto `pending + custo <= min(remaining,
+    max_pending)`, onde `remaining` é o último valor lido do storage; caso
+    contrário, os pendentes e este hit vão ao storage em uma única chamada,
+    que decide e devolve a janela resultante. Assim o excesso por processo
+    fica limitado a `max_pending` hits por chave, e clientes muito ativos
+    custam uma escrita por lote, não por requisição. Storage em memória
+    (incluindo o fallback) não usa batching.
+
+    Pendentes já foram atendidos: nunca são descartados, mesmo quando o
+    storage recusa o hit que os acompanha. A thread de envio dorme até
+    haver pendentes.
+    """
+
+    inner_class: type = None
+
+    def __init__(
+        self,
+        storage,
+        flush_interval: float = None,
+        max_pending: int = None,
+        should_batch: Callable[[Tuple[str, ...]], bool] = is_authenticated_key,
+    ):
+        super().__init__(storage)
+        self.inner = self.inner_class(storage)
+        self.flush_interval = (
+            flush_interval if flush_interval is not None
+            else settings.RATE_LIMIT_BATCH_INTERVAL_MS / 1000
+        )
+        self.max_pending = max_pending if max_pending is not None else settings.RATE_LIMIT_BATCH_MAX
+        self.should_batch = should_batch
+        self.enabled = not isinstance(storage, MemoryStorage)
+        self._lock = threading.Lock()
+        self._entries: Dict[str, _BatchEntry] = {}
+        self._flusher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._work = threading.Event()
+
+    # ---------- API de RateLimiter ----------
+
+    def hit(self, item: RateLimitItem, *identifiers: str, cost: int = 1) -> bool:
+        if not (self.enabled and self.should_batch(identifiers)):
+            return self.inner.hit(item, *identifiers, cost=cost)
+
+        key = item.key_for(*identifiers)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.pending + cost <= min(entry.remaining, self.max_pending):
+                entry.pending += cost
+                self._ensure_flusher()
+                self._work.set()
+                return True
+            pending = self._take_pending(entry)
+
+        # Decisão no storage: pendentes e este hit em uma ida
+        allowed, stats, recusados = self._send(item, identifiers, pending, cost)
+        self._sync(key, item, identifiers, stats, recusados)
+        return allowed
+
+    def test(self, item: RateLimitItem, *identifiers: str, cost: int = 1) -> bool:
+        return self.inner.test(item, *identifiers, cost=cost)
+
+    def get_window_stats(self, item: RateLimitItem, *identifiers: str) -> WindowStats:
+        key = item.key_for(*identifiers)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() < entry.reset_time:
+                return WindowStats(entry.reset_time, max(0, entry.remaining - entry.pending))
+        return self.inner.get_window_stats(item, *identifiers)
+
+    def clear(self, item: RateLimitItem, *identifiers: str) -> None:
+        with self._lock:
+            self._entries.pop(item.key_for(*identifiers), None)
+        self.inner.clear(item, *identifiers)
+
+    # ---------- Envio em lote ----------
+
+    @staticmethod
+    def _take_pending(entry: Optional[_BatchEntry]) -> int:
+        if entry is None:
+            return 0
+        pending, entry.pending = entry.pending, 0
+        return pending
+
+    def _send(
+        self, item: RateLimitItem, identifiers: Tuple[str, ...], pending: int, cost: int
+    ) -> Tuple[bool, WindowStats, int]:
+        """
+        Registra `pending` hits já atendidos e decide `cost` (0 no flush)
+
+        Com o SentinelaRedisStorage é uma chamada só, que devolve também a
+        janela; nos demais storages, hit(s) e leitura da janela à parte.
+
+        Returns:
+            Tuple[bool, WindowStats, int]: (permitido, janela, pendentes que não couberam)
+        """
+        storage, key = self.storage, item.key_for(*identifiers)
+        if isinstance(storage, SentinelaRedisStorage):
+            if isinstance(self.inner, FixedWindowRateLimiter):
+                current, reset_time = storage.incr_with_expiry(key, item.get_expiry(), pending + cost)
+                return current <= item.amount, WindowStats(reset_time, max(0, item.amount - current)), 0
+            if isinstance(self.inner, MovingWindowRateLimiter):
+                allowed, start, count = storage.acquire_served_entries(
+                    key, item.amount, item.get_expiry(), pending, cost
+                )
+                return allowed, WindowStats(start + item.get_expiry(), max(0, item.amount - count)), 0
+            if isinstance(self.inner, TokenBucketRateLimiter):
+                capacity, rate = self.inner._bucket_params(item)
+                allowed, tokens, now = storage.token_bucket(key, capacity, rate, cost, served=pending)
+                return allowed, TokenBucketRateLimiter.window_stats(tokens, now, rate), 0
+
+        allowed = self.inner.hit(item, *identifiers, cost=pending + cost)
+        recusados = 0
+        # Janela fixa conta o hit mesmo recusado; as demais recusam tudo ou nada
+        if not allowed and pending and not isinstance(self.inner, FixedWindowRateLimiter):
+            if not cost or not self.inner.hit(item, *identifiers, cost=pending):
+                recusados = pending
+        return allowed, self.inner.get_window_stats(item, *identifiers), recusados
+
+    def _sync(
+        self, key: str, item: RateLimitItem, identifiers: Tuple[str, ...], stats: WindowStats, recusados: int
+    ) -> None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                entry = self._entries[key] = _BatchEntry(item, identifiers, stats.remaining, stats.reset_time)
+            else:
+                entry.remaining = stats.remaining
+                entry.reset_time = stats.reset_time
+                entry.synced_at = time.time()
+            if recusados:
+                # Voltam para o próximo envio
+                entry.pending += recusados
+                self._ensure_flusher()
+                self._work.set()
+
+    def flush(self) -> None:
+        """Envia ao storage todos os hits pendentes e descarta janelas expiradas"""
+        now = time.time()
+        batch = []
+        with self._lock:
+            for key, entry in list(self._entries.items()):
+                if entry.pending:
+                    batch.append((key, entry.item, entry.identifiers, self._take_pending(entry)))
+                elif now >= max(entry.reset_time, entry.synced_at + IDLE_ENTRY_TTL):
+                    del self._entries[key]
+
+        for key, item, identifiers, pending in batch:
+            try:
+                _, stats, recusados = self._send(item, identifiers, pending, 0)
+                self._sync(key, item, identifiers, stats, recusados)
+            except Exception as e:
+                # Storage indisponível: o próximo hit síncrono aciona o fallback do slowapi
+                logger.warning(f"⚠️  Falha ao enviar {pending} hits de rate limit ({key}): {e}")
+                with self._lock:
+                    self._entries.pop(key, None)
+
+    def _ensure_flusher(self) -> None:
+        if self._flusher is None:
+            self._flusher = threading.Thread(
+                target=self._flush_loop, name="rate-limit-flusher", daemon=True
+            )
+            self._flusher.start()
+
+    def _flush_loop(self) -> None:
+        while True:
+            # Ocioso até o primeiro hit pendente; então agrega por flush_interval e envia
+            self._work.wait()
+            if self._stop.wait(self.flush_interval):
+                return
+            self._work.clear()
+            self.flush()
+
+    def close(self) -> None:
+        """Interrompe a thread de envio e envia os pendentes"""
+        self._stop.set()
+        self._work.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        self.flush()
+
+
+def batched(strategy_class: type) -> type:
+    """Cria a variante com batching de uma estratégia"""
+    return type(f"Batched{strategy_class.__name__}", (BatchedRateLimiter,), {"inner_class": strategy_class})
+
+
+for _name, _strategy_class in list(STRATEGIES.items()):
+    STRATEGIES[f"{_name}+batched"] = batched(_strategy_class)
@@ -0,0 +1,375 @@
+"""
+Motor de riscos
+===============
+
+Pontua fornecedores e contratos de cada entidade e grava o resultado já
+ranqueado em `riscos`, para que a tabela de riscos críticos seja uma
+leitura por faixa em (entidade_id, posicao).
+
+Fatores (normalizados em 0-1):
+- certidoes: certidões do fornecedor vencidas ou irregulares
+- concentracao: fatia do valor ativo da entidade com um só fornecedor,
+  acima de RISCOS_LIMIAR_CONCENTRACAO (apenas fornecedores)
+- renovacao: contrato ativo perto do fim da vigência (ou já vencido)
+  sem renovação, a partir de RISCOS_JANELA_RENOVACAO_DIAS (apenas contratos)
+- pncp: situação cadastral no espelho do PNCP diferente de ATIVA
+
+Contratos herdam os fatores certidoes/pncp do fornecedor. O score
+combina os fatores como um "ou" probabilístico, em que o peso de cada
+fator é o máximo que ele atinge sozinho:
+`score = 100 * (1 - prod(1 - peso * fator))`.
+
+Avaliação vetorizada: a carteira da entidade é carregada como colunas
+(NumPy) com três consultas, e todos os fatores e scores são calculados
+com operações sobre arrays, sem laço por contrato. A task periódica
+`sentinela.periodic.riscos_avaliar` divide as entidades ativas em lotes
+e enfileira um job por lote.
+
+Repositório: adrisa007/sentinela (ID: 1112237272)
+"""
+from dataclasses import dataclass
+from datetime import date, datetime, timezone
+from typing import Any, Dict, List, Optional, Sequence
+import logging
+import time
+
+import numpy as np
+from sqlalchemy import Select, case, delete, func, insert, or_, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.dashboard import FonteResumo, aplicar_deltas, registrar_fonte
+from app.core.models import (
+    AlvoRisco,
+    Certidao,
+    Contrato,
+    Entidade,
+    FornecedorPNCP,
+    Risco,
+    SeveridadeRisco,
+    StatusCertidao,
+    StatusContrato,
+    StatusEntidade,
+)
+from app.core.pagination import keyset_page
+
+logger = logging.getLogger(__name__)
+
+FATORES = ("certidoes", "concentracao", "renovacao", "pncp")
+# Score máximo (0-1) que cada fator atinge sozinho, na ordem de FATORES
+PESOS = np.array([0.75, 0.55, 0.70, 0.85])
+
+FAIXAS = (
+    (70.0, SeveridadeRisco.CRITICA),
+    (50.0, SeveridadeRisco.ALTA),
+    (25.0, SeveridadeRisco.MEDIA),
+    (0.0, SeveridadeRisco.BAIXA),
+)
+
+STATUS_CONTRATO_ATIVOS = (StatusContrato.VIGENTE, StatusContrato.SUSPENSO)
+STATUS_CERTIDAO_IRREGULARES = (StatusCertidao.VENCIDA, StatusCertidao.IRREGULAR)
+SITUACAO_PNCP_REGULAR = "ATIVA"
+
+
+# ============ Snapshot colunar ============
+
+@dataclass
+class Carteira:
+    """
+    Carteira de uma entidade em colunas
+
+    Contratos ativos (um item por contrato) e fornecedores (CNPJs dos
+    contratos e das certidões, ordenados); `contrato_fornecedor` é o
+    índice do fornecedor de cada contrato.
+    """
+    contrato_id: np.ndarray
+    contrato_numero: np.ndarray
+    contrato_fornecedor: np.ndarray
+    contrato_valor: np.ndarray
+    contrato_vigencia: np.ndarray  # date.toordinal()
+    fornecedores: np.ndarray
+    certidoes_total: np.ndarray
+    certidoes_irregulares: np.ndarray
+    situacao_pncp: np.ndarray  # None quando o CNPJ não está no espelho
+
+
+def carregar_carteira(db: Session, entidade_id: int, hoje: Optional[date] = None) -> Carteira:
+    """Carrega a carteira da entidade com três consultas (contratos, certidões, PNCP)"""
+    hoje = hoje or date.today()
+    contratos = db.execute(
+        select(Contrato.id, Contrato.numero, Contrato.cnpj_fornecedor, Contrato.valor, Contrato.vigencia)
+        .where(Contrato.entidade_id == entidade_id, Contrato.status.in_(STATUS_CONTRATO_ATIVOS))
+    ).all()
+    irregular = or_(Certidao.status.in_(STATUS_CERTIDAO_IRREGULARES), Certidao.data_validade < hoje)
+    certidoes = db.execute(
+        select(Certidao.cnpj_fornecedor, func.count(), func.sum(case((irregular, 1), else_=0)))
+        .where(Certidao.entidade_id == entidade_id)
+        .group_by(Certidao.cnpj_fornecedor)
+    ).all()
+
+    ids, numeros, cnpjs, valores, vigencias = (list(coluna) for coluna in zip(*contratos)) if contratos else ([],) * 5
+    cert_cnpjs, cert_total, cert_irregulares = (list(coluna) for coluna in zip(*certidoes)) if certidoes else ([],) * 3
+
+    fornecedores = np.unique(np.array(cnpjs + cert_cnpjs, dtype=object)).astype(str)
+    situacao = np.full(len(fornecedores), None, dtype=object)
+    if len(fornecedores):
+        pncp = db.execute(
+            select(FornecedorPNCP.cnpj, FornecedorPNCP.situacao_cadastral)
+            .where(FornecedorPNCP.cnpj.in_(fornecedores.tolist()))
+        ).all()
+        for cnpj, situacao_cadastral in pncp:
+            situacao[np.searchsorted(fornecedores, cnpj)] = situacao_cadastral
+
+    total = np.zeros(len(fornecedores), dtype=np.int64)
+    irregulares = np.zeros(len(fornecedores), dtype=np.int64)
+    if cert_cnpjs:
+        posicoes = np.searchsorted(fornecedores, np.array(cert_cnpjs, dtype=str))
+        total[posicoes] = cert_total
+        irregulares[posicoes] = cert_irregulares
+
+    return Carteira(
+        contrato_id=np.array(ids, dtype=np.int64),
+        contrato_numero=np.array(numeros, dtype=object),
+        contrato_fornecedor=np.searchsorted(fornecedores, np.array(cnpjs, dtype=str)).astype(np.int64),
+        contrato_valor=np.array(valores, dtype=np.float64),
+        contrato_vigencia=np.array([v.toordinal() for v in vigencias], dtype=np.int64),
+        fornecedores=fornecedores,
+        certidoes_total=total,
+        certidoes_irregulares=irregulares,
+        situacao_pncp=situacao,
+    )
+
+
+# ============ Avaliação vetorizada ============
+
+def pontuar(fatores: np.ndarray) -> np.ndarray:
+    """Matriz (n, len(FATORES)) de fatores 0-1 → scores 0-100"""
+    return 100.0 * (1.0 - np.prod(1.0 - fatores * PESOS, axis=1))
+
+
+def classificar(scores: np.ndarray) -> np.ndarray:
+    """Scores → severidades (FAIXAS)"""
+    limites = np.array([limite for limite, _ in FAIXAS])
+    severidades = np.array([severidade for _, severidade in FAIXAS], dtype=object)
+    return severidades[np.argmax(scores[:, None] >= limites, axis=1)]
+
+
+def _descrever(fatores: np.ndarray, irregulares: int, total: int, fatia: float,
+               dias: Optional[int], situacao: Optional[str]) -> str:
+    certidoes, concentracao, renovacao, pncp = fatores
+    partes = []
+    if renovacao > 0:
+        partes.append(
+            f"Vigência encerrada há {-dias} dias sem renovação" if dias < 0
+            else f"Vigência termina em {dias} dias sem renovação"
+        )
+    if certidoes > 0:
+        partes.append(f"{irregulares} de {total} certidões vencidas ou irregulares")
+    if concentracao > 0:
+        partes.append(f"{fatia:.0%} do valor ativo da entidade")
+    if pncp > 0:
+        partes.append(f"Situação cadastral PNCP: {situacao}")
+    return "; ".join(partes)[:255]
+
+
+def avaliar(carteira: Carteira, hoje: Optional[date] = None, score_minimo: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    Pontua fornecedores e contratos da carteira e ranqueia os riscos
+
+    Returns:
+        list: linhas de `riscos` (sem entidade_id/calculado_em), da
+        posição 1 (maior score) em diante, apenas com score >= score_minimo
+    """
+    hoje = hoje or date.today()
+    score_minimo = settings.RISCOS_SCORE_MINIMO if score_minimo is None else score_minimo
+    janela = settings.RISCOS_JANELA_RENOVACAO_DIAS
+    limiar = settings.RISCOS_LIMIAR_CONCENTRACAO
+    n_fornecedores = len(carteira.fornecedores)
+    n_contratos = len(carteira.contrato_id)
+    indice = carteira.contrato_fornecedor
+
+    # Fatores por fornecedor
+    valor_fornecedor = np.bincount(indice, weights=carteira.contrato_valor, minlength=n_fornecedores)
+    valor_ativo = carteira.contrato_valor.sum()
+    fatia = valor_fornecedor / valor_ativo if valor_ativo > 0 else np.zeros(n_fornecedores)
+    f_concentracao = np.clip((fatia - limiar) / (1.0 - limiar), 0.0, 1.0)
+    f_certidoes = np.where(
+        carteira.certidoes_irregulares > 0,
+        0.5 + 0.5 * carteira.certidoes_irregulares / np.maximum(carteira.certidoes_total, 1),
+        0.0,
+    )
+    situacao = carteira.situacao_pncp
+    f_pncp = np.array([s is not None and s.strip().upper() != SITUACAO_PNCP_REGULAR for s in situacao], dtype=float)
+
+    # Fatores por contrato (certidões e PNCP herdados do fornecedor)
+    dias = carteira.contrato_vigencia - hoje.toordinal()
+    f_renovacao = np.clip((janela - dias) / janela, 0.0, 1.0)
+
+    fatores = np.vstack([
+        np.column_stack([f_certidoes, f_concentracao, np.zeros(n_fornecedores), f_pncp]),
+        np.column_stack([f_certidoes[indice], np.zeros(n_contratos), f_renovacao, f_pncp[indice]]),
+    ])
+    scores = pontuar(fatores)
+    valores = np.concatenate([valor_fornecedor, carteira.contrato_valor])
+
+    # Maior score primeiro; empate → maior valor em risco; depois ordem estável
+    ordem = np.lexsort((np.arange(len(scores)), -valores, -scores))
+    ordem = ordem[scores[ordem] >= max(score_minimo, 1e-9)]
+    severidades = classificar(scores[ordem])
+
+    linhas = []
+    for posicao, (i, severidade) in enumerate(zip(ordem.tolist(), severidades), start=1):
+        eh_fornecedor = i < n_fornecedores
+        f = i if eh_fornecedor else int(indice[i - n_fornecedores])
+        cnpj = str(carteira.fornecedores[f])
+        linhas.append({
+            "posicao": posicao,
+            "alvo": AlvoRisco.FORNECEDOR if eh_fornecedor else AlvoRisco.CONTRATO,
+            "contrato_id": None if eh_fornecedor else int(carteira.contrato_id[i - n_fornecedores]),
+            "cnpj_fornecedor": cnpj,
+            "referencia": cnpj if eh_fornecedor else str(carteira.contrato_numero[i - n_fornecedores]),
+            "descricao": _descrever(
+                fatores[i],
+                int(carteira.certidoes_irregulares[f]),
+                int(carteira.certidoes_total[f]),
+                float(fatia[f]),
+                None if eh_fornecedor else int(dias[i - n_fornecedores]),
+                situacao[f],
+            ),
+            "score": round(float(scores[i]), 2),
+            "severidade": severidade,
+            "valor": float(valores[i]),
+            **{f"fator_{nome}": round(float(valor), 4) for nome, valor in zip(FATORES, fatores[i])},
+        })
+    return linhas
+
+
+# ============ Persistência e lotes ============
+
+# Primeira chave dos advisory locks de avaliação (a segunda é o id da entidade)
+LOCK_AVALIACAO = 0x5249  # "RI"
+
+
+def travar_entidade(db: Session, entidade_id: int) -> None:
+    """
+    Serializa avaliações da mesma entidade até o fim da transação corrente
+
+    PostgreSQL: pg_advisory_xact_lock(LOCK_AVALIACAO, entidade_id), sem
+    bloquear escritas na linha da entidade. Demais bancos: SELECT ... FOR
+    UPDATE na entidade (o SQLite já serializa escritas).
+    """
+    if db.get_bind().dialect.name == "postgresql":
+        db.execute(text("SELECT pg_advisory_xact_lock(:chave, :entidade_id)"),
+                   {"chave": LOCK_AVALIACAO, "entidade_id": entidade_id})
+    else:
+        db.execute(select(Entidade.id).where(Entidade.id == entidade_id).with_for_update())
+
+
+def gravar_riscos(db: Session, entidade_id: int, linhas: List[Dict[str, Any]], agora: Optional[datetime] = None) -> int:
+    """
+    Substitui os riscos da entidade (na transação corrente) e ajusta
+    `riscos_criticos` no resumo do dashboard
+
+    Chame com a entidade travada (travar_entidade): duas gravações
+    simultâneas colidiriam em (entidade_id, posicao) e contariam o delta
+    de `riscos_criticos` duas vezes.
+
+    Returns:
+        int: Riscos CRITICA gravados
+    """
+    agora = agora or datetime.now(timezone.utc)
+    antes = db.scalar(
+        select(func.count()).select_from(Risco)
+        .where(Risco.entidade_id == entidade_id, Risco.severidade == SeveridadeRisco.CRITICA)
+    )
+    db.execute(delete(Risco).where(Risco.entidade_id == entidade_id))
+    if linhas:
+        db.execute(insert(Risco), [{**linha, "entidade_id": entidade_id, "calculado_em": agora} for linha in linhas])
+
+    criticos = sum(linha["severidade"] == SeveridadeRisco.CRITICA for linha in linhas)
+    aplicar_deltas(db.connection(), entidade_id, {"riscos_criticos": criticos - antes})
+    return criticos
+
+
+def avaliar_entidades(db: Session, entidade_ids: Sequence[int], hoje: Optional[date] = None) -> Dict[str, Any]:
+    """
+    Avalia e grava os riscos de cada entidade (uma transação por entidade,
+    com a entidade travada da leitura da carteira até o commit)
+
+    Returns:
+        dict: {"entidades", "riscos", "criticos", "segundos"}
+    """
+    inicio = time.perf_counter()
+    agora = datetime.now(timezone.utc)
+    riscos = criticos = 0
+    for entidade_id in entidade_ids:
+        travar_entidade(db, entidade_id)
+        linhas = avaliar(carregar_carteira(db, entidade_id, hoje), hoje)
+        criticos += gravar_riscos(db, entidade_id, linhas, agora)
+        riscos += len(linhas)
+        db.commit()
+
+    resumo = {
+        "entidades": len(entidade_ids),
+        "riscos": riscos,
+        "criticos": criticos,
+        "segundos": round(time.perf_counter() - inicio, 3),
+    }
+    logger.info(f"⚠️ Riscos avaliados: {resumo}")
+    return resumo
+
+
+def selecionar_lotes_entidades(db: Session, tamanho: Optional[int] = None) -> List[List[int]]:
+    """Ids das entidades ATIVAS divididos em lotes de avaliação"""
+    tamanho = tamanho or settings.RISCOS_LOTE_ENTIDADES
+    ids = db.scalars(
+        select(Entidade.id).where(Entidade.status == StatusEntidade.ATIVA).order_by(Entidade.id)
+    ).all()
+    return [list(ids[i:i + tamanho]) for i in range(0, len(ids), tamanho)]
+
+
+# ============ Resumo do dashboard ============
+
+def _contribuicao_risco(r: Dict[str, Any], hoje: date) -> Dict[str, float]:
+    return {"riscos_criticos": int(r["severidade"] == SeveridadeRisco.CRITICA)}
+
+
+def _agregado_riscos(hoje: date) -> Select:
+    critico = Risco.severidade == SeveridadeRisco.CRITICA
+    return select(
+        Risco.entidade_id,
+        func.sum(case((critico, 1), else_=0)).label("riscos_criticos"),
+    ).group_by(Risco.entidade_id)
+
+
+registrar_fonte(FonteResumo(
+    model=Risco,
+    campos=("entidade_id", "severidade"),
+    contribuicao=_contribuicao_risco,
+    agregado=_agregado_riscos,
+))
+
+
+# ============ Consulta ============
+
+async def listar_riscos(
+    db: AsyncSession,
+    entidade_id: int,
+    severidades: Optional[Sequence[SeveridadeRisco]] = None,
+    alvo: Optional[AlvoRisco] = None,
+    apos: Optional[int] = None,
+    limit: int = 20,
+) -> List[Risco]:
+    """
+    Riscos da entidade na ordem do ranking, depois da posição `apos`
+
+    Retorna até limit + 1 linhas (ver app.core.pagination.split_page).
+    """
+    stmt = select(Risco).where(Risco.entidade_id == entidade_id)
+    if severidades:
+        stmt = stmt.where(Risco.severidade.in_(severidades))
+    if alvo:
+        stmt = stmt.where(Risco.alvo == alvo)
+    after = [apos] if apos is not None else None
+    return list((await db.execute(keyset_page(stmt, (Risco.posicao,), after, False, limit))).scalars().all())
@@ -4,11 +4,14 @@ Schemas Pydantic para validação de dados
 
 Repositório: adrisa007/sentinela (ID: 1112237272)
 """
-from pydantic import BaseModel, EmailStr, Field, ConfigDict
-from typing import Optional
-from datetime import datetime
+from pydantic import BaseModel, EmailStr, Field, ConfigDict, field_validator
+from pydantic.alias_generators import to_camel
+from typing import List, Optional
+from datetime import date, datetime
 from enum import Enum
 
+from app.core.config import settings
+
 
 # ============ Enums ============
 
@@ -212,3 +215,487 @@ class EntidadeStatusUpdate(BaseModel):
             }
         }
     )
+
+
+# ============ Schemas de Contrato ============
+
+class StatusContratoEnum(str, Enum):
+    """Enum de status de contrato para schemas"""
+    VIGENTE = "VIGENTE"
+    SUSPENSO = "SUSPENSO"
+    ENCERRADO = "ENCERRADO"
+    RESCINDIDO = "RESCINDIDO"
+
+
+def _validar_cnpj(value: str) -> str:
+    cnpj = ''.join(filter(str.isdigit, value))
+    if len(cnpj) != 14:
+        raise ValueError("CNPJ deve conter 14 dígitos")
+    return cnpj
+
+
+class ContratoBase(BaseModel):
+    """Schema base de contrato"""
+    numero: str = Field(..., min_length=1, max_length=50)
+    objeto: str = Field(..., min_length=3)
+    cnpj_fornecedor: str
+    valor: float = Field(..., ge=0)
+    data_assinatura: Optional[date] = None
+    vigencia: date = Field(..., description="Fim da vigência")
+    status: StatusContratoEnum = StatusContratoEnum.VIGENTE
+    
+    @field_validator("cnpj_fornecedor")
+    @classmethod
+    def validar_cnpj(cls, value: str) -> str:
+        return _validar_cnpj(value)
+
+
+class ContratoCreate(ContratoBase):
+    """Schema para criação de contrato"""
+    pass
+
+
+class ContratoUpdate(BaseModel):
+    """Schema para atualização de contrato (campos opcionais)"""
+    numero: Optional[str] = Field(None, min_length=1, max_length=50)
+    objeto: Optional[str] = Field(None, min_length=3)
+    cnpj_fornecedor: Optional[str] = None
+    valor: Optional[float] = Field(None, ge=0)
+    data_assinatura: Optional[date] = None
+    vigencia: Optional[date] = None
+    status: Optional[StatusContratoEnum] = None
+    
+    @field_validator("cnpj_fornecedor")
+    @classmethod
+    def validar_cnpj(cls, value: Optional[str]) -> Optional[str]:
+        return _validar_cnpj(value) if value is not None else None
+
+
+class ContratoResponse(ContratoBase):
+    """Schema de resposta de contrato"""
+    id: int
+    entidade_id: int
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+    
+    model_config = ConfigDict(from_attributes=True)
+
+
+class ContratoListResponse(BaseModel):
+    """Página de contratos (paginação keyset)"""
+    entidade: str
+    entidade_status: str
+    contratos: List[ContratoResponse]
+    limit: int
+    next_cursor: Optional[str] = Field(None, description="Cursor da próxima página; ausente na última")
+
+
+# ============ Schemas de Certidão ============
+
+class TipoCertidaoEnum(str, Enum):
+    """Enum de tipos de certidão para schemas"""
+    CND_FEDERAL = "CND_FEDERAL"
+    CNDT = "CNDT"
+    FGTS = "FGTS"
+    ESTADUAL = "ESTADUAL"
+    MUNICIPAL = "MUNICIPAL"
+
+
+class StatusCertidaoEnum(str, Enum):
+    """Enum de status de certidão para schemas"""
+    PENDENTE = "PENDENTE"
+    VALIDA = "VALIDA"
+    VENCIDA = "VENCIDA"
+    IRREGULAR = "IRREGULAR"
+
+
+class CertidaoBase(BaseModel):
+    """Schema base de certidão"""
+    cnpj_fornecedor: str
+    tipo: TipoCertidaoEnum
+    numero: str = Field(..., min_length=1, max_length=100)
+    data_emissao: Optional[date] = None
+    data_validade: date
+    
+    @field_validator("cnpj_fornecedor")
+    @classmethod
+    def validar_cnpj(cls, value: str) -> str:
+        return _validar_cnpj(value)
+
+
+class CertidaoCreate(CertidaoBase):
+    """Schema para cadastro de certidão (situação inicial: PENDENTE)"""
+    pass
+
+
+class CertidaoUpdate(BaseModel):
+    """Schema para atualização de certidão (campos opcionais)"""
+    numero: Optional[str] = Field(None, min_length=1, max_length=100)
+    data_emissao: Optional[date] = None
+    data_validade: Optional[date] = None
+    status: Optional[StatusCertidaoEnum] = None
+
+
+class CertidaoRenovar(BaseModel):
+    """Schema de renovação: nova validade (e, opcionalmente, novo número)"""
+    data_validade: date
+    numero: Optional[str] = Field(None, min_length=1, max_length=100)
+    data_emissao: Optional[date] = None
+
+
+class CertidaoResponse(CertidaoBase):
+    """Schema de resposta de certidão"""
+    id: int
+    entidade_id: int
+    status: StatusCertidaoEnum
+    ultima_verificacao: Optional[datetime] = None
+    created_at: datetime
+    
+    model_config = ConfigDict(from_attributes=True)
+
+
+class CertidaoVencendo(CertidaoResponse):
+    """Certidão vencendo, com a entidade e os dias restantes"""
+    entidade: str
+    dias_restantes: int
+
+
+# ============ Schemas de Fornecedor ============
+
+class TipoFornecedorEnum(str, Enum):
+    """Enum de tipos de fornecedor para schemas"""
+    JURIDICA = "JURIDICA"
+    FISICA = "FISICA"
+
+
+class StatusFornecedorEnum(str, Enum):
+    """Enum de status de fornecedor para schemas"""
+    ATIVO = "ATIVO"
+    INATIVO = "INATIVO"
+
+
+def _validar_documento(value: str) -> str:
+    documento = ''.join(filter(str.isdigit, value))
+    if len(documento) not in (11, 14):
+        raise ValueError("CNPJ deve conter 14 dígitos (ou CPF, 11)")
+    return documento
+
+
+class FornecedorBase(BaseModel):
+    """Schema base de fornecedor"""
+    cnpj: str = Field(..., description="CNPJ ou CPF (com ou sem máscara)")
+    razao_social: str = Field(..., min_length=3, max_length=255)
+    nome_fantasia: Optional[str] = Field(None, max_length=255)
+    tipo: TipoFornecedorEnum = TipoFornecedorEnum.JURIDICA
+    status: StatusFornecedorEnum = StatusFornecedorEnum.ATIVO
+    municipio: Optional[str] = Field(None, max_length=100)
+    uf: Optional[str] = Field(None, min_length=2, max_length=2)
+    telefone: Optional[str] = Field(None, max_length=30)
+    email: Optional[EmailStr] = None
+
+    @field_validator("cnpj")
+    @classmethod
+    def validar_cnpj(cls, value: str) -> str:
+        return _validar_documento(value)
+
+
+class FornecedorCreate(FornecedorBase):
+    """Schema para cadastro de fornecedor"""
+    pass
+
+
+class FornecedorUpdate(BaseModel):
+    """Schema para atualização de fornecedor (campos opcionais)"""
+    cnpj: Optional[str] = None
+    razao_social: Optional[str] = Field(None, min_length=3, max_length=255)
+    nome_fantasia: Optional[str] = Field(None, max_length=255)
+    tipo: Optional[TipoFornecedorEnum] = None
+    status: Optional[StatusFornecedorEnum] = None
+    municipio: Optional[str] = Field(None, max_length=100)
+    uf: Optional[str] = Field(None, min_length=2, max_length=2)
+    telefone: Optional[str] = Field(None, max_length=30)
+    email: Optional[EmailStr] = None
+
+    @field_validator("cnpj")
+    @classmethod
+    def validar_cnpj(cls, value: Optional[str]) -> Optional[str]:
+        return _validar_documento(value) if value is not None else None
+
+
+class FornecedorResponse(FornecedorBase):
+    """Schema de resposta de fornecedor"""
+    id: int
+    email: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class FornecedorListResponse(BaseModel):
+    """Página de fornecedores (formato do fornecedoresService do frontend)"""
+    items: List[FornecedorResponse]
+    total: int = Field(..., description="Total de resultados (limitado a 1000)")
+    page: int
+    pages: int
+
+
+# ============ Schemas do Dashboard ============
+
+class ResumoContratos(BaseModel):
+    """Totais de contratos da entidade"""
+    total: int
+    vigentes: int
+    vencendo: int
+    valor_total: float
+    valor_vigente: float
+
+
+class ResumoCertidoes(BaseModel):
+    """Totais de certidões da entidade"""
+    total: int
+    irregulares: int
+    vencendo: int
+
+
+class DashboardGestorResponse(BaseModel):
+    """Resumo pré-agregado da entidade para o dashboard do gestor"""
+    entidade: str
+    entidade_status: str
+    janela_dias: int = Field(..., description="Janela das contagens 'vencendo'")
+    contratos: ResumoContratos
+    certidoes: ResumoCertidoes
+    riscos_criticos: int
+    atualizado_em: Optional[datetime] = None
+
+
+# ============ Schemas de Risco ============
+
+class AlvoRiscoEnum(str, Enum):
+    """Enum de alvos de risco para schemas"""
+    CONTRATO = "CONTRATO"
+    FORNECEDOR = "FORNECEDOR"
+
+
+class SeveridadeRiscoEnum(str, Enum):
+    """Enum de severidades de risco para schemas"""
+    CRITICA = "CRITICA"
+    ALTA = "ALTA"
+    MEDIA = "MEDIA"
+    BAIXA = "BAIXA"
+
+
+class RiscoResponse(BaseModel):
+    """Risco ranqueado (pré-calculado pelo motor de riscos)"""
+    id: int
+    posicao: int
+    alvo: AlvoRiscoEnum
+    contrato_id: Optional[int] = None
+    cnpj_fornecedor: str
+    referencia: str
+    descricao: str
+    score: float
+    severidade: SeveridadeRiscoEnum
+    valor: float
+    fator_certidoes: float
+    fator_concentracao: float
+    fator_renovacao: float
+    fator_pncp: float
+    calculado_em: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class RiscoListResponse(BaseModel):
+    """Página do ranking de riscos (paginação keyset por posição)"""
+    entidade: str
+    riscos: List[RiscoResponse]
+    limit: int
+    next_cursor: Optional[str] = Field(None, description="Cursor da próxima página; ausente na última")
+
+
+# ============ Schemas de Câmera ============
+
+class StatusCameraEnum(str, Enum):
+    """Enum de status de câmera para schemas"""
+    ONLINE = "ONLINE"
+    DEGRADADA = "DEGRADADA"
+    OFFLINE = "OFFLINE"
+
+
+class CameraBase(BaseModel):
+    """Schema base de câmera"""
+    codigo: str = Field(..., min_length=1, max_length=64, description="Identificador do dispositivo (serial/MAC)")
+    nome: str = Field(..., min_length=1, max_length=100)
+    localizacao: Optional[str] = Field(None, max_length=255)
+    url_stream: Optional[str] = Field(None, max_length=500)
+    ativa: bool = True
+
+
+class CameraCreate(CameraBase):
+    """Schema para cadastro de câmera"""
+    pass
+
+
+class CameraUpdate(BaseModel):
+    """Schema para atualização de câmera (campos opcionais)"""
+    codigo: Optional[str] = Field(None, min_length=1, max_length=64)
+    nome: Optional[str] = Field(None, min_length=1, max_length=100)
+    localizacao: Optional[str] = Field(None, max_length=255)
+    url_stream: Optional[str] = Field(None, max_length=500)
+    ativa: Optional[bool] = None
+
+
+class CameraResponse(CameraBase):
+    """Câmera com o último estado conhecido (None se nunca reportou)"""
+    id: int
+    entidade_id: int
+    status: Optional[StatusCameraEnum] = Field(None, description="OFFLINE se o último heartbeat é antigo")
+    visto_em: Optional[datetime] = None
+    ip: Optional[str] = None
+    firmware: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class CameraListResponse(BaseModel):
+    """Página de câmeras (paginação keyset por id)"""
+    entidade: str
+    cameras: List[CameraResponse]
+    limit: int
+    next_cursor: Optional[str] = Field(None, description="Cursor da próxima página; ausente na última")
+
+
+class HeartbeatIn(BaseModel):
+    """Relato de status de uma câmera"""
+    codigo: str = Field(..., min_length=1, max_length=64)
+    status: StatusCameraEnum
+    timestamp: Optional[datetime] = Field(None, description="Momento do relato (padrão: recebimento)")
+    ip: Optional[str] = Field(None, max_length=45)
+    firmware: Optional[str] = Field(None, max_length=50)
+
+
+class HeartbeatLote(BaseModel):
+    """Lote de heartbeats (até CAMERAS_HEARTBEAT_MAX_LOTE itens)"""
+    heartbeats: List[HeartbeatIn] = Field(..., min_length=1, max_length=settings.CAMERAS_HEARTBEAT_MAX_LOTE)
+
+
+class HeartbeatLoteResponse(BaseModel):
+    """Resultado da ingestão de um lote"""
+    aceitos: int
+    desconhecidos: List[str] = Field(..., description="Códigos sem câmera ativa na entidade (até 100)")
+    total_desconhecidos: int
+
+
+class TipoEventoCameraEnum(str, Enum):
+    """Enum de tipos de evento de câmera para schemas"""
+    MOVIMENTO = "MOVIMENTO"
+    OFFLINE = "OFFLINE"
+    ONLINE = "ONLINE"
+    VIOLACAO = "VIOLACAO"
+
+
+class GranularidadeSerieEnum(str, Enum):
+    """Resolução da série de eventos (MINUTO vem do histórico bruto)"""
+    MINUTO = "MINUTO"
+    HORA = "HORA"
+    DIA = "DIA"
+
+
+class EventoIn(BaseModel):
+    """Evento relatado por uma câmera"""
+    codigo: str = Field(..., min_length=1, max_length=64)
+    tipo: TipoEventoCameraEnum
+    timestamp: Optional[datetime] = Field(None, description="Momento do evento (padrão: recebimento)")
+    dados: Optional[dict] = Field(None, description="Metadados do evento/vídeo (clipe, confiança, zona...)")
+
+
+class EventoLote(BaseModel):
+    """Lote de eventos (até CAMERAS_EVENTOS_MAX_LOTE itens)"""
+    eventos: List[EventoIn] = Field(..., min_length=1, max_length=settings.CAMERAS_EVENTOS_MAX_LOTE)
+
+
+class EventoLoteResponse(HeartbeatLoteResponse):
+    """Resultado da gravação de um lote de eventos"""
+    pass
+
+
+class EventoResponse(BaseModel):
+    """Evento do histórico bruto"""
+    id: int
+    camera_id: int
+    tipo: TipoEventoCameraEnum
+    ocorrido_em: datetime
+    dados: Optional[dict] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+
+class EventoListResponse(BaseModel):
+    """Página de eventos, mais recentes primeiro (paginação keyset)"""
+    eventos: List[EventoResponse]
+    limit: int
+    next_cursor: Optional[str] = Field(None, description="Cursor da próxima página; ausente na última")
+
+
+class PontoSerieEventos(BaseModel):
+    """Total de eventos de um tipo em um período"""
+    periodo: datetime
+    tipo: TipoEventoCameraEnum
+    total: int
+
+
+class SerieEventosResponse(BaseModel):
+    """Série de eventos; a granularidade depende do intervalo pedido"""
+    granularidade: GranularidadeSerieEnum
+    inicio: datetime
+    fim: datetime
+    pontos: List[PontoSerieEventos]
+
+
+# ============ Schemas PNCP ============
+
+class ContratosPNCP(BaseModel):
+    """Modelo de contrato do PNCP"""
+    numero: str
+    objeto: str
+    valor: float
+    data_assinatura: str
+    vigencia: str
+
+
+class ContratoPNCPDump(ContratosPNCP):
+    """
+    Registro de contrato dos arquivos de exportação do PNCP (camelCase)
+    
+    Campos de ContratosPNCP + identificação do contrato e do fornecedor.
+    """
+    id_pncp: Optional[str] = Field(None, alias="id")
+    cnpj_fornecedor: str
+    status: Optional[str] = None
+    orgao: Optional[str] = None
+    data_atualizacao: Optional[datetime] = None
+    
+    model_config = ConfigDict(alias_generator=to_camel, populate_by_name=True, coerce_numbers_to_str=True)
+    
+    @field_validator("cnpj_fornecedor")
+    @classmethod
+    def validar_cnpj(cls, value: str) -> str:
+        return _validar_cnpj(value)
+    
+    def to_row(self) -> dict:
+        """Colunas de pncp_contratos (app.core.models.ContratoPNCP)"""
+        return {
+            "id_pncp": self.id_pncp or f"{self.cnpj_fornecedor}:{self.numero}",
+            "cnpj_fornecedor": self.cnpj_fornecedor,
+            "numero": self.numero,
+            "objeto": self.objeto,
+            "valor": self.valor,
+            "data_assinatura": self.data_assinatura,
+            "vigencia": self.vigencia,
+            "status": self.status,
+            "orgao": self.orgao,
+            "data_atualizacao_pncp": self.data_atualizacao,
+        }
@@ -9,8 +9,8 @@ Repositório: adrisa007/sentinela (ID: 1112237272)
 """
 from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
-from starlette.types import ASGIApp
-from typing import Callable
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from typing import Callable, List, Tuple
 import logging
 
 from app.core.config import settings
@@ -18,9 +18,118 @@ from app.core.config import settings
 logger = logging.getLogger(__name__)
 
 
-class SecurityHeadersMiddleware(BaseHTTPMiddleware):
+# Rotas sensíveis que não devem ser cacheadas
+NO_CACHE_PATH_PREFIXES = ("/auth", "/api")
+
+
+def build_security_headers(
+    domain: str,
+    enable_hsts: bool = True,
+    hsts_max_age: int = 31536000,
+    enable_csp: bool = True
+) -> List[Tuple[str, str]]:
     """
-    Middleware que adiciona headers de segurança HTTP em todas as respostas.
+    Monta a lista de headers de segurança (nome, valor)
+    
+    Args:
+        domain: Domínio oficial usado no CSP
+        enable_hsts: Incluir Strict-Transport-Security
+        hsts_max_age: max-age do HSTS em segundos
+        enable_csp: Incluir Content-Security-Policy
+        
+    Returns:
+        List[Tuple[str, str]]: Headers na ordem em que são enviados
+    """
+    headers = []
+    
+    # ============ Content Security Policy (CSP) ============
+    if enable_csp:
+        csp_directives = [
+            f"default-src 'self' https://{domain}",
+            f"script-src 'self' 'unsafe-inline' 'unsafe-eval' https://{domain} https://cdn.jsdelivr.net",
+            f"style-src 'self' 'unsafe-inline' https://{domain} https://cdn.jsdelivr.net",
+            f"img-src 'self' data: https: https://{domain}",
+            f"font-src 'self' data: https://{domain} https://cdn.jsdelivr.net",
+            f"connect-src 'self' https://{domain}",
+            f"media-src 'self' https://{domain}",
+            "object-src 'none'",
+            "frame-src 'none'",
+            "base-uri 'self'",
+            f"form-action 'self' https://{domain}",
+            "upgrade-insecure-requests",
+            "block-all-mixed-content"
+        ]
+        headers.append(("Content-Security-Policy", "; ".join(csp_directives)))
+    
+    # ============ X-Frame-Options ============
+    # Previne clickjacking attacks
+    headers.append(("X-Frame-Options", "DENY"))
+    
+    # ============ X-Content-Type-Options ============
+    # Previne MIME type sniffing
+    headers.append(("X-Content-Type-Options", "nosniff"))
+    
+    # ============ Strict-Transport-Security (HSTS) ============
+    # Força HTTPS por 1 ano
+    if enable_hsts:
+        headers.append((
+            "Strict-Transport-Security",
+            f"max-age={hsts_max_age}; includeSubDomains; preload"
+        ))
+    
+    # ============ X-XSS-Protection ============
+    # Ativa proteção contra XSS em browsers antigos
+    headers.append(("X-XSS-Protection", "1; mode=block"))
+    
+    # ============ Referrer-Policy ============
+    # Controla informações de referrer enviadas
+    headers.append(("Referrer-Policy", "strict-origin-when-cross-origin"))
+    
+    # ============ Permissions-Policy ============
+    # Controla features do browser (anteriormente Feature-Policy)
+    permissions = [
+        "accelerometer=()",
+        "camera=()",
+        "geolocation=()",
+        "gyroscope=()",
+        "magnetometer=()",
+        "microphone=()",
+        "payment=()",
+        "usb=()"
+    ]
+    headers.append(("Permissions-Policy", ", ".join(permissions)))
+    
+    # ============ X-DNS-Prefetch-Control ============
+    # Desabilita DNS prefetching
+    headers.append(("X-DNS-Prefetch-Control", "off"))
+    
+    # ============ X-Download-Options ============
+    # Para IE8+, previne execução de downloads
+    headers.append(("X-Download-Options", "noopen"))
+    
+    # ============ X-Permitted-Cross-Domain-Policies ============
+    # Restringe Adobe Flash e PDF cross-domain
+    headers.append(("X-Permitted-Cross-Domain-Policies", "none"))
+    
+    return headers
+
+
+# ============ Cache-Control ============
+# Para rotas sensíveis, desabilitar cache
+NO_CACHE_HEADERS = [
+    ("Cache-Control", "no-store, no-cache, must-revalidate, private"),
+    ("Pragma", "no-cache"),
+    ("Expires", "0"),
+]
+
+
+def _encode_headers(headers: List[Tuple[str, str]]) -> List[Tuple[bytes, bytes]]:
+    return [(name.lower().encode("latin-1"), value.encode("latin-1")) for name, value in headers]
+
+
+class SecurityHeadersMiddleware:
+    """
+    Middleware ASGI que adiciona headers de segurança HTTP em todas as respostas.
     
     Implementa proteções similares ao Helmet.js:
     - Content Security Policy (CSP)
@@ -30,6 +139,10 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
     - X-XSS-Protection
     - Referrer-Policy
     - Permissions-Policy
+    
+    Os headers são codificados uma única vez na construção e anexados ao
+    `http.response.start`, sem envolver o corpo da resposta (streaming preservado).
+    Headers homônimos definidos pela rota são substituídos.
     """
     
     def __init__(
@@ -40,97 +153,41 @@ class SecurityHeadersMiddleware(BaseHTTPMiddleware):
         hsts_max_age: int = 31536000,  # 1 ano
         enable_csp: bool = True
     ):
-        super().__init__(app)
+        self.app = app
         self.domain = domain
         self.enable_hsts = enable_hsts
         self.hsts_max_age = hsts_max_age
         self.enable_csp = enable_csp
         
+        security_headers = build_security_headers(domain, enable_hsts, hsts_max_age, enable_csp)
+        self.raw_headers = _encode_headers(security_headers)
+        self.raw_headers_no_cache = _encode_headers(security_headers + NO_CACHE_HEADERS)
+        self._names = frozenset(name for name, _ in self.raw_headers)
+        self._names_no_cache = frozenset(name for name, _ in self.raw_headers_no_cache)
+        
         logger.info(f"🛡️  SecurityHeadersMiddleware inicializado para domínio: {self.domain}")
     
-    async def dispatch(self, request: Request, call_next: Callable) -> Response:
-        """
-        Processa a requisição e adiciona headers de segurança na resposta
-        """
-        # Processar requisição
-        response = await call_next(request)
-        
-        # ============ Content Security Policy (CSP) ============
-        if self.enable_csp:
-            csp_directives = [
-                f"default-src 'self' https://{self.domain}",
-                f"script-src 'self' 'unsafe-inline' 'unsafe-eval' https://{self.domain} https://cdn.jsdelivr.net",
-                f"style-src 'self' 'unsafe-inline' https://{self.domain} https://cdn.jsdelivr.net",
-                f"img-src 'self' data: https: https://{self.domain}",
-                f"font-src 'self' data: https://{self.domain} https://cdn.jsdelivr.net",
-                f"connect-src 'self' https://{self.domain}",
-                f"media-src 'self' https://{self.domain}",
-                f"object-src 'none'",
-                f"frame-src 'none'",
-                f"base-uri 'self'",
-                f"form-action 'self' https://{self.domain}",
-                "upgrade-insecure-requests",
-                "block-all-mixed-content"
-            ]
-            response.headers["Content-Security-Policy"] = "; ".join(csp_directives)
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
         
-        # ============ X-Frame-Options ============
-        # Previne clickjacking attacks
-        response.headers["X-Frame-Options"] = "DENY"
+        if scope["path"].startswith(NO_CACHE_PATH_PREFIXES):
+            extra_headers, names = self.raw_headers_no_cache, self._names_no_cache
+        else:
+            extra_headers, names = self.raw_headers, self._names
         
-        # ============ X-Content-Type-Options ============
-        # Previne MIME type sniffing
-        response.headers["X-Content-Type-Options"] = "nosniff"
+        async def send_with_headers(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                headers = [
+                    header for header in message.get("headers", ())
+                    if header[0].lower() not in names
+                ]
+                headers.extend(extra_headers)
+                message["headers"] = headers
+            await send(message)
         
-        # ============ Strict-Transport-Security (HSTS) ============
-        # Força HTTPS por 1 ano
-        if self.enable_hsts:
-            response.headers["Strict-Transport-Security"] = (
-                f"max-age={self.hsts_max_age}; includeSubDomains; preload"
-            )
-        
-        # ============ X-XSS-Protection ============
-        # Ativa proteção contra XSS em browsers antigos
-        response.headers["X-XSS-Protection"] = "1; mode=block"
-        
-        # ============ Referrer-Policy ============
-        # Controla informações de referrer enviadas
-        response.headers["Referrer-Policy"] = "strict-origin-when-cross-origin"
-        
-        # ============ Permissions-Policy ============
-        # Controla features do browser (anteriormente Feature-Policy)
-        permissions = [
-            "accelerometer=()",
-            "camera=()",
-            "geolocation=()",
-            "gyroscope=()",
-            "magnetometer=()",
-            "microphone=()",
-            "payment=()",
-            "usb=()"
-        ]
-        response.headers["Permissions-Policy"] = ", ".join(permissions)
-        
-        # ============ X-DNS-Prefetch-Control ============
-        # Desabilita DNS prefetching
-        response.headers["X-DNS-Prefetch-Control"] = "off"
-        
-        # ============ X-Download-Options ============
-        # Para IE8+, previne execução de downloads
-        response.headers["X-Download-Options"] = "noopen"
-        
-        # ============ X-Permitted-Cross-Domain-Policies ============
-        # Restringe Adobe Flash e PDF cross-domain
-        response.headers["X-Permitted-Cross-Domain-Policies"] = "none"
-        
-        # ============ Cache-Control ============
-        # Para rotas sensíveis, desabilitar cache
-        if request.url.path.startswith("/auth") or request.url.path.startswith("/api"):
-            response.headers["Cache-Control"] = "no-store, no-cache, must-revalidate, private"
-            response.headers["Pragma"] = "no-cache"
-            response.headers["Expires"] = "0"
-        
-        return response
+        await self.app(scope, receive, send_with_headers)
 
 
 # ============ Função Helper para Configuração ============
@@ -0,0 +1,218 @@
+"""
+Índice de vencimentos
+=====================
+
+Tabela `vencimentos` com uma linha por item ativo (contrato, ...) no dia
+em que vence, para que consultas "vencendo em 7/30/90 dias" por entidade
+sejam uma busca por faixa no índice (entidade_id, data_vencimento) em vez
+de uma varredura de cada tabela de origem.
+
+Manutenção:
+- Eventos ORM (after_insert/after_update/after_delete) de cada fonte
+  regravam a linha do item na mesma transação da escrita
+- A task noturna `sentinela.periodic.refresh_vencimentos` reconstrói o
+  índice com um INSERT ... SELECT por fonte, cobrindo escritas feitas
+  fora do ORM e descartando itens vencidos há mais de
+  VENCIMENTOS_RETENCAO_DIAS
+
+Novas fontes entram com `registrar_fonte`.
+
+Repositório: adrisa007/sentinela (ID: 1112237272)
+"""
+from dataclasses import dataclass
+from datetime import date, timedelta
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+import logging
+
+from sqlalchemy import Select, and_, case, delete, func, insert, literal, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.escritas import observar_escritas
+from app.core.models import Contrato, StatusContrato, TipoVencimento, Vencimento
+
+logger = logging.getLogger(__name__)
+
+JANELAS_PADRAO = (7, 30, 90)
+
+
+@dataclass(frozen=True)
+class FonteVencimento:
+    """
+    Tabela de origem do índice
+
+    Attributes:
+        model: Modelo ORM cujas escritas atualizam o índice
+        campos: Atributos que, alterados, mudam a linha do índice
+        linha: Instância → {entidade_id, data_vencimento, descricao}, ou None se não deve constar
+        consulta: Data limite → SELECT (referencia_id, entidade_id, data_vencimento, descricao)
+    """
+    model: type
+    campos: Tuple[str, ...]
+    linha: Callable[[Any], Optional[Dict[str, Any]]]
+    consulta: Callable[[date], Select]
+
+
+FONTES: Dict[TipoVencimento, FonteVencimento] = {}
+
+
+def _limite_retencao(hoje: Optional[date] = None) -> date:
+    return (hoje or date.today()) - timedelta(days=settings.VENCIMENTOS_RETENCAO_DIAS)
+
+
+# ============ Manutenção por escrita (ORM) ============
+
+def _regravar(connection, tipo: TipoVencimento, referencia_id: int, linha: Optional[Dict[str, Any]]) -> None:
+    connection.execute(
+        delete(Vencimento).where(Vencimento.tipo == tipo, Vencimento.referencia_id == referencia_id)
+    )
+    if linha and linha["data_vencimento"] >= _limite_retencao():
+        connection.execute(insert(Vencimento).values(tipo=tipo, referencia_id=referencia_id, **linha))
+
+
+def registrar_fonte(tipo: TipoVencimento, fonte: FonteVencimento) -> None:
+    """Inclui uma tabela de origem no índice e liga seus eventos de escrita"""
+    FONTES[tipo] = fonte
+
+    def _regravar_item(connection, target, antes, depois) -> None:
+        _regravar(connection, tipo, target.id, fonte.linha(target) if depois is not None else None)
+
+    observar_escritas(fonte.model, fonte.campos, _regravar_item)
+
+
+# ============ Fontes ============
+
+STATUS_CONTRATO_ATIVOS = (StatusContrato.VIGENTE, StatusContrato.SUSPENSO)
+
+
+def _linha_contrato(contrato: Contrato) -> Optional[Dict[str, Any]]:
+    if contrato.status not in STATUS_CONTRATO_ATIVOS or contrato.vigencia is None:
+        return None
+    return {
+        "entidade_id": contrato.entidade_id,
+        "data_vencimento": contrato.vigencia,
+        "descricao": f"Contrato {contrato.numero} - {contrato.objeto}"[:255],
+    }
+
+
+def _consulta_contratos(limite: date) -> Select:
+    return select(
+        Contrato.id,
+        Contrato.entidade_id,
+        Contrato.vigencia,
+        func.substr("Contrato " + Contrato.numero + " - " + Contrato.objeto, 1, 255),
+    ).where(Contrato.status.in_(STATUS_CONTRATO_ATIVOS), Contrato.vigencia >= limite)
+
+
+registrar_fonte(TipoVencimento.CONTRATO, FonteVencimento(
+    model=Contrato,
+    campos=("entidade_id", "vigencia", "status", "numero", "objeto"),
+    linha=_linha_contrato,
+    consulta=_consulta_contratos,
+))
+
+
+# ============ Reconstrução (Celery) ============
+
+def refresh_vencimentos(db: Session, hoje: Optional[date] = None) -> Dict[str, int]:
+    """
+    Reconstrói o índice a partir das fontes em uma transação
+
+    Returns:
+        dict: tipo → itens indexados
+    """
+    limite = _limite_retencao(hoje)
+    resultado = {}
+    colunas = ["referencia_id", "entidade_id", "data_vencimento", "descricao", "tipo"]
+    for tipo, fonte in FONTES.items():
+        db.execute(delete(Vencimento).where(Vencimento.tipo == tipo))
+        consulta = fonte.consulta(limite).add_columns(literal(tipo, Vencimento.__table__.c.tipo.type))
+        resultado[tipo.value] = db.execute(insert(Vencimento).from_select(colunas, consulta)).rowcount
+    db.commit()
+    logger.info(f"📅 Índice de vencimentos reconstruído: {resultado}")
+    return resultado
+
+
+def run_refresh() -> Dict[str, int]:
+    """Ponto de entrada síncrono (Celery)"""
+    from app.core.database import SessionLocal
+    import app.core.certidoes  # noqa: F401  (registra a fonte CERTIDAO no worker)
+
+    db = SessionLocal()
+    try:
+        return refresh_vencimentos(db)
+    finally:
+        db.close()
+
+
+# ============ Consultas ============
+
+async def listar_vencendo(
+    db: AsyncSession,
+    entidade_id: int,
+    dias: int,
+    tipos: Optional[Sequence[TipoVencimento]] = None,
+    incluir_vencidos: bool = False,
+    hoje: Optional[date] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Itens da entidade que vencem nos próximos `dias` (busca por faixa no índice)
+
+    Returns:
+        list: {tipo, referencia_id, descricao, data_vencimento, dias_restantes}, do mais próximo ao mais distante
+    """
+    hoje = hoje or date.today()
+    inicio = _limite_retencao(hoje) if incluir_vencidos else hoje
+    stmt = (
+        select(Vencimento)
+        .where(
+            Vencimento.entidade_id == entidade_id,
+            Vencimento.data_vencimento.between(inicio, hoje + timedelta(days=dias)),
+        )
+        .order_by(Vencimento.data_vencimento, Vencimento.referencia_id)
+    )
+    if tipos:
+        stmt = stmt.where(Vencimento.tipo.in_(tipos))
+
+    return [
+        {
+            "tipo": v.tipo.value,
+            "referencia_id": v.referencia_id,
+            "descricao": v.descricao,
+            "data_vencimento": v.data_vencimento,
+            "dias_restantes": (v.data_vencimento - hoje).days,
+        }
+        for v in (await db.execute(stmt)).scalars()
+    ]
+
+
+async def contar_janelas(
+    db: AsyncSession,
+    entidade_id: int,
+    janelas: Sequence[int] = JANELAS_PADRAO,
+    tipos: Optional[Sequence[TipoVencimento]] = None,
+    hoje: Optional[date] = None,
+) -> Dict[str, int]:
+    """
+    Contagem de vencidos e de itens vencendo em cada janela, em uma consulta
+
+    Returns:
+        dict: {"vencidos": n, "7": n, "30": n, "90": n}
+    """
+    hoje = hoje or date.today()
+    data = Vencimento.data_vencimento
+    colunas = [func.coalesce(func.sum(case((data < hoje, 1), else_=0)), 0)]
+    colunas += [
+        func.coalesce(func.sum(case((and_(data >= hoje, data <= hoje + timedelta(days=j)), 1), else_=0)), 0)
+        for j in janelas
+    ]
+    stmt = select(*colunas).where(
+        Vencimento.entidade_id == entidade_id,
+        data.between(_limite_retencao(hoje), hoje + timedelta(days=max(janelas))),
+    )
+    if tipos:
+        stmt = stmt.where(Vencimento.tipo.in_(tipos))
+
+    valores = (await db.execute(stmt)).one()
+    return {"vencidos": int(valores[0]), **{str(j): int(v) for j, v in zip(janelas, valores[1:])}}
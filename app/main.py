@@ -1,19 +1,50 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from slowapi import _rate_limit_exceeded_handler
 from slowapi.errors import RateLimitExceeded
 
-from app.core.database import init_db
-from app.routers import auth_router, entidades_router, cameras, contratos, health, pncp
+from app.core.database import engine, init_db
+from app.routers import auth_router, entidades_router, cameras, certidoes, contratos, dashboard, fornecedores, health, metrics, pncp, riscos
 from app.core.config import settings
-from app.core.rate_limit import limiter, rate_limit_exceeded_handler, exempt_from_rate_limit
+from app.core.rate_limit import limiter, rate_limit_exceeded_handler
 from app.core.security_headers import SecurityHeadersMiddleware, get_security_headers_config
 from app.core.csrf_protection import CSRFProtectionMiddleware, get_csrf_token
+from app.core.pncp_client import pncp_client
+from app.core.cameras import heartbeat_buffer
+from app.core.camera_stream import camera_stream, varredura_offline
+from app.core.health import health_prober
+from app.core.metrics import MetricsMiddleware, marcar_processo_encerrado
+from app.redis_client import redis_pool
 
 init_db()
+# A conexão do create_all não fica no pool sync: no worker web só o engine async atende
+engine.dispose()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Recursos compartilhados por worker: abertos na subida, fechados no desligamento"""
+    redis_pool.start()
+    await pncp_client.start()
+    heartbeat_buffer.start()
+    await camera_stream.start()
+    varredura_offline.start()
+    health_prober.start()
+    yield
+    await health_prober.aclose()
+    await varredura_offline.stop()
+    await camera_stream.aclose()
+    await heartbeat_buffer.stop()
+    await pncp_client.aclose()
+    await redis_pool.aclose()
+    marcar_processo_encerrado()
+
 
 app = FastAPI(
+    lifespan=lifespan,
     title=settings.APP_NAME,
     version=settings.VERSION,
     description="""
@@ -66,24 +97,24 @@ app.add_middleware(
 app.state.limiter = limiter
 app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
 
-
-@app.middleware("http")
-async def rate_limit_exemption_middleware(request: Request, call_next):
-    """Middleware de isenção de rate limit"""
-    if exempt_from_rate_limit(request):
-        response = await call_next(request)
-        return response
-    response = await call_next(request)
-    return response
+# 5. Métricas (adicionado por último = mais externo: mede também as rejeições dos demais)
+if settings.METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
 
 
 # ============ Registrar Routers ============
 
 app.include_router(health.router)
+if settings.METRICS_ENABLED:
+    app.include_router(metrics.router)
 app.include_router(auth_router.router)
 app.include_router(entidades_router.router)
 app.include_router(cameras.router)
 app.include_router(contratos.router)
+app.include_router(certidoes.router)
+app.include_router(fornecedores.router)
+app.include_router(dashboard.router)
+app.include_router(riscos.router)
 app.include_router(pncp.router)
 
 @app.get("/", response_model=dict)
@@ -193,16 +224,6 @@ async def root(request: Request):
     })
 
 
-@app.get("/health", tags=["Sistema"])
-async def health(request: Request):
-    """💚 Health check"""
-    return JSONResponse(content={
-        "status": "healthy",
-        "app": settings.APP_NAME,
-        "version": settings.VERSION
-    })
-
-
 @app.get("/csrf-token", tags=["Segurança"])
 async def get_csrf_token_endpoint(request: Request):
     """
@@ -302,7 +323,9 @@ async def rate_limit_info(request: Request):
     return JSONResponse(content={
         "global_limit": "300 requisições por minuto",
         "login_limit": "10 requisições por minuto",
-        "strategy": "fixed-window",
+        "strategy": settings.RATE_LIMIT_STRATEGY,
+        "storage": settings.RATE_LIMIT_STORAGE,
+        "batching": settings.RATE_LIMIT_BATCH_ENABLED,
         "identifier": "IP ou User ID",
         "current_info": get_rate_limit_info(request),
         "exemptions": [
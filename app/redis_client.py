@@ -1,9 +1,21 @@
 """
 Configuração do cliente Redis para o Sentinela
+
+- `redis_pool`: pool redis.asyncio compartilhado pelo worker, aberto e
+  fechado no lifespan da aplicação; usado pelo estado das câmeras e pelo
+  L2 do cache PNCP
+- `get_redis_client`: cliente síncrono para código fora do event loop
+  (Celery, scripts); nunca deve ser chamado de handlers `async def`
 """
 import redis
+import redis.asyncio as aioredis
 import os
-from typing import Optional
+import time
+from typing import Dict, Iterable, Mapping, Optional, Sequence
+from urllib.parse import quote
+
+from app.core.metrics import REDIS_LATENCY
+from app.core.pool_metrics import PoolMetrics
 
 # Configuração do Redis
 REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
@@ -11,18 +23,26 @@ REDIS_PORT = int(os.getenv("REDIS_PORT", 6379))
 REDIS_DB = int(os.getenv("REDIS_DB", 0))
 REDIS_PASSWORD = os.getenv("REDIS_PASSWORD", None)
 
-# Cliente Redis global
+# Pool assíncrono: conexões por worker, espera máxima por uma conexão livre e timeout de socket (s)
+REDIS_MAX_CONNECTIONS = int(os.getenv("REDIS_MAX_CONNECTIONS", 50))
+REDIS_POOL_TIMEOUT = float(os.getenv("REDIS_POOL_TIMEOUT", 1))
+REDIS_SOCKET_TIMEOUT = float(os.getenv("REDIS_SOCKET_TIMEOUT", 2))
+
+# Chaves por comando/pipeline nos helpers de múltiplas chaves
+PIPELINE_CHUNK = 500
+
+# Cliente Redis global (síncrono)
 redis_client: Optional[redis.Redis] = None
 
 def get_redis_client() -> redis.Redis:
     """
-    Obtém ou cria uma instância do cliente Redis
-    
+    Obtém ou cria uma instância do cliente Redis síncrono
+
     Returns:
         redis.Redis: Cliente Redis configurado
     """
     global redis_client
-    
+
     if redis_client is None:
         redis_client = redis.Redis(
             host=REDIS_HOST,
@@ -33,34 +53,189 @@ def get_redis_client() -> redis.Redis:
             socket_connect_timeout=2,
             socket_timeout=2
         )
-    
+
     return redis_client
 
-def check_redis_connection() -> bool:
+def get_redis_url() -> str:
+    """
+    Monta a URL de conexão com o Redis a partir da configuração deste módulo
+
+    Usada por componentes que abrem o próprio pool (ex.: storage do rate limiter).
+
+    Returns:
+        str: URL no formato redis://[:senha@]host:porta/db
+    """
+    auth = f":{quote(REDIS_PASSWORD, safe='')}@" if REDIS_PASSWORD else ""
+    return f"redis://{auth}{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}"
+
+# ============ Pool assíncrono ============
+
+class InstrumentedBlockingConnectionPool(aioredis.BlockingConnectionPool):
+    """
+    BlockingConnectionPool que mede a espera por conexão (mesmas métricas do
+    pool do banco) e, no Prometheus, o tempo de uso de cada conexão
+    (um comando ou um pipeline inteiro)
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+        self._checkouts: Dict[int, float] = {}
+
+    async def get_connection(self, command_name=None, *keys, **options):
+        start = time.perf_counter()
+        try:
+            connection = await super().get_connection()
+        except redis.ConnectionError as e:
+            if "No connection available" in str(e):
+                self.metrics.record_timeout()
+            raise
+        self.metrics.observe((time.perf_counter() - start) * 1000)
+        self._checkouts[id(connection)] = time.perf_counter()
+        return connection
+
+    async def release(self, connection):
+        start = self._checkouts.pop(id(connection), None)
+        if start is not None:
+            REDIS_LATENCY.observe(time.perf_counter() - start)
+        await super().release(connection)
+
+
+class RedisPool:
+    """
+    Cliente redis.asyncio do worker sobre um ConnectionPool compartilhado
+
+    O pool é criado na primeira utilização (ou em `start`, no lifespan)
+    e fechado em `aclose`. Com o pool cheio, comandos esperam até
+    REDIS_POOL_TIMEOUT por uma conexão em vez de abrir conexões sem limite.
+    """
+
+    def __init__(
+        self,
+        url: Optional[str] = None,
+        max_connections: int = REDIS_MAX_CONNECTIONS,
+        timeout: float = REDIS_POOL_TIMEOUT,
+        socket_timeout: float = REDIS_SOCKET_TIMEOUT,
+        **connection_kwargs,
+    ):
+        self.url = url
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.socket_timeout = socket_timeout
+        self.connection_kwargs = connection_kwargs
+        self.pool: Optional[InstrumentedBlockingConnectionPool] = None
+        self._client: Optional[aioredis.Redis] = None
+
+    def start(self) -> aioredis.Redis:
+        """Cria o pool (sem abrir conexões); idempotente"""
+        if self._client is None:
+            self.pool = InstrumentedBlockingConnectionPool.from_url(
+                self.url or get_redis_url(),
+                max_connections=self.max_connections,
+                timeout=self.timeout,
+                decode_responses=True,
+                socket_timeout=self.socket_timeout,
+                socket_connect_timeout=self.socket_timeout,
+                **self.connection_kwargs,
+            )
+            self._client = aioredis.Redis(connection_pool=self.pool)
+        return self._client
+
+    @property
+    def client(self) -> aioredis.Redis:
+        return self._client or self.start()
+
+    async def aclose(self) -> None:
+        """Fecha o cliente e desconecta todas as conexões do pool"""
+        if self._client is not None:
+            client, pool = self._client, self.pool
+            self._client = None
+            await client.aclose()
+            await pool.disconnect()
+
+    def pipeline(self):
+        """Pipeline sem MULTI/EXEC (um round-trip para vários comandos)"""
+        return self.client.pipeline(transaction=False)
+
+    async def get_many(self, keys: Sequence[str]) -> Dict[str, Optional[str]]:
+        """GET de várias chaves (MGET, em blocos de PIPELINE_CHUNK)"""
+        valores: Dict[str, Optional[str]] = {}
+        for inicio in range(0, len(keys), PIPELINE_CHUNK):
+            bloco = list(keys[inicio:inicio + PIPELINE_CHUNK])
+            valores.update(zip(bloco, await self.client.mget(bloco)))
+        return valores
+
+    async def set_many(self, items: Mapping[str, str], ttl: Optional[int] = None) -> None:
+        """SET de várias chaves com TTL opcional (pipeline; MSET não aceita TTL)"""
+        itens = list(items.items())
+        for inicio in range(0, len(itens), PIPELINE_CHUNK):
+            async with self.pipeline() as pipe:
+                for key, value in itens[inicio:inicio + PIPELINE_CHUNK]:
+                    pipe.set(key, value, ex=ttl)
+                await pipe.execute()
+
+    async def delete_many(self, keys: Iterable[str]) -> int:
+        """DEL de várias chaves; retorna quantas existiam"""
+        keys = list(keys)
+        removidas = 0
+        for inicio in range(0, len(keys), PIPELINE_CHUNK):
+            removidas += await self.client.delete(*keys[inicio:inicio + PIPELINE_CHUNK])
+        return removidas
+
+    async def hgetall_many(self, keys: Sequence[str]) -> Dict[str, Dict[str, str]]:
+        """HGETALL de vários hashes (pipeline)"""
+        valores: Dict[str, Dict[str, str]] = {}
+        for inicio in range(0, len(keys), PIPELINE_CHUNK):
+            bloco = list(keys[inicio:inicio + PIPELINE_CHUNK])
+            async with self.pipeline() as pipe:
+                for key in bloco:
+                    pipe.hgetall(key)
+                valores.update(zip(bloco, await pipe.execute()))
+        return valores
+
+    def stats(self) -> dict:
+        """Uso do pool e métricas de espera por conexão"""
+        if self.pool is None:
+            return {"started": False, "max_connections": self.max_connections}
+        return {
+            "started": self._client is not None,
+            "max_connections": self.pool.max_connections,
+            "timeout": self.pool.timeout,
+            "in_use": len(self.pool._in_use_connections),
+            "idle": len(self.pool._available_connections),
+            **self.pool.metrics.snapshot(),
+        }
+
+
+# Pool global (um por worker)
+redis_pool = RedisPool()
+
+
+# ============ Health ============
+
+async def check_redis_connection() -> bool:
     """
     Verifica conexão com o Redis usando PING
-    
+
     Returns:
         bool: True se conectado, False caso contrário
     """
     try:
-        client = get_redis_client()
-        response = client.ping()
+        response = await redis_pool.client.ping()
         return response is True
     except Exception as e:
         print(f"Erro ao conectar ao Redis: {e}")
         return False
 
-def get_redis_info() -> dict:
+async def get_redis_info() -> dict:
     """
     Obtém informações do Redis
-    
+
     Returns:
         dict: Informações do servidor Redis ou erro
     """
     try:
-        client = get_redis_client()
-        info = client.info()
+        info = await redis_pool.client.info()
         return {
             "connected": True,
             "version": info.get("redis_version", "unknown"),
@@ -8,13 +8,14 @@ Endpoints de login, MFA e gerenciamento de sessão.
 - POST /auth/login: 10 requisições/minuto (proteção contra força bruta)
 - Outras rotas: 300 requisições/minuto (limite global)
 """
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, Request
 from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
 import pyotp
 
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.core.models import User, UserRole
 from app.core.schemas import (
     UserLogin,
@@ -24,13 +25,14 @@ from app.core.schemas import (
     MessageResponse
 )
 from app.core.auth import (
-    verify_password,
     create_access_token,
+    password_needs_rehash,
     generate_mfa_secret,
     generate_qr_code
 )
 from app.core.dependencies import get_current_user, CurrentUser
 from app.core.rate_limit import limiter
+from app.core.password_pool import verify_password_async, rehash_password, PasswordPoolSaturated
 
 router = APIRouter(
     prefix="/auth",
@@ -48,7 +50,8 @@ router = APIRouter(
 async def login(
     request: Request,  # ✅ Necessário para o limiter
     user_login: UserLogin,
-    db: Session = Depends(get_db)
+    background_tasks: BackgroundTasks,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     🔐 **Login de Usuário - Limite: 10 requisições por minuto**
@@ -104,6 +107,9 @@ async def login(
     - Username ou password incorretos
     - Usuário inativo
     - Código MFA inválido (se MFA habilitado)
+    
+    **Response 503 Service Unavailable:**
+    - Pool de verificação de senhas saturado (header Retry-After)
     """
     from app.core.dependencies import logger
     
@@ -111,7 +117,7 @@ async def login(
     logger.info(f"🔐 Tentativa de login: username='{user_login.username}'")
     
     # Buscar usuário
-    user = db.query(User).filter(User.username == user_login.username).first()
+    user = await db.scalar(select(User).where(User.username == user_login.username))
     
     if not user:
         logger.warning(f"🚫 Login falhou: Usuário '{user_login.username}' não encontrado")
@@ -121,8 +127,22 @@ async def login(
             headers={"WWW-Authenticate": "Bearer"}
         )
     
-    # Verificar password
-    if not verify_password(user_login.password, user.hashed_password):
+    # Devolver a conexão ao pool antes do bcrypt (~250 ms): encerra a transação
+    # de leitura sem expirar `user` (expire_on_commit=False)
+    await db.commit()
+    
+    # Verificar password (bcrypt roda no password_pool, fora do event loop)
+    try:
+        password_ok = await verify_password_async(user_login.password, user.hashed_password)
+    except PasswordPoolSaturated:
+        logger.warning(f"⏳ Login adiado: pool de senhas saturado - '{user_login.username}'")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Servidor ocupado processando logins. Tente novamente em instantes.",
+            headers={"Retry-After": "1"}
+        )
+    
+    if not password_ok:
         logger.warning(f"🚫 Login falhou: Password incorreto para '{user_login.username}'")
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -163,7 +183,11 @@ async def login(
     
     # Atualizar último login
     user.last_login = datetime.utcnow()
-    db.commit()
+    await db.commit()
+    
+    # Hash gerado com custo antigo (BCRYPT_ROUNDS alterado): regravar após a resposta
+    if password_needs_rehash(user.hashed_password):
+        background_tasks.add_task(rehash_password, user.id, user_login.password, user.hashed_password)
     
     # Gerar token
     access_token = create_access_token(data=token_data)
@@ -188,6 +212,23 @@ async def login(
     )
 
 
+async def _get_user_for_update(db: AsyncSession, current_user: CurrentUser) -> User:
+    """
+    Carrega a linha User do banco para escrita
+    
+    CurrentUser pode conter apenas um snapshot imutável (principal cache),
+    portanto alterações devem ser feitas no objeto ORM.
+    """
+    user = await db.scalar(select(User).where(User.id == current_user.id))
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Usuário não encontrado",
+            headers={"WWW-Authenticate": "Bearer"}
+        )
+    return user
+
+
 @router.post(
     "/mfa/setup",
     response_model=MFASetup,
@@ -196,7 +237,7 @@ async def login(
 )
 async def setup_mfa(
     current_user: CurrentUser = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     🔒 **Configurar MFA - Gerar QR Code**
@@ -207,22 +248,23 @@ async def setup_mfa(
     """
     from app.core.dependencies import logger
     
+    user = await _get_user_for_update(db, current_user)
+    
     # Gerar secret se não existir
-    if not current_user.mfa_secret:
-        current_user.mfa_secret = generate_mfa_secret()
-        db.commit()
-        db.refresh(current_user)
+    if not user.mfa_secret:
+        user.mfa_secret = generate_mfa_secret()
+        await db.commit()
     
     # Gerar QR Code
     qr_code = generate_qr_code(
-        username=current_user.username,
-        secret=current_user.mfa_secret
+        user_email=user.email,
+        secret=user.mfa_secret
     )
     
     logger.info(f"🔒 MFA setup iniciado para '{current_user.username}'")
     
     return {
-        "secret": current_user.mfa_secret,
+        "secret": user.mfa_secret,
         "qr_code": qr_code,
         "username": current_user.username
     }
@@ -237,7 +279,7 @@ async def setup_mfa(
 async def verify_mfa(
     mfa_verify: MFAVerify,
     current_user: CurrentUser = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     ✅ **Verificar Código TOTP e Ativar MFA**
@@ -248,14 +290,16 @@ async def verify_mfa(
     """
     from app.core.dependencies import logger
     
-    if not current_user.mfa_secret:
+    user = await _get_user_for_update(db, current_user)
+    
+    if not user.mfa_secret:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="MFA não foi configurado. Execute /auth/mfa/setup primeiro."
         )
     
     # Verificar código
-    totp = pyotp.TOTP(current_user.mfa_secret)
+    totp = pyotp.TOTP(user.mfa_secret)
     if not totp.verify(mfa_verify.totp_code, valid_window=1):
         logger.warning(f"🚫 Verificação MFA falhou para '{current_user.username}'")
         raise HTTPException(
@@ -263,9 +307,9 @@ async def verify_mfa(
             detail="Código MFA inválido ou expirado"
         )
     
-    # Ativar MFA
-    current_user.mfa_enabled = True
-    db.commit()
+    # Ativar MFA (o commit invalida o principal cache do usuário)
+    user.mfa_enabled = True
+    await db.commit()
     
     logger.info(f"✅ MFA ativado para '{current_user.username}'")
     
@@ -283,7 +327,7 @@ async def verify_mfa(
 )
 async def disable_mfa(
     current_user: CurrentUser = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     🔓 **Desativar MFA**
@@ -303,9 +347,10 @@ async def disable_mfa(
             f"desativou MFA. Isso reduz a segurança!"
         )
     
-    # Desativar MFA
-    current_user.mfa_enabled = False
-    db.commit()
+    # Desativar MFA (o commit invalida o principal cache do usuário)
+    user = await _get_user_for_update(db, current_user)
+    user.mfa_enabled = False
+    await db.commit()
     
     logger.info(f"🔓 MFA desativado para '{current_user.username}'")
     
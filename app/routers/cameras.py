@@ -1,153 +1,482 @@
 """
 Router de Câmeras
 ✅ Validação: get_current_user + require_active_entidade aplicada
+✅ Heartbeats em lote: estado no Redis + upsert bufferizado em cameras_estado
+✅ Histórico de eventos com séries lidas de rollups (hora/dia) ou do bruto
+✅ Mudanças de status em tempo real via SSE (Redis pub/sub)
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
 
-from app.core.database import get_db
-from app.core.models import Entidade
+from app.core.camera_eventos import listar_eventos, registrar_eventos, serie_eventos
+from app.core.camera_stream import StreamIndisponivel, camera_stream, eventos_sse
+
+from app.core.cameras import (
+    diretorio_cameras,
+    estado_cameras,
+    estados_da_entidade,
+    heartbeat_buffer,
+    resolver_heartbeats,
+    status_efetivo,
+)
+from app.core.config import settings
+from app.core.database import get_async_db
+from app.core.models import Camera, TipoEventoCamera
+from app.core.pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_page, split_page
+from app.core.principal_cache import EntidadeSnapshot
+from app.core.schemas import (
+    CameraCreate,
+    CameraUpdate,
+    CameraResponse,
+    CameraListResponse,
+    HeartbeatLote,
+    HeartbeatLoteResponse,
+    EventoLote,
+    EventoLoteResponse,
+    EventoListResponse,
+    SerieEventosResponse,
+    TipoEventoCameraEnum,
+    MessageResponse
+)
 from app.core.dependencies import (
     get_current_user,
     get_current_entidade,
     require_active_entidade,
     require_gestor,
+    rate_limit_usuario,
     CurrentUser
 )
 
 router = APIRouter(
     prefix="/cameras",
     tags=["Câmeras"],
-    # ✅ Aplicar require_active_entidade em TODAS as rotas
-    dependencies=[Depends(require_active_entidade())]
+    # ✅ Aplicar require_active_entidade e o limite global por usuário em TODAS as rotas
+    dependencies=[Depends(require_active_entidade()), Depends(rate_limit_usuario)]
 )
 
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+async def _get_camera(db: AsyncSession, camera_id: int, entidade_id: int) -> Camera:
+    camera = await db.get(Camera, camera_id)
+    if camera is None or camera.entidade_id != entidade_id:
+        raise HTTPException(404, f"Câmera {camera_id} não encontrada")
+    return camera
+
+
+async def _codigo_em_uso(db: AsyncSession, codigo: str, exceto_id: Optional[int] = None) -> bool:
+    stmt = select(Camera.id).where(Camera.codigo == codigo)
+    if exceto_id is not None:
+        stmt = stmt.where(Camera.id != exceto_id)
+    return await db.scalar(stmt.limit(1)) is not None
+
+
+def _utc(value: datetime) -> datetime:
+    return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value.astimezone(timezone.utc)
+
+
+def _intervalo(inicio: Optional[datetime], fim: Optional[datetime]) -> tuple:
+    """[inicio, fim) em UTC; padrão: últimas 24 horas"""
+    fim = _utc(fim) if fim else datetime.now(timezone.utc)
+    inicio = _utc(inicio) if inicio else fim - timedelta(days=1)
+    if inicio >= fim:
+        raise HTTPException(400, "'inicio' deve ser anterior a 'fim'")
+    if fim - inicio > timedelta(days=settings.CAMERAS_EVENTOS_SERIE_MAX_DIAS):
+        raise HTTPException(400, f"Intervalo máximo: {settings.CAMERAS_EVENTOS_SERIE_MAX_DIAS} dias")
+    return inicio, fim
+
+
+def _tipos(tipo: Optional[List[TipoEventoCameraEnum]]) -> Optional[List[TipoEventoCamera]]:
+    return [TipoEventoCamera(t.value) for t in tipo] if tipo else None
+
+
+def _response(camera: Camera, estado=None) -> CameraResponse:
+    response = CameraResponse.model_validate(camera)
+    if estado is not None:
+        response.status = status_efetivo(estado.status, estado.visto_em)
+        response.visto_em = estado.visto_em
+        response.ip = estado.ip
+        response.firmware = estado.firmware
+    return response
+
 
 @router.get(
     "/",
+    response_model=CameraListResponse,
     summary="Listar Câmeras",
-    description="📹 Lista câmeras da entidade ativa do usuário."
+    description="📹 Lista câmeras da entidade ativa do usuário, com o último estado."
 )
 async def list_cameras(
+    ativa: Optional[bool] = Query(None, description="Filtrar por câmeras ativas/inativas"),
+    limit: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="next_cursor da página anterior"),
     current_user: CurrentUser = Depends(get_current_user),
-    entidade: Entidade = Depends(get_current_entidade),
-    db: Session = Depends(get_db)
+    entidade: EntidadeSnapshot = Depends(get_current_entidade),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     📹 **Listar Câmeras da Entidade**
-    
+
     **Validações:**
     - ✅ Usuário autenticado
     - ✅ Entidade ativa
     - ✅ Retorna apenas câmeras da entidade do usuário
+
+    O status vem do último heartbeat (Redis ou `cameras_estado`); câmeras
+    sem heartbeat há mais de CAMERAS_OFFLINE_APOS segundos aparecem OFFLINE.
     """
-    # TODO: Implementar modelo Camera
-    return {
-        "message": "Lista de câmeras",
-        "entidade": entidade.nome,
-        "user": current_user.username,
-        "cameras": []  # Placeholder
-    }
+    stmt = select(Camera).where(Camera.entidade_id == entidade.id)
+    if ativa is not None:
+        stmt = stmt.where(Camera.ativa.is_(ativa))
+    try:
+        after = decode_cursor(cursor, "id") if cursor else None
+        stmt = keyset_page(stmt, [Camera.id], after=after, limit=limit)
+    except InvalidCursor:
+        raise HTTPException(400, "Cursor inválido")
+
+    cameras, has_more = split_page((await db.execute(stmt)).scalars(), limit)
+    estados = await estados_da_entidade(db, entidade.id, (c.id for c in cameras))
+
+    return CameraListResponse(
+        entidade=entidade.nome,
+        cameras=[_response(c, estados.get(c.id)) for c in cameras],
+        limit=limit,
+        next_cursor=encode_cursor("id", [cameras[-1].id]) if has_more else None
+    )
 
 
 @router.post(
     "/",
+    response_model=CameraResponse,
+    status_code=status.HTTP_201_CREATED,
     summary="Criar Câmera (GESTOR+)",
     description="➕ Cria câmera na entidade ativa."
 )
 async def create_camera(
-    camera_data: dict,  # TODO: Criar schema CameraCreate
+    camera_data: CameraCreate,
     current_user: CurrentUser = Depends(require_gestor),
-    entidade: Entidade = Depends(get_current_entidade),
-    db: Session = Depends(get_db)
+    entidade: EntidadeSnapshot = Depends(get_current_entidade),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     ➕ **Criar Câmera - GESTOR ou ROOT**
-    
+
     **Validações:**
     - ✅ Perfil GESTOR ou ROOT
     - ✅ Entidade ativa
     - ✅ Câmera vinculada automaticamente à entidade do usuário
+    - ✅ Código do dispositivo único
     """
-    return {
-        "message": "Câmera criada (placeholder)",
-        "entidade_id": entidade.id,
-        "created_by": current_user.username
-    }
+    if await _codigo_em_uso(db, camera_data.codigo):
+        raise HTTPException(400, f"Código '{camera_data.codigo}' já cadastrado")
+
+    camera = Camera(**camera_data.model_dump(), entidade_id=entidade.id)
+    db.add(camera)
+    await db.commit()
+    await db.refresh(camera)
+    diretorio_cameras.invalidar(entidade.id)
+
+    return _response(camera)
+
+
+@router.post(
+    "/heartbeats",
+    response_model=HeartbeatLoteResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Registrar Heartbeats em Lote",
+    description="💓 Recebe relatos de status de várias câmeras em uma requisição."
+)
+async def post_heartbeats(
+    lote: HeartbeatLote,
+    current_user: CurrentUser = Depends(get_current_user),
+    entidade: EntidadeSnapshot = Depends(get_current_entidade),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    💓 **Heartbeats em Lote**
+
+    Cada item é `{codigo, status, timestamp?, ip?, firmware?}`. O último
+    estado vai para o Redis na hora (um pipeline por requisição) e para
+    `cameras_estado` no próximo flush do buffer, como upsert em lote.
+    Câmeras que mudaram de status são publicadas em GET /cameras/stream.
+
+    **Retorno (202):** quantos itens foram aceitos e os códigos sem câmera
+    ativa na entidade. Lotes acima de CAMERAS_HEARTBEAT_MAX_LOTE são
+    rejeitados com 422 na validação.
+    """
+
+    mapa = await diretorio_cameras.mapa(db, entidade.id)
+    heartbeats, desconhecidos = resolver_heartbeats(lote.heartbeats, mapa, entidade.id)
+
+    mudancas = await estado_cameras.gravar(heartbeats)
+    await camera_stream.publicar(mudancas)
+    if heartbeat_buffer.adicionar(heartbeats):
+        await heartbeat_buffer.flush()
+
+    return HeartbeatLoteResponse(
+        aceitos=len(heartbeats),
+        desconhecidos=desconhecidos[:100],
+        total_desconhecidos=len(desconhecidos)
+    )
+
+
+@router.get(
+    "/stream",
+    response_class=StreamingResponse,
+    summary="Stream de Status (SSE)",
+    description="📡 Server-Sent Events com as mudanças de status das câmeras da entidade."
+)
+async def stream_cameras(
+    request: Request,
+    current_user: CurrentUser = Depends(get_current_user),
+    entidade: EntidadeSnapshot = Depends(get_current_entidade),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    📡 **Stream de Status das Câmeras**
+
+    Substitui o polling de `GET /cameras/`: carregue a lista uma vez e
+    aplique os eventos recebidos.
+
+    - `event: status` → `{camera_id, status, anterior, visto_em, ip, firmware}`
+    - `event: overflow` → o cliente ficou para trás e mensagens foram
+      descartadas; recarregue a lista
+    - `: ping` a cada CAMERAS_STREAM_HEARTBEAT segundos sem mudanças
+
+    **Erros:** 503 quando o worker atingiu CAMERAS_STREAM_MAX_CONEXOES.
+    """
+    if camera_stream.total_conexoes() >= camera_stream.max_conexoes:
+        raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "Limite de conexões de stream atingido")
+
+    # A conexão dura minutos/horas: devolve ao pool a conexão usada na autenticação
+    await db.close()
+
+    async def corpo():
+        try:
+            async with camera_stream.assinar(entidade.id) as fila:
+                async for quadro in eventos_sse(fila, request.is_disconnected, settings.CAMERAS_STREAM_HEARTBEAT):
+                    yield quadro
+        except StreamIndisponivel:
+            return
+
+    return StreamingResponse(
+        corpo(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post(
+    "/eventos",
+    response_model=EventoLoteResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Registrar Eventos em Lote",
+    description="🎞️ Grava eventos (movimento, offline, violação) de várias câmeras."
+)
+async def post_eventos(
+    lote: EventoLote,
+    current_user: CurrentUser = Depends(get_current_user),
+    entidade: EntidadeSnapshot = Depends(get_current_entidade),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    🎞️ **Eventos em Lote**
+
+    Cada item é `{codigo, tipo, timestamp?, dados?}`; o histórico é
+    append-only (um INSERT em lote por requisição). Timestamps no futuro
+    são limitados ao recebimento. Lotes acima de CAMERAS_EVENTOS_MAX_LOTE
+    são rejeitados com 422 na validação.
+    """
+
+    mapa = await diretorio_cameras.mapa(db, entidade.id)
+    agora = datetime.now(timezone.utc)
+    rows, desconhecidos = [], []
+    for item in lote.eventos:
+        camera_id = mapa.get(item.codigo)
+        if camera_id is None:
+            desconhecidos.append(item.codigo)
+            continue
+        rows.append({
+            "entidade_id": entidade.id,
+            "camera_id": camera_id,
+            "tipo": TipoEventoCamera(item.tipo.value),
+            "ocorrido_em": min(_utc(item.timestamp), agora) if item.timestamp else agora,
+            "dados": item.dados,
+        })
+
+    if rows:
+        await db.run_sync(lambda session: registrar_eventos(session.connection(), rows))
+        await db.commit()
+
+    return EventoLoteResponse(
+        aceitos=len(rows),
+        desconhecidos=desconhecidos[:100],
+        total_desconhecidos=len(desconhecidos)
+    )
+
+
+@router.get(
+    "/eventos",
+    response_model=EventoListResponse,
+    summary="Listar Eventos",
+    description="🎞️ Histórico bruto de eventos, mais recentes primeiro."
+)
+async def list_eventos(
+    inicio: Optional[datetime] = Query(None, description="Início do intervalo (padrão: 24h atrás)"),
+    fim: Optional[datetime] = Query(None, description="Fim do intervalo (padrão: agora)"),
+    camera_id: Optional[int] = Query(None, description="Filtrar por câmera"),
+    tipo: Optional[List[TipoEventoCameraEnum]] = Query(None, description="Filtrar por tipo (repetível)"),
+    limit: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="next_cursor da página anterior"),
+    current_user: CurrentUser = Depends(get_current_user),
+    entidade: EntidadeSnapshot = Depends(get_current_entidade),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """🎞️ **Eventos da Entidade** (paginação keyset em (ocorrido_em, id))"""
+    inicio, fim = _intervalo(inicio, fim)
+    apos = None
+    if cursor:
+        try:
+            ocorrido_em, evento_id = decode_cursor(cursor, "-ocorrido_em")
+            apos = (_utc(datetime.fromisoformat(ocorrido_em)), int(evento_id))
+        except (InvalidCursor, TypeError, ValueError):
+            raise HTTPException(400, "Cursor inválido")
+
+    rows = await listar_eventos(db, entidade.id, inicio, fim, camera_id=camera_id, tipos=_tipos(tipo),
+                                apos=apos, limit=limit)
+    eventos, has_more = split_page(rows, limit)
+
+    return EventoListResponse(
+        eventos=eventos,
+        limit=limit,
+        next_cursor=encode_cursor("-ocorrido_em", [eventos[-1].ocorrido_em, eventos[-1].id]) if has_more else None
+    )
+
+
+@router.get(
+    "/eventos/serie",
+    response_model=SerieEventosResponse,
+    summary="Série de Eventos",
+    description="📈 Eventos por período e tipo, com resolução escolhida pelo intervalo."
+)
+async def get_serie_eventos(
+    inicio: Optional[datetime] = Query(None, description="Início do intervalo (padrão: 24h atrás)"),
+    fim: Optional[datetime] = Query(None, description="Fim do intervalo (padrão: agora)"),
+    camera_id: Optional[int] = Query(None, description="Filtrar por câmera"),
+    tipo: Optional[List[TipoEventoCameraEnum]] = Query(None, description="Filtrar por tipo (repetível)"),
+    current_user: CurrentUser = Depends(get_current_user),
+    entidade: EntidadeSnapshot = Depends(get_current_entidade),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    📈 **Série de Eventos**
+
+    - Até CAMERAS_EVENTOS_BRUTO_MAX_HORAS: por MINUTO, do histórico bruto
+    - Até CAMERAS_EVENTOS_HORA_MAX_DIAS: por HORA, dos rollups
+    - Acima: por DIA, dos rollups (um mês ≈ 30 pontos por tipo)
+
+    O trecho ainda não consolidado pelo Celery é somado do histórico bruto.
+    """
+    inicio, fim = _intervalo(inicio, fim)
+    granularidade, pontos = await serie_eventos(db, entidade.id, inicio, fim, camera_id=camera_id, tipos=_tipos(tipo))
+
+    return SerieEventosResponse(granularidade=granularidade, inicio=inicio, fim=fim, pontos=pontos)
 
 
 @router.get(
     "/{camera_id}",
+    response_model=CameraResponse,
     summary="Buscar Câmera",
     description="🔍 Busca câmera específica."
 )
 async def get_camera(
     camera_id: int,
     current_user: CurrentUser = Depends(get_current_user),
-    entidade: Entidade = Depends(get_current_entidade)
+    entidade: EntidadeSnapshot = Depends(get_current_entidade),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     🔍 **Buscar Câmera por ID**
-    
+
     **Validações:**
     - ✅ Usuário autenticado
     - ✅ Entidade ativa
     - ✅ Câmera pertence à entidade do usuário
     """
-    # TODO: Implementar busca real
-    return {
-        "id": camera_id,
-        "nome": f"Câmera {camera_id}",
-        "entidade_id": entidade.id
-    }
+    camera = await _get_camera(db, camera_id, entidade.id)
+    estados = await estados_da_entidade(db, entidade.id, [camera.id])
+    return _response(camera, estados.get(camera.id))
 
 
 @router.put(
     "/{camera_id}",
+    response_model=CameraResponse,
     summary="Atualizar Câmera (GESTOR+)",
     description="✏️ Atualiza câmera."
 )
 async def update_camera(
     camera_id: int,
-    camera_data: dict,  # TODO: Schema CameraUpdate
+    camera_data: CameraUpdate,
     current_user: CurrentUser = Depends(require_gestor),
-    entidade: Entidade = Depends(get_current_entidade)
+    entidade: EntidadeSnapshot = Depends(get_current_entidade),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     ✏️ **Atualizar Câmera - GESTOR ou ROOT**
-    
+
     **Validações:**
     - ✅ Perfil GESTOR ou ROOT
     - ✅ Entidade ativa
     - ✅ Câmera pertence à entidade do usuário
     """
-    return {
-        "message": f"Câmera {camera_id} atualizada",
-        "updated_by": current_user.username
-    }
+    camera = await _get_camera(db, camera_id, entidade.id)
+
+    update_data = camera_data.model_dump(exclude_unset=True)
+    if update_data.get("codigo") and await _codigo_em_uso(db, update_data["codigo"], camera.id):
+        raise HTTPException(400, f"Código '{update_data['codigo']}' já cadastrado")
+
+    for field, value in update_data.items():
+        if value is not None or field in ("localizacao", "url_stream"):
+            setattr(camera, field, value)
+
+    await db.commit()
+    await db.refresh(camera)
+    diretorio_cameras.invalidar(entidade.id)
+
+    estados = await estados_da_entidade(db, entidade.id, [camera.id])
+    return _response(camera, estados.get(camera.id))
 
 
 @router.delete(
     "/{camera_id}",
+    response_model=MessageResponse,
     summary="Deletar Câmera (GESTOR+)",
     description="🗑️ Deleta câmera."
 )
 async def delete_camera(
     camera_id: int,
     current_user: CurrentUser = Depends(require_gestor),
-    entidade: Entidade = Depends(get_current_entidade)
+    entidade: EntidadeSnapshot = Depends(get_current_entidade),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     🗑️ **Deletar Câmera - GESTOR ou ROOT**
-    
+
     **Validações:**
     - ✅ Perfil GESTOR ou ROOT
     - ✅ Entidade ativa
     - ✅ Câmera pertence à entidade do usuário
     """
-    return {
-        "message": f"Câmera {camera_id} deletada",
-        "deleted_by": current_user.username
-    }
+    camera = await _get_camera(db, camera_id, entidade.id)
+    await db.delete(camera)
+    await db.commit()
+    diretorio_cameras.invalidar(entidade.id)
+    heartbeat_buffer.descartar(camera_id)
+    await estado_cameras.remover(entidade.id, camera_id)
+
+    return MessageResponse(message=f"Câmera {camera_id} deletada")
@@ -0,0 +1,246 @@
+"""
+Router de Certidões
+✅ Validação: get_current_user + require_active_entidade aplicada
+✅ Vencimentos pelo índice de vencimentos e estatísticas por contadores incrementais
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List
+
+from app.core.certidoes import get_stats, listar_certidoes_vencendo
+from app.core.database import get_async_db
+from app.core.models import Certidao, StatusCertidao, TipoCertidao, TipoVencimento
+from app.core.principal_cache import EntidadeSnapshot
+from app.core.vencimentos import contar_janelas
+from app.core.schemas import (
+    CertidaoCreate,
+    CertidaoUpdate,
+    CertidaoRenovar,
+    CertidaoResponse,
+    CertidaoVencendo,
+    MessageResponse
+)
+from app.core.dependencies import (
+    get_current_user,
+    get_current_entidade,
+    require_active_entidade,
+    require_gestor,
+    rate_limit_usuario,
+    CurrentUser
+)
+
+router = APIRouter(
+    prefix="/certidoes",
+    tags=["Certidões"],
+    # ✅ Aplicar require_active_entidade e o limite global por usuário em TODAS as rotas
+    dependencies=[Depends(require_active_entidade()), Depends(rate_limit_usuario)]
+)
+
+
+async def _get_certidao_da_entidade(db: AsyncSession, certidao_id: int, entidade_id: int) -> Certidao:
+    certidao = await db.scalar(
+        select(Certidao).where(Certidao.id == certidao_id, Certidao.entidade_id == entidade_id)
+    )
+    if certidao is None:
+        raise HTTPException(404, f"Certidão {certidao_id} não encontrada")
+    return certidao
+
+
+@router.get(
+    "/vencendo",
+    response_model=List[CertidaoVencendo],
+    summary="Certidões Vencendo",
+    description="📅 Certidões da entidade com validade terminando nos próximos N dias."
+)
+async def list_certidoes_vencendo(
+    dias: int = Query(30, ge=1, le=365, description="Janela em dias a partir de hoje"),
+    current_user: CurrentUser = Depends(get_current_user),
+    entidade: EntidadeSnapshot = Depends(get_current_entidade),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    📅 **Certidões Vencendo**
+
+    Busca por faixa no índice de vencimentos (entidade_id + data), sem
+    varrer a tabela de certidões. Ordenadas da mais próxima à mais distante.
+    """
+    vencendo = await listar_certidoes_vencendo(db, entidade.id, dias)
+    return [
+        CertidaoVencendo(
+            **CertidaoResponse.model_validate(certidao).model_dump(),
+            entidade=entidade.nome,
+            dias_restantes=dias_restantes
+        )
+        for certidao, dias_restantes in vencendo
+    ]
+
+
+@router.get(
+    "/stats",
+    summary="Estatísticas de Certidões",
+    description="📊 Totais de certidões da entidade por status e tipo."
+)
+async def get_certidoes_stats(
+    current_user: CurrentUser = Depends(get_current_user),
+    entidade: EntidadeSnapshot = Depends(get_current_entidade),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    📊 **Estatísticas de Certidões**
+
+    Lidas dos contadores mantidos a cada escrita (sem COUNT/GROUP BY na
+    tabela de certidões) e das janelas do índice de vencimentos.
+    """
+    stats = await get_stats(db, entidade.id)
+    return {
+        "entidade": entidade.nome,
+        "total": sum(stats["status"].values()),
+        "por_status": stats["status"],
+        "por_tipo": stats["tipo"],
+        "vencendo": await contar_janelas(db, entidade.id, tipos=[TipoVencimento.CERTIDAO]),
+    }
+
+
+@router.post(
+    "",
+    response_model=CertidaoResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Cadastrar Certidão (GESTOR+)",
+    description="➕ Cadastra certidão de fornecedor na entidade ativa."
+)
+async def create_certidao(
+    certidao_data: CertidaoCreate,
+    current_user: CurrentUser = Depends(require_gestor),
+    entidade: EntidadeSnapshot = Depends(get_current_entidade),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    ➕ **Cadastrar Certidão - GESTOR ou ROOT**
+
+    **Validações:**
+    - ✅ Perfil GESTOR ou ROOT
+    - ✅ Entidade ATIVA (obrigatório)
+    - ✅ Certidão vinculada automaticamente à entidade do usuário
+    - ✅ Situação inicial PENDENTE até a próxima revalidação em lote
+    """
+    data = certidao_data.model_dump()
+    data["tipo"] = TipoCertidao(data["tipo"].value)
+    certidao = Certidao(**data, entidade_id=entidade.id, status=StatusCertidao.PENDENTE)
+    db.add(certidao)
+    await db.commit()
+    await db.refresh(certidao)
+
+    return certidao
+
+
+@router.get(
+    "/{certidao_id}",
+    response_model=CertidaoResponse,
+    summary="Buscar Certidão",
+    description="🔍 Busca certidão específica."
+)
+async def get_certidao(
+    certidao_id: int,
+    current_user: CurrentUser = Depends(get_current_user),
+    entidade: EntidadeSnapshot = Depends(get_current_entidade),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """🔍 **Buscar Certidão por ID** (apenas da entidade do usuário)"""
+    return await _get_certidao_da_entidade(db, certidao_id, entidade.id)
+
+
+@router.put(
+    "/{certidao_id}",
+    response_model=CertidaoResponse,
+    summary="Atualizar Certidão (GESTOR+)",
+    description="✏️ Atualiza certidão."
+)
+async def update_certidao(
+    certidao_id: int,
+    certidao_data: CertidaoUpdate,
+    current_user: CurrentUser = Depends(require_gestor),
+    entidade: EntidadeSnapshot = Depends(get_current_entidade),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    ✏️ **Atualizar Certidão - GESTOR ou ROOT**
+
+    **Validações:**
+    - ✅ Perfil GESTOR ou ROOT
+    - ✅ Entidade ATIVA
+    - ✅ Certidão pertence à entidade do usuário
+    """
+    certidao = await _get_certidao_da_entidade(db, certidao_id, entidade.id)
+
+    update_data = certidao_data.model_dump(exclude_unset=True)
+    if update_data.get("status") is not None:
+        update_data["status"] = StatusCertidao(update_data["status"].value)
+
+    for field, value in update_data.items():
+        if value is not None or field == "data_emissao":
+            setattr(certidao, field, value)
+
+    await db.commit()
+    await db.refresh(certidao)
+
+    return certidao
+
+
+@router.patch(
+    "/{certidao_id}/renovar",
+    response_model=CertidaoResponse,
+    summary="Renovar Certidão (GESTOR+)",
+    description="🔄 Registra nova validade; a certidão volta a PENDENTE até ser revalidada."
+)
+async def renovar_certidao(
+    certidao_id: int,
+    renovacao: CertidaoRenovar,
+    current_user: CurrentUser = Depends(require_gestor),
+    entidade: EntidadeSnapshot = Depends(get_current_entidade),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    🔄 **Renovar Certidão - GESTOR ou ROOT**
+
+    Atualiza validade (e número/emissão, se informados) e coloca a
+    certidão no início da fila da próxima revalidação em lote.
+    """
+    certidao = await _get_certidao_da_entidade(db, certidao_id, entidade.id)
+
+    certidao.data_validade = renovacao.data_validade
+    if renovacao.numero:
+        certidao.numero = renovacao.numero
+    if renovacao.data_emissao:
+        certidao.data_emissao = renovacao.data_emissao
+    certidao.status = StatusCertidao.PENDENTE
+    certidao.ultima_verificacao = None
+
+    await db.commit()
+    await db.refresh(certidao)
+
+    return certidao
+
+
+@router.delete(
+    "/{certidao_id}",
+    response_model=MessageResponse,
+    summary="Deletar Certidão (GESTOR+)",
+    description="🗑️ Deleta certidão."
+)
+async def delete_certidao(
+    certidao_id: int,
+    current_user: CurrentUser = Depends(require_gestor),
+    entidade: EntidadeSnapshot = Depends(get_current_entidade),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """🗑️ **Deletar Certidão - GESTOR ou ROOT**"""
+    certidao = await _get_certidao_da_entidade(db, certidao_id, entidade.id)
+    numero = certidao.numero
+    await db.delete(certidao)
+    await db.commit()
+
+    return MessageResponse(
+        message=f"Certidão '{numero}' deletada com sucesso",
+        detail=f"Operação executada por: {current_user.username}"
+    )
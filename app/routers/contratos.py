@@ -1,160 +1,307 @@
 """
 Router de Contratos
 ✅ Validação: get_current_user + require_active_entidade aplicada
+✅ Listagem com paginação keyset (cursor) e filtros aplicados no SQL
 """
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from typing import List
-from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from datetime import date
 
-from app.core.database import get_db
-from app.core.models import Entidade
+from app.core.database import get_async_db
+from app.core.models import Contrato, StatusContrato, TipoVencimento
+from app.core.pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_page, split_page
+from app.core.principal_cache import EntidadeSnapshot
+from app.core.vencimentos import contar_janelas, listar_vencendo
+from app.core.schemas import (
+    ContratoCreate,
+    ContratoUpdate,
+    ContratoResponse,
+    ContratoListResponse,
+    StatusContratoEnum,
+    MessageResponse
+)
 from app.core.dependencies import (
     get_current_user,
     get_current_entidade,
     require_active_entidade,
     require_gestor,
+    rate_limit_usuario,
     CurrentUser
 )
 
 router = APIRouter(
     prefix="/contratos",
     tags=["Contratos"],
-    # ✅ Aplicar require_active_entidade em TODAS as rotas
-    dependencies=[Depends(require_active_entidade())]
+    # ✅ Aplicar require_active_entidade e o limite global por usuário em TODAS as rotas
+    dependencies=[Depends(require_active_entidade()), Depends(rate_limit_usuario)]
 )
 
+# Ordenações aceitas → colunas da chave keyset (a última é única)
+ORDENACOES = {
+    "id": (Contrato.id,),
+    "vigencia": (Contrato.vigencia, Contrato.id),
+}
+
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def _cursor_values(ordenacao: str, values: list) -> list:
+    """Reconverte os valores do cursor (JSON) para os tipos das colunas"""
+    try:
+        if ordenacao == "vigencia":
+            return [date.fromisoformat(values[0]), int(values[1])]
+        return [int(values[0])]
+    except (IndexError, TypeError, ValueError) as e:
+        raise InvalidCursor("Cursor inválido") from e
+
+
+def _row_key(contrato: Contrato, ordenacao: str) -> list:
+    return [getattr(contrato, c.key) for c in ORDENACOES[ordenacao]]
+
+
+async def _get_contrato_da_entidade(db: AsyncSession, contrato_id: int, entidade_id: int) -> Contrato:
+    contrato = await db.scalar(
+        select(Contrato).where(Contrato.id == contrato_id, Contrato.entidade_id == entidade_id)
+    )
+    if contrato is None:
+        raise HTTPException(404, f"Contrato {contrato_id} não encontrado")
+    return contrato
+
+
+async def _numero_em_uso(db: AsyncSession, entidade_id: int, numero: str, exceto_id: Optional[int] = None) -> bool:
+    stmt = select(Contrato.id).where(Contrato.entidade_id == entidade_id, Contrato.numero == numero)
+    if exceto_id is not None:
+        stmt = stmt.where(Contrato.id != exceto_id)
+    return await db.scalar(stmt.limit(1)) is not None
+
 
 @router.get(
     "/",
+    response_model=ContratoListResponse,
     summary="Listar Contratos",
-    description="📄 Lista contratos da entidade ativa do usuário."
+    description="📄 Lista contratos da entidade ativa do usuário (paginação por cursor)."
 )
 async def list_contratos(
+    status_contrato: Optional[StatusContratoEnum] = Query(None, alias="status", description="Filtrar por status"),
+    cnpj_fornecedor: Optional[str] = Query(None, description="Filtrar por CNPJ do fornecedor"),
+    vigencia_de: Optional[date] = Query(None, description="Fim da vigência a partir de"),
+    vigencia_ate: Optional[date] = Query(None, description="Fim da vigência até"),
+    ordenar: str = Query("-id", pattern="^-?(id|vigencia)$", description="id, -id, vigencia ou -vigencia"),
+    limit: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="next_cursor da página anterior"),
     current_user: CurrentUser = Depends(get_current_user),
-    entidade: Entidade = Depends(get_current_entidade),
-    db: Session = Depends(get_db)
+    entidade: EntidadeSnapshot = Depends(get_current_entidade),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     📄 **Listar Contratos da Entidade**
-    
+
     **Validações:**
     - ✅ Usuário autenticado
     - ✅ Entidade ATIVA (obrigatório)
     - ✅ Retorna apenas contratos da entidade do usuário
-    
+
+    **Paginação:**
+    - Keyset: a próxima página parte da chave (ordenação, id) da última
+      linha entregue, usando os índices (entidade_id, ..., id); o custo
+      não cresce com a profundidade da página
+    - Envie `next_cursor` como `cursor` com os mesmos filtros e `ordenar`
+
     **Restrições:**
     - Entidades com status INATIVA, SUSPENSA, BLOQUEADA ou EM_ANALISE
       receberão 403 Forbidden
     """
-    # TODO: Implementar modelo Contrato
+    descending = ordenar.startswith("-")
+    ordenacao = ordenar.lstrip("-")
+    columns = ORDENACOES[ordenacao]
+
+    after = None
+    if cursor:
+        try:
+            after = _cursor_values(ordenacao, decode_cursor(cursor, ordenar))
+        except InvalidCursor as e:
+            raise HTTPException(400, str(e))
+
+    # Filtros empurrados para o WHERE, sempre escopados pela entidade
+    stmt = select(Contrato).where(Contrato.entidade_id == entidade.id)
+    if status_contrato:
+        stmt = stmt.where(Contrato.status == StatusContrato(status_contrato.value))
+    if cnpj_fornecedor:
+        stmt = stmt.where(Contrato.cnpj_fornecedor == ''.join(filter(str.isdigit, cnpj_fornecedor)))
+    if vigencia_de:
+        stmt = stmt.where(Contrato.vigencia >= vigencia_de)
+    if vigencia_ate:
+        stmt = stmt.where(Contrato.vigencia <= vigencia_ate)
+
+    rows = (await db.execute(keyset_page(stmt, columns, after, descending, limit))).scalars().all()
+    contratos, has_more = split_page(rows, limit)
+
+    return ContratoListResponse(
+        entidade=entidade.nome,
+        entidade_status=entidade.status.value,
+        contratos=contratos,
+        limit=limit,
+        next_cursor=encode_cursor(ordenar, _row_key(contratos[-1], ordenacao)) if has_more else None
+    )
+
+
+@router.get(
+    "/vencendo",
+    summary="Contratos Vencendo",
+    description="📅 Contratos da entidade cuja vigência termina nos próximos N dias."
+)
+async def list_contratos_vencendo(
+    dias: int = Query(30, ge=1, le=365, description="Janela em dias a partir de hoje"),
+    incluir_vencidos: bool = Query(False, description="Incluir vencidos recentes"),
+    current_user: CurrentUser = Depends(get_current_user),
+    entidade: EntidadeSnapshot = Depends(get_current_entidade),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    📅 **Contratos Vencendo**
+
+    Lido do índice de vencimentos (busca por faixa em entidade_id +
+    data_vencimento), sem varrer a tabela de contratos.
+
+    **Retorno:**
+    - `contratos`: itens do mais próximo ao mais distante, com `dias_restantes`
+    - `janelas`: contagens de vencidos e de vencendo em 7/30/90 dias
+    """
+    tipos = [TipoVencimento.CONTRATO]
     return {
-        "message": "Lista de contratos",
         "entidade": entidade.nome,
-        "entidade_status": entidade.status.value,
-        "user": current_user.username,
-        "contratos": []  # Placeholder
+        "dias": dias,
+        "janelas": await contar_janelas(db, entidade.id, tipos=tipos),
+        "contratos": await listar_vencendo(db, entidade.id, dias, tipos=tipos, incluir_vencidos=incluir_vencidos),
     }
 
 
 @router.post(
     "/",
+    response_model=ContratoResponse,
+    status_code=status.HTTP_201_CREATED,
     summary="Criar Contrato (GESTOR+)",
     description="➕ Cria contrato na entidade ativa."
 )
 async def create_contrato(
-    contrato_data: dict,  # TODO: Criar schema ContratoCreate
+    contrato_data: ContratoCreate,
     current_user: CurrentUser = Depends(require_gestor),
-    entidade: Entidade = Depends(get_current_entidade),
-    db: Session = Depends(get_db)
+    entidade: EntidadeSnapshot = Depends(get_current_entidade),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     ➕ **Criar Contrato - GESTOR ou ROOT**
-    
+
     **Validações:**
     - ✅ Perfil GESTOR ou ROOT
     - ✅ Entidade ATIVA (obrigatório)
     - ✅ Contrato vinculado automaticamente à entidade do usuário
+    - ✅ Número único dentro da entidade
     """
-    return {
-        "message": "Contrato criado (placeholder)",
-        "entidade_id": entidade.id,
-        "entidade_status": entidade.status.value,
-        "created_by": current_user.username
-    }
+    if await _numero_em_uso(db, entidade.id, contrato_data.numero):
+        raise HTTPException(400, f"Contrato '{contrato_data.numero}' já cadastrado")
+
+    data = contrato_data.model_dump()
+    data["status"] = StatusContrato(data["status"].value)
+    contrato = Contrato(**data, entidade_id=entidade.id)
+    db.add(contrato)
+    await db.commit()
+    await db.refresh(contrato)
+
+    return contrato
 
 
 @router.get(
     "/{contrato_id}",
+    response_model=ContratoResponse,
     summary="Buscar Contrato",
     description="🔍 Busca contrato específico."
 )
 async def get_contrato(
     contrato_id: int,
     current_user: CurrentUser = Depends(get_current_user),
-    entidade: Entidade = Depends(get_current_entidade)
+    entidade: EntidadeSnapshot = Depends(get_current_entidade),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     🔍 **Buscar Contrato por ID**
-    
+
     **Validações:**
     - ✅ Usuário autenticado
     - ✅ Entidade ATIVA
     - ✅ Contrato pertence à entidade do usuário
     """
-    # TODO: Implementar busca real
-    return {
-        "id": contrato_id,
-        "nome": f"Contrato {contrato_id}",
-        "entidade_id": entidade.id,
-        "entidade_status": entidade.status.value
-    }
+    return await _get_contrato_da_entidade(db, contrato_id, entidade.id)
 
 
 @router.put(
     "/{contrato_id}",
+    response_model=ContratoResponse,
     summary="Atualizar Contrato (GESTOR+)",
     description="✏️ Atualiza contrato."
 )
 async def update_contrato(
     contrato_id: int,
-    contrato_data: dict,  # TODO: Schema ContratoUpdate
+    contrato_data: ContratoUpdate,
     current_user: CurrentUser = Depends(require_gestor),
-    entidade: Entidade = Depends(get_current_entidade)
+    entidade: EntidadeSnapshot = Depends(get_current_entidade),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     ✏️ **Atualizar Contrato - GESTOR ou ROOT**
-    
+
     **Validações:**
     - ✅ Perfil GESTOR ou ROOT
     - ✅ Entidade ATIVA
     - ✅ Contrato pertence à entidade do usuário
     """
-    return {
-        "message": f"Contrato {contrato_id} atualizado",
-        "updated_by": current_user.username
-    }
+    contrato = await _get_contrato_da_entidade(db, contrato_id, entidade.id)
+
+    update_data = contrato_data.model_dump(exclude_unset=True)
+    if update_data.get("numero") and await _numero_em_uso(db, entidade.id, update_data["numero"], contrato.id):
+        raise HTTPException(400, f"Contrato '{update_data['numero']}' já cadastrado")
+    if update_data.get("status") is not None:
+        update_data["status"] = StatusContrato(update_data["status"].value)
+
+    for field, value in update_data.items():
+        if value is not None or field == "data_assinatura":
+            setattr(contrato, field, value)
+
+    await db.commit()
+    await db.refresh(contrato)
+
+    return contrato
 
 
 @router.delete(
     "/{contrato_id}",
+    response_model=MessageResponse,
     summary="Deletar Contrato (GESTOR+)",
     description="🗑️ Deleta contrato."
 )
 async def delete_contrato(
     contrato_id: int,
     current_user: CurrentUser = Depends(require_gestor),
-    entidade: Entidade = Depends(get_current_entidade)
+    entidade: EntidadeSnapshot = Depends(get_current_entidade),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     🗑️ **Deletar Contrato - GESTOR ou ROOT**
-    
+
     **Validações:**
     - ✅ Perfil GESTOR ou ROOT
     - ✅ Entidade ATIVA
     - ✅ Contrato pertence à entidade do usuário
     """
-    return {
-        "message": f"Contrato {contrato_id} deletado",
-        "deleted_by": current_user.username
-    }
+    contrato = await _get_contrato_da_entidade(db, contrato_id, entidade.id)
+    numero = contrato.numero
+    await db.delete(contrato)
+    await db.commit()
+
+    return MessageResponse(
+        message=f"Contrato '{numero}' deletado com sucesso",
+        detail=f"Operação executada por: {current_user.username}"
+    )
@@ -0,0 +1,125 @@
+"""
+Router do Dashboard
+✅ Validação: require_gestor + require_active_entidade aplicada
+✅ Resumo pré-agregado por entidade com ETag/Last-Modified (304 em recargas)
+"""
+from datetime import datetime
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Optional
+import hashlib
+
+from fastapi import APIRouter, Depends, Request, Response, status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.dashboard import obter_resumo
+from app.core.database import get_async_db
+from app.core.principal_cache import EntidadeSnapshot
+from app.core.schemas import DashboardGestorResponse, ResumoCertidoes, ResumoContratos
+from app.core.dependencies import (
+    get_current_entidade,
+    require_active_entidade,
+    require_gestor,
+    rate_limit_usuario,
+    CurrentUser
+)
+
+router = APIRouter(
+    prefix="/dashboard",
+    tags=["Dashboard"],
+    # ✅ Aplicar require_active_entidade e o limite global por usuário em TODAS as rotas
+    dependencies=[Depends(require_active_entidade()), Depends(rate_limit_usuario)]
+)
+
+# Cache apenas no navegador do usuário, sempre revalidado (ETag/Last-Modified)
+CACHE_CONTROL = "private, no-cache"
+
+
+def _etag_confere(if_none_match: str, etag: str) -> bool:
+    """Comparação fraca (RFC 9110 §13.1.2) contra a lista do If-None-Match"""
+    candidatos = [valor.strip() for valor in if_none_match.split(",")]
+    return "*" in candidatos or any(c.removeprefix("W/") == etag.removeprefix("W/") for c in candidatos)
+
+
+def _etag(entidade: EntidadeSnapshot, versao: int) -> str:
+    """
+    ETag fraco do dashboard: versão do resumo + campos da entidade no corpo
+
+    Renomear a entidade ou mudar seu status não altera o resumo, mas muda
+    a resposta; por isso nome, status e a janela entram no hash.
+    """
+    corpo = f"{entidade.nome}|{entidade.status.value}|{settings.DASHBOARD_JANELA_DIAS}"
+    return f'W/"{entidade.id}-{versao}-{hashlib.sha1(corpo.encode()).hexdigest()[:12]}"'
+
+
+def _nao_modificado(request: Request, etag: str, atualizado_em: Optional[datetime]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # If-None-Match tem precedência sobre If-Modified-Since
+        return _etag_confere(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and atualizado_em is not None:
+        try:
+            return atualizado_em.replace(microsecond=0) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+@router.get(
+    "/gestor",
+    response_model=DashboardGestorResponse,
+    summary="Dashboard do Gestor (GESTOR+)",
+    description="📊 Totais de contratos, vencimentos, certidões e riscos da entidade em uma chamada.",
+    responses={304: {"description": "Resumo não mudou desde o ETag/data informados"}}
+)
+async def get_dashboard_gestor(
+    request: Request,
+    response: Response,
+    current_user: CurrentUser = Depends(require_gestor),
+    entidade: EntidadeSnapshot = Depends(get_current_entidade),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    📊 **Dashboard do Gestor - GESTOR ou ROOT**
+
+    Lido da linha da entidade em `resumos_entidades`, mantida a cada
+    escrita em contratos/certidões e recalculada periodicamente.
+
+    **Cache condicional:**
+    - `ETag` muda apenas quando algum valor do resumo, o nome ou o status
+      da entidade muda
+    - Envie `If-None-Match` (ou `If-Modified-Since`) na recarga: sem
+      mudanças a resposta é 304, sem corpo
+    """
+    resumo = await obter_resumo(db, entidade.id)
+    atualizado_em = resumo["atualizado_em"]
+
+    headers = {"ETag": _etag(entidade, resumo["versao"]), "Cache-Control": CACHE_CONTROL}
+    if atualizado_em is not None:
+        headers["Last-Modified"] = format_datetime(atualizado_em, usegmt=True)
+
+    if _nao_modificado(request, headers["ETag"], atualizado_em):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    response.headers.update(headers)
+    return DashboardGestorResponse(
+        entidade=entidade.nome,
+        entidade_status=entidade.status.value,
+        janela_dias=settings.DASHBOARD_JANELA_DIAS,
+        contratos=ResumoContratos(
+            total=resumo["contratos_total"],
+            vigentes=resumo["contratos_vigentes"],
+            vencendo=resumo["contratos_vencendo"],
+            valor_total=round(resumo["valor_total"], 2),
+            valor_vigente=round(resumo["valor_vigente"], 2),
+        ),
+        certidoes=ResumoCertidoes(
+            total=resumo["certidoes_total"],
+            irregulares=resumo["certidoes_irregulares"],
+            vencendo=resumo["certidoes_vencendo"],
+        ),
+        riscos_criticos=resumo["riscos_criticos"],
+        atualizado_em=atualizado_em,
+    )
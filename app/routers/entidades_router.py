@@ -4,18 +4,20 @@ Router de Entidades - CRUD completo com validações de segurança
 """
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.responses import JSONResponse
-from sqlalchemy.orm import Session
+from sqlalchemy import select, func
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List, Optional
 from datetime import datetime
 
-from app.core.database import get_db
-from app.core.models import Entidade, User, TipoEntidade, StatusEntidade
+from app.core.database import get_async_db
+from app.core.models import Entidade, User, TipoEntidade, StatusEntidade, UserRole, Certidao
 from app.core.schemas import (
     EntidadeCreate,
     EntidadeUpdate,
     EntidadeResponse,
     EntidadeResponseComplete,
     EntidadeStatusUpdate,
+    CertidaoResponse,
     MessageResponse
 )
 from app.core.dependencies import (
@@ -24,12 +26,15 @@ from app.core.dependencies import (
     get_current_user,
     get_current_entidade,
     require_active_entidade,
+    rate_limit_usuario,
     CurrentUser
 )
 
 router = APIRouter(
     prefix="/entidades",
-    tags=["Entidades"]
+    tags=["Entidades"],
+    # ✅ Limite global por usuário (RATE_LIMIT_GLOBAL) em TODAS as rotas
+    dependencies=[Depends(rate_limit_usuario)]
 )
 
 
@@ -43,7 +48,7 @@ router = APIRouter(
 async def create_entidade(
     entidade_data: EntidadeCreate,
     root_user: CurrentUser = Depends(require_root_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """🔒 Criar Nova Entidade - Apenas ROOT"""
     from app.core.dependencies import logger
@@ -51,12 +56,12 @@ async def create_entidade(
     logger.info(f"🔐 ROOT '{root_user.username}' criando entidade: '{entidade_data.nome}'")
     
     if entidade_data.cnpj:
-        existing = db.query(Entidade).filter(Entidade.cnpj == entidade_data.cnpj).first()
+        existing = await db.scalar(select(Entidade.id).where(Entidade.cnpj == entidade_data.cnpj))
         if existing:
             raise HTTPException(400, f"CNPJ '{entidade_data.cnpj}' já cadastrado")
     
     if entidade_data.email:
-        existing = db.query(Entidade).filter(Entidade.email == entidade_data.email).first()
+        existing = await db.scalar(select(Entidade.id).where(Entidade.email == entidade_data.email))
         if existing:
             raise HTTPException(400, f"Email '{entidade_data.email}' já cadastrado")
     
@@ -67,8 +72,8 @@ async def create_entidade(
     )
     
     db.add(new_entidade)
-    db.commit()
-    db.refresh(new_entidade)
+    await db.commit()
+    await db.refresh(new_entidade)
     
     logger.info(f"✅ Entidade '{new_entidade.nome}' criada por ROOT '{root_user.username}'")
     return new_entidade
@@ -87,18 +92,19 @@ async def list_entidades(
     status_filter: Optional[StatusEntidade] = None,
     tipo_filter: Optional[TipoEntidade] = None,
     current_user: CurrentUser = Depends(require_gestor),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """📋 Listar Entidades - GESTOR ou ROOT"""
-    query = db.query(Entidade)
+    query = select(Entidade)
     
     if status_filter:
-        query = query.filter(Entidade.status == status_filter)
+        query = query.where(Entidade.status == status_filter)
     
     if tipo_filter:
-        query = query.filter(Entidade.tipo == tipo_filter)
+        query = query.where(Entidade.tipo == tipo_filter)
     
-    return query.offset(skip).limit(limit).all()
+    result = await db.execute(query.offset(skip).limit(limit))
+    return result.scalars().all()
 
 
 @router.get(
@@ -110,14 +116,16 @@ async def list_entidades(
 async def get_entidade_by_id(
     entidade_id: int,
     current_user: CurrentUser = Depends(require_gestor),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """🔍 Buscar Entidade por ID"""
-    entidade = db.query(Entidade).filter(Entidade.id == entidade_id).first()
+    entidade = await db.get(Entidade, entidade_id)
     
     if not entidade:
         raise HTTPException(404, f"Entidade {entidade_id} não encontrada")
     
+    usuario_ids = (await db.scalars(select(User.id).where(User.entidade_id == entidade.id))).all()
+    
     return JSONResponse(content={
         "id": entidade.id,
         "nome": entidade.nome,
@@ -133,10 +141,34 @@ async def get_entidade_by_id(
         "status": entidade.status.value if hasattr(entidade.status, 'value') else str(entidade.status),
         "is_active": entidade.is_active,
         "created_at": entidade.created_at.isoformat() if entidade.created_at else None,
-        "usuarios": [u.id for u in entidade.usuarios] if entidade.usuarios else []
+        "usuarios": list(usuario_ids)
     })
 
 
+@router.get(
+    "/{entidade_id}/certidoes",
+    response_model=List[CertidaoResponse],
+    summary="Certidões da Entidade",
+    description="📑 Lista certidões da entidade. ROOT acessa qualquer entidade; demais, apenas a própria.",
+    dependencies=[Depends(require_active_entidade())]
+)
+async def get_entidade_certidoes(
+    entidade_id: int,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """📑 Listar Certidões da Entidade (ordenadas pela validade)"""
+    if current_user.role != UserRole.ROOT and current_user.user.entidade_id != entidade_id:
+        raise HTTPException(403, "Acesso restrito às certidões da própria entidade")
+    
+    certidoes = await db.scalars(
+        select(Certidao)
+        .where(Certidao.entidade_id == entidade_id)
+        .order_by(Certidao.data_validade, Certidao.id)
+    )
+    return certidoes.all()
+
+
 @router.put(
     "/{entidade_id}",
     response_model=EntidadeResponse,
@@ -147,12 +179,12 @@ async def update_entidade(
     entidade_id: int,
     entidade_data: EntidadeUpdate,
     root_user: CurrentUser = Depends(require_root_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """🔒 Atualizar Entidade - Apenas ROOT"""
     from app.core.dependencies import logger
     
-    entidade = db.query(Entidade).filter(Entidade.id == entidade_id).first()
+    entidade = await db.get(Entidade, entidade_id)
     if not entidade:
         raise HTTPException(404, f"Entidade {entidade_id} não encontrada")
     
@@ -161,8 +193,8 @@ async def update_entidade(
     for field, value in entidade_data.model_dump(exclude_unset=True).items():
         setattr(entidade, field, value)
     
-    db.commit()
-    db.refresh(entidade)
+    await db.commit()
+    await db.refresh(entidade)
     
     return entidade
 
@@ -177,12 +209,12 @@ async def update_entidade_status(
     entidade_id: int,
     status_data: EntidadeStatusUpdate,
     root_user: CurrentUser = Depends(require_root_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """🔒 Alterar Status - Apenas ROOT"""
     from app.core.dependencies import logger
     
-    entidade = db.query(Entidade).filter(Entidade.id == entidade_id).first()
+    entidade = await db.get(Entidade, entidade_id)
     if not entidade:
         raise HTTPException(404, f"Entidade {entidade_id} não encontrada")
     
@@ -199,7 +231,7 @@ async def update_entidade_status(
     entidade.data_mudanca_status = datetime.utcnow()
     entidade.is_active = (status_data.status == StatusEntidade.ATIVA)
     
-    db.commit()
+    await db.commit()
     
     return MessageResponse(
         message=f"Status de '{entidade.nome}' alterado para {novo_status}",
@@ -217,7 +249,7 @@ async def patch_entidade_status(
     entidade_id: int,
     status_data: EntidadeStatusUpdate,
     root_user: CurrentUser = Depends(require_root_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """🔒 Alterar Status via PATCH - Apenas ROOT"""
     return await update_entidade_status(entidade_id, status_data, root_user, db)
@@ -232,25 +264,28 @@ async def patch_entidade_status(
 async def delete_entidade(
     entidade_id: int,
     root_user: CurrentUser = Depends(require_root_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """🔒 Deletar Entidade - Apenas ROOT"""
     from app.core.dependencies import logger
     
-    entidade = db.query(Entidade).filter(Entidade.id == entidade_id).first()
+    entidade = await db.get(Entidade, entidade_id)
     if not entidade:
         raise HTTPException(404, f"Entidade {entidade_id} não encontrada")
     
-    if entidade.usuarios:
+    total_usuarios = await db.scalar(
+        select(func.count(User.id)).where(User.entidade_id == entidade.id)
+    )
+    if total_usuarios:
         raise HTTPException(
             400,
             f"Não é possível deletar '{entidade.nome}'. "
-            f"Há {len(entidade.usuarios)} usuário(s) associado(s)."
+            f"Há {total_usuarios} usuário(s) associado(s)."
         )
     
     nome_entidade = entidade.nome
-    db.delete(entidade)
-    db.commit()
+    await db.delete(entidade)
+    await db.commit()
     
     logger.info(f"✅ Entidade '{nome_entidade}' deletada por ROOT '{root_user.username}'")
     
@@ -267,9 +302,11 @@ async def delete_entidade(
     dependencies=[Depends(require_active_entidade())]
 )
 async def get_my_entidade(
-    entidade: Entidade = Depends(get_current_entidade)
+    entidade: Entidade = Depends(get_current_entidade),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """🏢 Obter Minha Entidade"""
+    usuarios = (await db.scalars(select(User).where(User.entidade_id == entidade.id))).all()
     return JSONResponse(content={
         "id": entidade.id,
         "nome": entidade.nome,
@@ -285,7 +322,7 @@ async def get_my_entidade(
         "status": entidade.status.value if hasattr(entidade.status, 'value') else str(entidade.status),
         "is_active": entidade.is_active,
         "created_at": entidade.created_at.isoformat() if entidade.created_at else None,
-        "usuarios": [{"id": u.id, "username": u.username} for u in entidade.usuarios] if entidade.usuarios else []
+        "usuarios": [{"id": u.id, "username": u.username} for u in usuarios]
     })
 
 
@@ -297,9 +334,11 @@ async def get_my_entidade(
 )
 async def get_entidade_usuarios(
     entidade: Entidade = Depends(get_current_entidade),
-    current_user: CurrentUser = Depends(require_gestor)
+    current_user: CurrentUser = Depends(require_gestor),
+    db: AsyncSession = Depends(get_async_db)
 ):
     """👥 Listar Usuários da Minha Entidade"""
+    usuarios = (await db.scalars(select(User).where(User.entidade_id == entidade.id))).all()
     usuarios_data = [
         {
             "id": user.id,
@@ -308,7 +347,7 @@ async def get_entidade_usuarios(
             "role": user.role.value if hasattr(user.role, 'value') else str(user.role),
             "is_active": user.is_active
         }
-        for user in entidade.usuarios
+        for user in usuarios
     ]
     
     return JSONResponse(content=usuarios_data)
@@ -0,0 +1,217 @@
+"""
+Router de Fornecedores
+✅ Validação: get_current_user + require_active_entidade aplicada
+✅ Busca por prefixo de CNPJ e por nome via índices (trigram / FTS5)
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+
+from app.core.database import get_async_db
+from app.core.fornecedores import BuscaInvalida, buscar_fornecedores
+from app.core.models import Fornecedor, StatusFornecedor, TipoFornecedor
+from app.core.schemas import (
+    FornecedorCreate,
+    FornecedorUpdate,
+    FornecedorResponse,
+    FornecedorListResponse,
+    StatusFornecedorEnum,
+    TipoFornecedorEnum,
+    MessageResponse
+)
+from app.core.dependencies import (
+    get_current_user,
+    require_active_entidade,
+    require_gestor,
+    rate_limit_usuario,
+    CurrentUser
+)
+
+router = APIRouter(
+    prefix="/fornecedores",
+    tags=["Fornecedores"],
+    # ✅ Aplicar require_active_entidade e o limite global por usuário em TODAS as rotas
+    dependencies=[Depends(require_active_entidade()), Depends(rate_limit_usuario)]
+)
+
+PAGE_SIZE = 10
+MAX_PAGE_SIZE = 100
+
+
+async def _get_fornecedor(db: AsyncSession, fornecedor_id: int) -> Fornecedor:
+    fornecedor = await db.get(Fornecedor, fornecedor_id)
+    if fornecedor is None:
+        raise HTTPException(404, f"Fornecedor {fornecedor_id} não encontrado")
+    return fornecedor
+
+
+async def _cnpj_em_uso(db: AsyncSession, cnpj: str, exceto_id: Optional[int] = None) -> bool:
+    stmt = select(Fornecedor.id).where(Fornecedor.cnpj == cnpj)
+    if exceto_id is not None:
+        stmt = stmt.where(Fornecedor.id != exceto_id)
+    return await db.scalar(stmt.limit(1)) is not None
+
+
+def _enums(data: dict) -> dict:
+    if data.get("tipo") is not None:
+        data["tipo"] = TipoFornecedor(data["tipo"].value)
+    if data.get("status") is not None:
+        data["status"] = StatusFornecedor(data["status"].value)
+    if data.get("uf"):
+        data["uf"] = data["uf"].upper()
+    return data
+
+
+@router.get(
+    "",
+    response_model=FornecedorListResponse,
+    summary="Listar Fornecedores",
+    description="🏢 Lista fornecedores com busca por nome ou prefixo de CNPJ."
+)
+async def list_fornecedores(
+    search: Optional[str] = Query(None, max_length=100, description="Nome (mín. 3 caracteres) ou início do CNPJ/CPF"),
+    cnpj: Optional[str] = Query(None, max_length=18, description="Início do CNPJ/CPF (com ou sem máscara)"),
+    status_fornecedor: Optional[StatusFornecedorEnum] = Query(None, alias="status", description="Filtrar por status"),
+    tipo: Optional[TipoFornecedorEnum] = Query(None, description="Filtrar por tipo"),
+    uf: Optional[str] = Query(None, min_length=2, max_length=2, description="Filtrar por UF"),
+    page: int = Query(1, ge=1, le=100),
+    limit: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    🏢 **Listar Fornecedores**
+
+    **Busca (`search`):**
+    - Só dígitos/pontuação → prefixo de CNPJ/CPF, faixa no índice único de `cnpj`
+    - Texto → razão social ou nome fantasia contendo o termo
+      (GIN pg_trgm no PostgreSQL, FTS5 trigram no SQLite); mínimo 3 caracteres
+
+    **Retorno:** `{items, total, page, pages}`; `total` é limitado a 1000.
+    """
+    try:
+        fornecedores, total = await buscar_fornecedores(
+            db,
+            search=search,
+            cnpj=cnpj,
+            status=StatusFornecedor(status_fornecedor.value) if status_fornecedor else None,
+            tipo=TipoFornecedor(tipo.value) if tipo else None,
+            uf=uf,
+            page=page,
+            limit=limit,
+        )
+    except BuscaInvalida as e:
+        raise HTTPException(400, str(e))
+
+    return FornecedorListResponse(
+        items=fornecedores,
+        total=total,
+        page=page,
+        pages=(total + limit - 1) // limit
+    )
+
+
+@router.post(
+    "",
+    response_model=FornecedorResponse,
+    status_code=status.HTTP_201_CREATED,
+    summary="Cadastrar Fornecedor (GESTOR+)",
+    description="➕ Cadastra fornecedor."
+)
+async def create_fornecedor(
+    fornecedor_data: FornecedorCreate,
+    current_user: CurrentUser = Depends(require_gestor),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    ➕ **Cadastrar Fornecedor - GESTOR ou ROOT**
+
+    **Validações:**
+    - ✅ Perfil GESTOR ou ROOT
+    - ✅ Entidade ATIVA (obrigatório)
+    - ✅ CNPJ/CPF único no cadastro
+    """
+    if await _cnpj_em_uso(db, fornecedor_data.cnpj):
+        raise HTTPException(400, f"CNPJ '{fornecedor_data.cnpj}' já cadastrado")
+
+    fornecedor = Fornecedor(**_enums(fornecedor_data.model_dump()))
+    db.add(fornecedor)
+    await db.commit()
+    await db.refresh(fornecedor)
+
+    return fornecedor
+
+
+@router.get(
+    "/{fornecedor_id}",
+    response_model=FornecedorResponse,
+    summary="Buscar Fornecedor",
+    description="🔍 Busca fornecedor específico."
+)
+async def get_fornecedor(
+    fornecedor_id: int,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """🔍 **Buscar Fornecedor por ID**"""
+    return await _get_fornecedor(db, fornecedor_id)
+
+
+@router.put(
+    "/{fornecedor_id}",
+    response_model=FornecedorResponse,
+    summary="Atualizar Fornecedor (GESTOR+)",
+    description="✏️ Atualiza fornecedor."
+)
+async def update_fornecedor(
+    fornecedor_id: int,
+    fornecedor_data: FornecedorUpdate,
+    current_user: CurrentUser = Depends(require_gestor),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    ✏️ **Atualizar Fornecedor - GESTOR ou ROOT**
+
+    **Validações:**
+    - ✅ Perfil GESTOR ou ROOT
+    - ✅ Entidade ATIVA
+    - ✅ CNPJ/CPF continua único no cadastro
+    """
+    fornecedor = await _get_fornecedor(db, fornecedor_id)
+
+    update_data = _enums(fornecedor_data.model_dump(exclude_unset=True))
+    if update_data.get("cnpj") and await _cnpj_em_uso(db, update_data["cnpj"], fornecedor.id):
+        raise HTTPException(400, f"CNPJ '{update_data['cnpj']}' já cadastrado")
+
+    for field, value in update_data.items():
+        if value is not None or field in ("nome_fantasia", "municipio", "uf", "telefone", "email"):
+            setattr(fornecedor, field, value)
+
+    await db.commit()
+    await db.refresh(fornecedor)
+
+    return fornecedor
+
+
+@router.delete(
+    "/{fornecedor_id}",
+    response_model=MessageResponse,
+    summary="Deletar Fornecedor (GESTOR+)",
+    description="🗑️ Deleta fornecedor."
+)
+async def delete_fornecedor(
+    fornecedor_id: int,
+    current_user: CurrentUser = Depends(require_gestor),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """🗑️ **Deletar Fornecedor - GESTOR ou ROOT**"""
+    fornecedor = await _get_fornecedor(db, fornecedor_id)
+    razao_social = fornecedor.razao_social
+    await db.delete(fornecedor)
+    await db.commit()
+
+    return MessageResponse(
+        message=f"Fornecedor '{razao_social}' deletado com sucesso",
+        detail=f"Operação executada por: {current_user.username}"
+    )
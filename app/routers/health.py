@@ -1,144 +1,233 @@
 """
 Router de Health Check para o projeto Sentinela
 Testa conexões com Neon Database e Redis
+
+/health, /health/ready e /health/live servem o snapshot do prober em
+segundo plano (app.core.health); `?fresh=1` força uma verificação nova.
+/health/prober, /health/pool, /health/redis e /health/pncp são internos e
+exigem o bearer DIAGNOSTICS_TOKEN.
 Repositório: adrisa007/sentinela (ID: 1112237272)
 """
-from fastapi import APIRouter, status, Response
-from typing import Dict
+from fastapi import APIRouter, Depends, Request, status, Response
+from typing import Dict, Optional
 from datetime import datetime
 import sys
 import platform
 
+from app.core.dependencies import require_diagnostics_token
+from app.core.health import health_prober
+
 router = APIRouter(
     prefix="/health",
     tags=["health"]
 )
 
+def _fresh_or_limit(request: Request, fresh: bool) -> Optional[Response]:
+    """`?fresh=1` ignora o snapshot em cache e é limitado por cliente (HEALTH_FRESH_RATE_LIMIT)"""
+    if not fresh:
+        return None
+    from app.core.config import settings
+    from app.core.rate_limit import hit_extra_limit
+    
+    return hit_extra_limit(request, settings.HEALTH_FRESH_RATE_LIMIT, "health-fresh")
+
 @router.get("", response_model=Dict)
-async def health_check(response: Response) -> Dict:
+async def health_check(request: Request, response: Response, fresh: bool = False) -> Dict:
     """
     Endpoint principal de health check
     
-    Testa:
+    Serve o snapshot do prober em segundo plano (app.core.health):
     - Conexão com Neon Database (PostgreSQL)
+    - Redis e broker do Celery (informativos, não alteram o status)
     - Status geral da aplicação
     
     Returns:
-        Dict: Status da aplicação e conexão com banco
+        Dict: Status da aplicação, conexão com banco e idade do snapshot
     """
+    limited = _fresh_or_limit(request, fresh)
+    if limited is not None:
+        return limited
+    
+    snapshot = await health_prober.obter(fresh=fresh)
+    database = snapshot.checks["database"]
+    
     health_data = {
         "status": "ok",
         "service": "sentinela",
         "timestamp": datetime.utcnow().isoformat(),
         "version": "1.0.0",
         "python_version": f"{sys.version_info.major}.{sys.version_info.minor}.{sys.version_info.micro}",
-        "platform": platform.system()
+        "platform": platform.system(),
+        "database": database.status,
+        **snapshot.to_dict()
     }
     
-    # Testar conexão com Neon Database
-    try:
-        from app.database import check_database_connection
-        
-        db_connected = check_database_connection()
-        
-        if db_connected:
-            health_data["database"] = "connected"
-            health_data["database_type"] = "neon_postgres"
-        else:
-            health_data["database"] = "disconnected"
-            health_data["status"] = "degraded"
-            response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
-    except Exception as e:
-        health_data["database"] = "error"
-        health_data["database_error"] = str(e)
+    if database.ok:
+        health_data["database_type"] = "neon_postgres"
+    else:
         health_data["status"] = "degraded"
+        if database.status == "error":
+            health_data["database_error"] = database.erro
         response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
     
     return health_data
 
 @router.get("/ready")
-async def readiness_check(response: Response) -> Dict:
+async def readiness_check(request: Request, response: Response, fresh: bool = False) -> Dict:
     """
     Endpoint de readiness check - Verifica Neon Database
     
-    Executa SELECT 1 no Neon para verificar conectividade.
+    Usa o último SELECT 1 do prober (ou verifica na hora, sem snapshot recente).
     Retorna 200 se conectado, 503 caso contrário.
     
     Returns:
         Dict: Status de prontidão com detalhes do banco
     """
-    try:
-        from app.database import check_database_connection
-        
-        db_healthy = check_database_connection()
-        
-        if db_healthy:
-            return {
-                "status": "ready",
-                "database": "connected",
-                "database_type": "neon_postgres",
-                "timestamp": datetime.utcnow().isoformat()
-            }
-        else:
-            response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
-            return {
-                "status": "not ready",
-                "database": "disconnected",
-                "timestamp": datetime.utcnow().isoformat()
-            }
-    except Exception as e:
+    limited = _fresh_or_limit(request, fresh)
+    if limited is not None:
+        return limited
+    
+    snapshot = await health_prober.obter(fresh=fresh)
+    database = snapshot.checks["database"]
+    data = {
+        "status": "ready" if database.ok else "not ready",
+        "database": database.status,
+        "checked_at": snapshot.verificado_em.isoformat(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+    
+    if database.ok:
+        data["database_type"] = "neon_postgres"
+    else:
         response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
-        return {
-            "status": "not ready",
-            "database": "error",
-            "error": str(e),
-            "timestamp": datetime.utcnow().isoformat()
-        }
+        if database.status == "error":
+            data["error"] = database.erro
+    return data
 
 @router.get("/live")
-async def liveness_check(response: Response) -> Dict:
+async def liveness_check(request: Request, response: Response, fresh: bool = False) -> Dict:
     """
     Endpoint de liveness check - Verifica Redis
     
-    Executa PING no Redis para verificar conectividade.
+    Usa o último PING/INFO do prober (ou verifica na hora, sem snapshot recente).
     Retorna 200 se conectado, 503 caso contrário.
     
     Returns:
         Dict: Status de vida com detalhes do Redis
     """
-    try:
-        from app.redis_client import check_redis_connection, get_redis_info
-        
-        redis_healthy = check_redis_connection()
-        redis_info = get_redis_info()
-        
-        if redis_healthy:
-            return {
-                "status": "alive",
-                "redis": "connected",
-                "redis_info": {
-                    "version": redis_info.get("version", "unknown"),
-                    "uptime_seconds": redis_info.get("uptime_seconds", 0),
-                    "connected_clients": redis_info.get("connected_clients", 0)
-                },
-                "timestamp": datetime.utcnow().isoformat()
-            }
-        else:
-            response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
-            return {
-                "status": "not alive",
-                "redis": "disconnected",
-                "error": redis_info.get("error", "Unknown error"),
-                "timestamp": datetime.utcnow().isoformat()
-            }
-    except Exception as e:
-        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    limited = _fresh_or_limit(request, fresh)
+    if limited is not None:
+        return limited
+    
+    snapshot = await health_prober.obter(fresh=fresh)
+    redis = snapshot.checks["redis"]
+    
+    if redis.ok:
         return {
-            "status": "not alive",
-            "redis": "error",
-            "error": str(e),
+            "status": "alive",
+            "redis": "connected",
+            "redis_info": redis.detalhes.get("info", {}),
+            "checked_at": snapshot.verificado_em.isoformat(),
             "timestamp": datetime.utcnow().isoformat()
         }
+    
+    response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return {
+        "status": "not alive",
+        "redis": redis.status,
+        "error": redis.erro or "Unknown error",
+        "checked_at": snapshot.verificado_em.isoformat(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+@router.get("/prober", dependencies=[Depends(require_diagnostics_token)])
+async def health_prober_stats() -> Dict:
+    """
+    Endpoint interno com o estado do prober de health checks deste worker
+    
+    Expõe rodadas, verificações sob demanda/coalescidas, timeouts e o
+    último snapshot completo (incluindo o broker do Celery).
+    
+    Returns:
+        Dict: Métricas do prober e último snapshot
+    """
+    import os
+    
+    return {
+        "worker_pid": os.getpid(),
+        "prober": health_prober.stats(),
+        "snapshot": health_prober.snapshot.to_dict() if health_prober.snapshot else None,
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+@router.get("/pool", dependencies=[Depends(require_diagnostics_token)])
+async def database_pool_stats() -> Dict:
+    """
+    Endpoint interno com estatísticas do pool de conexões deste worker
+    
+    Expõe conexões em uso, overflow, tempo de espera e histograma de
+    latência de checkout para dimensionar DB_POOL_SIZE/DB_MAX_OVERFLOW.
+    
+    Returns:
+        Dict: Configuração e métricas dos pools sync e async
+    """
+    from app.core.config import settings
+    from app.core.database import get_db_pool_stats
+    import os
+    
+    return {
+        "worker_pid": os.getpid(),
+        "config": {
+            "pool_size": settings.DB_POOL_SIZE,
+            "max_overflow": settings.DB_MAX_OVERFLOW,
+            "pool_recycle": settings.DB_POOL_RECYCLE,
+            "pool_timeout": settings.DB_POOL_TIMEOUT,
+            "pool_pre_ping": settings.DB_POOL_PRE_PING
+        },
+        "pools": get_db_pool_stats(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+@router.get("/redis", dependencies=[Depends(require_diagnostics_token)])
+async def redis_pool_stats() -> Dict:
+    """
+    Endpoint interno com o uso do pool Redis assíncrono deste worker
+    
+    Expõe conexões em uso/ociosas, limite do pool, esperas por conexão
+    e timeouts para dimensionar REDIS_MAX_CONNECTIONS.
+    
+    Returns:
+        Dict: Configuração e métricas do pool
+    """
+    from app.redis_client import redis_pool
+    import os
+    
+    return {
+        "worker_pid": os.getpid(),
+        "pool": redis_pool.stats(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
+
+@router.get("/pncp", dependencies=[Depends(require_diagnostics_token)])
+async def pncp_client_stats() -> Dict:
+    """
+    Endpoint interno com o estado do cliente e do cache PNCP deste worker
+    
+    Expõe estado do circuit breaker, hits/misses por camada, revalidações
+    em segundo plano e latência das chamadas ao PNCP.
+    
+    Returns:
+        Dict: Métricas do cliente e do cache PNCP
+    """
+    from app.core.pncp_cache import pncp_cache
+    import os
+    
+    return {
+        "worker_pid": os.getpid(),
+        "client": pncp_cache.client.stats(),
+        "cache": pncp_cache.stats(),
+        "timestamp": datetime.utcnow().isoformat()
+    }
 
 @router.get("/neon")
 async def neon_database_check(response: Response) -> Dict:
@@ -151,11 +240,12 @@ async def neon_database_check(response: Response) -> Dict:
         Dict: Status detalhado da conexão com Neon
     """
     try:
-        from app.database import check_database_connection, engine
+        from app.database import check_async_database_connection
+        from app.core.database import async_engine
         from sqlalchemy import text
         
-        # Testar conexão
-        db_connected = check_database_connection()
+        # Testar conexão (pool assíncrono do worker, sem bloquear o event loop)
+        db_connected = await check_async_database_connection()
         
         if not db_connected:
             response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
@@ -166,17 +256,17 @@ async def neon_database_check(response: Response) -> Dict:
             }
         
         # Obter informações do banco
-        with engine.connect() as conn:
+        async with async_engine.connect() as conn:
             # Versão do PostgreSQL
-            result = conn.execute(text("SELECT version()"))
+            result = await conn.execute(text("SELECT version()"))
             version = result.scalar()
             
             # Nome do banco
-            result = conn.execute(text("SELECT current_database()"))
+            result = await conn.execute(text("SELECT current_database()"))
             db_name = result.scalar()
             
             # Usuário
-            result = conn.execute(text("SELECT current_user"))
+            result = await conn.execute(text("SELECT current_user"))
             db_user = result.scalar()
         
         return {
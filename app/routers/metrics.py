@@ -0,0 +1,21 @@
+"""
+Router de métricas Prometheus do projeto Sentinela
+Repositório: adrisa007/sentinela (ID: 1112237272)
+"""
+from fastapi import APIRouter, Depends, Response
+
+from app.core.dependencies import require_diagnostics_token
+from app.core.metrics import CONTENT_TYPE_LATEST, gerar_metricas
+
+router = APIRouter(tags=["Sistema"])
+
+
+@router.get("/metrics", include_in_schema=False, dependencies=[Depends(require_diagnostics_token)])
+async def metrics() -> Response:
+    """
+    Métricas no formato texto do Prometheus
+    
+    Com PROMETHEUS_MULTIPROC_DIR, agrega os valores de todos os workers.
+    Exige o bearer DIAGNOSTICS_TOKEN.
+    """
+    return Response(content=gerar_metricas(), media_type=CONTENT_TYPE_LATEST)
@@ -3,33 +3,33 @@ PNCP Router - Integração com Portal Nacional de Contratações Públicas
 adrisa007/sentinela (ID: 1112237272)
 """
 from fastapi import APIRouter, HTTPException, Depends
-from sqlalchemy.orm import Session
-import httpx
+from fastapi.responses import StreamingResponse
 from datetime import datetime
-from typing import Optional, List, Dict, Any
-from pydantic import BaseModel
+from typing import AsyncIterator, Optional, List, Dict, Any
+from pydantic import BaseModel, Field
+from sqlalchemy.ext.asyncio import AsyncSession
+import asyncio
+import json
 
-from app.core.database import get_db
-from app.core.dependencies import get_current_user, CurrentUser
+from app.core.config import settings
+from app.core.database import get_async_db
+from app.core.dependencies import get_current_user, CurrentUser, rate_limit_usuario
+from app.core.pncp_mirror import get_fornecedor_local, get_fornecedores_locais
+from app.core.schemas import ContratosPNCP
+from app.core.pncp_cache import pncp_cache
+from app.core.pncp_client import (
+    PNCPError,
+    PNCPNotFoundError,
+    PNCPUnavailableError,
+)
 
 router = APIRouter(
     prefix="/pncp",
-    tags=["PNCP"]
+    tags=["PNCP"],
+    # Limite global por usuário: o lote dispara até PNCP_BATCH_MAX_CNPJS consultas ao PNCP
+    dependencies=[Depends(rate_limit_usuario)]
 )
 
-# URL base da API do PNCP
-PNCP_API_URL = "https://pncp.gov.br/api"
-
-
-class ContratosPNCP(BaseModel):
-    """Modelo de contrato do PNCP"""
-    numero: str
-    objeto: str
-    valor: float
-    data_assinatura: str
-    vigencia: str
-
-
 class FornecedorPNCPResponse(BaseModel):
     """Resposta com dados do fornecedor no PNCP"""
     success: bool
@@ -55,136 +55,112 @@ class FornecedorPNCPResponse(BaseModel):
     ultima_atualizacao: str
 
 
+def _limpar_cnpj(cnpj: str) -> str:
+    """Remove formatação do CNPJ e valida os 14 dígitos"""
+    cnpj_limpo = ''.join(filter(str.isdigit, cnpj))
+    
+    if len(cnpj_limpo) != 14:
+        raise HTTPException(
+            status_code=400,
+            detail="CNPJ inválido. Deve conter 14 dígitos."
+        )
+    return cnpj_limpo
+
+
+def _pncp_http_error(e: PNCPError) -> HTTPException:
+    """Converte erros do cliente PNCP em respostas HTTP"""
+    if isinstance(e, PNCPNotFoundError):
+        return HTTPException(status_code=404, detail="Fornecedor não encontrado no PNCP")
+    if isinstance(e, PNCPUnavailableError):
+        headers = {"Retry-After": str(max(1, int(e.retry_after)))} if e.retry_after else None
+        return HTTPException(status_code=503, detail=str(e), headers=headers)
+    return HTTPException(status_code=502, detail=f"Erro ao consultar PNCP: {e}")
+
+
+def _contrato_from_pncp(contrato: Dict[str, Any]) -> ContratosPNCP:
+    return ContratosPNCP(
+        numero=contrato['numero'],
+        objeto=contrato.get('objeto') or "",
+        valor=contrato['valor'],
+        data_assinatura=contrato.get('dataAssinatura') or "",
+        vigencia=contrato.get('vigencia') or ""
+    )
+
+
+def _montar_fornecedor(cnpj: str, dados: Dict[str, Any]) -> FornecedorPNCPResponse:
+    """
+    Converte cadastro + contratos do PNCP (camelCase) no modelo de resposta
+
+    Raises:
+        KeyError, TypeError, ValueError: Resposta do PNCP fora do formato esperado
+    """
+    cadastro = dados["cadastro"]
+    contratos = [_contrato_from_pncp(c) for c in dados["contratos"]]
+
+    return FornecedorPNCPResponse(
+        success=True,
+        cnpj=cnpj,
+        razao_social=cadastro["razaoSocial"],
+        nome_fantasia=cadastro.get("nomeFantasia"),
+        situacao_cadastral=cadastro.get("situacaoCadastral") or "",
+        data_abertura=cadastro.get("dataAbertura") or "",
+        porte=cadastro.get("porte") or "",
+        natureza_juridica=cadastro.get("naturezaJuridica") or "",
+        logradouro=cadastro.get("logradouro") or "",
+        numero=cadastro.get("numero") or "",
+        complemento=cadastro.get("complemento"),
+        bairro=cadastro.get("bairro") or "",
+        municipio=cadastro.get("municipio") or "",
+        uf=cadastro.get("uf") or "",
+        cep=cadastro.get("cep") or "",
+        telefone=cadastro.get("telefone"),
+        email=cadastro.get("email"),
+        contratos_pncp=contratos,
+        total_contratos=len(contratos),
+        valor_total=sum(c.valor for c in contratos),
+        ultima_atualizacao=datetime.now().isoformat()
+    )
+
+
 @router.get("/fornecedor/{cnpj}", response_model=FornecedorPNCPResponse)
 async def consultar_fornecedor_pncp(
     cnpj: str,
     current_user: CurrentUser = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Consulta dados de um fornecedor no Portal Nacional de Contratações Públicas (PNCP)
     
+    CNPJs presentes no espelho local (app.core.pncp_mirror) são lidos do
+    banco. Os demais são consultados no PNCP — cadastro e contratos em
+    paralelo — via cache em camadas (app.core.pncp_cache).
+    
     Args:
         cnpj: CNPJ do fornecedor (apenas números)
         current_user: Usuário autenticado
-        db: Sessão do banco de dados
+        db: Sessão assíncrona do banco
         
     Returns:
         Dados do fornecedor incluindo contratos no PNCP
         
     Raises:
-        HTTPException: Se houver erro na consulta
+        HTTPException: 400 CNPJ inválido, 404 não encontrado, 503 PNCP indisponível
     """
+    cnpj_limpo = _limpar_cnpj(cnpj)
+    
+    dados = await get_fornecedor_local(db, cnpj_limpo) if settings.PNCP_MIRROR_ENABLED else None
+    if dados is None:
+        try:
+            dados = await pncp_cache.get_fornecedor(cnpj_limpo)
+        except PNCPError as e:
+            raise _pncp_http_error(e)
+    
     try:
-        # Limpar CNPJ (remover formatação)
-        cnpj_limpo = ''.join(filter(str.isdigit, cnpj))
-        
-        if len(cnpj_limpo) != 14:
-            raise HTTPException(
-                status_code=400,
-                detail="CNPJ inválido. Deve conter 14 dígitos."
-            )
-        
-        # TODO: Implementar consulta real à API do PNCP
-        # Por enquanto, retornar dados simulados para desenvolvimento
-        
-        """
-        # Exemplo de consulta real (quando a API do PNCP estiver disponível):
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            # Consultar dados cadastrais
-            response_cadastro = await client.get(
-                f"{PNCP_API_URL}/fornecedor/{cnpj_limpo}",
-                headers={"Accept": "application/json"}
-            )
-            
-            if response_cadastro.status_code == 404:
-                raise HTTPException(
-                    status_code=404,
-                    detail="Fornecedor não encontrado no PNCP"
-                )
-            
-            response_cadastro.raise_for_status()
-            dados_cadastro = response_cadastro.json()
-            
-            # Consultar contratos
-            response_contratos = await client.get(
-                f"{PNCP_API_URL}/contratos/fornecedor/{cnpj_limpo}",
-                headers={"Accept": "application/json"}
-            )
-            
-            contratos = []
-            valor_total = 0.0
-            
-            if response_contratos.status_code == 200:
-                dados_contratos = response_contratos.json()
-                for contrato in dados_contratos.get('contratos', []):
-                    contratos.append(ContratosPNCP(
-                        numero=contrato['numero'],
-                        objeto=contrato['objeto'],
-                        valor=contrato['valor'],
-                        data_assinatura=contrato['dataAssinatura'],
-                        vigencia=contrato['vigencia']
-                    ))
-                    valor_total += contrato['valor']
-        """
-        
-        # Dados simulados para desenvolvimento
-        contratos_mock = [
-            ContratosPNCP(
-                numero="001/2024",
-                objeto="Fornecimento de materiais de escritório",
-                valor=50000.00,
-                data_assinatura="2024-01-15",
-                vigencia="2024-12-31"
-            ),
-            ContratosPNCP(
-                numero="045/2023",
-                objeto="Prestação de serviços de manutenção",
-                valor=120000.00,
-                data_assinatura="2023-06-20",
-                vigencia="2024-06-20"
-            ),
-            ContratosPNCP(
-                numero="078/2024",
-                objeto="Locação de equipamentos",
-                valor=85000.00,
-                data_assinatura="2024-03-10",
-                vigencia="2025-03-10"
-            )
-        ]
-        
-        valor_total = sum(c.valor for c in contratos_mock)
-        
-        return FornecedorPNCPResponse(
-            success=True,
-            cnpj=cnpj_limpo,
-            razao_social="EMPRESA EXEMPLO LTDA",
-            nome_fantasia="Empresa Exemplo",
-            situacao_cadastral="ATIVA",
-            data_abertura="2015-03-15",
-            porte="MEDIO",
-            natureza_juridica="Sociedade Empresária Limitada",
-            logradouro="Av. Paulista",
-            numero="1000",
-            complemento="Sala 500",
-            bairro="Bela Vista",
-            municipio="São Paulo",
-            uf="SP",
-            cep="01310-100",
-            telefone="(11) 3000-0000",
-            email="contato@empresa.com.br",
-            contratos_pncp=contratos_mock,
-            total_contratos=len(contratos_mock),
-            valor_total=valor_total,
-            ultima_atualizacao=datetime.now().isoformat()
-        )
-        
-    except HTTPException:
-        raise
-    except Exception as e:
+        return _montar_fornecedor(cnpj_limpo, dados)
+    except (KeyError, TypeError, ValueError) as e:
         raise HTTPException(
-            status_code=500,
-            detail=f"Erro ao consultar PNCP: {str(e)}"
+            status_code=502,
+            detail=f"Resposta inesperada do PNCP: {str(e)}"
         )
 
 
@@ -192,7 +168,7 @@ async def consultar_fornecedor_pncp(
 async def listar_contratos_fornecedor(
     cnpj: str,
     current_user: CurrentUser = Depends(get_current_user),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     ano: Optional[int] = None,
     status: Optional[str] = None
 ):
@@ -204,64 +180,153 @@ async def listar_contratos_fornecedor(
         ano: Filtrar por ano (opcional)
         status: Filtrar por status (opcional)
         current_user: Usuário autenticado
-        db: Sessão do banco de dados
+        db: Sessão assíncrona do banco (espelho local)
         
     Returns:
         Lista de contratos do fornecedor
     """
+    cnpj_limpo = _limpar_cnpj(cnpj)
+    
+    local = await get_fornecedor_local(db, cnpj_limpo) if settings.PNCP_MIRROR_ENABLED else None
+    if local is not None:
+        contratos_pncp = local["contratos"]
+    else:
+        try:
+            contratos_pncp = await pncp_cache.get_contratos(cnpj_limpo)
+        except PNCPError as e:
+            raise _pncp_http_error(e)
+    
+    contratos = [
+        {
+            "numero": c.get("numero", ""),
+            "objeto": c.get("objeto"),
+            "valor": c.get("valor"),
+            "data_assinatura": c.get("dataAssinatura"),
+            "vigencia": c.get("vigencia"),
+            "status": c.get("status"),
+            "orgao": c.get("orgao")
+        }
+        for c in contratos_pncp
+    ]
+    
+    # Aplicar filtros
+    if ano:
+        contratos = [c for c in contratos if str(ano) in c['numero']]
+    
+    if status:
+        contratos = [c for c in contratos if (c['status'] or '').upper() == status.upper()]
+    
+    return {
+        "success": True,
+        "cnpj": cnpj_limpo,
+        "total": len(contratos),
+        "contratos": contratos
+    }
+
+
+class FornecedoresBatchRequest(BaseModel):
+    """Lista de CNPJs para consulta em lote"""
+    cnpjs: List[str] = Field(
+        ..., min_length=1, max_length=settings.PNCP_BATCH_MAX_CNPJS,
+        description="CNPJs (formatados ou não), até PNCP_BATCH_MAX_CNPJS"
+    )
+
+
+def _ndjson(item: Dict[str, Any]) -> bytes:
+    return (json.dumps(item, ensure_ascii=False, default=str) + "\n").encode("utf-8")
+
+
+def _linha_fornecedor(cnpj: str, dados: Dict[str, Any]) -> Dict[str, Any]:
     try:
-        cnpj_limpo = ''.join(filter(str.isdigit, cnpj))
+        return {"cnpj": cnpj, "status": 200, "fornecedor": _montar_fornecedor(cnpj, dados).model_dump()}
+    except (KeyError, TypeError, ValueError) as e:
+        return {"cnpj": cnpj, "status": 502, "erro": f"Resposta inesperada do PNCP: {e}"}
+
+
+async def _consultar_um(cnpj: str, semaforo: asyncio.Semaphore) -> Dict[str, Any]:
+    """Consulta um CNPJ do lote e devolve a linha NDJSON (sucesso ou erro)"""
+    async with semaforo:
+        try:
+            dados = await pncp_cache.get_fornecedor(cnpj)
+        except PNCPError as e:
+            erro = _pncp_http_error(e)
+            return {"cnpj": cnpj, "status": erro.status_code, "erro": erro.detail}
+    return _linha_fornecedor(cnpj, dados)
+
+
+async def _stream_lote(
+    cnpjs: List[str],
+    invalidos: List[str],
+    locais: Dict[str, Dict[str, Any]]
+) -> AsyncIterator[bytes]:
+    """
+    Emite uma linha por CNPJ assim que cada consulta termina
+
+    Inválidos e fornecedores do espelho local saem primeiro; a latência
+    total é limitada pelo fornecedor remoto mais lento, não pela soma.
+    Se o cliente desconectar, as consultas pendentes são canceladas.
+    """
+    for cnpj in invalidos:
+        yield _ndjson({"cnpj": cnpj, "status": 400, "erro": "CNPJ inválido. Deve conter 14 dígitos."})
+    for cnpj, dados in locais.items():
+        yield _ndjson(_linha_fornecedor(cnpj, dados))
+    cnpjs = [cnpj for cnpj in cnpjs if cnpj not in locais]
+
+    semaforo = asyncio.Semaphore(settings.PNCP_BATCH_CONCURRENCY)
+    tarefas = [asyncio.ensure_future(_consultar_um(cnpj, semaforo)) for cnpj in cnpjs]
+    try:
+        for proxima in asyncio.as_completed(tarefas):
+            yield _ndjson(await proxima)
+    finally:
+        for tarefa in tarefas:
+            tarefa.cancel()
+
+
+@router.post("/fornecedores/batch")
+async def consultar_fornecedores_lote(
+    payload: FornecedoresBatchRequest,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Consulta vários fornecedores no PNCP em uma única requisição
+    
+    CNPJs são normalizados e deduplicados; os presentes no espelho local
+    são lidos em uma única consulta ao banco e os demais rodam em paralelo
+    (até PNCP_BATCH_CONCURRENCY por lote, sujeitas ao limite de taxa do
+    cliente PNCP) e cada resultado é enviado como uma linha NDJSON assim
+    que fica pronto, em ordem de conclusão.
+    
+    Linhas:
+        {"cnpj": "...", "status": 200, "fornecedor": {...}}
+        {"cnpj": "...", "status": 404|400|502|503, "erro": "..."}
+    
+    Args:
+        payload: Lista de CNPJs (máximo PNCP_BATCH_MAX_CNPJS)
+        current_user: Usuário autenticado
+        db: Sessão assíncrona do banco (espelho local)
         
+    Lotes acima de PNCP_BATCH_MAX_CNPJS são rejeitados com 422 na
+    validação do corpo, antes de qualquer processamento.
+    """
+    cnpjs: List[str] = []
+    invalidos: List[str] = []
+    vistos = set()
+    for cnpj in payload.cnpjs:
+        cnpj_limpo = ''.join(filter(str.isdigit, cnpj))
         if len(cnpj_limpo) != 14:
-            raise HTTPException(
-                status_code=400,
-                detail="CNPJ inválido"
-            )
-        
-        # TODO: Implementar consulta real
-        # Dados simulados
-        contratos = [
-            {
-                "numero": "001/2024",
-                "objeto": "Fornecimento de materiais de escritório",
-                "valor": 50000.00,
-                "data_assinatura": "2024-01-15",
-                "vigencia": "2024-12-31",
-                "status": "VIGENTE",
-                "orgao": "Prefeitura Municipal"
-            },
-            {
-                "numero": "045/2023",
-                "objeto": "Prestação de serviços de manutenção",
-                "valor": 120000.00,
-                "data_assinatura": "2023-06-20",
-                "vigencia": "2024-06-20",
-                "status": "ENCERRADO",
-                "orgao": "Secretaria de Obras"
-            }
-        ]
-        
-        # Aplicar filtros
-        if ano:
-            contratos = [c for c in contratos if str(ano) in c['numero']]
-        
-        if status:
-            contratos = [c for c in contratos if c['status'] == status.upper()]
-        
-        return {
-            "success": True,
-            "cnpj": cnpj_limpo,
-            "total": len(contratos),
-            "contratos": contratos
-        }
-        
-    except HTTPException:
-        raise
-    except Exception as e:
-        raise HTTPException(
-            status_code=500,
-            detail=f"Erro ao listar contratos: {str(e)}"
-        )
+            invalidos.append(cnpj)
+        elif cnpj_limpo not in vistos:
+            vistos.add(cnpj_limpo)
+            cnpjs.append(cnpj_limpo)
+    
+    locais = await get_fornecedores_locais(db, cnpjs) if settings.PNCP_MIRROR_ENABLED else {}
+    
+    return StreamingResponse(
+        _stream_lote(cnpjs, invalidos, locais),
+        media_type="application/x-ndjson",
+        headers={"Cache-Control": "no-store", "X-Total-CNPJs": str(len(cnpjs) + len(invalidos))}
+    )
 
 
 @router.get("/test/{cnpj}")
@@ -0,0 +1,111 @@
+"""
+Router de Riscos
+✅ Validação: get_current_user + require_active_entidade aplicada
+✅ Ranking pré-calculado pelo motor de riscos (leitura por faixa de posição)
+"""
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Optional
+
+from app.core.database import get_async_db
+from app.core.models import AlvoRisco, SeveridadeRisco
+from app.core.pagination import InvalidCursor, decode_cursor, encode_cursor, split_page
+from app.core.principal_cache import EntidadeSnapshot
+from app.core.riscos import listar_riscos
+from app.core.schemas import AlvoRiscoEnum, RiscoListResponse, SeveridadeRiscoEnum
+from app.core.dependencies import (
+    get_current_user,
+    get_current_entidade,
+    require_active_entidade,
+    require_gestor,
+    rate_limit_usuario,
+    CurrentUser
+)
+
+router = APIRouter(
+    prefix="/riscos",
+    tags=["Riscos"],
+    # ✅ Aplicar require_active_entidade e o limite global por usuário em TODAS as rotas
+    dependencies=[Depends(require_active_entidade()), Depends(rate_limit_usuario)]
+)
+
+PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+@router.get(
+    "",
+    response_model=RiscoListResponse,
+    summary="Listar Riscos",
+    description="⚠️ Riscos da entidade ordenados por score (pré-calculados em lote)."
+)
+async def list_riscos(
+    severidade: Optional[List[SeveridadeRiscoEnum]] = Query(None, description="Filtrar por severidade (repetível)"),
+    alvo: Optional[AlvoRiscoEnum] = Query(None, description="CONTRATO ou FORNECEDOR"),
+    limit: int = Query(PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = Query(None, description="next_cursor da página anterior"),
+    current_user: CurrentUser = Depends(get_current_user),
+    entidade: EntidadeSnapshot = Depends(get_current_entidade),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    ⚠️ **Riscos Críticos da Entidade**
+
+    Lidos de `riscos`, gravados já ranqueados pela avaliação em lote:
+    a página é uma busca por faixa em (entidade_id, posicao), sem
+    calcular scores na requisição.
+    """
+    apos = None
+    if cursor:
+        try:
+            apos = int(decode_cursor(cursor, "posicao")[0])
+        except (InvalidCursor, IndexError, TypeError, ValueError):
+            raise HTTPException(400, "Cursor inválido")
+
+    rows = await listar_riscos(
+        db,
+        entidade.id,
+        severidades=[SeveridadeRisco(s.value) for s in severidade] if severidade else None,
+        alvo=AlvoRisco(alvo.value) if alvo else None,
+        apos=apos,
+        limit=limit,
+    )
+    riscos, has_more = split_page(rows, limit)
+
+    return RiscoListResponse(
+        entidade=entidade.nome,
+        riscos=riscos,
+        limit=limit,
+        next_cursor=encode_cursor("posicao", [riscos[-1].posicao]) if has_more else None
+    )
+
+
+@router.post(
+    "/avaliar",
+    status_code=status.HTTP_202_ACCEPTED,
+    summary="Reavaliar Riscos (GESTOR+)",
+    description="🔄 Enfileira agora a avaliação de riscos da entidade (fora do ciclo em lote)."
+)
+async def avaliar_riscos(
+    current_user: CurrentUser = Depends(require_gestor),
+    entidade: EntidadeSnapshot = Depends(get_current_entidade)
+):
+    """
+    🔄 **Reavaliar Riscos - GESTOR ou ROOT**
+
+    Enfileira o motor de riscos só para a entidade do usuário (útil após
+    cadastrar contratos ou certidões, sem esperar a avaliação noturna).
+    A avaliação roda no worker Celery, travada por entidade; acompanhe o
+    resultado em GET /riscos.
+
+    **Retorno (202):** id da task enfileirada
+    """
+    from app.tasks.riscos_tasks import avaliar_lote_riscos
+
+    try:
+        # Publicação no broker é síncrona: fora do event loop, sem retentativas
+        task = await run_in_threadpool(avaliar_lote_riscos.apply_async, ([entidade.id],), retry=False)
+    except Exception:
+        raise HTTPException(status.HTTP_503_SERVICE_UNAVAILABLE, "Fila de avaliação indisponível, tente novamente")
+    return {"task_id": task.id, "status": "queued"}
@@ -1,3 +1,6 @@
 from .celery_app import celery_app
 from .periodic_tasks import *
+from .pncp_tasks import *
+from .certidoes_tasks import *
+from .riscos_tasks import *
 __all__ = ['celery_app']
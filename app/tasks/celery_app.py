@@ -2,6 +2,8 @@ from celery import Celery
 from celery.schedules import crontab
 import os
 
+from app.core.config import settings
+
 REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
 REDIS_PORT = os.getenv("REDIS_PORT", "6379")
 REDIS_DB = os.getenv("CELERY_REDIS_DB", "1")
@@ -31,4 +33,36 @@ celery_app.conf.beat_schedule = {
         'task': 'sentinela.periodic.report',
         'schedule': crontab(hour=8, minute=0),
     },
+    'pncp-sync': {
+        'task': 'sentinela.periodic.pncp_sync',
+        'schedule': settings.PNCP_SYNC_INTERVAL,
+    },
+    'vencimentos-refresh': {
+        'task': 'sentinela.periodic.refresh_vencimentos',
+        'schedule': crontab(hour=settings.VENCIMENTOS_REFRESH_HOUR, minute=15),
+    },
+    'certidoes-revalidar': {
+        'task': 'sentinela.periodic.certidoes_revalidar',
+        'schedule': settings.CERTIDOES_REVALIDAR_INTERVAL,
+    },
+    'certidoes-recontar': {
+        'task': 'sentinela.periodic.certidoes_recontar',
+        'schedule': crontab(hour=settings.VENCIMENTOS_REFRESH_HOUR, minute=30),
+    },
+    'dashboard-recalcular': {
+        'task': 'sentinela.periodic.dashboard_recalcular',
+        'schedule': settings.DASHBOARD_RECALCULO_INTERVAL,
+    },
+    'riscos-avaliar': {
+        'task': 'sentinela.periodic.riscos_avaliar',
+        'schedule': crontab(hour=settings.RISCOS_AVALIAR_HOUR, minute=0),
+    },
+    'cameras-eventos-rollup': {
+        'task': 'sentinela.periodic.cameras_eventos_rollup',
+        'schedule': crontab(minute=settings.CAMERAS_EVENTOS_ROLLUP_MINUTE),
+    },
+    'cameras-eventos-particoes': {
+        'task': 'sentinela.periodic.cameras_eventos_particoes',
+        'schedule': crontab(hour=1, minute=45),
+    },
 }
@@ -0,0 +1,18 @@
+from .celery_app import celery_app
+from celery.utils.log import get_task_logger
+
+logger = get_task_logger(__name__)
+
+@celery_app.task(name="sentinela.certidoes.revalidar_lote")
+def revalidar_lote_certidoes(ids: list) -> dict:
+    """Revalida um lote de certidões nos emissores (concorrência limitada por emissor)"""
+    from app.core.certidoes import revalidar_lote
+    from app.core.database import SessionLocal
+    import app.core.dashboard  # noqa: F401  (mudanças de status atualizam o resumo do dashboard)
+
+    logger.info(f"Revalidando lote de {len(ids)} certidões")
+    db = SessionLocal()
+    try:
+        return revalidar_lote(db, ids)
+    finally:
+        db.close()
@@ -18,3 +18,91 @@ def cleanup_old_tasks():
 def generate_daily_report():
     logger.info("Gerando relatório")
     return {"date": datetime.utcnow().date().isoformat()}
+
+@celery_app.task(name="sentinela.periodic.pncp_sync")
+def sync_pncp_mirror():
+    """Sincronização incremental do espelho local do PNCP"""
+    from app.core.pncp_mirror import run_sync
+
+    logger.info("Sincronizando espelho PNCP")
+    return run_sync()
+
+@celery_app.task(name="sentinela.periodic.refresh_vencimentos")
+def refresh_vencimentos_index():
+    """Reconstrução noturna do índice de vencimentos"""
+    from app.core.vencimentos import run_refresh
+
+    logger.info("Reconstruindo índice de vencimentos")
+    return run_refresh()
+
+@celery_app.task(name="sentinela.periodic.certidoes_revalidar")
+def dispatch_certidoes_revalidacao():
+    """Divide as certidões com verificação vencida em lotes e enfileira um job por lote"""
+    from celery import group
+    from app.core.certidoes import selecionar_lotes
+    from app.core.database import SessionLocal
+    from .certidoes_tasks import revalidar_lote_certidoes
+
+    db = SessionLocal()
+    try:
+        lotes = selecionar_lotes(db)
+    finally:
+        db.close()
+    if lotes:
+        group(revalidar_lote_certidoes.s(ids) for ids in lotes).apply_async()
+    logger.info(f"Revalidação de certidões: {len(lotes)} lote(s) enfileirado(s)")
+    return {"lotes": len(lotes), "certidoes": sum(len(ids) for ids in lotes)}
+
+@celery_app.task(name="sentinela.periodic.certidoes_recontar")
+def recount_certidoes():
+    """Recontagem noturna dos contadores de certidões (corrige escritas fora do ORM)"""
+    from app.core.certidoes import recontar_certidoes
+    from app.core.database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        return {"linhas": recontar_certidoes(db)}
+    finally:
+        db.close()
+
+@celery_app.task(name="sentinela.periodic.dashboard_recalcular")
+def recalculate_dashboard():
+    """Recálculo dos resumos do dashboard (desvios e virada do dia nas janelas de vencimento)"""
+    from app.core.dashboard import run_recalculo
+
+    logger.info("Recalculando resumos do dashboard")
+    return run_recalculo()
+
+@celery_app.task(name="sentinela.periodic.riscos_avaliar")
+def dispatch_riscos_avaliacao():
+    """Divide as entidades ativas em lotes e enfileira a avaliação de riscos de cada lote"""
+    from celery import group
+    from app.core.database import SessionLocal
+    from app.core.riscos import selecionar_lotes_entidades
+    from .riscos_tasks import avaliar_lote_riscos
+
+    db = SessionLocal()
+    try:
+        lotes = selecionar_lotes_entidades(db)
+    finally:
+        db.close()
+    if lotes:
+        group(avaliar_lote_riscos.s(ids) for ids in lotes).apply_async()
+    logger.info(f"Avaliação de riscos: {len(lotes)} lote(s) enfileirado(s)")
+    return {"lotes": len(lotes), "entidades": sum(len(ids) for ids in lotes)}
+
+@celery_app.task(name="sentinela.periodic.cameras_eventos_rollup")
+def rollup_camera_events():
+    """Consolida os eventos de câmeras das horas recentes em rollups por hora e por dia"""
+    from app.core.camera_eventos import run_consolidacao
+
+    logger.info("Consolidando eventos de câmeras")
+    return run_consolidacao()
+
+@celery_app.task(name="sentinela.periodic.cameras_eventos_particoes")
+def ensure_camera_event_partitions():
+    """Cria com antecedência as partições mensais do histórico de eventos (PostgreSQL)"""
+    from app.core.camera_eventos import run_particoes
+
+    logger.info("Garantindo partições de eventos de câmeras")
+    return run_particoes()
@@ -0,0 +1,17 @@
+from .celery_app import celery_app
+from celery.utils.log import get_task_logger
+
+logger = get_task_logger(__name__)
+
+@celery_app.task(name="sentinela.pncp.ingest_dump")
+def ingest_pncp_dump(sources: list, chunk_size: int = None, array_key: str = "data") -> dict:
+    """Ingestão em streaming de exportações de contratos do PNCP (arquivos ou URLs)"""
+    from app.core.database import SessionLocal
+    from app.core.pncp_ingest import ingerir_fontes
+
+    logger.info(f"Ingerindo {len(sources)} exportação(ões) do PNCP")
+    db = SessionLocal()
+    try:
+        return ingerir_fontes(db, sources, chunk_size=chunk_size, array_key=array_key).to_dict()
+    finally:
+        db.close()
@@ -0,0 +1,17 @@
+from .celery_app import celery_app
+from celery.utils.log import get_task_logger
+
+logger = get_task_logger(__name__)
+
+@celery_app.task(name="sentinela.riscos.avaliar_lote")
+def avaliar_lote_riscos(entidade_ids: list) -> dict:
+    """Avalia e grava os riscos de um lote de entidades (scores vetorizados por entidade)"""
+    from app.core.database import SessionLocal
+    from app.core.riscos import avaliar_entidades
+
+    logger.info(f"Avaliando riscos de {len(entidade_ids)} entidades")
+    db = SessionLocal()
+    try:
+        return avaliar_entidades(db, entidade_ids)
+    finally:
+        db.close()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Benchmark: latência de rotas não relacionadas durante uma "tempestade" de logins
+================================================================================
+
+Sobe a aplicação em processo (httpx + ASGITransport, um único event loop,
+como um worker uvicorn), dispara N logins concorrentes com senha errada
+(bcrypt completo) e, ao mesmo tempo, mede a latência de GET /health/pool.
+
+Compara:
+- inline: bcrypt executado dentro do handler (comportamento antigo)
+- pool:   bcrypt no password_pool (app.core.password_pool)
+
+Uso:
+    python scripts/bench_login_storm.py --logins 40 --probes 200
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Banco isolado para o benchmark (antes de importar a aplicação)
+_tmpdir = tempfile.mkdtemp(prefix="sentinela-bench-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmpdir}/bench.db"
+
+import httpx  # noqa: E402
+
+from app.main import app  # noqa: E402
+from app.core.auth import get_password_hash, verify_password  # noqa: E402
+from app.core.database import SessionLocal, async_engine  # noqa: E402
+from app.core.models import User, UserRole  # noqa: E402
+from app.core.rate_limit import limiter  # noqa: E402
+import app.routers.auth_router as auth_router  # noqa: E402
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def create_bench_user():
+    db = SessionLocal()
+    try:
+        if not db.query(User).filter(User.username == "bench_user").first():
+            db.add(User(
+                username="bench_user",
+                email="bench@sentinela.local",
+                hashed_password=get_password_hash("senha-correta"),
+                role=UserRole.OPERADOR,
+                is_active=True
+            ))
+            db.commit()
+    finally:
+        db.close()
+
+
+async def run_scenario(mode: str, logins: int, probes: int) -> dict:
+    original = auth_router.verify_password_async
+    if mode == "inline":
+        async def blocking_verify(plain, hashed):
+            return verify_password(plain, hashed)
+        auth_router.verify_password_async = blocking_verify
+
+    transport = httpx.ASGITransport(app=app)
+    latencies = []
+    login_status = {}
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def login():
+            response = await client.post(
+                "/auth/login",
+                json={"username": "bench_user", "password": "senha-errada"}
+            )
+            login_status[response.status_code] = login_status.get(response.status_code, 0) + 1
+
+        async def probe():
+            for _ in range(probes):
+                start = time.perf_counter()
+                await client.get("/health/pool")
+                latencies.append((time.perf_counter() - start) * 1000)
+                await asyncio.sleep(0.005)
+
+        try:
+            await asyncio.gather(probe(), *(login() for _ in range(logins)))
+        finally:
+            auth_router.verify_password_async = original
+            # Conexões async pertencem a este event loop
+            await async_engine.dispose()
+
+    return {
+        "mode": mode,
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": max(latencies),
+        "logins": login_status,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=40, help="Logins concorrentes na tempestade")
+    parser.add_argument("--probes", type=int, default=200, help="Requisições de sonda em /health/pool")
+    args = parser.parse_args()
+
+    limiter.enabled = False
+    logging.disable(logging.WARNING)
+    from app.core.database import init_db
+    init_db()
+    create_bench_user()
+
+    print(f"🔐 Tempestade de {args.logins} logins + {args.probes} sondas (BCRYPT_ROUNDS do ambiente)")
+    print(f"{'modo':<8} {'p50 (ms)':>10} {'p99 (ms)':>10} {'max (ms)':>10}  logins")
+    for mode in ("inline", "pool"):
+        result = asyncio.run(run_scenario(mode, args.logins, args.probes))
+        print(
+            f"{result['mode']:<8} {result['p50_ms']:>10.1f} {result['p99_ms']:>10.1f} "
+            f"{result['max_ms']:>10.1f}  {result['logins']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
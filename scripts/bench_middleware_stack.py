@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Benchmark: requisições/s da pilha de middlewares (BaseHTTPMiddleware vs ASGI puro)
+==================================================================================
+
+Monta duas aplicações idênticas (uma rota JSON + CORS) variando apenas a
+pilha de segurança:
+
+- legacy: réplica da pilha antiga — SecurityHeaders e CSRF como
+          BaseHTTPMiddleware (CSP remontado por resposta) e um
+          @app.middleware("http") sem efeito
+- asgi:   SecurityHeadersMiddleware e CSRFProtectionMiddleware atuais
+
+As requisições são feitas em processo (httpx + ASGITransport), sem rede,
+para isolar o custo dos middlewares.
+
+Uso:
+    python scripts/bench_middleware_stack.py --requests 5000 --concurrency 50
+"""
+import argparse
+import asyncio
+import logging
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx  # noqa: E402
+from fastapi import FastAPI, Request  # noqa: E402
+from fastapi.middleware.cors import CORSMiddleware  # noqa: E402
+from starlette.middleware.base import BaseHTTPMiddleware  # noqa: E402
+
+from app.core.csrf_protection import CSRFProtectionMiddleware, csrf_generator  # noqa: E402
+from app.core.security_headers import (  # noqa: E402
+    NO_CACHE_HEADERS,
+    SecurityHeadersMiddleware,
+    build_security_headers,
+)
+
+DOMAIN = "sentinela.example.com"
+
+
+class LegacySecurityHeadersMiddleware(BaseHTTPMiddleware):
+    """Comportamento antigo: headers (incluindo CSP) montados a cada resposta"""
+
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        for name, value in build_security_headers(DOMAIN):
+            response.headers[name] = value
+        if request.url.path.startswith("/auth") or request.url.path.startswith("/api"):
+            for name, value in NO_CACHE_HEADERS:
+                response.headers[name] = value
+        return response
+
+
+class LegacyCSRFMiddleware(BaseHTTPMiddleware):
+    """Comportamento antigo para métodos seguros: cookie gerado se ausente"""
+
+    async def dispatch(self, request: Request, call_next):
+        response = await call_next(request)
+        if not request.cookies.get("csrf_token"):
+            response.set_cookie(
+                key="csrf_token",
+                value=csrf_generator.generate_token(),
+                max_age=3600,
+                httponly=True,
+                samesite="strict",
+                path="/"
+            )
+        return response
+
+
+def build_app(mode: str) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return {"status": "ok"}
+
+    if mode == "legacy":
+        app.add_middleware(LegacySecurityHeadersMiddleware)
+        app.add_middleware(LegacyCSRFMiddleware)
+    else:
+        app.add_middleware(SecurityHeadersMiddleware, domain=DOMAIN)
+        app.add_middleware(CSRFProtectionMiddleware, cookie_secure=False)
+
+    app.add_middleware(
+        CORSMiddleware,
+        allow_origins=["*"],
+        allow_credentials=True,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+
+    if mode == "legacy":
+        @app.middleware("http")
+        async def noop_middleware(request: Request, call_next):
+            return await call_next(request)
+
+    return app
+
+
+async def run_scenario(mode: str, total: int, concurrency: int) -> dict:
+    transport = httpx.ASGITransport(app=build_app(mode))
+    # Cliente com cookie CSRF, como um navegador após a primeira requisição
+    cookies = {"csrf_token": csrf_generator.generate_token()}
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", cookies=cookies) as client:
+        remaining = iter(range(total))
+
+        async def worker():
+            for _ in remaining:
+                response = await client.get("/ping")
+                assert response.status_code == 200
+
+        # Aquecimento
+        for _ in range(50):
+            await client.get("/ping")
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return {"mode": mode, "rps": total / elapsed, "elapsed_s": elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000, help="Total de requisições por cenário")
+    parser.add_argument("--concurrency", type=int, default=50, help="Requisições simultâneas")
+    args = parser.parse_args()
+
+    logging.disable(logging.WARNING)
+
+    print(f"🛡️  {args.requests} requisições, concorrência {args.concurrency}")
+    print(f"{'pilha':<8} {'req/s':>10} {'tempo (s)':>10}")
+    results = {}
+    for mode in ("legacy", "asgi"):
+        result = asyncio.run(run_scenario(mode, args.requests, args.concurrency))
+        results[mode] = result["rps"]
+        print(f"{mode:<8} {result['rps']:>10.0f} {result['elapsed_s']:>10.2f}")
+
+    print(f"📈 Ganho: {results['asgi'] / results['legacy']:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+"""
+Benchmark: custo do bcrypt (hash/verify) por BCRYPT_ROUNDS neste host
+======================================================================
+
+Mede o tempo de hash e de verificação para cada custo do intervalo e
+recomenda o maior custo cuja verificação (p99) cabe no orçamento de
+latência do login. Combine com PASSWORD_HASH_WORKERS para estimar a
+vazão de logins por worker: workers * 1000 / verify_p50_ms.
+
+Ao alterar BCRYPT_ROUNDS, os hashes existentes são regravados de forma
+transparente no próximo login de cada usuário (app.core.password_pool.rehash_password).
+
+Uso:
+    python scripts/bench_password_hash.py --min-rounds 10 --max-rounds 14 --budget-ms 250
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.auth import pwd_context  # noqa: E402
+from app.core.config import settings  # noqa: E402
+
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def measure(func, iterations: int) -> list:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def bench_rounds(rounds: int, iterations: int) -> dict:
+    context = pwd_context.copy(bcrypt__rounds=rounds)
+    password = "Senha@Benchmark123"
+    hashed = context.hash(password)
+
+    hash_ms = measure(lambda: context.hash(password), iterations)
+    verify_ms = measure(lambda: context.verify(password, hashed), iterations)
+
+    return {
+        "rounds": rounds,
+        "hash_p50_ms": statistics.median(hash_ms),
+        "verify_p50_ms": statistics.median(verify_ms),
+        "verify_p99_ms": percentile(verify_ms, 99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--min-rounds", type=int, default=10, help="Menor custo testado")
+    parser.add_argument("--max-rounds", type=int, default=14, help="Maior custo testado")
+    parser.add_argument("--iterations", type=int, default=5, help="Medições por custo e operação")
+    parser.add_argument("--budget-ms", type=float, default=250.0, help="Orçamento de latência da verificação (p99)")
+    args = parser.parse_args()
+
+    workers = settings.PASSWORD_HASH_WORKERS
+    print(f"🔐 bcrypt neste host (BCRYPT_ROUNDS atual={settings.BCRYPT_ROUNDS}, PASSWORD_HASH_WORKERS={workers})")
+    print(f"{'rounds':>6} {'hash p50':>10} {'verify p50':>11} {'verify p99':>11} {'logins/s':>9}")
+
+    recommended = None
+    for rounds in range(args.min_rounds, args.max_rounds + 1):
+        result = bench_rounds(rounds, args.iterations)
+        throughput = workers * 1000 / result["verify_p50_ms"]
+        print(
+            f"{rounds:>6} {result['hash_p50_ms']:>10.1f} {result['verify_p50_ms']:>11.1f} "
+            f"{result['verify_p99_ms']:>11.1f} {throughput:>9.1f}"
+        )
+        if result["verify_p99_ms"] <= args.budget_ms:
+            recommended = rounds
+
+    if recommended is None:
+        print(f"⚠️  Nenhum custo do intervalo cabe em {args.budget_ms:.0f} ms")
+    else:
+        print(f"✅ Recomendado: BCRYPT_ROUNDS={recommended} (verify p99 <= {args.budget_ms:.0f} ms)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Ingestão de exportações de contratos do PNCP no espelho local
+=============================================================
+
+Lê arquivos (.json, .ndjson/.jsonl, opcionalmente .gz) ou URLs de páginas
+de exportação em streaming e grava em `pncp_contratos` em lotes, com
+memória constante (app.core.pncp_ingest). Útil para o backfill de um ano
+inteiro de um estado antes de ligar a sincronização incremental.
+
+Com --celery, as fontes são enfileiradas na task
+`sentinela.pncp.ingest_dump` em vez de processadas localmente.
+
+Uso:
+    python scripts/ingest_pncp_dump.py exportacoes/contratos-2024-SP-*.json.gz
+    python scripts/ingest_pncp_dump.py --chunk-size 10000 "https://.../contratos?pagina=1"
+    python scripts/ingest_pncp_dump.py --celery exportacoes/*.ndjson
+"""
+import argparse
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from app.core.config import settings  # noqa: E402
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("sources", nargs="+", help="Arquivos ou URLs de exportação")
+    parser.add_argument("--chunk-size", type=int, default=settings.PNCP_INGEST_CHUNK_SIZE, help="Registros por transação")
+    parser.add_argument("--array-key", default="data", help="Chave do array de registros em páginas {\"data\": [...]}")
+    parser.add_argument("--celery", action="store_true", help="Enfileira a ingestão no worker Celery")
+    args = parser.parse_args(argv)
+
+    if args.celery:
+        from app.tasks.pncp_tasks import ingest_pncp_dump
+
+        task = ingest_pncp_dump.delay(args.sources, chunk_size=args.chunk_size, array_key=args.array_key)
+        print(f"📨 Ingestão enfileirada: task {task.id}")
+        return 0
+
+    from app.core.database import SessionLocal, init_db
+    from app.core.pncp_ingest import ingerir_fontes
+
+    init_db()
+    db = SessionLocal()
+    try:
+        result = ingerir_fontes(db, args.sources, chunk_size=args.chunk_size, array_key=args.array_key)
+    finally:
+        db.close()
+
+    resumo = result.to_dict()
+    print(
+        f"✅ {resumo['gravados']} contratos gravados de {resumo['lidos']} lidos "
+        f"({resumo['invalidos']} inválidos) em {resumo['segundos']}s "
+        f"— {resumo['registros_por_segundo']} registros/s"
+    )
+    for erro in resumo["erros"]:
+        print(f"   ⚠️  {erro}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,13 +3,16 @@ from pathlib import Path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 import pytest
+import pytest_asyncio
 from fastapi.testclient import TestClient
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import NullPool
 
 from app.main import app
-from app.core.database import Base, get_db
+from app.core.database import Base, get_db, get_async_db
 
 @pytest.fixture(autouse=True)
 def mock_totp(monkeypatch):
@@ -17,12 +20,31 @@ def mock_totp(monkeypatch):
     monkeypatch.setattr("app.core.auth.verify_totp", lambda *args, **kwargs: True)
     monkeypatch.setattr("app.core.dependencies.verify_totp", lambda *args, **kwargs: True)
 
+@pytest.fixture(autouse=True)
+def clear_principal_cache():
+    """Isola o principal cache entre testes (IDs se repetem em cada banco em memória)"""
+    from app.core.principal_cache import principal_cache
+    principal_cache.clear()
+    yield
+    principal_cache.clear()
+
+@pytest.fixture
+def db_path(tmp_path):
+    # Arquivo (e não :memory:) para que os engines sync e async vejam os mesmos dados
+    return tmp_path / "test.db"
+
 @pytest.fixture
-def db_engine():
-    engine = create_engine("sqlite:///:memory:", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+def db_engine(db_path):
+    engine = create_engine(f"sqlite:///{db_path}", connect_args={"check_same_thread": False})
     Base.metadata.create_all(bind=engine)
     yield engine
     Base.metadata.drop_all(bind=engine)
+    engine.dispose()
+
+@pytest.fixture
+def async_db_engine(db_engine, db_path):
+    # NullPool: o TestClient pode usar um event loop diferente por requisição
+    return create_async_engine(f"sqlite+aiosqlite:///{db_path}", poolclass=NullPool)
 
 @pytest.fixture
 def db_session(db_engine):
@@ -34,17 +56,109 @@ def db_session(db_engine):
         session.close()
 
 @pytest.fixture
-def client(db_session):
+def client(db_session, async_db_engine):
     def override_get_db():
         try:
             yield db_session
         finally:
             pass
+    
+    AsyncTestingSession = async_sessionmaker(bind=async_db_engine, class_=AsyncSession, expire_on_commit=False)
+    
+    async def override_get_async_db():
+        async with AsyncTestingSession() as session:
+            yield session
+    
     app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_async_db] = override_get_async_db
     with TestClient(app) as c:
         yield c
     app.dependency_overrides.clear()
 
+TEST_MFA_SECRET = "JBSWY3DPEHPK3PXP"
+
+@pytest.fixture
+def criar_entidade(db_session):
+    """Fábrica de entidades ATIVAS: criar_entidade(nome, cnpj)"""
+    from app.core.models import Entidade, StatusEntidade, TipoEntidade
+
+    def factory(nome: str = "Entidade Teste", cnpj: str = "10000000000101") -> Entidade:
+        entidade = Entidade(nome=nome, cnpj=cnpj, tipo=TipoEntidade.EMPRESA, status=StatusEntidade.ATIVA, is_active=True)
+        db_session.add(entidade)
+        db_session.commit()
+        return entidade
+    return factory
+
+@pytest.fixture
+def entidade(criar_entidade):
+    """Entidade ATIVA padrão dos testes de rotas"""
+    return criar_entidade()
+
+@pytest.fixture
+def gestor_headers(db_session):
+    """
+    Fábrica de headers Authorization de um usuário da entidade:
+    gestor_headers(entidade, username=None, role=UserRole.GESTOR)
+    
+    ROOT/GESTOR recebem MFA ativo e o claim "totp"; OPERADOR, só "sub".
+    """
+    import pyotp
+    from app.core.auth import create_access_token
+    from app.core.models import User, UserRole
+
+    def factory(entidade, username: str = None, role: UserRole = UserRole.GESTOR) -> dict:
+        username = username or f"{role.value.lower()}_{entidade.id}"
+        com_mfa = role != UserRole.OPERADOR
+        user = User(username=username, email=f"{username}@test.com", hashed_password="$2b$12$test", role=role,
+                    entidade_id=entidade.id, mfa_enabled=com_mfa, mfa_secret=TEST_MFA_SECRET, is_active=True)
+        db_session.add(user)
+        db_session.commit()
+        claims = {"sub": str(user.id)}
+        if com_mfa:
+            claims["totp"] = pyotp.TOTP(TEST_MFA_SECRET).now()
+        return {"Authorization": f"Bearer {create_access_token(claims)}"}
+    return factory
+
+@pytest.fixture
+def diagnostics_headers(monkeypatch):
+    """Configura DIAGNOSTICS_TOKEN e retorna o header para /metrics e /health internos"""
+    from app.core.config import settings
+    monkeypatch.setattr(settings, "DIAGNOSTICS_TOKEN", "token-de-teste")
+    return {"Authorization": "Bearer token-de-teste"}
+
+# ==========================================
+# PNCP LOCAL (servidor HTTP real com falhas injetáveis)
+# ==========================================
+
+@pytest.fixture(scope="module")
+def stub_server():
+    from tests.pncp_stub import StubServer
+    server = StubServer()
+    server.start()
+    yield server
+    server.stop()
+
+@pytest.fixture
+def stub(stub_server):
+    stub_server.state.reset()
+    return stub_server
+
+@pytest_asyncio.fixture
+async def make_client(stub):
+    """Fábrica de PNCPClient apontando para o stub (fechados ao final)"""
+    from app.core.pncp_client import PNCPClient
+    clients = []
+    
+    def factory(**kwargs):
+        kwargs.setdefault("backoff_base", 0.01)
+        client = PNCPClient(base_url=stub.url, **kwargs)
+        clients.append(client)
+        return client
+    
+    yield factory
+    for client in clients:
+        await client.aclose()
+
 # ==========================================
 # MOCK REDIS (para testes sem Redis)
 # ==========================================
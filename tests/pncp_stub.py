@@ -0,0 +1,151 @@
+"""
+Servidor PNCP local para testes (HTTP real em 127.0.0.1, porta efêmera)
+
+Permite injetar latência e falhas para exercitar pool de conexões,
+retentativas e circuit breaker sem depender da API do governo.
+"""
+import asyncio
+import socket
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+import uvicorn
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+CNPJ_INEXISTENTE = "00000000000000"
+
+
+class StubState:
+    """Comportamento configurável do stub (reiniciado a cada teste)"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.delay = 0.0
+        self.fail_next = 0
+        self.fail_status = 503
+        self.calls = []
+        self.client_ports = set()
+        # Registros servidos em /{recurso}/atualizacoes
+        self.atualizacoes = {"fornecedores": [], "contratos": []}
+
+
+def create_stub_app(state: StubState) -> FastAPI:
+    app = FastAPI()
+
+    async def simulate(path: str, port: int):
+        state.calls.append(path)
+        state.client_ports.add(port)
+        if state.delay:
+            await asyncio.sleep(state.delay)
+        if state.fail_next > 0:
+            state.fail_next -= 1
+            return JSONResponse(status_code=state.fail_status, content={"erro": "indisponível"})
+        return None
+
+    @app.get("/fornecedor/{cnpj}")
+    async def fornecedor(cnpj: str):
+        return {
+            "cnpj": cnpj,
+            "razaoSocial": "FORNECEDOR STUB LTDA",
+            "nomeFantasia": "Stub",
+            "situacaoCadastral": "ATIVA",
+            "dataAbertura": "2015-03-15",
+            "porte": "MEDIO",
+            "naturezaJuridica": "Sociedade Empresária Limitada",
+            "logradouro": "Av. Paulista",
+            "numero": "1000",
+            "bairro": "Bela Vista",
+            "municipio": "São Paulo",
+            "uf": "SP",
+            "cep": "01310-100",
+        }
+
+    @app.middleware("http")
+    async def behaviour(request, call_next):
+        response = await simulate(request.url.path, request.client.port)
+        if response is not None:
+            return response
+        if request.url.path.endswith(CNPJ_INEXISTENTE):
+            return JSONResponse(status_code=404, content={"erro": "não encontrado"})
+        return await call_next(request)
+
+    @app.get("/contratos/fornecedor/{cnpj}")
+    async def contratos(cnpj: str):
+        return {
+            "contratos": [
+                {
+                    "numero": "001/2024",
+                    "objeto": "Fornecimento de materiais",
+                    "valor": 50000.0,
+                    "dataAssinatura": "2024-01-15",
+                    "vigencia": "2024-12-31",
+                    "status": "VIGENTE",
+                    "orgao": "Prefeitura Municipal",
+                },
+                {
+                    "numero": "045/2023",
+                    "objeto": "Manutenção",
+                    "valor": 120000.0,
+                    "dataAssinatura": "2023-06-20",
+                    "vigencia": "2024-06-20",
+                    "status": "ENCERRADO",
+                    "orgao": "Secretaria de Obras",
+                },
+            ]
+        }
+
+    @app.get("/{recurso}/atualizacoes")
+    async def atualizacoes(
+        recurso: str,
+        tamanhoPagina: int = 500,
+        dataAtualizacaoInicial: Optional[str] = None,
+        aposChave: Optional[str] = None,
+    ):
+        chave = "cnpj" if recurso == "fornecedores" else "id"
+        registros = sorted(
+            state.atualizacoes.get(recurso, []),
+            key=lambda r: (datetime.fromisoformat(r["dataAtualizacao"]), r[chave]),
+        )
+        if dataAtualizacaoInicial:
+            desde = datetime.fromisoformat(dataAtualizacaoInicial)
+            registros = [
+                r for r in registros
+                if (datetime.fromisoformat(r["dataAtualizacao"]), r[chave]) > (desde, aposChave or "")
+            ]
+        return {"data": registros[:tamanhoPagina]}
+
+    return app
+
+
+class StubServer:
+    """Executa o stub com uvicorn em uma thread"""
+
+    def __init__(self):
+        self.state = StubState()
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self._sock.bind(("127.0.0.1", 0))
+        self.port = self._sock.getsockname()[1]
+        self.url = f"http://127.0.0.1:{self.port}"
+        self._server = uvicorn.Server(
+            uvicorn.Config(create_stub_app(self.state), log_level="warning", lifespan="off")
+        )
+        self._thread = threading.Thread(target=self._server.run, kwargs={"sockets": [self._sock]}, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        deadline = time.monotonic() + 5
+        while not self._server.started:
+            if time.monotonic() > deadline:
+                raise RuntimeError("Stub PNCP não iniciou")
+            time.sleep(0.01)
+
+    def stop(self):
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
+        self._sock.close()
@@ -0,0 +1,37 @@
+"""
+Testes para o engine/sessão assíncronos (app.core.database)
+"""
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import get_async_database_url, get_async_db
+
+
+class TestAsyncDatabaseUrl:
+    """Conversão da DATABASE_URL para drivers assíncronos"""
+
+    def test_postgres_usa_asyncpg(self):
+        url = get_async_database_url("postgresql://user:pw@ep-x.neon.tech/db")
+        assert url == "postgresql+asyncpg://user:pw@ep-x.neon.tech/db"
+
+    def test_neon_sslmode_convertido(self):
+        url = get_async_database_url(
+            "postgresql://user:pw@ep-x.neon.tech/db?sslmode=require&channel_binding=require"
+        )
+        assert url == "postgresql+asyncpg://user:pw@ep-x.neon.tech/db?ssl=require"
+
+    def test_sqlite_usa_aiosqlite(self):
+        assert get_async_database_url("sqlite:///./sentinela.db") == "sqlite+aiosqlite:///./sentinela.db"
+
+    def test_driver_async_preservado(self):
+        url = "postgresql+asyncpg://user:pw@localhost/db"
+        assert get_async_database_url(url) == url
+
+
+@pytest.mark.asyncio
+async def test_get_async_db_fornece_async_session():
+    """get_async_db entrega uma AsyncSession e a fecha ao final"""
+    gen = get_async_db()
+    session = await gen.__anext__()
+    assert isinstance(session, AsyncSession)
+    await gen.aclose()
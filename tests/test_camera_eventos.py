@@ -0,0 +1,186 @@
+"""
+Testes do histórico de eventos de câmeras e dos rollups (app.core.camera_eventos)
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from app.core import cameras as cameras_core
+from app.core.auth import create_access_token
+from app.core.camera_eventos import (
+    consolidar_eventos,
+    corte_rollup,
+    escolher_granularidade,
+    registrar_eventos,
+    serie_eventos,
+)
+from app.core.config import settings
+from app.core.models import (
+    Camera,
+    CameraEventoRollup,
+    Entidade,
+    GranularidadeRollup,
+    StatusEntidade,
+    TipoEntidade,
+    TipoEventoCamera,
+    User,
+    UserRole,
+)
+
+# Referência fixa: meio-dia UTC, três dias de histórico antes dela
+AGORA = datetime(2026, 3, 10, 12, 30, tzinfo=timezone.utc)
+MOVIMENTO, VIOLACAO = TipoEventoCamera.MOVIMENTO, TipoEventoCamera.VIOLACAO
+
+
+@pytest.fixture
+def entidade(db_session: Session) -> Entidade:
+    entidade = Entidade(nome="Entidade Eventos", cnpj="55555555000155", tipo=TipoEntidade.EMPRESA,
+                        status=StatusEntidade.ATIVA, is_active=True)
+    db_session.add(entidade)
+    db_session.commit()
+    return entidade
+
+
+@pytest.fixture
+def cameras(db_session, entidade) -> list:
+    cameras = [Camera(entidade_id=entidade.id, codigo=f"EV-{i}", nome=f"Câmera {i}") for i in range(2)]
+    db_session.add_all(cameras)
+    db_session.commit()
+    return cameras
+
+
+def evento(camera: Camera, ocorrido_em: datetime, tipo: TipoEventoCamera = MOVIMENTO) -> dict:
+    return {"entidade_id": camera.entidade_id, "camera_id": camera.id, "tipo": tipo, "ocorrido_em": ocorrido_em}
+
+
+@pytest.fixture
+def historico(db_engine, cameras) -> list:
+    """Um movimento a cada 20 min nas últimas 72h (câmera 0) e violações de hora em hora (câmera 1)"""
+    rows = [evento(cameras[0], AGORA - timedelta(minutes=20 * i)) for i in range(1, 3 * 72 + 1)]
+    rows += [evento(cameras[1], AGORA - timedelta(hours=i, minutes=5), VIOLACAO) for i in range(72)]
+    with db_engine.begin() as conn:
+        registrar_eventos(conn, rows)
+    return rows
+
+
+def contar(rows, inicio, fim, **filtros) -> int:
+    return sum(
+        inicio <= r["ocorrido_em"] < fim and all(r[k] == v for k, v in filtros.items())
+        for r in rows
+    )
+
+
+class TestRollups:
+    """Consolidação por hora e por dia"""
+
+    def test_consolida_horas_e_dias(self, db_session, historico, cameras):
+        inicio = AGORA - timedelta(days=4)
+        resultado = consolidar_eventos(db_session, inicio, AGORA)
+        assert resultado["horas"] > 0 and resultado["dias"] > 0
+
+        horas = db_session.scalars(select(CameraEventoRollup).where(
+            CameraEventoRollup.granularidade == GranularidadeRollup.HORA)).all()
+        assert sum(h.total for h in horas) == contar(historico, inicio, AGORA.replace(minute=0))
+        assert all(h.total == 3 for h in horas if h.camera_id == cameras[0].id and h.periodo.hour != 12)
+
+        dias = db_session.scalars(select(CameraEventoRollup).where(
+            CameraEventoRollup.granularidade == GranularidadeRollup.DIA)).all()
+        assert sum(d.total for d in dias) == sum(h.total for h in horas)
+
+        # Reprocessar é idempotente
+        consolidar_eventos(db_session, inicio, AGORA)
+        assert len(db_session.scalars(select(CameraEventoRollup)).all()) == len(horas) + len(dias)
+
+    def test_reprocessa_eventos_atrasados(self, db_engine, db_session, historico, cameras):
+        consolidar_eventos(db_session, AGORA - timedelta(days=4), AGORA)
+        with db_engine.begin() as conn:
+            registrar_eventos(conn, [evento(cameras[0], AGORA - timedelta(hours=2, minutes=1))])
+
+        consolidar_eventos(db_session, AGORA - timedelta(hours=3), AGORA)
+
+        dia = db_session.scalar(select(CameraEventoRollup).where(
+            CameraEventoRollup.granularidade == GranularidadeRollup.DIA,
+            CameraEventoRollup.camera_id == cameras[0].id,
+            CameraEventoRollup.periodo == AGORA.replace(hour=0, minute=0).replace(tzinfo=None),
+        ))
+        assert dia.total == contar(historico, AGORA.replace(hour=0, minute=0), AGORA.replace(minute=0),
+                                   camera_id=cameras[0].id) + 1
+
+
+class TestSerie:
+    """Escolha da fonte (bruto ou rollup) pelo intervalo"""
+
+    def test_escolher_granularidade(self):
+        assert escolher_granularidade(AGORA - timedelta(hours=6), AGORA) == "MINUTO"
+        assert escolher_granularidade(AGORA - timedelta(days=7), AGORA) == "HORA"
+        assert escolher_granularidade(AGORA - timedelta(days=30), AGORA) == "DIA"
+        assert corte_rollup("HORA", AGORA) == datetime(2026, 3, 10, 11, tzinfo=timezone.utc)
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("dias, granularidade", [(3, "HORA"), (30, "DIA")])
+    async def test_rollup_mais_bruto_recente(self, db_session, async_db_engine, historico, entidade,
+                                             dias, granularidade):
+        # Consolidado até 11h; a hora 11h e a atual só existem no bruto
+        consolidar_eventos(db_session, AGORA - timedelta(days=4), AGORA - timedelta(hours=1))
+        inicio = AGORA - timedelta(days=dias)
+
+        async with async_sessionmaker(bind=async_db_engine, class_=AsyncSession)() as db:
+            resultado, pontos = await serie_eventos(db, entidade.id, inicio, AGORA, agora=AGORA)
+            _, violacoes = await serie_eventos(db, entidade.id, inicio, AGORA, tipos=[VIOLACAO], agora=AGORA)
+
+        assert resultado == granularidade
+        assert sum(p["total"] for p in pontos) == contar(historico, inicio.replace(minute=0), AGORA)
+        assert sum(p["total"] for p in violacoes) == contar(historico, inicio.replace(minute=0), AGORA, tipo=VIOLACAO)
+        if granularidade == "DIA":
+            assert len(pontos) <= (dias + 1) * 2  # um ponto por dia e tipo
+        assert [p["periodo"] for p in pontos] == sorted(p["periodo"] for p in pontos)
+
+
+class TestRotas:
+    """POST /cameras/eventos, GET /cameras/eventos e GET /cameras/eventos/serie"""
+
+    @pytest.fixture
+    def headers(self, db_session, entidade) -> dict:
+        user = User(username="operador_eventos", email="operador_eventos@test.com", hashed_password="$2b$12$test",
+                    role=UserRole.OPERADOR, entidade_id=entidade.id, is_active=True)
+        db_session.add(user)
+        db_session.commit()
+        return {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+
+    def test_grava_lista_e_serie(self, client, headers, cameras):
+        cameras_core.diretorio_cameras.cache.clear()
+        agora = datetime.now(timezone.utc)
+        lote = {"eventos": [
+            {"codigo": "EV-0", "tipo": "MOVIMENTO", "timestamp": (agora - timedelta(minutes=i)).isoformat(),
+             "dados": {"confianca": 0.9}}
+            for i in range(1, 6)
+        ] + [{"codigo": "EV-1", "tipo": "VIOLACAO"}, {"codigo": "NAO-EXISTE", "tipo": "OFFLINE"}]}
+
+        response = client.post("/cameras/eventos", headers=headers, json=lote)
+        assert response.status_code == 201, response.json()
+        assert response.json() == {"aceitos": 6, "desconhecidos": ["NAO-EXISTE"], "total_desconhecidos": 1}
+
+        ids, cursor = [], None
+        while True:
+            params = {"limit": 4, **({"cursor": cursor} if cursor else {})}
+            pagina = client.get("/cameras/eventos", headers=headers, params=params).json()
+            ids += [e["id"] for e in pagina["eventos"]]
+            cursor = pagina["next_cursor"]
+            if not cursor:
+                break
+        assert len(set(ids)) == 6
+
+        serie = client.get("/cameras/eventos/serie", headers=headers,
+                           params={"inicio": (agora - timedelta(hours=1)).isoformat()}).json()
+        assert serie["granularidade"] == "MINUTO"
+        assert sum(p["total"] for p in serie["pontos"] if p["tipo"] == "MOVIMENTO") == 5
+
+        assert client.get("/cameras/eventos/serie", headers=headers,
+                          params={"inicio": (agora - timedelta(days=400)).isoformat()}).status_code == 400
+
+    def test_lote_excede_maximo(self, client, headers):
+        lote = {"eventos": [{"codigo": "EV-0", "tipo": "MOVIMENTO"}] * (settings.CAMERAS_EVENTOS_MAX_LOTE + 1)}
+        assert client.post("/cameras/eventos", headers=headers, json=lote).status_code == 422
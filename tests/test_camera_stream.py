@@ -0,0 +1,276 @@
+"""
+Testes do stream SSE de status das câmeras (app.core.camera_stream)
+"""
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core.auth import create_access_token
+from app.core.cameras import EstadoCameras, Heartbeat
+from app.core.camera_stream import (
+    FilaConexao,
+    StreamCameras,
+    StreamIndisponivel,
+    VarreduraOffline,
+    camera_stream,
+    eventos_sse,
+)
+from app.core.config import settings
+from app.core.models import Entidade, StatusCamera, StatusEntidade, TipoEntidade, User, UserRole
+from app.redis_client import RedisPool
+
+AGORA = datetime(2026, 3, 10, 12, 0, tzinfo=timezone.utc)
+
+
+def hb(
+    camera_id: int, entidade_id: int = 1, status: StatusCamera = StatusCamera.ONLINE, visto_em: datetime = AGORA
+) -> Heartbeat:
+    return Heartbeat(camera_id, entidade_id, status, visto_em)
+
+
+def fake_redis():
+    fakeredis = pytest.importorskip("fakeredis")
+    return fakeredis.aioredis.FakeRedis(server=fakeredis.FakeServer(), decode_responses=True)
+
+
+def fake_pool(server=None) -> RedisPool:
+    fakeredis = pytest.importorskip("fakeredis")
+    return RedisPool(connection_class=fakeredis.aioredis.FakeConnection, server=server or fakeredis.FakeServer())
+
+
+class TestFilaConexao:
+    """Fila limitada com descarte das mensagens mais antigas"""
+
+    @pytest.mark.asyncio
+    async def test_descarta_mais_antigas(self):
+        fila = FilaConexao(maxlen=3)
+        for i in range(5):
+            fila.put(str(i))
+
+        assert await fila.proximas(timeout=0.1) == (["2", "3", "4"], 2)
+        assert await fila.proximas(timeout=0.01) == ([], 0)
+
+    @pytest.mark.asyncio
+    async def test_acorda_ao_receber(self):
+        fila = FilaConexao(maxlen=3)
+        asyncio.get_running_loop().call_later(0.01, fila.put, "x")
+
+        assert await fila.proximas(timeout=1.0) == (["x"], 0)
+
+
+class TestMudancas:
+    """Detecção de mudanças de status no estado das câmeras"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("backend", ["memory", "redis"])
+    async def test_gravar_retorna_mudancas(self, backend):
+        if backend == "redis":
+            pytest.importorskip("lupa")
+        pool = fake_pool() if backend == "redis" else None
+        estado = EstadoCameras(pool=pool)
+
+        mudancas = await estado.gravar([hb(1), hb(2)])
+        assert [(anterior, h.camera_id) for anterior, h in mudancas] == [(None, 1), (None, 2)]
+
+        depois = AGORA + timedelta(seconds=30)
+        mudancas = await estado.gravar([hb(1, visto_em=depois), hb(2, status=StatusCamera.DEGRADADA, visto_em=depois)])
+        assert [(anterior, h.camera_id, h.status) for anterior, h in mudancas] == [
+            (StatusCamera.ONLINE, 2, StatusCamera.DEGRADADA)
+        ]
+        if pool is not None:
+            await pool.aclose()
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("backend", ["memory", "redis"])
+    async def test_heartbeat_antigo_nao_sobrescreve(self, backend):
+        """Heartbeat fora de ordem não regride o estado nem gera mudança"""
+        if backend == "redis":
+            pytest.importorskip("lupa")
+        pool = fake_pool() if backend == "redis" else None
+        estado = EstadoCameras(pool=pool)
+        await estado.gravar([hb(1, status=StatusCamera.DEGRADADA, visto_em=AGORA + timedelta(seconds=30))])
+
+        assert await estado.gravar([hb(1)]) == []
+        assert await estado.gravar([hb(1, status=StatusCamera.DEGRADADA, visto_em=AGORA + timedelta(seconds=30))]) == []
+        atual = (await estado.ler(1))[1]
+        assert atual.status == StatusCamera.DEGRADADA
+        assert atual.visto_em == AGORA + timedelta(seconds=30)
+        if pool is not None:
+            await pool.aclose()
+
+    @pytest.mark.asyncio
+    async def test_redis_inacessivel_usa_memoria(self):
+        """Com o Redis fora, o estado passa para o processo e volta ao Redis depois do intervalo"""
+        fakeredis = pytest.importorskip("fakeredis")
+        pytest.importorskip("lupa")
+        server = fakeredis.FakeServer()
+        agora = [0.0]
+        estado = EstadoCameras(pool=fake_pool(server), timer=lambda: agora[0])
+        server.connected = False
+
+        assert [h.camera_id for _, h in await estado.gravar([hb(1)])] == [1]
+        assert list(await estado.ler(1)) == [1]
+        assert estado.errors == 1
+
+        server.connected = True
+        agora[0] += 10
+        await estado.gravar([hb(2)])
+        assert await estado.pool.client.hkeys(estado.make_key(1)) == ["2"]
+        await estado.pool.aclose()
+
+
+class TestStreamCameras:
+    """Distribuição por entidade, limite de conexões e pub/sub"""
+
+    @pytest.mark.asyncio
+    async def test_distribui_so_para_a_entidade(self):
+        stream = StreamCameras(fila=10)
+        async with stream.assinar(1) as fila_a, stream.assinar(1) as fila_b, stream.assinar(2) as fila_c:
+            await stream.publicar([(None, hb(7, entidade_id=1))])
+
+            for fila in (fila_a, fila_b):
+                mensagens, _ = await fila.proximas(timeout=0.1)
+                assert json.loads(mensagens[0])["camera_id"] == 7
+            assert await fila_c.proximas(timeout=0.01) == ([], 0)
+            assert stream.stats()["conexoes"] == 3
+        assert stream.conexoes == {}
+
+    @pytest.mark.asyncio
+    async def test_limite_de_conexoes(self):
+        stream = StreamCameras(max_conexoes=1)
+        async with stream.assinar(1):
+            with pytest.raises(StreamIndisponivel):
+                async with stream.assinar(1):
+                    pass
+
+    @pytest.mark.asyncio
+    async def test_pubsub_redis(self):
+        stream = StreamCameras(redis=fake_redis())
+        await stream.start()
+        try:
+            async with stream.assinar(1) as fila:
+                await asyncio.sleep(0.05)  # assinatura ativa
+                await stream.publicar([(StatusCamera.ONLINE, hb(3, status=StatusCamera.OFFLINE))])
+
+                mensagens, _ = await fila.proximas(timeout=2.0)
+                assert json.loads(mensagens[0]) == {
+                    "camera_id": 3, "status": "OFFLINE", "anterior": "ONLINE",
+                    "visto_em": AGORA.isoformat(), "ip": None, "firmware": None,
+                }
+        finally:
+            await stream.aclose()
+
+
+class TestVarreduraOffline:
+    """Transições para OFFLINE sem heartbeat publicadas uma única vez"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.parametrize("backend", ["memory", "redis"])
+    async def test_publica_offline_uma_vez(self, backend):
+        if backend == "redis":
+            pytest.importorskip("lupa")
+        pool = fake_pool() if backend == "redis" else None
+        estado = EstadoCameras(pool=pool)
+        stream = StreamCameras(fila=10)
+        varredura = VarreduraOffline(estado, stream, intervalo=0.01)
+        vencido = AGORA + timedelta(seconds=settings.CAMERAS_OFFLINE_APOS + 1)
+        await estado.gravar([hb(1), hb(2, status=StatusCamera.DEGRADADA), hb(3, entidade_id=2)])
+        await estado.gravar([Heartbeat(2, 1, StatusCamera.ONLINE, vencido)])
+
+        async with stream.assinar(1) as fila:
+            assert await varredura.varrer(agora=vencido) == 2  # câmera 1 e a 3, da entidade 2
+            mensagens, _ = await fila.proximas(timeout=0.1)
+            assert [json.loads(m) for m in mensagens] == [{
+                "camera_id": 1, "status": "OFFLINE", "anterior": "ONLINE",
+                "visto_em": AGORA.isoformat(), "ip": None, "firmware": None,
+            }]
+
+            # Já marcadas: não publica de novo
+            await asyncio.sleep(0.02)  # trava da varredura (90% do intervalo) expirada
+            assert await varredura.varrer(agora=vencido) == 0
+
+            # Voltou a reportar: o heartbeat aparece como OFFLINE → ONLINE
+            mudancas = await estado.gravar([Heartbeat(1, 1, StatusCamera.ONLINE, vencido)])
+            assert [(anterior, h.status) for anterior, h in mudancas] == [(StatusCamera.OFFLINE, StatusCamera.ONLINE)]
+
+        lidos = await estado.ler(1)
+        assert lidos[1].status == StatusCamera.ONLINE and lidos[2].status == StatusCamera.ONLINE
+        if pool is not None:
+            await pool.aclose()
+
+    @pytest.mark.asyncio
+    async def test_heartbeat_durante_varredura_vence(self):
+        pytest.importorskip("lupa")
+        estado = EstadoCameras(pool=fake_pool())
+        await estado.gravar([hb(1)])
+        vencido = AGORA + timedelta(seconds=settings.CAMERAS_OFFLINE_APOS + 1)
+
+        # Heartbeat novo entre a leitura dos hashes e o compare-and-set
+        original_pipeline = estado.pool.pipeline
+
+        def pipeline():
+            pipe = original_pipeline()
+            execute = pipe.execute
+
+            async def execute_e_reportar(*a, **k):
+                resultado = await execute(*a, **k)
+                if any(isinstance(r, dict) for r in resultado):
+                    await estado.pool.client.hset(EstadoCameras.make_key(1), "1",
+                                            Heartbeat(1, 1, StatusCamera.ONLINE, vencido).dumps())
+                return resultado
+
+            pipe.execute = execute_e_reportar
+            return pipe
+
+        estado.pool.pipeline = pipeline
+        assert await estado.marcar_offline(agora=vencido) == []
+        assert (await estado.ler(1))[1].status == StatusCamera.ONLINE
+        await estado.pool.aclose()
+
+
+class TestEventosSSE:
+    """Quadros SSE de uma conexão"""
+
+    @pytest.mark.asyncio
+    async def test_quadros(self):
+        fila = FilaConexao(maxlen=2)
+        desconectar = False
+
+        async def desconectado():
+            return desconectar
+
+        quadros = eventos_sse(fila, desconectado, heartbeat=0.01)
+        assert await quadros.__anext__() == "retry: 10\n\n"
+        assert await quadros.__anext__() == ": ping\n\n"
+
+        for i in range(3):
+            fila.put(json.dumps({"camera_id": i}))
+        assert await quadros.__anext__() == 'event: overflow\ndata: {"descartadas": 1}\n\n'
+        assert await quadros.__anext__() == (
+            'event: status\ndata: {"camera_id": 1}\n\nevent: status\ndata: {"camera_id": 2}\n\n'
+        )
+
+        desconectar = True
+        with pytest.raises(StopAsyncIteration):
+            await quadros.__anext__()
+
+
+class TestRota:
+    """GET /cameras/stream"""
+
+    def test_limite_do_worker(self, client, db_session, monkeypatch):
+        entidade = Entidade(nome="Entidade Stream", cnpj="66666666000166", tipo=TipoEntidade.EMPRESA,
+                            status=StatusEntidade.ATIVA, is_active=True)
+        db_session.add(entidade)
+        db_session.commit()
+        user = User(username="operador_stream", email="operador_stream@test.com", hashed_password="$2b$12$test",
+                    role=UserRole.OPERADOR, entidade_id=entidade.id, is_active=True)
+        db_session.add(user)
+        db_session.commit()
+        monkeypatch.setattr(camera_stream, "max_conexoes", 0)
+
+        response = client.get("/cameras/stream",
+                               headers={"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"})
+        assert response.status_code == 503
@@ -0,0 +1,179 @@
+"""
+Testes de câmeras e da ingestão de heartbeats em lote (app.core.cameras e app.routers.cameras)
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core import cameras as cameras_core
+from app.core.cameras import BufferHeartbeats, EstadoCameras, Heartbeat, gravar_estados, status_efetivo
+from app.core.config import settings
+from app.core.models import Camera, CameraEstado, StatusCamera
+from app.redis_client import RedisPool
+
+AGORA = datetime.now(timezone.utc).replace(microsecond=0)
+
+
+@pytest.fixture
+def cameras(db_session, entidade) -> list:
+    cameras = [Camera(entidade_id=entidade.id, codigo=f"CAM-{i}", nome=f"Câmera {i}") for i in range(3)]
+    db_session.add_all(cameras)
+    db_session.commit()
+    return cameras
+
+
+@pytest.fixture(autouse=True)
+def isolar_estado(monkeypatch, async_db_engine):
+    """Estado em memória, diretório e buffer limpos, flush no banco do teste"""
+    monkeypatch.setattr(cameras_core.estado_cameras, "local", {})
+    monkeypatch.setattr(cameras_core.heartbeat_buffer, "pendentes", {})
+    monkeypatch.setattr(cameras_core.heartbeat_buffer, "session_factory",
+                        async_sessionmaker(bind=async_db_engine, class_=AsyncSession))
+    cameras_core.diretorio_cameras.cache.clear()
+
+
+def hb(camera: Camera, segundos: int = 0, status: StatusCamera = StatusCamera.ONLINE) -> Heartbeat:
+    return Heartbeat(camera.id, camera.entidade_id, status, AGORA + timedelta(seconds=segundos), "10.0.0.1", "1.0")
+
+
+class TestBufferHeartbeats:
+    """Coalescência e upsert em lote"""
+
+    @pytest.mark.asyncio
+    async def test_coalesce_e_grava_mais_recente(self, db_session, cameras, async_db_engine):
+        buffer = BufferHeartbeats(async_sessionmaker(bind=async_db_engine, class_=AsyncSession), flush_max=2)
+
+        assert buffer.adicionar([hb(cameras[0], -10), hb(cameras[0], 0, StatusCamera.DEGRADADA)]) is False
+        assert buffer.adicionar([hb(cameras[0], -5)]) is False  # mais antigo: descartado
+        assert buffer.adicionar([hb(cameras[1])]) is True
+        assert len(buffer) == 2
+
+        assert await buffer.flush() == 2
+        assert len(buffer) == 0
+        estados = {e.camera_id: e for e in db_session.scalars(select(CameraEstado))}
+        assert estados[cameras[0].id].status == StatusCamera.DEGRADADA
+        assert buffer.stats()["recebidos"] == 4
+
+    @pytest.mark.asyncio
+    async def test_falha_devolve_ao_buffer(self, cameras):
+        def quebrada():
+            raise RuntimeError("banco indisponível")
+
+        buffer = BufferHeartbeats(quebrada)
+        buffer.adicionar([hb(cameras[0])])
+
+        assert await buffer.flush() == 0
+        assert len(buffer) == 1 and buffer.stats()["falhas"] == 1
+
+    @pytest.mark.asyncio
+    async def test_camera_excluida_nao_trava_o_buffer(self, db_session, cameras, async_db_engine):
+        """Câmera excluída por outro worker: a linha dela é descartada e as demais são gravadas"""
+        buffer = BufferHeartbeats(async_sessionmaker(bind=async_db_engine, class_=AsyncSession))
+        buffer.adicionar([hb(cameras[0]), hb(cameras[1])])
+        excluida = cameras[1].id
+        db_session.delete(cameras[1])
+        db_session.commit()
+
+        assert await buffer.flush() == 1
+        assert len(buffer) == 0
+        assert buffer.stats()["descartados"] == 1 and buffer.stats()["falhas"] == 0
+        assert set(db_session.scalars(select(CameraEstado.camera_id))) == {cameras[0].id}
+        assert excluida not in set(db_session.scalars(select(Camera.id)))
+
+    def test_upsert_nao_regride(self, db_engine, db_session, cameras):
+        with db_engine.begin() as conn:
+            gravar_estados(conn, [hb(cameras[0], 0).to_row(), hb(cameras[1], 0).to_row()])
+        with db_engine.begin() as conn:
+            gravar_estados(conn, [
+                hb(cameras[0], -60, StatusCamera.OFFLINE).to_row(),  # fora de ordem
+                hb(cameras[1], 60, StatusCamera.DEGRADADA).to_row(),
+            ])
+
+        estados = {e.camera_id: e.status for e in db_session.scalars(select(CameraEstado))}
+        assert estados == {cameras[0].id: StatusCamera.ONLINE, cameras[1].id: StatusCamera.DEGRADADA}
+
+
+class TestEstadoCameras:
+    """Último estado em hashes Redis"""
+
+    @pytest.mark.asyncio
+    async def test_hashes_por_entidade(self, cameras):
+        fakeredis = pytest.importorskip("fakeredis")
+        pytest.importorskip("lupa")
+        pool = RedisPool(connection_class=fakeredis.aioredis.FakeConnection, server=fakeredis.FakeServer())
+        estado = EstadoCameras(pool=pool)
+
+        await estado.gravar([hb(cameras[0]), hb(cameras[1], status=StatusCamera.DEGRADADA)])
+        assert await pool.client.hlen(EstadoCameras.make_key(cameras[0].entidade_id)) == 2
+
+        lidos = await estado.ler(cameras[0].entidade_id)
+        assert lidos[cameras[1].id] == hb(cameras[1], status=StatusCamera.DEGRADADA)
+
+        await estado.remover(cameras[0].entidade_id, cameras[0].id)
+        assert set(await estado.ler(cameras[0].entidade_id)) == {cameras[1].id}
+        await pool.aclose()
+
+    def test_status_efetivo(self):
+        assert status_efetivo(None, None) is None
+        assert status_efetivo(StatusCamera.ONLINE, AGORA, agora=AGORA + timedelta(seconds=30)) == StatusCamera.ONLINE
+        assert status_efetivo(StatusCamera.ONLINE, AGORA, agora=AGORA + timedelta(hours=1)) == StatusCamera.OFFLINE
+
+
+class TestRotas:
+    """CRUD de /cameras e POST /cameras/heartbeats"""
+
+    @pytest.fixture
+    def headers(self, entidade, gestor_headers) -> dict:
+        return gestor_headers(entidade)
+
+    def test_crud(self, client, headers):
+        response = client.post("/cameras/", headers=headers, json={"codigo": "CAM-X", "nome": "Portaria"})
+        assert response.status_code == 201, response.json()
+        camera = response.json()
+        assert camera["status"] is None
+
+        assert client.post("/cameras/", headers=headers, json={"codigo": "CAM-X", "nome": "Outra"}).status_code == 400
+
+        response = client.put(f"/cameras/{camera['id']}", headers=headers, json={"localizacao": "Bloco A"})
+        assert response.json()["localizacao"] == "Bloco A"
+
+        assert client.delete(f"/cameras/{camera['id']}", headers=headers).status_code == 200
+        assert client.get(f"/cameras/{camera['id']}", headers=headers).status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_heartbeats_em_lote(self, client, headers, cameras, db_session):
+        futuro = (AGORA + timedelta(hours=1)).isoformat()
+        lote = {"heartbeats": [
+            {"codigo": "CAM-0", "status": "ONLINE", "ip": "10.0.0.9"},
+            {"codigo": "CAM-1", "status": "DEGRADADA", "timestamp": futuro},
+            {"codigo": "CAM-1", "status": "ONLINE", "timestamp": (AGORA - timedelta(minutes=1)).isoformat()},
+            {"codigo": "NAO-EXISTE", "status": "ONLINE"},
+        ]}
+
+        response = client.post("/cameras/heartbeats", headers=headers, json=lote)
+        assert response.status_code == 202, response.json()
+        assert response.json() == {"aceitos": 3, "desconhecidos": ["NAO-EXISTE"], "total_desconhecidos": 1}
+
+        # Antes do flush, o estado já vem do Redis/memória
+        listagem = {c["codigo"]: c for c in client.get("/cameras/", headers=headers).json()["cameras"]}
+        assert listagem["CAM-0"]["status"] == "ONLINE" and listagem["CAM-0"]["ip"] == "10.0.0.9"
+        assert listagem["CAM-1"]["status"] == "DEGRADADA"  # timestamp futuro limitado ao recebimento
+        assert listagem["CAM-2"]["status"] is None
+
+        assert await cameras_core.heartbeat_buffer.flush() == 2
+        assert len(db_session.scalars(select(CameraEstado)).all()) == 2
+
+    def test_lote_excede_maximo(self, client, headers):
+        lote = {"heartbeats": [{"codigo": f"CAM-{i}", "status": "ONLINE"}
+                               for i in range(settings.CAMERAS_HEARTBEAT_MAX_LOTE + 1)]}
+        assert client.post("/cameras/heartbeats", headers=headers, json=lote).status_code == 422
+
+    def test_paginacao_keyset(self, client, headers, cameras):
+        primeira = client.get("/cameras/", headers=headers, params={"limit": 2}).json()
+        segunda = client.get("/cameras/", headers=headers, params={"limit": 2, "cursor": primeira["next_cursor"]}).json()
+
+        assert [c["codigo"] for c in primeira["cameras"] + segunda["cameras"]] == ["CAM-0", "CAM-1", "CAM-2"]
+        assert segunda["next_cursor"] is None
+        assert client.get("/cameras/", headers=headers, params={"cursor": "x"}).status_code == 400
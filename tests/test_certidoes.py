@@ -0,0 +1,249 @@
+"""
+Testes do subsistema de certidões (app.core.certidoes e app.routers.certidoes)
+"""
+import asyncio
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from app.core import certidoes as certidoes_core
+from app.core.cache import TTLLRUCache
+from app.core.certidoes import (
+    ConsultaCertidao,
+    ResultadoVerificacao,
+    RevalidadorCertidoes,
+    recontar_certidoes,
+    registrar_verificador,
+    revalidar_lote,
+    selecionar_lotes,
+)
+from app.core.models import (
+    Certidao,
+    CertidaoContador,
+    Entidade,
+    StatusCertidao,
+    TipoCertidao,
+)
+
+HOJE = date.today()
+
+
+def nova_certidao(db: Session, entidade: Entidade, numero: str, dias: int = 30,
+                  tipo: TipoCertidao = TipoCertidao.CND_FEDERAL, **extra) -> Certidao:
+    certidao = Certidao(entidade_id=entidade.id, cnpj_fornecedor="11111111000111", tipo=tipo, numero=numero,
+                        data_validade=HOJE + timedelta(days=dias), **extra)
+    db.add(certidao)
+    db.commit()
+    return certidao
+
+
+def contadores(db: Session) -> dict:
+    return {
+        (c.entidade_id, c.dimensao, c.valor): c.total
+        for c in db.scalars(select(CertidaoContador)) if c.total
+    }
+
+
+@pytest.fixture
+def verificadores():
+    """Isola os verificadores registrados por teste"""
+    salvos = dict(certidoes_core._verificadores)
+    yield certidoes_core._verificadores
+    certidoes_core._verificadores.clear()
+    certidoes_core._verificadores.update(salvos)
+
+
+class TestContadores:
+    """Contadores incrementais x recontagem"""
+
+    def test_incremental_igual_a_recontagem(self, db_session, entidade, criar_entidade):
+        outra = criar_entidade("Outra", "99999999000199")
+        a = nova_certidao(db_session, entidade, "A")
+        b = nova_certidao(db_session, entidade, "B", tipo=TipoCertidao.FGTS)
+        c = nova_certidao(db_session, outra, "C", tipo=TipoCertidao.CNDT)
+
+        a.status = StatusCertidao.VALIDA
+        b.tipo = TipoCertidao.CNDT
+        c.entidade_id = entidade.id
+        db_session.commit()
+        db_session.delete(a)
+        db_session.commit()
+
+        incremental = contadores(db_session)
+        assert incremental == {
+            (entidade.id, "status", "PENDENTE"): 2,
+            (entidade.id, "tipo", "CNDT"): 2,
+        }
+
+        recontar_certidoes(db_session)
+        assert contadores(db_session) == incremental
+
+
+class TestIndiceDeVencimentos:
+    """Certidões como fonte do índice de vencimentos"""
+
+    def test_refresh_inclui_certidoes(self, db_session, entidade):
+        from app.core.models import Vencimento
+        from app.core.vencimentos import refresh_vencimentos
+
+        certidao = nova_certidao(db_session, entidade, "CND-1", dias=15)
+
+        assert refresh_vencimentos(db_session)["CERTIDAO"] == 1
+        vencimento = db_session.scalar(select(Vencimento).where(Vencimento.referencia_id == certidao.id))
+        assert vencimento.data_vencimento == certidao.data_validade
+        assert vencimento.descricao == "CND_FEDERAL CND-1 - CNPJ 11111111000111"
+
+
+class TestRevalidacaoEmLote:
+    """Lotes, limite por emissor e cache de resultados"""
+
+    def test_selecao_de_lotes(self, db_session, entidade):
+        recente = datetime.now(timezone.utc) - timedelta(hours=1)
+        antiga = datetime.now(timezone.utc) - timedelta(days=3)
+        ids = [nova_certidao(db_session, entidade, f"N{i}").id for i in range(5)]
+        nova_certidao(db_session, entidade, "recente", ultima_verificacao=recente)
+        velha = nova_certidao(db_session, entidade, "antiga", ultima_verificacao=antiga)
+
+        lotes = selecionar_lotes(db_session, tamanho=2)
+
+        assert [len(lote) for lote in lotes] == [2, 2, 2]
+        assert sum(lotes, []) == ids + [velha.id]
+
+    def test_limite_por_emissor_e_cache(self, verificadores):
+        ativos = defaultdict(int)
+        pico = defaultdict(int)
+        chamadas = []
+
+        async def lento(consulta: ConsultaCertidao) -> ResultadoVerificacao:
+            chamadas.append(consulta)
+            ativos[consulta.emissor] += 1
+            pico[consulta.emissor] = max(pico[consulta.emissor], ativos[consulta.emissor])
+            await asyncio.sleep(0.01)
+            ativos[consulta.emissor] -= 1
+            return ResultadoVerificacao(StatusCertidao.VALIDA)
+
+        registrar_verificador("TST", lento)
+        registrar_verificador("CAIXA", lento)
+        revalidador = RevalidadorCertidoes(concorrencia_padrao=3, concorrencia={"TST": 1}, cache=TTLLRUCache(100, 60))
+        consultas = [
+            ConsultaCertidao(tipo, f"{i:08d}000100", str(i), HOJE)
+            for tipo in (TipoCertidao.CNDT, TipoCertidao.FGTS) for i in range(6)
+        ]
+
+        resultados = asyncio.run(revalidador.verificar(consultas + consultas[:2]))
+
+        assert len(resultados) == 12
+        assert len(chamadas) == 12
+        assert pico["TST"] == 1
+        assert pico["CAIXA"] == 3
+
+        asyncio.run(revalidador.verificar(consultas))
+        assert len(chamadas) == 12  # tudo servido pelo cache
+
+    def test_revalidar_lote_grava_e_isola_falhas(self, db_session, entidade, verificadores, criar_entidade):
+        async def tst_fora_do_ar(consulta):
+            raise ConnectionError("timeout")
+
+        registrar_verificador("TST", tst_fora_do_ar)
+        valida = nova_certidao(db_session, entidade, "V", dias=10)
+        vencida = nova_certidao(db_session, entidade, "X", dias=-1)
+        falha = nova_certidao(db_session, entidade, "F", tipo=TipoCertidao.CNDT)
+        # Mesma certidão acompanhada por outra entidade: uma consulta só
+        outra = criar_entidade("Outra", "99999999000199")
+        copia = nova_certidao(db_session, outra, "V", dias=10)
+
+        revalidador = RevalidadorCertidoes(cache=TTLLRUCache(100, 60))
+        resumo = revalidar_lote(db_session, [valida.id, vencida.id, falha.id, copia.id], revalidador)
+
+        assert resumo["verificadas"] == 3
+        assert resumo["falhas"] == 1
+        assert revalidador.consultas == 3
+        db_session.expire_all()
+        assert valida.status == StatusCertidao.VALIDA
+        assert copia.status == StatusCertidao.VALIDA
+        assert vencida.status == StatusCertidao.VENCIDA
+        assert falha.status == StatusCertidao.PENDENTE
+        assert falha.ultima_verificacao is None
+        assert contadores(db_session)[(entidade.id, "status", "VENCIDA")] == 1
+
+
+    def test_revalidar_lote_preserva_edicao_concorrente(self, db_engine, db_session, entidade, verificadores):
+        editada = nova_certidao(db_session, entidade, "E", dias=-1)
+        intacta = nova_certidao(db_session, entidade, "I", dias=-1)
+        nova_validade = HOJE + timedelta(days=180)
+
+        async def emissor_lento(consulta):
+            # Usuário renova a certidão enquanto o emissor responde
+            if consulta.numero == "E":
+                with Session(db_engine) as outra:
+                    outra.get(Certidao, editada.id).data_validade = nova_validade
+                    outra.commit()
+            return ResultadoVerificacao(StatusCertidao.VENCIDA)
+
+        registrar_verificador("RECEITA_FEDERAL", emissor_lento)
+        resumo = revalidar_lote(db_session, [editada.id, intacta.id], RevalidadorCertidoes(cache=TTLLRUCache(100, 60)))
+
+        assert resumo["verificadas"] == 1
+        assert resumo["concorrentes"] == 1
+        db_session.expire_all()
+        assert editada.data_validade == nova_validade
+        assert editada.status == StatusCertidao.PENDENTE
+        assert editada.ultima_verificacao is None
+        assert intacta.status == StatusCertidao.VENCIDA
+
+
+class TestRotas:
+    """Rotas /certidoes e /entidades/{id}/certidoes"""
+
+    @pytest.fixture
+    def headers(self, entidade, gestor_headers) -> dict:
+        return gestor_headers(entidade)
+
+    def test_ciclo_completo(self, client, entidade, headers):
+        client.get("/certidoes/stats", headers=headers)  # cookie CSRF
+
+        response = client.post("/certidoes", headers=headers, json={
+            "cnpj_fornecedor": "11.111.111/0001-11",
+            "tipo": "FGTS",
+            "numero": "CRF-2025-001",
+            "data_validade": (HOJE + timedelta(days=5)).isoformat(),
+        })
+        assert response.status_code == 201, response.json()
+        certidao = response.json()
+        assert certidao["status"] == "PENDENTE"
+
+        vencendo = client.get("/certidoes/vencendo", headers=headers, params={"dias": 7}).json()
+        assert [(c["numero"], c["dias_restantes"], c["entidade"]) for c in vencendo] == [
+            ("CRF-2025-001", 5, entidade.nome)
+        ]
+
+        response = client.put(f"/certidoes/{certidao['id']}", headers=headers, json={"status": "VALIDA"})
+        assert response.json()["status"] == "VALIDA"
+
+        nova_validade = (HOJE + timedelta(days=180)).isoformat()
+        response = client.patch(f"/certidoes/{certidao['id']}/renovar", headers=headers,
+                                json={"data_validade": nova_validade})
+        assert response.json()["status"] == "PENDENTE"
+        assert client.get("/certidoes/vencendo", headers=headers, params={"dias": 7}).json() == []
+
+        stats = client.get("/certidoes/stats", headers=headers).json()
+        assert stats["total"] == 1
+        assert stats["por_status"] == {"PENDENTE": 1}
+        assert stats["por_tipo"] == {"FGTS": 1}
+        assert stats["vencendo"]["7"] == 0
+
+        assert client.delete(f"/certidoes/{certidao['id']}", headers=headers).status_code == 200
+        assert client.get("/certidoes/stats", headers=headers).json()["total"] == 0
+
+    def test_certidoes_da_entidade(self, client, db_session, entidade, headers, criar_entidade):
+        nova_certidao(db_session, entidade, "B", dias=40)
+        nova_certidao(db_session, entidade, "A", dias=10)
+        outra = criar_entidade("Outra", "99999999000199")
+
+        response = client.get(f"/entidades/{entidade.id}/certidoes", headers=headers)
+        assert [c["numero"] for c in response.json()] == ["A", "B"]
+
+        assert client.get(f"/entidades/{outra.id}/certidoes", headers=headers).status_code == 403
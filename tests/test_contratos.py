@@ -0,0 +1,194 @@
+"""
+Testes do router de contratos (app.routers.contratos) e da paginação keyset
+"""
+from datetime import date, timedelta
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import select, text
+from sqlalchemy.orm import Session
+
+from app.core.models import Contrato, Entidade, StatusContrato
+from app.core.pagination import InvalidCursor, decode_cursor, encode_cursor, keyset_page
+
+CNPJ_A = "11111111000111"
+CNPJ_B = "22222222000122"
+
+
+def popular(db: Session, entidade: Entidade, total: int) -> None:
+    inicio = date(2025, 1, 1)
+    db.add_all([
+        Contrato(
+            entidade_id=entidade.id,
+            numero=f"{i}/2025",
+            objeto="Prestação de serviços",
+            cnpj_fornecedor=CNPJ_A if i % 2 else CNPJ_B,
+            valor=1000.0 * i,
+            vigencia=inicio + timedelta(days=i % 7),
+            status=StatusContrato.VIGENTE if i % 3 else StatusContrato.ENCERRADO,
+        )
+        for i in range(1, total + 1)
+    ])
+    db.commit()
+
+
+@pytest.fixture
+def headers(entidade, gestor_headers) -> dict:
+    return gestor_headers(entidade)
+
+
+def percorrer(client: TestClient, headers: dict, **params) -> list:
+    """Segue next_cursor até a última página e devolve todos os contratos"""
+    contratos, cursor = [], None
+    while True:
+        query = dict(params, **({"cursor": cursor} if cursor else {}))
+        response = client.get("/contratos/", headers=headers, params=query)
+        assert response.status_code == 200, response.json()
+        data = response.json()
+        contratos.extend(data["contratos"])
+        cursor = data["next_cursor"]
+        if cursor is None:
+            return contratos
+
+
+class TestCursor:
+    """Codificação do cursor opaco"""
+
+    def test_ida_e_volta(self):
+        cursor = encode_cursor("vigencia", [date(2025, 3, 1), 42])
+        assert decode_cursor(cursor, "vigencia") == ["2025-03-01", 42]
+
+    def test_ordenacao_diferente(self):
+        with pytest.raises(InvalidCursor):
+            decode_cursor(encode_cursor("-id", [10]), "id")
+
+    def test_cursor_ilegivel(self):
+        with pytest.raises(InvalidCursor):
+            decode_cursor("nao-e-um-cursor", "id")
+
+
+class TestListagemKeyset:
+    """GET /contratos/ com cursor e filtros"""
+
+    def test_percorre_todas_as_paginas(self, client, db_session, entidade, headers):
+        popular(db_session, entidade, 23)
+
+        contratos = percorrer(client, headers, limit=5)
+
+        ids = [c["id"] for c in contratos]
+        assert len(ids) == 23
+        assert ids == sorted(ids, reverse=True)
+
+    def test_ordenacao_por_vigencia_com_empates(self, client, db_session, entidade, headers):
+        popular(db_session, entidade, 30)
+
+        contratos = percorrer(client, headers, ordenar="vigencia", limit=4)
+
+        chaves = [(c["vigencia"], c["id"]) for c in contratos]
+        assert len(chaves) == 30
+        assert chaves == sorted(chaves)
+
+    def test_filtros(self, client, db_session, entidade, headers):
+        popular(db_session, entidade, 30)
+
+        contratos = percorrer(
+            client, headers, limit=3, status="VIGENTE", cnpj_fornecedor="11.111.111/0001-11",
+            vigencia_de="2025-01-02", vigencia_ate="2025-01-05",
+        )
+
+        assert contratos
+        for c in contratos:
+            assert c["status"] == "VIGENTE"
+            assert c["cnpj_fornecedor"] == CNPJ_A
+            assert "2025-01-02" <= c["vigencia"] <= "2025-01-05"
+        esperados = db_session.scalars(
+            select(Contrato.id).where(
+                Contrato.status == StatusContrato.VIGENTE,
+                Contrato.cnpj_fornecedor == CNPJ_A,
+                Contrato.vigencia.between(date(2025, 1, 2), date(2025, 1, 5)),
+            )
+        ).all()
+        assert sorted(c["id"] for c in contratos) == sorted(esperados)
+
+    def test_isolamento_entre_entidades(self, client, db_session, entidade, headers, criar_entidade):
+        outra = criar_entidade("Outra Entidade", "66666666666666")
+        popular(db_session, outra, 5)
+        popular(db_session, entidade, 2)
+
+        response = client.get("/contratos/", headers=headers)
+
+        data = response.json()
+        assert data["entidade_status"] == "ATIVA"
+        assert {c["entidade_id"] for c in data["contratos"]} == {entidade.id}
+        outro_id = db_session.scalar(select(Contrato.id).where(Contrato.entidade_id == outra.id))
+        assert client.get(f"/contratos/{outro_id}", headers=headers).status_code == 404
+
+    def test_cursor_invalido(self, client, entidade, headers):
+        response = client.get("/contratos/", headers=headers, params={"cursor": "xyz"})
+        assert response.status_code == 400
+
+        cursor = encode_cursor("-id", [10])
+        response = client.get("/contratos/", headers=headers, params={"cursor": cursor, "ordenar": "vigencia"})
+        assert response.status_code == 400
+
+    @pytest.mark.parametrize("ordenar,indice", [
+        ("-id", "ix_contratos_entidade_id"),
+        ("vigencia", "ix_contratos_entidade_vigencia"),
+    ])
+    def test_pagina_profunda_usa_indice(self, db_session, ordenar, indice):
+        """A página seguinte é uma busca no índice, sem ordenação em memória"""
+        from sqlalchemy.dialects import sqlite
+        from app.routers.contratos import ORDENACOES
+
+        columns = ORDENACOES[ordenar.lstrip("-")]
+        after = [date(2025, 1, 3), 500] if ordenar == "vigencia" else [500]
+        stmt = keyset_page(
+            select(Contrato).where(Contrato.entidade_id == 1), columns, after, ordenar.startswith("-"), 50
+        )
+        sql = str(stmt.compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True}))
+
+        plano = " ".join(row[-1] for row in db_session.execute(text(f"EXPLAIN QUERY PLAN {sql}")))
+        assert indice in plano
+        assert "TEMP B-TREE" not in plano
+
+
+class TestCRUD:
+    """Criação, leitura, atualização e remoção escopadas pela entidade"""
+
+    def payload(self, **extra) -> dict:
+        data = {
+            "numero": "10/2025",
+            "objeto": "Manutenção predial",
+            "cnpj_fornecedor": "11.111.111/0001-11",
+            "valor": 15000.5,
+            "vigencia": "2026-01-31",
+        }
+        data.update(extra)
+        return data
+
+    def test_ciclo_completo(self, client, entidade, headers):
+        client.get("/contratos/", headers=headers)  # cookie CSRF
+
+        response = client.post("/contratos/", headers=headers, json=self.payload())
+        assert response.status_code == 201, response.json()
+        criado = response.json()
+        assert criado["entidade_id"] == entidade.id
+        assert criado["cnpj_fornecedor"] == CNPJ_A
+        assert criado["status"] == "VIGENTE"
+
+        duplicado = client.post("/contratos/", headers=headers, json=self.payload())
+        assert duplicado.status_code == 400
+
+        response = client.put(f"/contratos/{criado['id']}", headers=headers, json={"status": "SUSPENSO", "valor": 1.0})
+        assert response.status_code == 200
+        assert response.json()["status"] == "SUSPENSO"
+        assert response.json()["numero"] == "10/2025"
+
+        assert client.get(f"/contratos/{criado['id']}", headers=headers).json()["valor"] == 1.0
+        assert client.delete(f"/contratos/{criado['id']}", headers=headers).status_code == 200
+        assert client.get(f"/contratos/{criado['id']}", headers=headers).status_code == 404
+
+    def test_cnpj_invalido(self, client, entidade, headers):
+        client.get("/contratos/", headers=headers)
+        response = client.post("/contratos/", headers=headers, json=self.payload(cnpj_fornecedor="123"))
+        assert response.status_code == 422
@@ -0,0 +1,197 @@
+"""
+Testes do resumo do dashboard (app.core.dashboard e app.routers.dashboard)
+"""
+from dataclasses import replace
+from datetime import date, timedelta
+
+from sqlalchemy import select, update
+from sqlalchemy.orm import Session
+
+from app.core import dashboard as dashboard_core
+from app.core.dashboard import COLUNAS, recalcular_resumos
+from app.core.principal_cache import principal_cache
+from app.core.models import (
+    Certidao,
+    Contrato,
+    Entidade,
+    ResumoEntidade,
+    StatusCertidao,
+    StatusContrato,
+    TipoCertidao,
+    UserRole,
+)
+
+HOJE = date.today()
+
+
+def novo_contrato(db: Session, entidade: Entidade, numero: str, valor: float, dias: int, **extra) -> Contrato:
+    contrato = Contrato(entidade_id=entidade.id, numero=numero, objeto="Manutenção predial",
+                        cnpj_fornecedor="11111111000111", valor=valor, vigencia=HOJE + timedelta(days=dias), **extra)
+    db.add(contrato)
+    db.commit()
+    return contrato
+
+
+def nova_certidao(db: Session, entidade: Entidade, numero: str, dias: int, **extra) -> Certidao:
+    certidao = Certidao(entidade_id=entidade.id, cnpj_fornecedor="11111111000111", tipo=TipoCertidao.FGTS,
+                        numero=numero, data_validade=HOJE + timedelta(days=dias), **extra)
+    db.add(certidao)
+    db.commit()
+    return certidao
+
+
+def resumos(db: Session) -> dict:
+    db.expire_all()
+    return {
+        r.entidade_id: {c: round(getattr(r, c), 2) for c in COLUNAS}
+        for r in db.scalars(select(ResumoEntidade))
+    }
+
+
+class TestManutencaoIncremental:
+    """Deltas por escrita x recálculo completo"""
+
+    def test_incremental_igual_ao_recalculo(self, db_session, entidade, criar_entidade):
+        outra = criar_entidade("Outra", "44444444000144")
+        a = novo_contrato(db_session, entidade, "1/2025", 1000.10, 10)
+        b = novo_contrato(db_session, entidade, "2/2025", 250.25, 90)
+        c = novo_contrato(db_session, outra, "3/2025", 99.99, 5)
+        x = nova_certidao(db_session, entidade, "CRF-1", 3)
+        nova_certidao(db_session, entidade, "CRF-2", 100, status=StatusCertidao.IRREGULAR)
+
+        a.status = StatusContrato.SUSPENSO
+        b.valor = 300.0
+        b.vigencia = HOJE + timedelta(days=20)
+        c.entidade_id = entidade.id
+        x.status = StatusCertidao.VENCIDA
+        db_session.commit()
+        db_session.delete(b)
+        db_session.commit()
+
+        incremental = resumos(db_session)
+        assert incremental[entidade.id] == {
+            "contratos_total": 2, "contratos_vigentes": 1, "contratos_vencendo": 2,
+            "valor_total": 1100.09, "valor_vigente": 99.99,
+            "certidoes_total": 2, "certidoes_irregulares": 2, "certidoes_vencendo": 1,
+            "riscos_criticos": 0,
+        }
+        assert incremental[outra.id]["contratos_total"] == 0
+
+        recalcular_resumos(db_session)
+        assert resumos(db_session) == incremental
+
+    def test_escrita_irrelevante_nao_muda_versao(self, db_session, entidade):
+        contrato = novo_contrato(db_session, entidade, "1/2025", 10.0, 10)
+        versao = db_session.get(ResumoEntidade, entidade.id).versao
+
+        contrato.objeto = "Outro objeto"
+        db_session.commit()
+        db_session.expire_all()
+
+        assert db_session.get(ResumoEntidade, entidade.id).versao == versao
+
+
+class TestRecalculo:
+    """Recálculo periódico corrige desvios sem invalidar o que não mudou"""
+
+    def test_corrige_desvio_e_preserva_versao(self, db_session, entidade, criar_entidade):
+        outra = criar_entidade("Outra", "44444444000144")
+        novo_contrato(db_session, entidade, "1/2025", 10.0, 10)
+        novo_contrato(db_session, outra, "2/2025", 20.0, 10)
+        versoes = {r.entidade_id: r.versao for r in db_session.scalars(select(ResumoEntidade))}
+
+        # Escrita fora do ORM não dispara eventos
+        db_session.execute(update(Contrato).where(Contrato.entidade_id == entidade.id).values(valor=50.0))
+        db_session.commit()
+
+        assert recalcular_resumos(db_session) == {"entidades": 2, "alteradas": 1, "concorrentes": 0}
+        db_session.expire_all()
+        assert db_session.get(ResumoEntidade, entidade.id).valor_total == 50.0
+        assert db_session.get(ResumoEntidade, entidade.id).versao == versoes[entidade.id] + 1
+        assert db_session.get(ResumoEntidade, outra.id).versao == versoes[outra.id]
+
+    def test_delta_concorrente_nao_e_perdido(self, db_engine, db_session, entidade, monkeypatch):
+        novo_contrato(db_session, entidade, "1/2025", 10.0, 10)
+        db_session.execute(update(Contrato).where(Contrato.entidade_id == entidade.id).values(valor=50.0))
+        db_session.commit()
+
+        # Outro contrato gravado (com seu delta) enquanto o recálculo agrega as fontes
+        fontes = list(dashboard_core.FONTES)
+        contratos = fontes[0]
+
+        def agregado_com_escrita(hoje):
+            with Session(db_engine) as outra:
+                novo_contrato(outra, entidade, "2/2025", 5.0, 10)
+            return contratos.agregado(hoje)
+
+        monkeypatch.setattr(dashboard_core, "FONTES", [replace(contratos, agregado=agregado_com_escrita), *fontes[1:]])
+        assert recalcular_resumos(db_session) == {"entidades": 1, "alteradas": 0, "concorrentes": 1}
+        assert resumos(db_session)[entidade.id]["contratos_total"] == 2
+
+        monkeypatch.setattr(dashboard_core, "FONTES", fontes)
+        assert recalcular_resumos(db_session)["alteradas"] == 1
+        assert resumos(db_session)[entidade.id]["valor_total"] == 55.0
+
+    def test_virada_do_dia(self, db_session, entidade):
+        novo_contrato(db_session, entidade, "1/2025", 10.0, 30)
+        assert resumos(db_session)[entidade.id]["contratos_vencendo"] == 1
+
+        recalcular_resumos(db_session, hoje=HOJE - timedelta(days=1))
+        assert resumos(db_session)[entidade.id]["contratos_vencendo"] == 0
+
+
+class TestRota:
+    """GET /dashboard/gestor com cache condicional"""
+
+    def test_etag_e_304(self, client, db_session, entidade, gestor_headers):
+        headers = gestor_headers(entidade)
+        novo_contrato(db_session, entidade, "1/2025", 1500.0, 10)
+
+        response = client.get("/dashboard/gestor", headers=headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["contratos"] == {"total": 1, "vigentes": 1, "vencendo": 1,
+                                     "valor_total": 1500.0, "valor_vigente": 1500.0}
+        etag = response.headers["etag"]
+        last_modified = response.headers["last-modified"]
+        assert response.headers["cache-control"] == "private, no-cache"
+
+        response = client.get("/dashboard/gestor", headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+
+        response = client.get("/dashboard/gestor", headers={**headers, "If-Modified-Since": last_modified})
+        assert response.status_code == 304
+
+        nova_certidao(db_session, entidade, "CRF-1", 5)
+        response = client.get("/dashboard/gestor", headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.headers["etag"] != etag
+        assert response.json()["certidoes"]["vencendo"] == 1
+
+    def test_etag_muda_com_nome_da_entidade(self, client, db_session, entidade, gestor_headers):
+        headers = gestor_headers(entidade)
+        etag = client.get("/dashboard/gestor", headers=headers).headers["etag"]
+
+        entidade.nome = "Entidade Renomeada"
+        db_session.commit()
+        principal_cache.invalidate_entidade(entidade.id)
+
+        response = client.get("/dashboard/gestor", headers={**headers, "If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()["entidade"] == "Entidade Renomeada"
+        assert response.headers["etag"] != etag
+
+    def test_entidade_sem_dados(self, client, db_session, entidade, gestor_headers):
+        headers = gestor_headers(entidade)
+
+        response = client.get("/dashboard/gestor", headers=headers)
+
+        assert response.status_code == 200
+        assert response.json()["contratos"]["total"] == 0
+        assert "last-modified" not in response.headers
+
+    def test_operador_bloqueado(self, client, db_session, entidade, gestor_headers):
+        headers = gestor_headers(entidade, role=UserRole.OPERADOR)
+        assert client.get("/dashboard/gestor", headers=headers).status_code == 403
@@ -0,0 +1,53 @@
+"""
+Testes dos valores antes/depois entregues por app.core.escritas
+"""
+from sqlalchemy import Integer, String, create_engine
+from sqlalchemy.orm import DeclarativeBase, Mapped, Session, mapped_column
+
+from app.core.escritas import observar_escritas
+
+
+class Base(DeclarativeBase):
+    pass
+
+
+class Item(Base):
+    __tablename__ = "itens_escritas"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    nome: Mapped[str] = mapped_column(String(50))
+    grupo: Mapped[str] = mapped_column(String(50), nullable=True)
+    nota: Mapped[str] = mapped_column(String(50), nullable=True)
+
+
+ESCRITAS = []
+observar_escritas(Item, ("nome", "grupo"), lambda connection, target, antes, depois: ESCRITAS.append((antes, depois)))
+
+
+def test_antes_e_depois():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    ESCRITAS.clear()
+
+    with Session(engine, expire_on_commit=True) as db:
+        item = Item(nome="a")
+        db.add(item)
+        db.commit()
+
+        # Atributo expirado pelo commit: o valor anterior ainda é carregado
+        item.nome = "b"
+        item.grupo = "g"
+        db.commit()
+
+        # Campo não observado: nenhuma chamada
+        item.nota = "x"
+        db.commit()
+
+        db.delete(item)
+        db.commit()
+
+    assert ESCRITAS == [
+        (None, {"nome": "a", "grupo": None}),
+        ({"nome": "a", "grupo": None}, {"nome": "b", "grupo": "g"}),
+        ({"nome": "b", "grupo": "g"}, None),
+    ]
@@ -0,0 +1,134 @@
+"""
+Testes de fornecedores (app.core.fornecedores e app.routers.fornecedores)
+"""
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import Session
+
+from app.core.fornecedores import BuscaInvalida, buscar_fornecedores, consulta_fornecedores
+from app.core.models import Fornecedor, StatusFornecedor
+
+
+def novo_fornecedor(db: Session, cnpj: str, razao_social: str, **extra) -> Fornecedor:
+    fornecedor = Fornecedor(cnpj=cnpj, razao_social=razao_social, **extra)
+    db.add(fornecedor)
+    db.commit()
+    return fornecedor
+
+
+@pytest.fixture
+def cadastro(db_session: Session):
+    novo_fornecedor(db_session, "12345678000190", "Construtora Alfa Ltda", nome_fantasia="Alfa Obras", uf="SP")
+    novo_fornecedor(db_session, "12345999000101", "Papelaria Beta ME", nome_fantasia="Beta Papéis", uf="RJ")
+    novo_fornecedor(db_session, "98765432000155", "Gama Serviços de Construção", status=StatusFornecedor.INATIVO)
+    novo_fornecedor(db_session, "12345678901", "João da Silva")
+
+
+async def buscar(engine, **filtros):
+    Session = async_sessionmaker(bind=engine)
+    async with Session() as db:
+        fornecedores, total = await buscar_fornecedores(db, **filtros)
+    return [f.razao_social for f in fornecedores], total
+
+
+class TestBusca:
+    """Prefixo de CNPJ e busca por trigramas"""
+
+    @pytest.mark.asyncio
+    async def test_prefixo_de_cnpj(self, cadastro, async_db_engine):
+        assert await buscar(async_db_engine, cnpj="12.345") == (
+            ["Construtora Alfa Ltda", "João da Silva", "Papelaria Beta ME"], 3
+        )
+        assert await buscar(async_db_engine, search="12.345.678/0001") == (["Construtora Alfa Ltda"], 1)
+        assert await buscar(async_db_engine, cnpj="12.345.678/0001-90") == (["Construtora Alfa Ltda"], 1)
+
+    @pytest.mark.asyncio
+    async def test_busca_por_nome(self, cadastro, async_db_engine):
+        # Substring no meio da palavra, sem diferenciar maiúsculas
+        assert await buscar(async_db_engine, search="CONSTRU") == (
+            ["Construtora Alfa Ltda", "Gama Serviços de Construção"], 2
+        )
+        # Nome fantasia também é indexado
+        assert await buscar(async_db_engine, search="papéis") == (["Papelaria Beta ME"], 1)
+        assert await buscar(async_db_engine, search="constru", status=StatusFornecedor.ATIVO) == (
+            ["Construtora Alfa Ltda"], 1
+        )
+        # Aspas não quebram a sintaxe do MATCH
+        assert await buscar(async_db_engine, search='alfa" OR "beta') == ([], 0)
+
+    @pytest.mark.asyncio
+    async def test_termo_curto(self, cadastro, async_db_engine):
+        with pytest.raises(BuscaInvalida):
+            await buscar(async_db_engine, search="al")
+
+    @pytest.mark.asyncio
+    async def test_paginacao(self, db_session, async_db_engine):
+        for i in range(25):
+            novo_fornecedor(db_session, f"{i:014d}", f"Fornecedor {i:02d}")
+
+        nomes, total = await buscar(async_db_engine, search="fornecedor", page=3, limit=10)
+
+        assert total == 25
+        assert nomes == [f"Fornecedor {i}" for i in range(20, 25)]
+
+    @pytest.mark.asyncio
+    async def test_indice_fts_acompanha_escritas(self, db_session, cadastro, async_db_engine):
+        alfa = db_session.query(Fornecedor).filter_by(cnpj="12345678000190").one()
+        alfa.razao_social = "Engenharia Delta SA"
+        alfa.nome_fantasia = None
+        db_session.commit()
+
+        assert await buscar(async_db_engine, search="alfa") == ([], 0)
+        assert await buscar(async_db_engine, search="delta") == (["Engenharia Delta SA"], 1)
+
+        db_session.delete(alfa)
+        db_session.commit()
+        assert await buscar(async_db_engine, search="delta") == ([], 0)
+
+    def test_plano_usa_indices(self, db_session, cadastro):
+        def plano(stmt) -> str:
+            compiled = stmt.compile(db_session.get_bind(), compile_kwargs={"literal_binds": True})
+            rows = db_session.execute(text(f"EXPLAIN QUERY PLAN {compiled}")).all()
+            return " | ".join(row[-1] for row in rows)
+
+        prefixo = plano(consulta_fornecedores("sqlite", cnpj="123"))
+        assert "USING INDEX" in prefixo and "cnpj" in prefixo
+
+        nome = plano(consulta_fornecedores("sqlite", search="constru"))
+        assert "fornecedores_fts VIRTUAL TABLE INDEX" in nome
+        assert "SCAN fornecedores" not in nome.replace("fornecedores_fts", "")
+
+
+class TestRotas:
+    """CRUD /fornecedores"""
+
+    @pytest.fixture
+    def headers(self, entidade, gestor_headers) -> dict:
+        return gestor_headers(entidade)
+
+    def test_ciclo_completo(self, client, headers):
+        client.get("/fornecedores", headers=headers)  # cookie CSRF
+
+        novo = {"cnpj": "12.345.678/0001-90", "razao_social": "Construtora Alfa Ltda", "uf": "sp"}
+        response = client.post("/fornecedores", headers=headers, json=novo)
+        assert response.status_code == 201, response.json()
+        fornecedor = response.json()
+        assert fornecedor["cnpj"] == "12345678000190"
+        assert fornecedor["uf"] == "SP"
+        assert (fornecedor["tipo"], fornecedor["status"]) == ("JURIDICA", "ATIVO")
+
+        assert client.post("/fornecedores", headers=headers, json=novo).status_code == 400
+
+        response = client.get("/fornecedores", headers=headers, params={"search": "alfa", "page": 1, "limit": 10})
+        assert response.json() == {**response.json(), "total": 1, "page": 1, "pages": 1}
+        assert response.json()["items"][0]["id"] == fornecedor["id"]
+
+        assert client.get("/fornecedores", headers=headers, params={"search": "al"}).status_code == 400
+
+        response = client.put(f"/fornecedores/{fornecedor['id']}", headers=headers, json={"status": "INATIVO"})
+        assert response.json()["status"] == "INATIVO"
+        assert client.get("/fornecedores", headers=headers, params={"status": "ATIVO"}).json()["total"] == 0
+
+        assert client.delete(f"/fornecedores/{fornecedor['id']}", headers=headers).status_code == 200
+        assert client.get(f"/fornecedores/{fornecedor['id']}", headers=headers).status_code == 404
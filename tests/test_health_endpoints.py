@@ -31,7 +31,7 @@ class TestHealthEndpoints:
         assert "platform" in data
         assert "timestamp" in data
     
-    @patch('app.database.check_database_connection')
+    @patch('app.database.check_async_database_connection')
     def test_ready_returns_200_with_db_connected(self, mock_db, client):
         """Testa /ready quando banco está conectado - retorna 200"""
         mock_db.return_value = True
@@ -43,7 +43,7 @@ class TestHealthEndpoints:
         assert data["status"] == "ready"
         assert data["database"] == "connected"
     
-    @patch('app.database.check_database_connection')
+    @patch('app.database.check_async_database_connection')
     def test_ready_returns_503_with_db_disconnected(self, mock_db, client):
         """Testa /ready quando banco está desconectado - retorna 503"""
         mock_db.return_value = False
@@ -55,7 +55,7 @@ class TestHealthEndpoints:
         assert data["status"] == "not ready"
         assert data["database"] == "disconnected"
     
-    @patch('app.database.check_database_connection')
+    @patch('app.database.check_async_database_connection')
     def test_ready_returns_503_on_db_error(self, mock_db, client):
         """Testa /ready quando há erro no banco - retorna 503"""
         mock_db.side_effect = Exception("Connection timeout")
@@ -132,7 +132,7 @@ class TestHealthEndpoints:
         response_health = client.get("/health")
         assert "timestamp" in response_health.json()
     
-    @patch('app.database.check_database_connection')
+    @patch('app.database.check_async_database_connection')
     @patch('app.redis_client.check_redis_connection')
     @patch('app.redis_client.get_redis_info')
     def test_ready_and_live_are_independent(self, mock_redis_info, mock_redis_check, mock_db, client):
@@ -178,7 +178,7 @@ class TestHealthEndpointsPerformance:
         assert response.status_code == 200
         assert duration < 0.5, f"Health check demorou {duration:.3f}s"
     
-    @patch('app.database.check_database_connection')
+    @patch('app.database.check_async_database_connection')
     def test_ready_responds_quickly(self, mock_db, client):
         """Testa se /ready responde em menos de 2s"""
         import time
@@ -14,7 +14,7 @@ class TestHealthNeon:
     def client(self):
         return TestClient(app)
     
-    @patch('app.database.check_database_connection')
+    @patch('app.database.check_async_database_connection')
     def test_health_with_neon_connected(self, mock_db, client):
         """Testa /health quando Neon está conectado"""
         mock_db.return_value = True
@@ -27,7 +27,7 @@ class TestHealthNeon:
         assert data["database"] == "connected"
         assert data["database_type"] == "neon_postgres"
     
-    @patch('app.database.check_database_connection')
+    @patch('app.database.check_async_database_connection')
     def test_health_with_neon_disconnected(self, mock_db, client):
         """Testa /health quando Neon está desconectado"""
         mock_db.return_value = False
@@ -39,7 +39,7 @@ class TestHealthNeon:
         assert data["status"] == "degraded"
         assert data["database"] == "disconnected"
     
-    @patch('app.database.check_database_connection')
+    @patch('app.database.check_async_database_connection')
     def test_ready_with_neon(self, mock_db, client):
         """Testa /ready com Neon"""
         mock_db.return_value = True
@@ -0,0 +1,119 @@
+"""
+Testes do prober de health checks em segundo plano (app.core.health)
+"""
+import asyncio
+import time
+
+import pytest
+
+from app.core.health import DependenciaDesconectada, HealthProber, health_prober
+
+
+class Contador:
+    """Check falso que conta chamadas e pode demorar, falhar ou desconectar"""
+
+    def __init__(self, atraso: float = 0.0, erro: Exception = None):
+        self.chamadas = 0
+        self.atraso = atraso
+        self.erro = erro
+
+    async def __call__(self) -> dict:
+        self.chamadas += 1
+        await asyncio.sleep(self.atraso)
+        if self.erro is not None:
+            raise self.erro
+        return {"chamadas": self.chamadas}
+
+
+class TestHealthProber:
+    """Verificações paralelas, timeouts e coalescência"""
+
+    @pytest.mark.asyncio
+    async def test_paralelo_com_timeout_por_dependencia(self):
+        lento, rapido = Contador(atraso=1.0), Contador(atraso=0.05)
+        prober = HealthProber({"database": (rapido, 0.5), "redis": (lento, 0.1)})
+
+        inicio = time.perf_counter()
+        snapshot = await prober.verificar()
+        assert time.perf_counter() - inicio < 0.5
+
+        assert snapshot.checks["database"].ok
+        assert snapshot.checks["redis"].status == "error"
+        assert snapshot.checks["redis"].erro == "timeout after 0.1s"
+
+        # A verificação presa não é empilhada
+        snapshot = await prober.verificar()
+        assert snapshot.checks["redis"].erro == "previous check still running"
+        assert lento.chamadas == 1
+        await prober.aclose()
+
+    @pytest.mark.asyncio
+    async def test_status_desconectado_e_erro(self):
+        prober = HealthProber({
+            "database": (Contador(erro=DependenciaDesconectada("disconnected")), 1.0),
+            "redis": (Contador(erro=RuntimeError("boom")), 1.0),
+        })
+        snapshot = await prober.verificar()
+        assert snapshot.checks["database"].status == "disconnected"
+        assert snapshot.to_dict()["checks"]["redis"]["error"] == "boom"
+
+    @pytest.mark.asyncio
+    async def test_coalesce_verificacoes_simultaneas(self):
+        check = Contador(atraso=0.05)
+        prober = HealthProber({"database": (check, 1.0)})
+
+        snapshots = await asyncio.gather(*(prober.verificar() for _ in range(10)))
+        assert check.chamadas == 1
+        assert all(s is snapshots[0] for s in snapshots)
+        assert prober.stats()["coalescidas"] == 9
+
+    @pytest.mark.asyncio
+    async def test_serve_snapshot_em_cache(self):
+        check = Contador()
+        prober = HealthProber({"database": (check, 1.0)}, intervalo=60)
+
+        # Sem prober ativo: verifica a cada chamada
+        await prober.obter()
+        await prober.obter()
+        assert check.chamadas == 2
+
+        prober.start()
+        await asyncio.sleep(0.01)
+        chamadas = check.chamadas
+        for _ in range(50):
+            await prober.obter()
+        assert check.chamadas == chamadas
+
+        await prober.obter(fresh=True)
+        assert check.chamadas == chamadas + 1
+        await prober.aclose()
+        assert prober.stats()["running"] is False
+
+
+class TestRotas:
+    """/health, /health/ready e /health/live com o prober ativo (lifespan)"""
+
+    def test_snapshot_e_fresh_limitado(self, client, monkeypatch, diagnostics_headers):
+        # Primeira rodada (checks reais) iniciada no lifespan
+        for _ in range(100):
+            if health_prober._em_curso is not None and health_prober._em_curso.done():
+                break
+            time.sleep(0.05)
+        database, redis = Contador(), Contador()
+        monkeypatch.setattr(health_prober, "checks", {"database": (database, 1.0), "redis": (redis, 1.0)})
+
+        response = client.get("/health/ready", params={"fresh": 1})
+        assert response.status_code == 200
+        assert database.chamadas == 1
+
+        for path in ("/health", "/health/ready", "/health/live"):
+            assert client.get(path).status_code in (200, 503)
+        assert database.chamadas == 1 and redis.chamadas == 1
+
+        codigos = [client.get("/health", params={"fresh": 1}).status_code for _ in range(10)]
+        assert 429 in codigos
+        assert database.chamadas == 1 + codigos.count(200)
+
+        stats = client.get("/health/prober", headers=diagnostics_headers).json()
+        assert stats["prober"]["running"] is True
+        assert set(stats["snapshot"]["checks"]) == {"database", "redis"}
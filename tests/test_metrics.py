@@ -0,0 +1,137 @@
+"""
+Testes das métricas Prometheus (app.core.metrics) e de GET /metrics
+"""
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.core.auth import create_access_token
+from app.core.config import settings
+from app.core.models import Entidade, StatusEntidade, TipoEntidade, User, UserRole
+from app.core.pncp_cache import PNCPCache
+
+ROOT = Path(__file__).resolve().parents[1]
+
+
+def valor(nome: str, **labels) -> float:
+    return REGISTRY.get_sample_value(nome, labels) or 0.0
+
+
+class TestHTTP:
+    """Latência, status e queries por rota"""
+
+    def test_rota_template_e_status(self, client):
+        antes = valor("sentinela_http_requests_total", method="GET", route="/cameras/{camera_id}", status="401")
+
+        assert client.get("/cameras/12345").status_code == 401
+        assert client.get("/nao-existe").status_code == 404
+
+        assert valor("sentinela_http_requests_total",
+                     method="GET", route="/cameras/{camera_id}", status="401") == antes + 1
+        assert valor("sentinela_http_requests_total", method="GET", route="unmatched", status="404") >= 1
+        assert valor("sentinela_http_request_duration_seconds_count", method="GET", route="/cameras/{camera_id}") >= 1
+        assert valor("sentinela_http_requests_in_flight", method="GET") == 0
+
+    def test_queries_por_requisicao(self, client, db_session):
+        entidade = Entidade(nome="Entidade Métricas", cnpj="77777777000177", tipo=TipoEntidade.EMPRESA,
+                            status=StatusEntidade.ATIVA, is_active=True)
+        db_session.add(entidade)
+        db_session.commit()
+        user = User(username="operador_metricas", email="operador_metricas@test.com", hashed_password="$2b$12$test",
+                    role=UserRole.OPERADOR, entidade_id=entidade.id, is_active=True)
+        db_session.add(user)
+        db_session.commit()
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+
+        antes = valor("sentinela_db_queries_per_request_sum", route="/cameras/")
+        assert client.get("/cameras/", headers=headers).status_code == 200
+        assert valor("sentinela_db_queries_per_request_sum", route="/cameras/") > antes
+
+
+class TestRejeicoes:
+    """Rate limiter e CSRF"""
+
+    def test_csrf_sem_token(self, client):
+        antes = valor("sentinela_csrf_rejections_total", reason="missing")
+        assert client.post("/auth/logout").status_code == 403
+        assert valor("sentinela_csrf_rejections_total", reason="missing") == antes + 1
+
+    def test_rate_limit_fresh(self, client):
+        antes = valor("sentinela_rate_limit_rejections_total", route="/health/live")
+        codigos = [client.get("/health/live", params={"fresh": 1}).status_code for _ in range(10)]
+        assert valor("sentinela_rate_limit_rejections_total", route="/health/live") == antes + codigos.count(429)
+        assert codigos.count(429) > 0
+
+
+class TestDependencias:
+    """Redis e cache PNCP"""
+
+    @pytest.mark.asyncio
+    async def test_latencia_redis(self):
+        fakeredis = pytest.importorskip("fakeredis")
+        from app.redis_client import RedisPool
+
+        pool = RedisPool(connection_class=fakeredis.aioredis.FakeConnection, server=fakeredis.FakeServer())
+        antes = valor("sentinela_redis_command_duration_seconds_count")
+        try:
+            await pool.client.ping()
+            await pool.set_many({"a": "1", "b": "2"})
+        finally:
+            await pool.aclose()
+        assert valor("sentinela_redis_command_duration_seconds_count") == antes + 2
+
+    @pytest.mark.asyncio
+    async def test_cache_pncp(self):
+        async def loader():
+            return {"cnpj": "1"}
+
+        cache = PNCPCache(None, pool=None)
+        antes = {r: valor("sentinela_pncp_cache_requests_total", result=r) for r in ("l1_hit", "miss")}
+        await cache.get_or_load("cadastro", "12345678000190", loader)
+        await cache.get_or_load("cadastro", "12345678000190", loader)
+        assert valor("sentinela_pncp_cache_requests_total", result="miss") == antes["miss"] + 1
+        assert valor("sentinela_pncp_cache_requests_total", result="l1_hit") == antes["l1_hit"] + 1
+
+
+class TestExposicao:
+    """GET /metrics e agregação entre processos"""
+
+    def test_endpoint(self, client, diagnostics_headers):
+        response = client.get("/metrics", headers=diagnostics_headers)
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+        assert "sentinela_http_request_duration_seconds_bucket" in response.text
+        assert 'sentinela_db_pool_connections{pool="sync",state="checked_out"}' in response.text
+
+    def test_exige_token(self, client, diagnostics_headers, monkeypatch):
+        assert client.get("/metrics").status_code == 401
+        assert client.get("/metrics", headers={"Authorization": "Bearer outro"}).status_code == 401
+        assert client.get("/health/pool", headers={"Authorization": "Bearer outro"}).status_code == 401
+
+        monkeypatch.setattr(settings, "DIAGNOSTICS_TOKEN", "")
+        assert client.get("/metrics", headers=diagnostics_headers).status_code == 404
+        assert client.get("/health/prober", headers=diagnostics_headers).status_code == 404
+
+    def test_multiprocesso(self, tmp_path):
+        """Dois workers gravam em PROMETHEUS_MULTIPROC_DIR; a exposição soma os dois"""
+        env = {"PROMETHEUS_MULTIPROC_DIR": str(tmp_path), "PYTHONPATH": str(ROOT), "PATH": ""}
+        worker = (
+            "import sys\n"
+            "from app.core.metrics import HTTP_IN_FLIGHT, HTTP_REQUESTS, marcar_processo_encerrado\n"
+            "HTTP_REQUESTS.labels('GET', '/x', '200').inc()\n"
+            "HTTP_IN_FLIGHT.labels('GET').inc()\n"
+            "if sys.argv[1] == 'encerrar':\n"
+            "    marcar_processo_encerrado()\n"
+        )
+        for modo in ("encerrar", "ativo"):
+            subprocess.run([sys.executable, "-c", worker, modo], env=env, check=True, cwd=ROOT)
+
+        exposicao = "from app.core.metrics import gerar_metricas\nprint(gerar_metricas().decode())\n"
+        saida = subprocess.run([sys.executable, "-c", exposicao], env=env, check=True, cwd=ROOT,
+                               capture_output=True, text=True).stdout
+        assert 'sentinela_http_requests_total{method="GET",route="/x",status="200"} 2.0' in saida
+        # livesum: o worker encerrado pelo lifespan sai do gauge; contadores são preservados
+        assert 'sentinela_http_requests_in_flight{method="GET"} 1.0' in saida
@@ -0,0 +1,185 @@
+"""
+Testes para o pool dedicado de bcrypt (app.core.password_pool)
+"""
+import asyncio
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.orm import Session
+
+from app.core import database
+from app.core.auth import get_password_hash, password_needs_rehash, pwd_context, verify_password
+from app.core.models import User, UserRole
+from app.core.password_pool import PasswordHashPool, PasswordPoolSaturated, password_pool
+
+
+@pytest.fixture
+def operador(db_session: Session):
+    """Cria OPERADOR com senha conhecida"""
+    user = User(
+        username="operador_pool",
+        email="operador_pool@test.com",
+        hashed_password=get_password_hash("Senha@123"),
+        role=UserRole.OPERADOR,
+        is_active=True
+    )
+    db_session.add(user)
+    db_session.commit()
+    return user
+
+
+class TestPasswordHashPool:
+    """Execução fora do event loop e backpressure"""
+
+    @pytest.mark.asyncio
+    async def test_executa_em_thread_dedicada(self):
+        pool = PasswordHashPool(max_workers=1, max_queue=0)
+        thread_name = await pool.run(lambda: threading.current_thread().name)
+        assert thread_name.startswith("bcrypt")
+        assert pool.stats()["completed"] == 1
+        pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_rejeita_quando_saturado(self):
+        pool = PasswordHashPool(max_workers=1, max_queue=1)
+        release = threading.Event()
+
+        running = [asyncio.ensure_future(pool.run(release.wait)) for _ in range(2)]
+        await asyncio.sleep(0)
+
+        with pytest.raises(PasswordPoolSaturated):
+            await pool.run(lambda: None)
+        assert pool.stats()["rejected"] == 1
+
+        release.set()
+        await asyncio.gather(*running)
+        assert pool.pending == 0
+        pool.shutdown()
+
+    @pytest.mark.asyncio
+    async def test_cancelamento_mantem_vaga_ate_thread_terminar(self):
+        pool = PasswordHashPool(max_workers=1, max_queue=1)
+        started = threading.Event()
+        release = threading.Event()
+
+        def bcrypt_lento():
+            started.set()
+            release.wait()
+
+        running = asyncio.ensure_future(pool.run(bcrypt_lento))
+        queued = asyncio.ensure_future(pool.run(lambda: None))
+        await asyncio.to_thread(started.wait)
+
+        # Cliente desconecta: a thread segue ocupada, a vaga continua em uso
+        running.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await running
+        assert pool.pending == 2
+
+        # Item ainda na fila é cancelado de fato e libera a vaga na hora
+        queued.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await queued
+        assert pool.pending == 1
+
+        release.set()
+        await asyncio.to_thread(pool._get_executor().submit(lambda: None).result)
+        assert pool.pending == 0
+        pool.shutdown()
+
+
+class TestLoginBackpressure:
+    """POST /auth/login com pool saturado"""
+
+    def test_login_retorna_503_quando_saturado(self, client: TestClient, operador: User, monkeypatch):
+        monkeypatch.setattr(password_pool, "max_workers", 0)
+        monkeypatch.setattr(password_pool, "max_queue", 0)
+
+        response = client.post(
+            "/auth/login",
+            json={"username": "operador_pool", "password": "Senha@123"},
+            headers={"X-Forwarded-For": "10.9.0.1"}
+        )
+
+        assert response.status_code == 503
+        assert response.headers["Retry-After"] == "1"
+
+    def test_login_sucesso_via_pool(self, client: TestClient, operador: User):
+        response = client.post(
+            "/auth/login",
+            json={"username": "operador_pool", "password": "Senha@123"},
+            headers={"X-Forwarded-For": "10.9.0.2"}
+        )
+
+        assert response.status_code == 200
+        assert response.json()["user"]["username"] == "operador_pool"
+
+
+class TestRehashNoLogin:
+    """Regravação transparente do hash quando BCRYPT_ROUNDS muda"""
+
+    @pytest.fixture
+    def background_session(self, async_db_engine, monkeypatch):
+        """Sessão usada pela tarefa de rehash aponta para o banco de teste"""
+        monkeypatch.setattr(
+            database,
+            "AsyncSessionLocal",
+            async_sessionmaker(bind=async_db_engine, class_=AsyncSession, expire_on_commit=False)
+        )
+
+    def _create_user(self, db_session: Session, hashed_password: str) -> User:
+        user = User(
+            username="operador_rehash",
+            email="operador_rehash@test.com",
+            hashed_password=hashed_password,
+            role=UserRole.OPERADOR,
+            is_active=True
+        )
+        db_session.add(user)
+        db_session.commit()
+        return user
+
+    def test_needs_rehash_custo_diferente(self):
+        current_rounds = pwd_context.to_dict()["bcrypt__rounds"]
+        old_hash = pwd_context.hash("Senha@123", rounds=current_rounds - 1)
+        assert password_needs_rehash(old_hash) is True
+        assert password_needs_rehash(get_password_hash("Senha@123")) is False
+        assert password_needs_rehash("hash-invalido") is False
+
+    def test_login_regrava_hash_antigo(
+        self, client: TestClient, db_session: Session, background_session
+    ):
+        current_rounds = pwd_context.to_dict()["bcrypt__rounds"]
+        old_hash = pwd_context.hash("Senha@123", rounds=current_rounds - 1)
+        user = self._create_user(db_session, old_hash)
+
+        response = client.post(
+            "/auth/login",
+            json={"username": "operador_rehash", "password": "Senha@123"},
+            headers={"X-Forwarded-For": "10.9.0.3"}
+        )
+        assert response.status_code == 200
+
+        db_session.expire_all()
+        new_hash = db_session.get(User, user.id).hashed_password
+        assert new_hash != old_hash
+        assert password_needs_rehash(new_hash) is False
+        assert verify_password("Senha@123", new_hash)
+
+    def test_login_nao_regrava_hash_atual(
+        self, client: TestClient, db_session: Session, background_session
+    ):
+        current_hash = get_password_hash("Senha@123")
+        user = self._create_user(db_session, current_hash)
+
+        response = client.post(
+            "/auth/login",
+            json={"username": "operador_rehash", "password": "Senha@123"},
+            headers={"X-Forwarded-For": "10.9.0.4"}
+        )
+        assert response.status_code == 200
+
+        db_session.expire_all()
+        assert db_session.get(User, user.id).hashed_password == current_hash
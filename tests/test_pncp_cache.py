@@ -0,0 +1,204 @@
+"""
+Testes do cache em camadas do PNCP (app.core.pncp_cache)
+"""
+import asyncio
+
+import pytest
+
+from app.core.pncp_cache import PNCPCache
+from app.core.pncp_client import PNCPUnavailableError
+from app.redis_client import RedisPool
+
+CNPJ = "12345678000190"
+
+
+class FakePNCPClient:
+    """Cliente PNCP em memória que conta as chamadas"""
+
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls = []
+        self.fail = False
+        self.version = 1
+
+    async def _call(self, kind: str, cnpj: str):
+        self.calls.append((kind, cnpj))
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise PNCPUnavailableError("PNCP fora do ar")
+
+    async def get_cadastro(self, cnpj: str):
+        await self._call("cadastro", cnpj)
+        return {"cnpj": cnpj, "razaoSocial": f"FORNECEDOR v{self.version}"}
+
+    async def get_contratos(self, cnpj: str):
+        await self._call("contratos", cnpj)
+        return [{"numero": "001/2024", "valor": 1000.0 * self.version}]
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def upstream():
+    return FakePNCPClient()
+
+
+@pytest.fixture
+def cache(upstream, clock):
+    return PNCPCache(upstream, cadastro_ttl=60, contratos_ttl=10, stale_ttl=300, timer=clock)
+
+
+@pytest.fixture
+def fake_pool():
+    fakeredis = pytest.importorskip("fakeredis")
+    return RedisPool(connection_class=fakeredis.aioredis.FakeConnection, server=fakeredis.FakeServer())
+
+
+class TestCacheL1:
+    """Hits, misses e chave normalizada"""
+
+    @pytest.mark.asyncio
+    async def test_miss_depois_hit(self, cache, upstream):
+        primeiro = await cache.get_cadastro(CNPJ)
+        segundo = await cache.get_cadastro("12.345.678/0001-90")
+
+        assert primeiro == segundo
+        assert upstream.calls == [("cadastro", CNPJ)]
+        stats = cache.stats()
+        assert stats["misses"] == 1
+        assert stats["l1_hits"] == 1
+        assert stats["upstream_calls"] == 1
+
+    @pytest.mark.asyncio
+    async def test_ttls_separados(self, cache, upstream, clock):
+        await cache.get_fornecedor(CNPJ)
+        clock.now += 30  # contratos vencidos, cadastro ainda fresco
+
+        await cache.get_fornecedor(CNPJ)
+        await asyncio.sleep(0)
+
+        assert upstream.calls.count(("cadastro", CNPJ)) == 1
+        assert upstream.calls.count(("contratos", CNPJ)) == 2
+
+    @pytest.mark.asyncio
+    async def test_erro_em_miss_nao_e_cacheado(self, cache, upstream):
+        upstream.fail = True
+        with pytest.raises(PNCPUnavailableError):
+            await cache.get_cadastro(CNPJ)
+
+        upstream.fail = False
+        assert (await cache.get_cadastro(CNPJ))["cnpj"] == CNPJ
+        assert cache.stats()["upstream_errors"] == 1
+
+    @pytest.mark.asyncio
+    async def test_desabilitado(self, upstream, clock):
+        cache = PNCPCache(upstream, enabled=False, timer=clock)
+        await cache.get_cadastro(CNPJ)
+        await cache.get_cadastro(CNPJ)
+        assert len(upstream.calls) == 2
+
+
+class TestSingleFlight:
+    """Misses concorrentes coalescidos"""
+
+    @pytest.mark.asyncio
+    async def test_misses_concorrentes_uma_chamada(self, cache, upstream):
+        upstream.delay = 0.05
+        resultados = await asyncio.gather(*(cache.get_cadastro(CNPJ) for _ in range(20)))
+
+        assert len(upstream.calls) == 1
+        assert all(r == resultados[0] for r in resultados)
+        assert cache.stats()["coalesced"] == 19
+
+    @pytest.mark.asyncio
+    async def test_erro_propagado_a_todos(self, cache, upstream):
+        upstream.delay = 0.05
+        upstream.fail = True
+        resultados = await asyncio.gather(
+            *(cache.get_cadastro(CNPJ) for _ in range(5)), return_exceptions=True
+        )
+
+        assert len(upstream.calls) == 1
+        assert all(isinstance(r, PNCPUnavailableError) for r in resultados)
+
+
+class TestStaleWhileRevalidate:
+    """Valor vencido servido enquanto revalida em segundo plano"""
+
+    @pytest.mark.asyncio
+    async def test_serve_vencido_e_revalida(self, cache, upstream, clock):
+        await cache.get_cadastro(CNPJ)
+        upstream.version = 2
+        clock.now += 61
+
+        vencido = await cache.get_cadastro(CNPJ)
+        assert vencido["razaoSocial"] == "FORNECEDOR v1"
+
+        await asyncio.sleep(0.01)
+        atualizado = await cache.get_cadastro(CNPJ)
+        assert atualizado["razaoSocial"] == "FORNECEDOR v2"
+        assert cache.stats()["stale_hits"] == 1
+        assert cache.stats()["revalidations"] == 1
+
+    @pytest.mark.asyncio
+    async def test_falha_na_revalidacao_mantem_vencido(self, cache, upstream, clock):
+        await cache.get_cadastro(CNPJ)
+        upstream.fail = True
+        clock.now += 61
+
+        assert (await cache.get_cadastro(CNPJ))["razaoSocial"] == "FORNECEDOR v1"
+        await asyncio.sleep(0.01)
+        assert (await cache.get_cadastro(CNPJ))["razaoSocial"] == "FORNECEDOR v1"
+
+    @pytest.mark.asyncio
+    async def test_alem_do_stale_ttl_e_miss(self, cache, upstream, clock):
+        await cache.get_cadastro(CNPJ)
+        upstream.version = 2
+        clock.now += 60 + 301
+
+        assert (await cache.get_cadastro(CNPJ))["razaoSocial"] == "FORNECEDOR v2"
+        assert cache.stats()["misses"] == 2
+
+
+class TestCacheL2:
+    """Redis compartilhado entre workers"""
+
+    @pytest.mark.asyncio
+    async def test_l2_compartilhado(self, upstream, clock, fake_pool):
+        worker_a = PNCPCache(upstream, pool=fake_pool, timer=clock)
+        worker_b = PNCPCache(upstream, pool=fake_pool, timer=clock)
+
+        await worker_a.get_cadastro(CNPJ)
+        dados = await worker_b.get_cadastro(CNPJ)
+
+        assert dados["cnpj"] == CNPJ
+        assert len(upstream.calls) == 1
+        assert worker_b.stats()["l2_hits"] == 1
+
+        # invalidate limpa o L2 e o L1 do próprio worker; os demais expiram pelo TTL
+        await worker_b.invalidate(CNPJ)
+        await worker_b.get_cadastro(CNPJ)
+        assert len(upstream.calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_redis_fora_do_ar(self, upstream, clock, fake_pool):
+        fake_pool.connection_kwargs["server"].connected = False
+
+        cache = PNCPCache(upstream, pool=fake_pool, timer=clock)
+        assert (await cache.get_cadastro(CNPJ))["cnpj"] == CNPJ
+        assert (await cache.get_cadastro(CNPJ))["cnpj"] == CNPJ
+
+        assert len(upstream.calls) == 1
+        assert cache.stats()["redis_errors"] == 1
+        assert cache.stats()["l2_available"] is False
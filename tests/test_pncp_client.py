@@ -0,0 +1,361 @@
+"""
+Testes do cliente PNCP (app.core.pncp_client) contra um servidor PNCP local
+"""
+import asyncio
+import json
+import time
+
+import httpx
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.database import get_async_db
+from app.core.dependencies import CurrentUser, get_current_user
+from app.core.models import UserRole
+from app.core.principal_cache import UserSnapshot
+from app.core.pncp_cache import PNCPCache
+from app.core.pncp_client import (
+    CircuitBreaker,
+    HostRateLimiter,
+    PNCPClient,
+    PNCPError,
+    PNCPNotFoundError,
+    PNCPUnavailableError,
+    RetryBudget,
+)
+from app.routers import pncp as pncp_router
+from tests.pncp_stub import CNPJ_INEXISTENTE
+
+CNPJ = "12345678000190"
+
+
+class TestPNCPClient:
+    """Pool, paralelismo e resiliência"""
+
+    @pytest.mark.asyncio
+    async def test_cadastro_e_contratos_em_paralelo(self, stub, make_client):
+        stub.state.delay = 0.3
+        client = make_client()
+
+        start = time.perf_counter()
+        dados = await client.get_fornecedor(CNPJ)
+        elapsed = time.perf_counter() - start
+
+        assert dados["cadastro"]["razaoSocial"] == "FORNECEDOR STUB LTDA"
+        assert len(dados["contratos"]) == 2
+        assert elapsed < 0.55
+
+    @pytest.mark.asyncio
+    async def test_conexao_reutilizada(self, stub, make_client):
+        client = make_client()
+        for _ in range(5):
+            await client.get_cadastro(CNPJ)
+        assert len(stub.state.client_ports) == 1
+
+    @pytest.mark.asyncio
+    async def test_retentativa_apos_falha_temporaria(self, stub, make_client):
+        stub.state.fail_next = 2
+        client = make_client(max_retries=2)
+
+        dados = await client.get_cadastro(CNPJ)
+        assert dados["cnpj"] == CNPJ
+        assert len(stub.state.calls) == 3
+
+    @pytest.mark.asyncio
+    async def test_orcamento_de_retentativas_esgotado(self, stub, make_client):
+        stub.state.fail_next = 10
+        client = make_client(max_retries=3, retry_budget=RetryBudget(ratio=0, min_retries=0))
+
+        with pytest.raises(PNCPUnavailableError):
+            await client.get_cadastro(CNPJ)
+        assert len(stub.state.calls) == 1
+
+    @pytest.mark.asyncio
+    async def test_circuito_abre_e_falha_rapido(self, stub, make_client):
+        stub.state.fail_next = 10
+        client = make_client(
+            max_retries=0,
+            circuit_breaker=CircuitBreaker(failure_threshold=2, reset_timeout=60),
+        )
+
+        for _ in range(2):
+            with pytest.raises(PNCPUnavailableError):
+                await client.get_cadastro(CNPJ)
+        assert client.circuit_breaker.state == CircuitBreaker.OPEN
+
+        with pytest.raises(PNCPUnavailableError) as exc_info:
+            await client.get_cadastro(CNPJ)
+        assert exc_info.value.retry_after > 0
+        assert len(stub.state.calls) == 2
+
+    @pytest.mark.asyncio
+    async def test_circuito_meio_aberto_fecha_com_sucesso(self, stub, make_client):
+        stub.state.fail_next = 1
+        client = make_client(
+            max_retries=0,
+            circuit_breaker=CircuitBreaker(failure_threshold=1, reset_timeout=0.05),
+        )
+
+        with pytest.raises(PNCPUnavailableError):
+            await client.get_cadastro(CNPJ)
+        time.sleep(0.06)
+
+        await client.get_cadastro(CNPJ)
+        assert client.circuit_breaker.state == CircuitBreaker.CLOSED
+
+    @pytest.mark.asyncio
+    async def test_timeout_de_leitura(self, stub, make_client):
+        stub.state.delay = 1.0
+        client = make_client(max_retries=0, timeout=httpx.Timeout(0.2))
+
+        start = time.perf_counter()
+        with pytest.raises(PNCPUnavailableError):
+            await client.get_cadastro(CNPJ)
+        assert time.perf_counter() - start < 0.8
+
+    @pytest.mark.asyncio
+    async def test_fornecedor_inexistente(self, stub, make_client):
+        client = make_client()
+        with pytest.raises(PNCPNotFoundError):
+            await client.get_fornecedor(CNPJ_INEXISTENTE)
+        assert client.circuit_breaker.failures == 0
+
+
+class TestCircuitoMeioAberto:
+    """A requisição de teste sempre devolve o circuito a um estado definido"""
+
+    @pytest_asyncio.fixture
+    async def pncp(self):
+        """Cliente sobre MockTransport; `respostas` decide cada chamada"""
+        respostas = []
+
+        async def handler(request: httpx.Request) -> httpx.Response:
+            return await respostas.pop(0)(request) if respostas else httpx.Response(200, json={"cnpj": CNPJ})
+
+        clients = []
+
+        def factory(**kwargs):
+            client = PNCPClient(
+                base_url="http://pncp.test", transport=httpx.MockTransport(handler), max_retries=0,
+                circuit_breaker=CircuitBreaker(failure_threshold=1, reset_timeout=0.05), **kwargs,
+            )
+            clients.append(client)
+            return client
+
+        factory.respostas = respostas
+        yield factory
+        for client in clients:
+            await client.aclose()
+
+    @staticmethod
+    async def _falha(request):
+        return httpx.Response(503)
+
+    @staticmethod
+    async def _lenta(request):
+        await asyncio.sleep(5)
+        return httpx.Response(200, json={})
+
+    @pytest.mark.asyncio
+    async def test_teste_cancelado_libera_o_circuito(self, pncp):
+        client = pncp()
+        pncp.respostas.extend([self._falha, self._lenta])
+        with pytest.raises(PNCPUnavailableError):
+            await client.get_cadastro(CNPJ)
+        await asyncio.sleep(0.06)
+
+        teste = asyncio.create_task(client.get_cadastro(CNPJ))
+        await asyncio.sleep(0.01)
+        teste.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await teste
+
+        assert (await client.get_cadastro(CNPJ))["cnpj"] == CNPJ
+        assert client.circuit_breaker.state == CircuitBreaker.CLOSED
+
+    @pytest.mark.asyncio
+    async def test_erro_http_nao_transporte_reabre(self, pncp):
+        async def redirecionamentos(request):
+            raise httpx.TooManyRedirects("muitos redirecionamentos", request=request)
+
+        client = pncp()
+        pncp.respostas.extend([self._falha, redirecionamentos])
+        with pytest.raises(PNCPUnavailableError):
+            await client.get_cadastro(CNPJ)
+        await asyncio.sleep(0.06)
+
+        with pytest.raises(PNCPError):
+            await client.get_cadastro(CNPJ)
+        assert client.circuit_breaker.state == CircuitBreaker.OPEN
+
+        await asyncio.sleep(0.06)
+        assert (await client.get_cadastro(CNPJ))["cnpj"] == CNPJ
+
+    @pytest.mark.asyncio
+    async def test_teste_tem_prazo_proprio(self, pncp):
+        client = pncp(probe_timeout=0.1)
+        pncp.respostas.extend([self._falha, self._lenta])
+        with pytest.raises(PNCPUnavailableError):
+            await client.get_cadastro(CNPJ)
+        await asyncio.sleep(0.06)
+
+        start = time.perf_counter()
+        with pytest.raises(PNCPUnavailableError):
+            await client.get_cadastro(CNPJ)
+        assert time.perf_counter() - start < 1.0
+        assert client.circuit_breaker.state == CircuitBreaker.OPEN
+
+    @pytest.mark.asyncio
+    async def test_chamadas_concorrentes_compartilham_o_teste(self, pncp):
+        client = pncp()
+        pncp.respostas.append(self._falha)
+        with pytest.raises(PNCPUnavailableError):
+            await client.get_cadastro(CNPJ)
+        await asyncio.sleep(0.06)
+
+        dados = await client.get_fornecedor(CNPJ)
+        assert dados["cadastro"]["cnpj"] == CNPJ
+        assert client.circuit_breaker.state == CircuitBreaker.CLOSED
+
+
+class TestHostRateLimiter:
+    """Limite de taxa por host"""
+
+    @pytest.mark.asyncio
+    async def test_rajada_e_espera(self):
+        limiter = HostRateLimiter(rate=20, burst=2)
+
+        start = time.perf_counter()
+        for _ in range(2):
+            await limiter.acquire()
+        assert time.perf_counter() - start < 0.02
+
+        for _ in range(3):
+            await limiter.acquire()
+        assert time.perf_counter() - start >= 0.14
+
+    @pytest.mark.asyncio
+    async def test_limite_desligado(self):
+        limiter = HostRateLimiter(rate=0)
+        start = time.perf_counter()
+        for _ in range(100):
+            await limiter.acquire()
+        assert time.perf_counter() - start < 0.05
+
+
+class TestPNCPRouter:
+    """Rotas /pncp usando o cliente compartilhado"""
+
+    @pytest_asyncio.fixture
+    async def api(self, make_client, async_db_engine, monkeypatch):
+        from app.main import app
+
+        TestingSession = async_sessionmaker(bind=async_db_engine, expire_on_commit=False)
+
+        async def override_get_async_db():
+            async with TestingSession() as session:
+                yield session
+
+        app.dependency_overrides[get_async_db] = override_get_async_db
+        monkeypatch.setattr(pncp_router, "pncp_cache", PNCPCache(make_client(max_retries=0)))
+        operador = UserSnapshot(
+            id=1, username="operador", email="operador@test.com", full_name=None,
+            role=UserRole.OPERADOR, is_active=True, mfa_enabled=False,
+            entidade_id=None, last_login=None,
+        )
+        app.dependency_overrides[get_current_user] = lambda: CurrentUser(operador)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            yield client
+        app.dependency_overrides.pop(get_current_user, None)
+        app.dependency_overrides.pop(get_async_db, None)
+
+    @pytest.mark.asyncio
+    async def test_consultar_fornecedor(self, api):
+        response = await api.get("/pncp/fornecedor/12.345.6780001-90")
+        assert response.status_code == 200
+        data = response.json()
+        assert data["cnpj"] == CNPJ
+        assert data["total_contratos"] == 2
+        assert data["valor_total"] == 170000.0
+
+    @pytest.mark.asyncio
+    async def test_fornecedor_nao_encontrado(self, api):
+        response = await api.get(f"/pncp/fornecedor/{CNPJ_INEXISTENTE}")
+        assert response.status_code == 404
+
+    @pytest.mark.asyncio
+    async def test_pncp_indisponivel(self, api, stub):
+        stub.state.fail_next = 10
+        response = await api.get(f"/pncp/fornecedor/{CNPJ}")
+        assert response.status_code == 503
+
+    @pytest.mark.asyncio
+    async def test_listar_contratos_filtro_status(self, api):
+        response = await api.get(f"/pncp/contratos/fornecedor/{CNPJ}", params={"status": "vigente"})
+        assert response.status_code == 200
+        data = response.json()
+        assert data["total"] == 1
+        assert data["contratos"][0]["data_assinatura"] == "2024-01-15"
+
+    @pytest.mark.asyncio
+    async def test_lote_ndjson_paralelo(self, api, stub):
+        stub.state.delay = 0.2
+        cnpjs = [f"{i:08d}000190" for i in range(1, 6)]
+
+        start = time.perf_counter()
+        response = await api.post("/pncp/fornecedores/batch", json={"cnpjs": cnpjs})
+        elapsed = time.perf_counter() - start
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        linhas = [json.loads(linha) for linha in response.text.splitlines()]
+        assert sorted(linha["cnpj"] for linha in linhas) == cnpjs
+        assert all(linha["status"] == 200 for linha in linhas)
+        assert linhas[0]["fornecedor"]["total_contratos"] == 2
+        assert elapsed < 0.8
+
+    @pytest.mark.asyncio
+    async def test_lote_deduplica_e_valida(self, api):
+        response = await api.post(
+            "/pncp/fornecedores/batch",
+            json={"cnpjs": [CNPJ, "12.345.678/0001-90", "123", CNPJ_INEXISTENTE]},
+        )
+        linhas = [json.loads(linha) for linha in response.text.splitlines()]
+        por_cnpj = {linha["cnpj"]: linha["status"] for linha in linhas}
+
+        assert len(linhas) == 3
+        assert por_cnpj == {CNPJ: 200, "123": 400, CNPJ_INEXISTENTE: 404}
+
+    @pytest.mark.asyncio
+    async def test_lote_excede_maximo(self, api):
+        from app.core.config import settings
+
+        cnpjs = [f"{i:08d}000190" for i in range(1, settings.PNCP_BATCH_MAX_CNPJS + 2)]
+        response = await api.post("/pncp/fornecedores/batch", json={"cnpjs": cnpjs})
+        assert response.status_code == 422
+
+    @pytest.mark.asyncio
+    async def test_fornecedor_do_espelho_local(self, api, stub, db_session):
+        from app.core.models import ContratoPNCP, FornecedorPNCP
+
+        db_session.add(FornecedorPNCP(cnpj="11111111000111", razao_social="ESPELHADO LTDA", uf="SP"))
+        db_session.add(ContratoPNCP(
+            id_pncp="c1", cnpj_fornecedor="11111111000111", numero="7/2024",
+            valor=500.0, data_assinatura="2024-04-01", vigencia="2025-04-01", status="VIGENTE",
+        ))
+        db_session.commit()
+
+        response = await api.get("/pncp/fornecedor/11111111000111")
+        assert response.status_code == 200
+        assert response.json()["razao_social"] == "ESPELHADO LTDA"
+        assert response.json()["valor_total"] == 500.0
+
+        response = await api.post("/pncp/fornecedores/batch", json={"cnpjs": ["11111111000111", CNPJ]})
+        linhas = [json.loads(linha) for linha in response.text.splitlines()]
+        assert [linha["status"] for linha in linhas] == [200, 200]
+        assert linhas[0]["cnpj"] == "11111111000111"
+
+        # Apenas o CNPJ fora do espelho foi ao PNCP
+        assert all("11111111000111" not in path for path in stub.state.calls)
@@ -0,0 +1,136 @@
+"""
+Testes da ingestão em streaming de exportações do PNCP (app.core.pncp_ingest)
+"""
+import gzip
+import json
+import tracemalloc
+
+import pytest
+from sqlalchemy import func, select
+
+from app.core.models import ContratoPNCP
+from app.core.pncp_ingest import (
+    JSONStreamError,
+    carregar_contratos,
+    ingerir_fontes,
+    iter_json_records,
+)
+
+
+def contrato(i: int, **extra) -> dict:
+    registro = {
+        "id": f"PNCP-{i:07d}",
+        "cnpjFornecedor": f"{i % 1000:08d}000100",
+        "numero": f"{i}/2024",
+        "objeto": "Aquisição de materiais de expediente",
+        "valor": 1000.0 + i,
+        "dataAssinatura": "2024-02-01",
+        "vigencia": "2025-02-01",
+        "status": "VIGENTE",
+        "orgao": "Secretaria Estadual",
+        "dataAtualizacao": "2024-02-02T09:00:00",
+    }
+    registro.update(extra)
+    return registro
+
+
+def em_blocos(texto: str, tamanho: int):
+    dados = texto.encode("utf-8")
+    for i in range(0, len(dados), tamanho):
+        yield dados[i:i + tamanho]
+
+
+class TestParserIncremental:
+    """Decodificação de arrays JSON bloco a bloco"""
+
+    @pytest.mark.parametrize("tamanho", [1, 7, 64, 4096])
+    def test_pagina_pncp_em_blocos(self, tamanho):
+        pagina = {
+            "totalRegistros": 3,
+            "data": [contrato(1), contrato(2, objeto="Café ☕ e açúcar"), contrato(3)],
+            "totalPaginas": 1,
+        }
+        registros = list(iter_json_records(em_blocos(json.dumps(pagina, ensure_ascii=False), tamanho)))
+        assert registros == pagina["data"]
+
+    def test_array_no_topo(self):
+        registros = list(iter_json_records(em_blocos(json.dumps([1.5, {"a": [1, 2]}, "x", 12345]), 3)))
+        assert registros == [1.5, {"a": [1, 2]}, "x", 12345]
+
+    def test_ndjson(self):
+        texto = "\n".join(json.dumps(contrato(i)) for i in range(5)) + "\n"
+        registros = list(iter_json_records(em_blocos(texto, 10), ndjson=True))
+        assert [r["id"] for r in registros] == [f"PNCP-{i:07d}" for i in range(5)]
+
+    def test_objeto_sem_array(self):
+        assert list(iter_json_records(em_blocos('{"totalRegistros": 0}', 4))) == []
+
+    def test_documento_truncado(self):
+        texto = json.dumps({"data": [contrato(1), contrato(2)]})[:-40]
+        with pytest.raises(JSONStreamError):
+            list(iter_json_records(em_blocos(texto, 16)))
+
+    def test_memoria_constante(self):
+        def pagina_gigante(n: int):
+            yield b'{"data": ['
+            for i in range(n):
+                yield (("," if i else "") + json.dumps(contrato(i))).encode()
+            yield b"]}"
+
+        tracemalloc.start()
+        total = sum(1 for _ in iter_json_records(pagina_gigante(20000)))
+        _, pico = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        assert total == 20000
+        # ~6 MB de JSON atravessam o parser com pico bem abaixo disso
+        assert pico < 1_000_000
+
+
+class TestCargaEmLote:
+    """Validação e gravação por chunks"""
+
+    def test_chunks_e_invalidos(self, db_session):
+        registros = [contrato(i) for i in range(25)]
+        registros[3] = contrato(3, cnpjFornecedor="123")
+        registros[10] = {k: v for k, v in contrato(10).items() if k != "valor"}
+
+        resultado = carregar_contratos(db_session, iter(registros), chunk_size=10)
+
+        assert resultado.lidos == 25
+        assert resultado.invalidos == 2
+        assert resultado.gravados == 23
+        assert len(resultado.erros) == 2
+        assert db_session.scalar(select(func.count()).select_from(ContratoPNCP)) == 23
+
+    def test_reingestao_atualiza(self, db_session):
+        carregar_contratos(db_session, iter([contrato(1)]), chunk_size=10)
+        carregar_contratos(db_session, iter([contrato(1, valor=99.0), contrato(1, valor=42.0)]), chunk_size=10)
+
+        db_session.expire_all()
+        assert db_session.scalar(select(func.count()).select_from(ContratoPNCP)) == 1
+        assert db_session.get(ContratoPNCP, "PNCP-0000001").valor == 42.0
+
+    def test_fontes_arquivo_gzip_e_ndjson(self, db_session, tmp_path):
+        pagina = tmp_path / "contratos-2024-SP-p1.json.gz"
+        with gzip.open(pagina, "wt", encoding="utf-8") as fp:
+            json.dump({"data": [contrato(i) for i in range(30)]}, fp)
+        linhas = tmp_path / "contratos-2024-SP-p2.ndjson"
+        linhas.write_text("\n".join(json.dumps(contrato(i)) for i in range(30, 45)), encoding="utf-8")
+
+        resultado = ingerir_fontes(db_session, [str(pagina), str(linhas)], chunk_size=8)
+
+        assert resultado.to_dict()["gravados"] == 45
+        assert db_session.scalar(select(func.count()).select_from(ContratoPNCP)) == 45
+
+    def test_cli(self, tmp_path, monkeypatch, db_engine, capsys):
+        from sqlalchemy.orm import sessionmaker
+        import app.core.database as database
+        from scripts import ingest_pncp_dump
+
+        monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=db_engine))
+        arquivo = tmp_path / "contratos.json"
+        arquivo.write_text(json.dumps([contrato(i) for i in range(5)]), encoding="utf-8")
+
+        assert ingest_pncp_dump.main([str(arquivo), "--chunk-size", "2"]) == 0
+        assert "5 contratos gravados" in capsys.readouterr().out
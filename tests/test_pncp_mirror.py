@@ -0,0 +1,171 @@
+"""
+Testes do espelho local do PNCP (app.core.pncp_mirror)
+"""
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.core.models import ContratoPNCP, FornecedorPNCP, PNCPSyncState
+from app.core.pncp_mirror import (
+    bulk_upsert,
+    get_fornecedor_local,
+    get_fornecedores_locais,
+    sincronizar_espelho,
+    sincronizar_recurso,
+)
+
+
+def fornecedor(cnpj: str, atualizado: str, razao: str = None) -> dict:
+    return {
+        "cnpj": cnpj,
+        "razaoSocial": razao or f"FORNECEDOR {cnpj[:4]}",
+        "situacaoCadastral": "ATIVA",
+        "uf": "SP",
+        "dataAtualizacao": atualizado,
+    }
+
+
+def contrato(id_pncp: str, cnpj: str, atualizado: str, valor: float = 1000.0) -> dict:
+    return {
+        "id": id_pncp,
+        "cnpjFornecedor": cnpj,
+        "numero": f"{id_pncp}/2024",
+        "objeto": "Serviços",
+        "valor": valor,
+        "dataAssinatura": "2024-03-01",
+        "vigencia": "2025-03-01",
+        "status": "VIGENTE",
+        "orgao": "Prefeitura",
+        "dataAtualizacao": atualizado,
+    }
+
+
+def contar(db, model) -> int:
+    return db.scalar(select(func.count()).select_from(model))
+
+
+class TestBulkUpsert:
+    """INSERT ... ON CONFLICT em lote"""
+
+    def test_insere_e_atualiza(self, db_session):
+        rows = [
+            {"cnpj": "11111111000111", "razao_social": "A"},
+            {"cnpj": "22222222000122", "razao_social": "B"},
+        ]
+        assert bulk_upsert(db_session, FornecedorPNCP, rows, "cnpj") == 2
+        db_session.commit()
+
+        bulk_upsert(db_session, FornecedorPNCP, [{"cnpj": "11111111000111", "razao_social": "A2"}], "cnpj")
+        db_session.commit()
+
+        assert contar(db_session, FornecedorPNCP) == 2
+        assert db_session.get(FornecedorPNCP, "11111111000111").razao_social == "A2"
+
+
+class TestSincronizacao:
+    """Sincronização incremental com cursor keyset"""
+
+    @pytest.mark.asyncio
+    async def test_sincroniza_paginando(self, stub, make_client, db_session):
+        stub.state.atualizacoes["fornecedores"] = [
+            fornecedor(f"{i:08d}000100", f"2024-05-0{i}T10:00:00") for i in range(1, 6)
+        ]
+        client = make_client()
+
+        total = await sincronizar_recurso(client, db_session, "fornecedores", page_size=2)
+
+        assert total == 5
+        assert contar(db_session, FornecedorPNCP) == 5
+        assert len(stub.state.calls) == 3
+        state = db_session.get(PNCPSyncState, "fornecedores")
+        assert state.ultima_chave == "00000005000100"
+        assert state.registros_sincronizados == 5
+
+    @pytest.mark.asyncio
+    async def test_incremental_apos_marca_dagua(self, stub, make_client, db_session):
+        registros = [fornecedor(f"{i:08d}000100", "2024-05-01T10:00:00") for i in range(1, 4)]
+        stub.state.atualizacoes["fornecedores"] = registros
+        client = make_client()
+        await sincronizar_recurso(client, db_session, "fornecedores", page_size=10)
+
+        # Nada novo: nenhuma linha regravada
+        assert await sincronizar_recurso(client, db_session, "fornecedores", page_size=10) == 0
+
+        # Um fornecedor alterado depois da marca d'água
+        registros.append(fornecedor("00000002000100", "2024-05-02T08:00:00", razao="NOVA RAZAO"))
+        assert await sincronizar_recurso(client, db_session, "fornecedores", page_size=10) == 1
+
+        db_session.expire_all()
+        assert contar(db_session, FornecedorPNCP) == 3
+        assert db_session.get(FornecedorPNCP, "00000002000100").razao_social == "NOVA RAZAO"
+
+    @pytest.mark.asyncio
+    async def test_empate_de_data_retoma_pela_chave(self, stub, make_client, db_session):
+        stub.state.atualizacoes["fornecedores"] = [
+            fornecedor(f"{i:08d}000100", "2024-05-01T10:00:00") for i in range(1, 6)
+        ]
+        client = make_client()
+
+        # Uma página por execução: o cursor (data, chave) precisa avançar mesmo com datas iguais
+        for _ in range(3):
+            await sincronizar_recurso(client, db_session, "fornecedores", page_size=2, max_pages=1)
+
+        assert contar(db_session, FornecedorPNCP) == 5
+
+    @pytest.mark.asyncio
+    async def test_registro_malformado_ignorado(self, stub, make_client, db_session):
+        stub.state.atualizacoes["contratos"] = [
+            contrato("c1", "11111111000111", "2024-05-01T10:00:00"),
+            {"id": "c2", "dataAtualizacao": "2024-05-01T11:00:00"},
+            contrato("c3", "11111111000111", "2024-05-01T12:00:00"),
+        ]
+        client = make_client()
+
+        assert await sincronizar_recurso(client, db_session, "contratos") == 2
+        assert db_session.get(PNCPSyncState, "contratos").ultima_chave == "c3"
+
+    @pytest.mark.asyncio
+    async def test_espelho_completo(self, stub, make_client, db_session):
+        stub.state.atualizacoes["fornecedores"] = [fornecedor("11111111000111", "2024-05-01T10:00:00")]
+        stub.state.atualizacoes["contratos"] = [
+            contrato("c1", "11111111000111", "2024-05-01T10:00:00"),
+            contrato("c2", "11111111000111", "2024-05-01T11:00:00"),
+        ]
+
+        resultado = await sincronizar_espelho(make_client(), db_session)
+        assert resultado == {"fornecedores": 1, "contratos": 2}
+
+
+class TestLeituraLocal:
+    """Consultas do espelho pelas rotas"""
+
+    @pytest.fixture
+    def espelho(self, db_session):
+        bulk_upsert(db_session, FornecedorPNCP, [
+            {"cnpj": "11111111000111", "razao_social": "ESPELHADO LTDA", "uf": "SP"},
+        ], "cnpj")
+        bulk_upsert(db_session, ContratoPNCP, [
+            {"id_pncp": "c1", "cnpj_fornecedor": "11111111000111", "numero": "1/2023",
+             "valor": 10.0, "data_assinatura": "2023-01-10"},
+            {"id_pncp": "c2", "cnpj_fornecedor": "11111111000111", "numero": "2/2024",
+             "valor": 20.0, "data_assinatura": "2024-02-10"},
+        ], "id_pncp")
+        db_session.commit()
+
+    @pytest.mark.asyncio
+    async def test_fornecedor_local(self, espelho, async_db_engine):
+        Session = async_sessionmaker(bind=async_db_engine)
+        async with Session() as db:
+            dados = await get_fornecedor_local(db, "11111111000111")
+            assert await get_fornecedor_local(db, "99999999000199") is None
+
+        assert dados["cadastro"]["razaoSocial"] == "ESPELHADO LTDA"
+        assert [c["numero"] for c in dados["contratos"]] == ["2/2024", "1/2023"]
+
+    @pytest.mark.asyncio
+    async def test_varios_fornecedores(self, espelho, async_db_engine):
+        Session = async_sessionmaker(bind=async_db_engine)
+        async with Session() as db:
+            encontrados = await get_fornecedores_locais(db, ["11111111000111", "99999999000199"])
+
+        assert list(encontrados) == ["11111111000111"]
@@ -0,0 +1,76 @@
+"""
+Testes para a instrumentação do pool de conexões (app.core.pool_metrics)
+"""
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, exc as sa_exc
+
+from app.core.database import build_engine_options
+from app.core.pool_metrics import InstrumentedQueuePool, PoolMetrics, get_pool_stats
+from app.main import app
+
+
+class TestPoolMetrics:
+    """Contadores e histograma de checkout"""
+
+    def test_histograma_cumulativo(self):
+        metrics = PoolMetrics()
+        metrics.observe(0.5)
+        metrics.observe(30)
+        metrics.observe(10000)
+
+        snapshot = metrics.snapshot()
+        histogram = snapshot["checkout_latency_histogram"]
+        assert snapshot["checkouts"] == 3
+        assert histogram["le_1ms"] == 1
+        assert histogram["le_50ms"] == 2
+        assert histogram["le_5000ms"] == 2
+        assert histogram["le_inf"] == 3
+        assert snapshot["wait_max_ms"] == 10000
+
+    def test_timeout_contabilizado(self, tmp_path):
+        engine = create_engine(
+            f"sqlite:///{tmp_path / 'pool.db'}",
+            poolclass=InstrumentedQueuePool,
+            pool_size=1,
+            max_overflow=0,
+            pool_timeout=0.05,
+        )
+        held = engine.connect()
+        with pytest.raises(sa_exc.TimeoutError):
+            engine.connect()
+        held.close()
+
+        stats = get_pool_stats(engine)
+        assert stats["timeouts"] == 1
+        assert stats["checkouts"] == 1
+        assert stats["checked_out"] == 0
+        engine.dispose()
+
+
+class TestEngineFactory:
+    """Opções do engine derivadas de Settings"""
+
+    def test_postgres_usa_pool_instrumentado(self):
+        options = build_engine_options("postgresql://u:p@localhost/db", InstrumentedQueuePool)
+        assert options["poolclass"] is InstrumentedQueuePool
+        assert {"pool_size", "max_overflow", "pool_recycle", "pool_timeout"} <= set(options)
+        assert "connect_args" not in options
+
+    def test_neon_exige_ssl(self):
+        options = build_engine_options("postgresql://u:p@ep-x.neon.tech/db", InstrumentedQueuePool)
+        assert options["connect_args"] == {"sslmode": "require"}
+
+    def test_sqlite_memoria_mantem_pool_padrao(self):
+        options = build_engine_options("sqlite:///:memory:", InstrumentedQueuePool)
+        assert "poolclass" not in options
+
+
+def test_endpoint_pool_stats(diagnostics_headers):
+    """GET /health/pool expõe configuração e métricas dos pools"""
+    response = TestClient(app).get("/health/pool", headers=diagnostics_headers)
+    assert response.status_code == 200
+    data = response.json()
+    assert data["config"]["pool_size"] >= 1
+    assert "checked_out" in data["pools"]["sync"]
+    assert "checkout_latency_histogram" in data["pools"]["async"]
@@ -0,0 +1,205 @@
+"""
+Testes para o cache de principal autenticado (app.core.principal_cache)
+"""
+import pyotp
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.core.auth import create_access_token
+from app.core.cache import TTLLRUCache
+from app.core.models import User, UserRole, Entidade, StatusEntidade, TipoEntidade
+from app.core.principal_cache import principal_cache, UserSnapshot, EntidadeSnapshot
+
+
+@pytest.fixture
+def entidade(db_session: Session):
+    """Cria entidade ATIVA"""
+    entidade = Entidade(
+        nome="Entidade Cache",
+        cnpj="33333333333333",
+        tipo=TipoEntidade.EMPRESA,
+        status=StatusEntidade.ATIVA,
+        is_active=True
+    )
+    db_session.add(entidade)
+    db_session.commit()
+    db_session.refresh(entidade)
+    return entidade
+
+
+@pytest.fixture
+def operador(db_session: Session, entidade: Entidade):
+    """Cria OPERADOR vinculado à entidade"""
+    user = User(
+        username="operador_cache",
+        email="operador_cache@test.com",
+        hashed_password="$2b$12$test",
+        role=UserRole.OPERADOR,
+        entidade_id=entidade.id,
+        is_active=True
+    )
+    db_session.add(user)
+    db_session.commit()
+    db_session.refresh(user)
+    return user
+
+
+@pytest.fixture
+def count_queries(async_db_engine):
+    """Conta SELECTs executados no engine (async) usado pelas dependencies de auth"""
+    statements = []
+
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    sync_engine = async_db_engine.sync_engine
+    event.listen(sync_engine, "before_cursor_execute", before_execute)
+    yield statements
+    event.remove(sync_engine, "before_cursor_execute", before_execute)
+
+
+class TestTTLLRUCache:
+    """Testes da estrutura TTL + LRU"""
+
+    def test_expira_apos_ttl(self):
+        now = [0.0]
+        cache = TTLLRUCache(maxsize=10, ttl=5, timer=lambda: now[0])
+        cache.set("a", 1)
+        assert cache.get("a") == 1
+        now[0] = 6
+        assert cache.get("a") is None
+
+    def test_despeja_menos_recente(self):
+        cache = TTLLRUCache(maxsize=2, ttl=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.get("a")
+        cache.set("c", 3)
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+
+
+class TestPrincipalCache:
+    """Testes de preenchimento e invalidação do principal cache"""
+
+    def test_snapshot_imutavel(self, operador: User):
+        snapshot = UserSnapshot.from_model(operador)
+        with pytest.raises(Exception):
+            snapshot.is_active = False
+
+    def test_segunda_requisicao_nao_consulta_banco(
+        self, client: TestClient, operador: User, count_queries
+    ):
+        token = create_access_token({"sub": str(operador.id)})
+        headers = {"Authorization": f"Bearer {token}"}
+
+        assert client.get("/auth/me", headers=headers).status_code == 200
+        count_queries.clear()
+
+        response = client.get("/auth/me", headers=headers)
+        assert response.status_code == 200
+        assert response.json()["username"] == "operador_cache"
+        assert count_queries == []
+
+    def test_entidade_compartilhada_entre_requisicoes(
+        self, client: TestClient, operador: User, entidade: Entidade, count_queries
+    ):
+        token = create_access_token({"sub": str(operador.id)})
+        headers = {"Authorization": f"Bearer {token}"}
+
+        assert client.get("/contratos/", headers=headers).status_code == 200
+        count_queries.clear()
+
+        assert client.get("/contratos/", headers=headers).status_code == 200
+        assert not any("FROM users" in s or "FROM entidades" in s for s in count_queries)
+
+    def test_desativacao_invalida_usuario(
+        self, client: TestClient, db_session: Session, operador: User
+    ):
+        token = create_access_token({"sub": str(operador.id)})
+        headers = {"Authorization": f"Bearer {token}"}
+        assert client.get("/auth/me", headers=headers).status_code == 200
+
+        operador.is_active = False
+        db_session.commit()
+
+        assert client.get("/auth/me", headers=headers).status_code == 403
+
+    def test_mudanca_status_invalida_entidade(
+        self, client: TestClient, db_session: Session, operador: User, entidade: Entidade
+    ):
+        token = create_access_token({"sub": str(operador.id)})
+        headers = {"Authorization": f"Bearer {token}"}
+        assert client.get("/contratos/", headers=headers).status_code == 200
+        assert principal_cache.get_entidade(entidade.id) is not None
+
+        entidade.status = StatusEntidade.SUSPENSA
+        db_session.commit()
+
+        assert principal_cache.get_entidade(entidade.id) is None
+        response = client.get("/contratos/", headers=headers)
+        assert response.status_code == 403
+        assert response.headers["X-Entidade-Status"] == "SUSPENSA"
+
+    def test_ativar_mfa_invalida_usuario(self, client: TestClient, operador: User):
+        """Rotas de MFA gravam pela sessão assíncrona e invalidam o snapshot"""
+        token = create_access_token({"sub": str(operador.id)})
+        headers = {"Authorization": f"Bearer {token}"}
+        assert client.get("/auth/me", headers=headers).json()["mfa_enabled"] is False
+
+        secret = client.post("/auth/mfa/setup", headers=headers).json()["secret"]
+        response = client.post("/auth/mfa/verify", headers=headers, json={"totp_code": pyotp.TOTP(secret).now()})
+        assert response.status_code == 200
+        assert client.get("/auth/me", headers=headers).json()["mfa_enabled"] is True
+
+        assert client.delete("/auth/mfa/disable", headers=headers).status_code == 200
+        assert client.get("/auth/me", headers=headers).json()["mfa_enabled"] is False
+
+    def test_invalidacao_so_apos_commit(self, db_session: Session, operador: User):
+        """No flush a linha nova ainda não é visível a outras conexões: a entrada só sai no commit"""
+        key = principal_cache.make_key(operador.id, {"iat": 1})
+        principal_cache.set_user(key, UserSnapshot.from_model(operador))
+
+        operador.is_active = False
+        db_session.flush()
+        assert principal_cache.get_user(key) is not None
+        db_session.rollback()
+        assert principal_cache.get_user(key) is not None
+
+        operador.is_active = False
+        db_session.flush()
+        db_session.commit()
+        assert principal_cache.get_user(key) is None
+
+    @pytest.mark.asyncio
+    async def test_invalidacao_pela_sessao_assincrona(self, async_db_engine, entidade: Entidade):
+        principal_cache.set_entidade(EntidadeSnapshot.from_model(entidade))
+
+        async with AsyncSession(async_db_engine) as db:
+            registro = await db.get(Entidade, entidade.id)
+            registro.status = StatusEntidade.SUSPENSA
+            await db.flush()
+            assert principal_cache.get_entidade(entidade.id) is not None
+            await db.commit()
+
+        assert principal_cache.get_entidade(entidade.id) is None
+
+    def test_snapshot_sem_secret_mfa(self, operador: User):
+        assert not hasattr(UserSnapshot.from_model(operador), "mfa_secret")
+
+    def test_cache_desabilitado(self, operador: User, monkeypatch):
+        monkeypatch.setattr(principal_cache, "enabled", False)
+        key = principal_cache.make_key(operador.id, {"iat": 1})
+        principal_cache.set_user(key, UserSnapshot.from_model(operador))
+        assert principal_cache.get_user(key) is None
+
+    def test_entidade_snapshot_propriedades(self, entidade: Entidade):
+        snapshot = EntidadeSnapshot.from_model(entidade)
+        assert snapshot.is_ativa is True
+        assert snapshot.is_acessivel is True
+        assert snapshot.status.value == "ATIVA"
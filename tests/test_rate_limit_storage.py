@@ -0,0 +1,359 @@
+"""
+Testes do storage distribuído e da estratégia token bucket (app.core.rate_limit_storage)
+"""
+import time
+
+import pytest
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from limits import parse
+from limits.strategies import MovingWindowRateLimiter
+from slowapi import Limiter
+from slowapi.errors import RateLimitExceeded
+
+from app.core import rate_limit_storage
+from app.core.auth import create_access_token
+from app.core.models import Entidade, StatusEntidade, TipoEntidade, User, UserRole
+from app.core.rate_limit import get_identifier, get_rate_limit_info, rate_limit_exceeded_handler
+from app.core.rate_limit_storage import (
+    BatchedRateLimiter,
+    LocalTokenBuckets,
+    batched as batched_strategy,
+    SentinelaRedisStorage,
+    TokenBucketRateLimiter,
+)
+
+
+@pytest.fixture
+def fake_redis_pool():
+    """Pool de conexões para um Redis em memória (com suporte a Lua)"""
+    fakeredis = pytest.importorskip("fakeredis")
+    pytest.importorskip("lupa")
+    return fakeredis.FakeRedis(server=fakeredis.FakeServer()).connection_pool
+
+
+def make_storage(pool) -> SentinelaRedisStorage:
+    return SentinelaRedisStorage("sentinela+redis://localhost:6379/0", connection_pool=pool)
+
+
+class TestLocalTokenBucket:
+    """Baldes em processo (storage em memória e fallback)"""
+
+    def test_rajada_ate_capacidade_e_reposicao(self, monkeypatch):
+        now = [1000.0]
+        monkeypatch.setattr(rate_limit_storage.time, "time", lambda: now[0])
+        buckets = LocalTokenBuckets()
+
+        assert all(buckets.token_bucket("k", 3, 1.0)[0] for _ in range(3))
+        assert buckets.token_bucket("k", 3, 1.0)[0] is False
+
+        now[0] += 1.0
+        assert buckets.token_bucket("k", 3, 1.0)[0] is True
+        assert buckets.token_bucket("k", 3, 1.0)[0] is False
+
+    def test_estrategia_em_memoria(self):
+        from limits.storage import MemoryStorage
+
+        limiter = TokenBucketRateLimiter(MemoryStorage())
+        item = parse("2/minute")
+        assert limiter.hit(item, "cliente")
+        assert limiter.hit(item, "cliente")
+        assert not limiter.test(item, "cliente")
+        assert not limiter.hit(item, "cliente")
+        assert limiter.get_window_stats(item, "cliente").remaining == 0
+
+
+class TestRedisStorage:
+    """Contadores compartilhados via Lua"""
+
+    def test_token_bucket_compartilhado_entre_workers(self, fake_redis_pool):
+        worker_a = TokenBucketRateLimiter(make_storage(fake_redis_pool))
+        worker_b = TokenBucketRateLimiter(make_storage(fake_redis_pool))
+        item = parse("3/minute")
+
+        assert worker_a.hit(item, "cliente")
+        assert worker_b.hit(item, "cliente")
+        assert worker_a.hit(item, "cliente")
+        assert not worker_b.hit(item, "cliente")
+
+        stats = worker_a.get_window_stats(item, "cliente")
+        assert stats.remaining == 0
+
+        worker_a.clear(item, "cliente")
+        assert worker_b.hit(item, "cliente")
+
+    def test_janela_movel_compartilhada(self, fake_redis_pool):
+        worker_a = MovingWindowRateLimiter(make_storage(fake_redis_pool))
+        worker_b = MovingWindowRateLimiter(make_storage(fake_redis_pool))
+        item = parse("2/minute")
+
+        assert worker_a.hit(item, "cliente")
+        assert worker_b.hit(item, "cliente")
+        assert not worker_a.hit(item, "cliente")
+
+
+class TestRedisFallback:
+    """Redis inacessível: limites continuam valendo em memória"""
+
+    def test_fallback_para_memoria(self):
+        limiter = Limiter(
+            key_func=get_identifier,
+            storage_uri="sentinela+redis://127.0.0.1:1/0",
+            storage_options={"socket_connect_timeout": 0.1, "socket_timeout": 0.1},
+            strategy="token-bucket",
+            in_memory_fallback_enabled=True,
+        )
+        app = FastAPI()
+        app.state.limiter = limiter
+        app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
+
+        @app.get("/limitada")
+        @limiter.limit("2/minute")
+        async def limitada(request: Request):
+            return {"ok": True}
+
+        client = TestClient(app)
+        assert client.get("/limitada").status_code == 200
+        assert client.get("/limitada").status_code == 200
+        assert client.get("/limitada").status_code == 429
+
+
+class TestBatchedRateLimiter:
+    """Agregação local de hits de usuários autenticados"""
+
+    @pytest.fixture
+    def batched(self, fake_redis_pool):
+        from limits.strategies import FixedWindowRateLimiter
+
+        limiter = batched_strategy(FixedWindowRateLimiter)(
+            make_storage(fake_redis_pool), flush_interval=60, max_pending=3
+        )
+        calls = []
+        original_hit = limiter.inner.hit
+        original_incr = limiter.storage.incr_with_expiry
+
+        def counting_hit(item, *identifiers, cost=1):
+            calls.append(cost)
+            return original_hit(item, *identifiers, cost=cost)
+
+        def counting_incr(key, expiry, amount):
+            calls.append(amount)
+            return original_incr(key, expiry, amount)
+
+        # Hits diretos (anônimos) e envios em lote: cada um é uma ida ao storage
+        limiter.inner.hit = counting_hit
+        limiter.storage.incr_with_expiry = counting_incr
+        yield limiter, calls
+        limiter.close()
+
+    def test_hits_locais_ate_max_pending(self, batched):
+        limiter, calls = batched
+        item = parse("100/minute")
+
+        assert limiter.hit(item, "user:1", "rota")
+        assert calls == [1]
+        for _ in range(3):
+            assert limiter.hit(item, "user:1", "rota")
+        assert calls == [1]
+        assert limiter.get_window_stats(item, "user:1", "rota").remaining == 96
+
+        limiter.flush()
+        assert calls == [1, 3]
+        assert limiter.inner.get_window_stats(item, "user:1", "rota").remaining == 96
+
+    def test_limite_respeitado_com_batching(self, batched):
+        limiter, _ = batched
+        item = parse("5/minute")
+
+        results = [limiter.hit(item, "user:2", "rota") for _ in range(8)]
+        limiter.flush()
+
+        assert results.count(True) == 5
+        assert limiter.inner.get_window_stats(item, "user:2", "rota").remaining == 0
+
+    def test_pendentes_e_hit_em_uma_ida(self, batched, fake_redis_pool):
+        limiter, calls = batched
+        item = parse("100/minute")
+        for _ in range(4):
+            limiter.hit(item, "user:3", "rota")
+
+        comandos = []
+        conexao = limiter.storage.get_connection()
+        original = conexao.execute_command
+
+        def contar(*args, **kwargs):
+            comandos.append(args[0])
+            return original(*args, **kwargs)
+
+        conexao.execute_command = contar
+        try:
+            assert limiter.hit(item, "user:3", "rota")  # 3 pendentes + 1 não cabem em max_pending
+        finally:
+            del conexao.execute_command
+        assert calls == [1, 4]
+        assert len(comandos) == 1
+        assert limiter.get_window_stats(item, "user:3", "rota").remaining == 95
+
+    def test_janela_movel_mantem_pendentes_recusados(self, fake_redis_pool):
+        limiter = batched_strategy(MovingWindowRateLimiter)(
+            make_storage(fake_redis_pool), flush_interval=60, max_pending=3
+        )
+        item = parse("5/minute")
+        assert limiter.hit(item, "user:4", "rota")
+        for _ in range(3):
+            assert limiter.hit(item, "user:4", "rota")  # pendentes locais
+
+        limiter.inner.hit(item, "user:4", "rota", cost=1)  # outro worker
+        assert limiter.hit(item, "user:4", "rota") is False
+
+        # Os 3 pendentes entraram na janela apesar da recusa
+        assert limiter.inner.get_window_stats(item, "user:4", "rota").remaining == 0
+        assert limiter.get_window_stats(item, "user:4", "rota").remaining == 0
+        limiter.close()
+
+    def test_thread_de_envio_ociosa_sem_pendentes(self, fake_redis_pool):
+        from limits.strategies import FixedWindowRateLimiter
+
+        limiter = batched_strategy(FixedWindowRateLimiter)(
+            make_storage(fake_redis_pool), flush_interval=0.005, max_pending=3
+        )
+        flushes = []
+        original_flush = limiter.flush
+
+        def contar_flush():
+            flushes.append(1)
+            original_flush()
+
+        limiter.flush = contar_flush
+        item = parse("100/minute")
+        limiter.hit(item, "user:5", "rota")
+        limiter.hit(item, "user:5", "rota")  # pendente: acorda a thread
+
+        time.sleep(0.2)
+        assert len(flushes) == 1
+        assert limiter.inner.get_window_stats(item, "user:5", "rota").remaining == 98
+        limiter.close()
+
+    def test_anonimos_nao_agregados(self, batched):
+        limiter, calls = batched
+        item = parse("100/minute")
+
+        for _ in range(3):
+            assert limiter.hit(item, "203.0.113.1", "rota")
+        assert calls == [1, 1, 1]
+
+
+class TestRotasAutenticadas:
+    """Limite global por usuário (rate_limit_usuario) passando pelo batching na aplicação real"""
+
+    @pytest.fixture
+    def batched_limiter(self, fake_redis_pool, monkeypatch):
+        from app.main import app
+
+        limiter = Limiter(
+            key_func=get_identifier,
+            default_limits=["100/minute"],
+            storage_uri="sentinela+redis://localhost:6379/0",
+            storage_options={"connection_pool": fake_redis_pool},
+            strategy="fixed-window+batched",
+            headers_enabled=True,
+        )
+        monkeypatch.setattr(app.state, "limiter", limiter)
+        yield limiter
+        limiter.limiter.close()
+
+    @pytest.fixture
+    def headers(self, db_session) -> dict:
+        entidade = Entidade(nome="Entidade Rate Limit", cnpj="66666666000166", tipo=TipoEntidade.EMPRESA,
+                            status=StatusEntidade.ATIVA, is_active=True)
+        db_session.add(entidade)
+        db_session.commit()
+        user = User(username="operador_rate_limit", email="operador_rate_limit@test.com",
+                    hashed_password="$2b$12$test", role=UserRole.OPERADOR, entidade_id=entidade.id, is_active=True)
+        db_session.add(user)
+        db_session.commit()
+        return {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+
+    def test_hits_por_usuario_agregados(self, client, headers, batched_limiter):
+        strategy = batched_limiter.limiter
+        assert isinstance(strategy, BatchedRateLimiter) and strategy.enabled
+        strategy.flush_interval = 60
+        calls = []
+        original_incr = strategy.storage.incr_with_expiry
+
+        def counting_incr(key, expiry, amount):
+            calls.append(key)
+            return original_incr(key, expiry, amount)
+
+        strategy.storage.incr_with_expiry = counting_incr
+
+        for _ in range(4):
+            response = client.get("/cameras/", headers=headers)
+            assert response.status_code == 200
+        assert response.headers["X-RateLimit-Limit"] == "100"
+        assert response.headers["X-RateLimit-Remaining"] == "96"
+
+        # Só o primeiro hit foi ao storage; os demais estão pendentes no processo
+        assert len(calls) == 1 and "user:" in calls[0]
+        assert sum(entry.pending for entry in strategy._entries.values()) == 3
+
+        strategy.flush()
+        assert len(calls) == 2
+        assert strategy.storage.get(calls[0]) == 4
+
+    def test_lote_pncp_limitado_por_usuario(self, client, headers, monkeypatch):
+        from app.core.config import settings
+        from app.main import app
+
+        monkeypatch.setattr(settings, "RATE_LIMIT_GLOBAL", "2/minute")
+        limiter = Limiter(key_func=get_identifier, default_limits=[settings.RATE_LIMIT_GLOBAL],
+                          storage_uri="memory://", strategy="fixed-window")
+        monkeypatch.setattr(app.state, "limiter", limiter)
+
+        for _ in range(2):
+            response = client.post("/pncp/fornecedores/batch", headers=headers, json={"cnpjs": ["123"]})
+            assert response.status_code == 200
+        response = client.post("/pncp/fornecedores/batch", headers=headers, json={"cnpjs": ["123"]})
+        assert response.status_code == 429
+
+
+class TestRateLimitInfo:
+    """Headers e informações reais por rota"""
+
+    @pytest.fixture
+    def limited_client(self):
+        limiter = Limiter(key_func=get_identifier, storage_uri="memory://", strategy="fixed-window")
+        app = FastAPI()
+        app.state.limiter = limiter
+        app.add_exception_handler(RateLimitExceeded, rate_limit_exceeded_handler)
+
+        @app.get("/info")
+        @limiter.limit("5/minute")
+        async def info(request: Request):
+            return get_rate_limit_info(request)
+
+        @app.get("/restrita")
+        @limiter.limit("2/minute")
+        async def restrita(request: Request):
+            return {"ok": True}
+
+        return TestClient(app)
+
+    def test_info_com_valores_do_storage(self, limited_client: TestClient):
+        limited_client.get("/info")
+        data = limited_client.get("/info").json()
+        assert data["limit"] == 5
+        assert data["remaining"] == 3
+        assert 0 < data["reset_in"] <= 60
+        assert data["description"] == "5 requisições por minuto"
+
+    def test_429_com_limite_da_rota(self, limited_client: TestClient):
+        for _ in range(2):
+            assert limited_client.get("/restrita").status_code == 200
+
+        response = limited_client.get("/restrita")
+        assert response.status_code == 429
+        assert response.headers["X-RateLimit-Limit"] == "2"
+        assert response.headers["X-RateLimit-Remaining"] == "0"
+        assert 0 < int(response.headers["Retry-After"]) <= 60
+        assert response.json()["detail"]["limit"] == "2 requisições por minuto"
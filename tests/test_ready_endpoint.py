@@ -13,7 +13,7 @@ class TestReadyEndpoint:
     def client(self):
         return TestClient(app)
     
-    @patch('app.database.check_database_connection')
+    @patch('app.database.check_async_database_connection')
     def test_ready_endpoint_with_db_connected(self, mock_db, client):
         """Testa /ready quando DB está conectado"""
         mock_db.return_value = True
@@ -25,7 +25,7 @@ class TestReadyEndpoint:
         assert data["status"] == "ready"
         assert data["database"] == "connected"
     
-    @patch('app.database.check_database_connection')
+    @patch('app.database.check_async_database_connection')
     def test_ready_endpoint_with_db_disconnected(self, mock_db, client):
         """Testa /ready quando DB está desconectado"""
         mock_db.return_value = False
@@ -37,7 +37,7 @@ class TestReadyEndpoint:
         assert data["status"] == "not ready"
         assert data["database"] == "disconnected"
     
-    @patch('app.database.check_database_connection')
+    @patch('app.database.check_async_database_connection')
     def test_ready_endpoint_with_db_error(self, mock_db, client):
         """Testa /ready quando DB tem erro"""
         mock_db.side_effect = Exception("DB connection error")
@@ -0,0 +1,94 @@
+"""
+Testes do pool redis.asyncio compartilhado (app.redis_client)
+"""
+import asyncio
+
+import pytest
+
+from app import redis_client
+from app.redis_client import RedisPool
+
+
+def fake_pool(**kwargs) -> RedisPool:
+    fakeredis = pytest.importorskip("fakeredis")
+    return RedisPool(connection_class=fakeredis.aioredis.FakeConnection, server=fakeredis.FakeServer(), **kwargs)
+
+
+class TestRedisPool:
+    """Ciclo de vida, helpers de múltiplas chaves e métricas do pool"""
+
+    def test_stats_antes_de_iniciar(self):
+        pool = RedisPool(max_connections=7)
+        assert pool.stats() == {"started": False, "max_connections": 7}
+
+    @pytest.mark.asyncio
+    async def test_helpers_multiplas_chaves(self):
+        pool = fake_pool()
+        try:
+            await pool.set_many({"a": "1", "b": "2"}, ttl=60)
+            assert await pool.get_many(["a", "b", "c"]) == {"a": "1", "b": "2", "c": None}
+            assert 0 < await pool.client.ttl("a") <= 60
+
+            await pool.client.hset("h:1", mapping={"x": "1"})
+            assert await pool.hgetall_many(["h:1", "h:2"]) == {"h:1": {"x": "1"}, "h:2": {}}
+
+            assert await pool.delete_many(["a", "b", "c"]) == 2
+            assert await pool.get_many([]) == {}
+        finally:
+            await pool.aclose()
+
+    @pytest.mark.asyncio
+    async def test_limite_e_metricas(self):
+        pool = fake_pool(max_connections=2)
+        try:
+            await asyncio.gather(*(pool.client.ping() for _ in range(10)))
+            stats = pool.stats()
+            assert stats["started"] is True
+            assert stats["in_use"] == 0
+            assert 1 <= stats["idle"] <= 2
+            assert stats["checkouts"] == 10
+            assert stats["timeouts"] == 0
+        finally:
+            await pool.aclose()
+        assert pool.stats()["started"] is False
+
+    @pytest.mark.asyncio
+    async def test_start_idempotente_e_reabre(self):
+        pool = fake_pool()
+        client = pool.start()
+        assert pool.start() is client
+        await pool.aclose()
+        await pool.aclose()
+        assert pool.client is not client
+        assert await pool.client.ping() is True
+        await pool.aclose()
+
+
+class TestHealth:
+    """check_redis_connection e GET /health/redis"""
+
+    @pytest.mark.asyncio
+    async def test_check_redis_connection(self, monkeypatch):
+        pool = fake_pool()
+        monkeypatch.setattr(redis_client, "redis_pool", pool)
+        try:
+            assert await redis_client.check_redis_connection() is True
+        finally:
+            await pool.aclose()
+
+    @pytest.mark.asyncio
+    async def test_check_redis_connection_indisponivel(self, monkeypatch):
+        pool = RedisPool(url="redis://127.0.0.1:1/0", socket_timeout=0.2)
+        monkeypatch.setattr(redis_client, "redis_pool", pool)
+        try:
+            assert await redis_client.check_redis_connection() is False
+            assert (await redis_client.get_redis_info())["connected"] is False
+        finally:
+            await pool.aclose()
+
+    def test_rota_redis(self, client, diagnostics_headers):
+        response = client.get("/health/redis", headers=diagnostics_headers)
+        assert response.status_code == 200
+        data = response.json()
+        assert data["pool"]["max_connections"] == redis_client.REDIS_MAX_CONNECTIONS
+        assert "worker_pid" in data
@@ -0,0 +1,173 @@
+"""
+Testes do motor de riscos (app.core.riscos e app.routers.riscos)
+"""
+from datetime import date, timedelta
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from sqlalchemy import select
+from sqlalchemy.orm import sessionmaker
+
+from app.core import database
+from app.core.dashboard import recalcular_resumos
+from app.core.models import (
+    AlvoRisco,
+    Certidao,
+    Contrato,
+    FornecedorPNCP,
+    ResumoEntidade,
+    Risco,
+    SeveridadeRisco,
+    StatusCertidao,
+    StatusContrato,
+    TipoCertidao,
+)
+from app.core.riscos import PESOS, avaliar, avaliar_entidades, carregar_carteira, classificar, pontuar
+from app.tasks.riscos_tasks import avaliar_lote_riscos
+
+HOJE = date.today()
+FORNECEDOR_A = "11111111000111"
+FORNECEDOR_B = "22222222000122"
+
+
+@pytest.fixture
+def carteira(db_session, entidade):
+    """A concentra 90% do valor e tem 1 de 2 certidões vencida; B está BAIXADA no PNCP"""
+    db_session.add_all([
+        Contrato(entidade_id=entidade.id, numero="1/2025", objeto="Obra", cnpj_fornecedor=FORNECEDOR_A,
+                 valor=800.0, vigencia=HOJE - timedelta(days=5)),
+        Contrato(entidade_id=entidade.id, numero="2/2025", objeto="Obra", cnpj_fornecedor=FORNECEDOR_A,
+                 valor=100.0, vigencia=HOJE + timedelta(days=365)),
+        Contrato(entidade_id=entidade.id, numero="3/2025", objeto="Limpeza", cnpj_fornecedor=FORNECEDOR_B,
+                 valor=100.0, vigencia=HOJE + timedelta(days=200)),
+        Contrato(entidade_id=entidade.id, numero="4/2020", objeto="Antigo", cnpj_fornecedor=FORNECEDOR_B,
+                 valor=5000.0, vigencia=HOJE - timedelta(days=900), status=StatusContrato.ENCERRADO),
+        Certidao(entidade_id=entidade.id, cnpj_fornecedor=FORNECEDOR_A, tipo=TipoCertidao.FGTS, numero="F1",
+                 data_validade=HOJE - timedelta(days=1)),
+        Certidao(entidade_id=entidade.id, cnpj_fornecedor=FORNECEDOR_A, tipo=TipoCertidao.CNDT, numero="T1",
+                 data_validade=HOJE + timedelta(days=90), status=StatusCertidao.VALIDA),
+        FornecedorPNCP(cnpj=FORNECEDOR_B, razao_social="Fornecedor B", situacao_cadastral="BAIXADA"),
+    ])
+    db_session.commit()
+
+
+class TestAvaliacaoVetorizada:
+    """Snapshot colunar, fatores e ranking"""
+
+    def test_pontuar_igual_a_formula_escalar(self):
+        fatores = np.random.default_rng(7).random((500, len(PESOS)))
+
+        esperado = [100 * (1 - np.prod([1 - p * f for p, f in zip(PESOS, linha)])) for linha in fatores]
+
+        np.testing.assert_allclose(pontuar(fatores), esperado)
+        assert list(classificar(np.array([95.0, 70.0, 69.9, 25.0, 3.0]))) == [
+            SeveridadeRisco.CRITICA, SeveridadeRisco.CRITICA, SeveridadeRisco.ALTA,
+            SeveridadeRisco.MEDIA, SeveridadeRisco.BAIXA,
+        ]
+
+    def test_carregar_carteira(self, db_session, entidade, carteira):
+        snapshot = carregar_carteira(db_session, entidade.id, HOJE)
+
+        assert list(snapshot.fornecedores) == [FORNECEDOR_A, FORNECEDOR_B]
+        assert sorted(snapshot.contrato_numero) == ["1/2025", "2/2025", "3/2025"]  # só contratos ativos
+        assert list(snapshot.certidoes_total) == [2, 0]
+        assert list(snapshot.certidoes_irregulares) == [1, 0]
+        assert list(snapshot.situacao_pncp) == [None, "BAIXADA"]
+
+    def test_ranking(self, db_session, entidade, carteira):
+        linhas = avaliar(carregar_carteira(db_session, entidade.id, HOJE), HOJE, score_minimo=0)
+        por_referencia = {linha["referencia"]: linha for linha in linhas}
+
+        assert [linha["posicao"] for linha in linhas] == list(range(1, 6))
+        assert [linha["score"] for linha in linhas] == sorted((linha["score"] for linha in linhas), reverse=True)
+
+        vencido = por_referencia["1/2025"]
+        assert vencido["fator_renovacao"] == 1.0
+        assert vencido["fator_certidoes"] == 0.75
+        assert vencido["severidade"] == SeveridadeRisco.CRITICA
+        assert "encerrada há 5 dias" in vencido["descricao"]
+
+        fornecedor_a = por_referencia[FORNECEDOR_A]
+        assert fornecedor_a["alvo"] == AlvoRisco.FORNECEDOR
+        assert fornecedor_a["valor"] == 900.0
+        assert fornecedor_a["fator_concentracao"] == pytest.approx((0.9 - 0.3) / 0.7, abs=1e-4)
+
+        assert por_referencia[FORNECEDOR_B]["fator_pncp"] == 1.0
+        assert por_referencia["3/2025"]["fator_pncp"] == 1.0  # herdado do fornecedor
+        assert por_referencia["2/2025"]["fator_renovacao"] == 0.0
+
+    def test_carteira_vazia(self, db_session, entidade):
+        assert avaliar(carregar_carteira(db_session, entidade.id, HOJE), HOJE) == []
+
+
+class TestGravacao:
+    """Riscos ranqueados persistidos e resumo do dashboard"""
+
+    def test_regrava_e_atualiza_dashboard(self, db_session, entidade, carteira):
+        resumo = avaliar_entidades(db_session, [entidade.id], HOJE)
+
+        riscos = db_session.scalars(select(Risco).order_by(Risco.posicao)).all()
+        assert resumo["riscos"] == len(riscos) > 0
+        assert all(r.score >= 25 for r in riscos)
+        criticos = sum(r.severidade == SeveridadeRisco.CRITICA for r in riscos)
+        assert resumo["criticos"] == criticos
+
+        db_session.expire_all()
+        assert db_session.get(ResumoEntidade, entidade.id).riscos_criticos == criticos
+
+        # Reavaliar substitui (não duplica) e o resumo continua consistente com o recálculo
+        avaliar_entidades(db_session, [entidade.id], HOJE)
+        assert len(db_session.scalars(select(Risco)).all()) == len(riscos)
+        recalcular_resumos(db_session)
+        db_session.expire_all()
+        assert db_session.get(ResumoEntidade, entidade.id).riscos_criticos == criticos
+
+
+class TestRotas:
+    """GET /riscos e POST /riscos/avaliar"""
+
+    @pytest.fixture
+    def headers(self, entidade, gestor_headers) -> dict:
+        return gestor_headers(entidade)
+
+    @pytest.fixture
+    def enfileiradas(self, db_engine, monkeypatch) -> list:
+        """Tasks de avaliação publicadas; o worker usa o banco do teste"""
+        enfileiradas = []
+
+        def apply_async(args, **options):
+            enfileiradas.append(*args)
+            return SimpleNamespace(id=f"task-{len(enfileiradas)}")
+
+        monkeypatch.setattr(avaliar_lote_riscos, "apply_async", apply_async)
+        monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=db_engine))
+        return enfileiradas
+
+    def test_avaliar_e_paginar(self, client, carteira, entidade, headers, enfileiradas):
+        assert client.get("/riscos", headers=headers).json()["riscos"] == []  # também obtém o cookie CSRF
+
+        response = client.post("/riscos/avaliar", headers=headers)
+        assert response.status_code == 202, response.json()
+        assert response.json() == {"task_id": "task-1", "status": "queued"}
+        assert enfileiradas == [[entidade.id]]
+
+        # O worker avalia a entidade enfileirada
+        total = avaliar_lote_riscos.run(enfileiradas[0])["riscos"]
+
+        posicoes, cursor = [], None
+        while True:
+            params = {"limit": 2, **({"cursor": cursor} if cursor else {})}
+            pagina = client.get("/riscos", headers=headers, params=params).json()
+            posicoes += [r["posicao"] for r in pagina["riscos"]]
+            cursor = pagina["next_cursor"]
+            if not cursor:
+                break
+        assert posicoes == list(range(1, total + 1))
+
+        criticos = client.get("/riscos", headers=headers, params={"severidade": "CRITICA"}).json()["riscos"]
+        assert criticos and all(r["severidade"] == "CRITICA" for r in criticos)
+        contratos = client.get("/riscos", headers=headers, params={"alvo": "CONTRATO"}).json()["riscos"]
+        assert all(r["contrato_id"] for r in contratos)
+
+        assert client.get("/riscos", headers=headers, params={"cursor": "x"}).status_code == 400
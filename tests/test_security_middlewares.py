@@ -0,0 +1,97 @@
+"""
+Testes dos middlewares ASGI de segurança (headers Helmet e CSRF)
+"""
+import pytest
+from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse, StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.core.csrf_protection import CSRFProtectionMiddleware, csrf_generator
+from app.core.security_headers import SecurityHeadersMiddleware
+
+
+@pytest.fixture
+def stack_client():
+    """Aplicação mínima com a mesma ordem de middlewares de app.main"""
+    app = FastAPI()
+
+    @app.get("/ping")
+    async def ping():
+        return PlainTextResponse("pong", headers={"X-Frame-Options": "SAMEORIGIN"})
+
+    @app.get("/auth/me")
+    async def auth_me():
+        return {"ok": True}
+
+    @app.post("/dados")
+    async def criar():
+        return {"criado": True}
+
+    @app.get("/stream")
+    async def stream():
+        async def chunks():
+            for i in range(3):
+                yield f"chunk-{i}\n"
+        return StreamingResponse(chunks(), media_type="text/plain")
+
+    app.add_middleware(SecurityHeadersMiddleware, domain="sentinela.test")
+    app.add_middleware(CSRFProtectionMiddleware, cookie_secure=False)
+    return TestClient(app)
+
+
+class TestSecurityHeadersMiddleware:
+    """Headers pré-computados anexados em http.response.start"""
+
+    def test_headers_presentes(self, stack_client: TestClient):
+        response = stack_client.get("/ping")
+        assert response.status_code == 200
+        assert "https://sentinela.test" in response.headers["Content-Security-Policy"]
+        assert response.headers["X-Content-Type-Options"] == "nosniff"
+        assert "Cache-Control" not in response.headers
+
+    def test_substitui_header_da_rota(self, stack_client: TestClient):
+        response = stack_client.get("/ping")
+        assert response.headers.get_list("X-Frame-Options") == ["DENY"]
+
+    def test_rotas_sensiveis_sem_cache(self, stack_client: TestClient):
+        response = stack_client.get("/auth/me")
+        assert response.headers["Cache-Control"].startswith("no-store")
+        assert response.headers["Pragma"] == "no-cache"
+
+    def test_streaming_preservado(self, stack_client: TestClient):
+        response = stack_client.get("/stream")
+        assert response.text == "chunk-0\nchunk-1\nchunk-2\n"
+        assert response.headers["X-Frame-Options"] == "DENY"
+
+
+class TestCSRFProtectionMiddleware:
+    """Validação CSRF diretamente sobre ASGI"""
+
+    def test_get_define_cookie(self, stack_client: TestClient):
+        response = stack_client.get("/ping")
+        set_cookie = response.headers["set-cookie"]
+        assert set_cookie.startswith("csrf_token=")
+        assert "SameSite=strict" in set_cookie
+        assert "HttpOnly" in set_cookie
+
+    def test_get_com_cookie_nao_renova(self, stack_client: TestClient):
+        stack_client.cookies.set("csrf_token", csrf_generator.generate_token())
+        response = stack_client.get("/ping")
+        assert "set-cookie" not in response.headers
+
+    def test_post_sem_token_retorna_403(self, stack_client: TestClient):
+        response = stack_client.post("/dados")
+        assert response.status_code == 403
+        assert "CSRF token missing" in response.json()["detail"]
+
+    def test_post_token_invalido_retorna_403(self, stack_client: TestClient):
+        response = stack_client.post("/dados", headers={"X-CSRF-Token": "invalido"})
+        assert response.status_code == 403
+        assert response.json()["detail"] == "Invalid or expired CSRF token"
+
+    def test_post_token_valido_renova_cookie(self, stack_client: TestClient):
+        token = csrf_generator.generate_token()
+        response = stack_client.post("/dados", headers={"X-CSRF-Token": token})
+        assert response.status_code == 200
+        assert response.json() == {"criado": True}
+        assert response.cookies["csrf_token"] != token
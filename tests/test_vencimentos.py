@@ -0,0 +1,142 @@
+"""
+Testes do índice de vencimentos (app.core.vencimentos)
+"""
+from datetime import date, timedelta
+
+import pytest
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker
+from sqlalchemy.orm import Session
+
+from app.core.models import Contrato, Entidade, StatusContrato, StatusEntidade, TipoEntidade, TipoVencimento, Vencimento
+from app.core.vencimentos import contar_janelas, listar_vencendo, refresh_vencimentos
+
+HOJE = date.today()
+
+
+@pytest.fixture
+def entidade(db_session: Session) -> Entidade:
+    entidade = Entidade(nome="Entidade Vencimentos", cnpj="77777777000177", tipo=TipoEntidade.EMPRESA,
+                        status=StatusEntidade.ATIVA, is_active=True)
+    db_session.add(entidade)
+    db_session.commit()
+    return entidade
+
+
+def novo_contrato(db: Session, entidade: Entidade, numero: str, dias: int, **extra) -> Contrato:
+    contrato = Contrato(entidade_id=entidade.id, numero=numero, objeto="Serviços de limpeza",
+                        cnpj_fornecedor="11111111000111", valor=100.0,
+                        vigencia=HOJE + timedelta(days=dias), **extra)
+    db.add(contrato)
+    db.commit()
+    return contrato
+
+
+def indexados(db: Session) -> dict:
+    return {v.referencia_id: v.data_vencimento for v in db.scalars(select(Vencimento))}
+
+
+class TestManutencaoPorEscrita:
+    """Eventos ORM mantêm o índice na mesma transação"""
+
+    def test_insert_update_delete(self, db_session, entidade):
+        contrato = novo_contrato(db_session, entidade, "1/2025", 10)
+        assert indexados(db_session) == {contrato.id: HOJE + timedelta(days=10)}
+
+        contrato.vigencia = HOJE + timedelta(days=40)
+        db_session.commit()
+        assert indexados(db_session) == {contrato.id: HOJE + timedelta(days=40)}
+
+        contrato.status = StatusContrato.ENCERRADO
+        db_session.commit()
+        assert indexados(db_session) == {}
+
+        contrato.status = StatusContrato.VIGENTE
+        db_session.commit()
+        db_session.delete(contrato)
+        db_session.commit()
+        assert indexados(db_session) == {}
+
+    def test_alteracao_irrelevante_nao_regrava(self, db_session, entidade):
+        contrato = novo_contrato(db_session, entidade, "1/2025", 10)
+        db_session.execute(update(Vencimento).values(descricao="marcador"))
+        db_session.commit()
+
+        contrato.valor = 999.0
+        db_session.commit()
+
+        assert db_session.scalar(select(Vencimento.descricao)) == "marcador"
+
+    def test_vencido_alem_da_retencao_fica_fora(self, db_session, entidade):
+        novo_contrato(db_session, entidade, "1/2020", -400)
+        assert indexados(db_session) == {}
+
+
+class TestRefresh:
+    """Reconstrução noturna"""
+
+    def test_reconstroi_a_partir_das_fontes(self, db_session, entidade):
+        ativo = novo_contrato(db_session, entidade, "1/2025", 5)
+        novo_contrato(db_session, entidade, "2/2025", 5, status=StatusContrato.RESCINDIDO)
+        antigo = novo_contrato(db_session, entidade, "3/2025", 5)
+
+        # Escritas fora do ORM não disparam eventos
+        db_session.execute(delete(Vencimento))
+        db_session.execute(update(Contrato).where(Contrato.id == antigo.id).values(vigencia=HOJE - timedelta(days=400)))
+        db_session.commit()
+
+        assert refresh_vencimentos(db_session)["CONTRATO"] == 1
+        assert indexados(db_session) == {ativo.id: HOJE + timedelta(days=5)}
+        vencimento = db_session.scalar(select(Vencimento))
+        assert vencimento.tipo == TipoVencimento.CONTRATO
+        assert vencimento.descricao == "Contrato 1/2025 - Serviços de limpeza"
+
+    def test_refresh_idempotente(self, db_session, entidade):
+        for i in range(3):
+            novo_contrato(db_session, entidade, f"{i}/2025", i * 20)
+        refresh_vencimentos(db_session)
+        refresh_vencimentos(db_session)
+        assert db_session.scalar(select(func.count()).select_from(Vencimento)) == 3
+
+
+class TestConsultas:
+    """Janelas 7/30/90 e listagem por faixa"""
+
+    @pytest.fixture
+    def carteira(self, db_session, entidade):
+        for numero, dias in [("a", -3), ("b", 2), ("c", 7), ("d", 20), ("e", 60), ("f", 200)]:
+            novo_contrato(db_session, entidade, numero, dias)
+
+    @pytest.mark.asyncio
+    async def test_janelas(self, carteira, entidade, async_db_engine):
+        Session = async_sessionmaker(bind=async_db_engine)
+        async with Session() as db:
+            janelas = await contar_janelas(db, entidade.id)
+        assert janelas == {"vencidos": 1, "7": 2, "30": 3, "90": 4}
+
+    @pytest.mark.asyncio
+    async def test_listar_vencendo(self, carteira, entidade, async_db_engine):
+        Session = async_sessionmaker(bind=async_db_engine)
+        async with Session() as db:
+            itens = await listar_vencendo(db, entidade.id, 30)
+            com_vencidos = await listar_vencendo(db, entidade.id, 7, incluir_vencidos=True)
+
+        assert [i["dias_restantes"] for i in itens] == [2, 7, 20]
+        assert [i["dias_restantes"] for i in com_vencidos] == [-3, 2, 7]
+
+    def test_rota_contratos_vencendo(self, client, carteira, db_session, entidade):
+        from app.core.auth import create_access_token
+        from app.core.models import User, UserRole
+
+        user = User(username="operador_venc", email="operador_venc@test.com", hashed_password="$2b$12$test",
+                    role=UserRole.OPERADOR, entidade_id=entidade.id, is_active=True)
+        db_session.add(user)
+        db_session.commit()
+        headers = {"Authorization": f"Bearer {create_access_token({'sub': str(user.id)})}"}
+
+        response = client.get("/contratos/vencendo", headers=headers, params={"dias": 7})
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["janelas"]["7"] == 2
+        assert [c["dias_restantes"] for c in data["contratos"]] == [2, 7]